@@ -57,7 +57,11 @@ frontend_stack = FrontendStack(
 )
 
 # Create the uploads stack
-uploads_stack = UploadsStack(app, "UploadsStack", env=env)
+uploads_stack = UploadsStack(
+  app, "UploadsStack",
+  env=env,
+  allowed_origins=[f"https://{FRONTEND_SUBDOMAIN}.{DOMAIN_NAME}", f"https://{DOMAIN_NAME}"],
+)
 
 # Create the backend stack, passing in the domain resources AND uploads CloudFront domain
 backend_stack = BackendStack(
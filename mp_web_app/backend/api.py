@@ -3,19 +3,28 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app_config import FRONTEND_BASE_URL
-from auth.routers import auth_router
-from files.routers import file_router
-from gallery.routers import gallery_router
-from inquiries.routers import inquiry_router
-from mail.routers import mail_router
-from members.routers import member_router
-from news.routers import news_router
-from products.routers import product_router
-from users.routers import user_router
+from app_config import FRONTEND_BASE_URL, StartupSettings
+from utils.concurrency import ThreadLimiterMiddleware
+from utils.cursors import NEXT_CURSOR_HEADER
+from utils.lazy_routers import LazyRouter, LazyRouterMiddleware
 
 FRONTEND_URL = os.environ.get("FRONTEND_BASE_URL", FRONTEND_BASE_URL)
 
+# Routers are imported on first use (see utils/lazy_routers.py): a cold start serving
+# /api/gallery/list never loads argon2, jose, xhtml2pdf or the other packages' code
+ROUTERS = [
+  LazyRouter("/api/users", "users.routers", "user_router"),
+  LazyRouter("/api/auth", "auth.routers", "auth_router"),
+  LazyRouter("/api/mail", "mail.routers", "mail_router"),
+  LazyRouter("/api/files", "files.routers", "file_router"),
+  LazyRouter("/api/news", "news.routers", "news_router"),
+  LazyRouter("/api/gallery", "gallery.routers", "gallery_router"),
+  LazyRouter("/api/members", "members.routers", "member_router"),
+  LazyRouter("/api/products", "products.routers", "product_router"),
+  LazyRouter("/api/inquiries", "inquiries.routers", "inquiry_router"),
+]
+DOCS_PATHS = {"/api/docs", "/api/redoc", "/api/openapi.json"}
+
 
 # Allow both www and non-www variants of the frontend URL
 def get_allowed_origins(url: str) -> list[str]:
@@ -35,18 +44,18 @@ app.add_middleware(
   allow_credentials=True,
   allow_methods=["*"],
   allow_headers=["*"],
-  expose_headers=["Content-Disposition"],
+  expose_headers=["Content-Disposition", NEXT_CURSOR_HEADER],
 )
 
-app.include_router(user_router, prefix="/api/users")
-app.include_router(auth_router, prefix="/api/auth")
-app.include_router(mail_router, prefix="/api/mail")
-app.include_router(file_router, prefix="/api/files")
-app.include_router(news_router, prefix="/api/news")
-app.include_router(gallery_router, prefix="/api/gallery")
-app.include_router(member_router, prefix="/api/members")
-app.include_router(product_router, prefix="/api/products")
-app.include_router(inquiry_router, prefix="/api/inquiries")
+# Bound the worker pool that runs the sync (blocking) route handlers. This is a middleware
+# rather than a lifespan hook because Mangum runs with lifespan="off"
+app.add_middleware(ThreadLimiterMiddleware)
+
+if StartupSettings().lazy_routers:
+  app.add_middleware(LazyRouterMiddleware, fastapi_app=app, routers=ROUTERS, mount_all_paths=DOCS_PATHS)
+else:
+  for router in ROUTERS:
+    app.include_router(router.load(), prefix=router.prefix)
 
 from mangum import Mangum
 
@@ -1,18 +1,13 @@
-import json
 import os
 
-import boto3
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from utils.secrets import get_secret_provider
 
-def get_jwt_secret():
-  secret_arn = os.environ["JWT_SECRET_ARN"]
-  client = boto3.client("secretsmanager")
-  response = client.get_secret_value(SecretId=secret_arn)
-  secret = response.get("SecretString")
-  if secret:
-    return json.loads(secret)["JWT_SECRET"]
-  raise ValueError("JWT_SECRET not found in secret")
+
+def get_jwt_secret() -> str:
+  """JWT signing key, fetched from Secrets Manager on first use and cached (see utils/secrets.py)."""
+  return get_secret_provider().get("JWT_SECRET")
 
 
 REGION = "eu-central-1"
@@ -20,7 +15,6 @@ FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL")
 COOKIE_DOMAIN = os.getenv("COOKIE_DOMAIN")
 MAIL_SENDER = os.getenv("MAIL_SENDER")
 ALGORITH = os.getenv("JWT_ALGORITHM")
-SECRET_KEY = get_jwt_secret()
 
 
 class DynamoDBSettings(BaseSettings):
@@ -28,12 +22,117 @@ class DynamoDBSettings(BaseSettings):
   aws_secret_access_key: str
   region_name: str = REGION
   endpoint_url: str | None = None
+  # Default TotalSegments for BaseRepository.iter_scan; 1 keeps scans sequential
+  scan_segments: int = 1
+
+
+class UserDirectorySettings(BaseSettings):
+  model_config = SettingsConfigDict(env_prefix="USER_DIRECTORY_")
+
+  ttl_seconds: float = 300.0
+  max_entries: int = 5000
+
+
+class PrincipalCacheSettings(BaseSettings):
+  # Users resolved by get_current_user, keyed by user id and token iat. With
+  # trust_token_claims the signed role/active claims are authoritative for the access
+  # token's lifetime: entries live until the token expires and role/active changes
+  # apply from the next token.
+  model_config = SettingsConfigDict(env_prefix="PRINCIPAL_CACHE_")
+
+  ttl_seconds: float = 60.0
+  max_entries: int = 2000
+  trust_token_claims: bool = False
+
+
+class DirectUploadSettings(BaseSettings):
+  # Presigned POST policies for browser-to-S3 document uploads
+  model_config = SettingsConfigDict(env_prefix="DIRECT_UPLOAD_")
+
+  expires_seconds: int = 900
+  max_file_size_bytes: int = 100 * 1024 * 1024
+
+
+class DownloadSettings(BaseSettings):
+  # Default delivery for document and attachment downloads: "redirect" (302 to a presigned
+  # GET URL), "url" (JSON with the URL) or "proxy" (stream through the API)
+  model_config = SettingsConfigDict(env_prefix="DOWNLOAD_")
+
+  mode: str = "redirect"
+  url_expires_seconds: int = 300
+
+
+class ConcurrencySettings(BaseSettings):
+  # Threads available to sync route handlers, sync dependencies and run_blocking().
+  # Keep at or below AWS_CLIENT_MAX_POOL_CONNECTIONS so threads don't queue for sockets.
+  model_config = SettingsConfigDict(env_prefix="BLOCKING_")
+
+  max_threads: int = 40
+
+
+class StartupSettings(BaseSettings):
+  # Mount each router on the first request to its prefix instead of importing all of them
+  # when the Lambda starts. Set STARTUP_LAZY_ROUTERS=false to mount everything eagerly.
+  model_config = SettingsConfigDict(env_prefix="STARTUP_")
+
+  lazy_routers: bool = True
+
+
+class PdfRenderSettings(BaseSettings):
+  # Inquiry PDFs render in a pool of worker processes (CPU-bound, holds the GIL). Falls back
+  # to rendering inline where processes can't be used, e.g. Lambda, which has no /dev/shm.
+  model_config = SettingsConfigDict(env_prefix="PDF_RENDER_")
+
+  process_pool: bool = True
+  workers: int | None = None  # None = one per CPU
+  timeout_seconds: float = 60.0
+  start_method: str = "spawn"
+  batch_size: int = 16
+
+
+class BulkMailSettings(BaseSettings):
+  # Broadcast emails are sent from a pool of threads, paced by a token bucket at the SES
+  # account's MaxSendRate (read with GetSendQuota) unless BULK_MAIL_MAX_SEND_RATE is set.
+  model_config = SettingsConfigDict(env_prefix="BULK_MAIL_")
+
+  workers: int = 8
+  max_send_rate: float | None = None  # messages per second
+  max_attempts: int = 3  # per recipient, counting sends rejected for throttling
+
+
+class EmailOutboxSettings(BaseSettings):
+  # Notification emails are queued in email_outbox_table and sent by the outbox worker.
+  # A job is leased for lease_seconds from when it starts; if the worker dies it becomes
+  # claimable again. Broadcasts pace themselves with a per-process SES token bucket at the
+  # account's full send rate (mail/bulk.py), which is only correct while a single worker
+  # instance runs: the stack reserves a concurrency of 1 for it.
+  model_config = SettingsConfigDict(env_prefix="OUTBOX_")
+
+  workers: int = 4  # jobs delivered concurrently, and the most claimed at once
+  lease_seconds: int = 900  # at least the worker's timeout, so a running broadcast isn't claimed twice
+  max_attempts: int = 5
+  retry_base_seconds: int = 30  # backoff doubles per failed attempt
+  retry_max_seconds: int = 3600
+  retention_days: int = 14  # sent and failed jobs expire (TTL) after this long
+
+
+class DigestSettings(BaseSettings):
+  # Users with notification_mode = daily get new and shared documents in one email once the
+  # oldest unsent one is window_hours old (checked hourly by the outbox worker).
+  model_config = SettingsConfigDict(env_prefix="DIGEST_")
+
+  window_hours: int = 24
+  retention_days: int = 30  # unsent entries expire (TTL) after this long
 
 
 class JWTSettings(BaseSettings):
-  secret_key: str = SECRET_KEY
   algorithm: str = ALGORITH
 
+  @property
+  def secret_key(self) -> str:
+    # Not a field: resolved on use so importing the app never waits on Secrets Manager
+    return get_jwt_secret()
+
 
 class SesSettings(BaseSettings):
   sender: str = MAIL_SENDER
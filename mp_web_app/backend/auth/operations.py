@@ -5,9 +5,10 @@ from functools import lru_cache
 from typing import Literal, Optional
 from uuid import uuid4
 
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from pydantic import EmailStr, ValidationError
 
 from app_config import JWTSettings
@@ -17,11 +18,15 @@ from database.repositories import AuthRepository, UserRepository
 from users.exceptions import UserNotFoundError
 from users.models import User, UserSecret
 from users.operations import get_user_by_email, get_user_by_id, get_user_repository, verify_password
+from users.principals import get_principal_cache, get_principal_cache_settings
 from users.roles import ROLE_HIERARCHY, UserRole
 
 REFRESH_TABLE_NAME = os.environ.get("REFRESH_TABLE_NAME")
 ACCESS_TOKEN_EXPIRE_MINUTES = 5
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+# A refresh token rotated this recently still yields its replacement (concurrent tabs)
+REFRESH_ROTATION_GRACE_SECONDS = 30
+REFRESH_ROTATION_ATTEMPTS = 3
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -40,19 +45,28 @@ def get_auth_repository():
 def generate_access_token(data: dict, expires_delta: Optional[timedelta] = None):
   settings = get_jwt_settings()
   to_encode = data.copy()
-  expire = datetime.now(UTC) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-  to_encode.update({"exp": expire, "type": "access"})
+  now = datetime.now(UTC)
+  expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+  # iat keys the principal cache, so a new token never reuses a principal resolved for an old one
+  to_encode.update({"exp": expire, "iat": now, "type": "access"})
+  from jose import jwt
+
   encoded_jwt = jwt.encode(to_encode, settings.secret_key, settings.algorithm)
   return encoded_jwt
 
 
-def generate_refresh_token(data: dict, repo: AuthRepository, expires_delta: Optional[timedelta] = None):
+def _encode_refresh_token(data: dict, jti: str, expires_at: int) -> str:
   settings = get_jwt_settings()
   to_encode = data.copy()
-  expire = datetime.now(UTC) + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-  jti = str(uuid4())
+  to_encode.update({"exp": expires_at, "type": "refresh", "jti": jti})
+  from jose import jwt
+
+  return jwt.encode(to_encode, settings.secret_key, settings.algorithm)
 
-  expires_at = int(time.time()) + REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+def generate_refresh_token(data: dict, repo: AuthRepository, expires_delta: Optional[timedelta] = None):
+  jti = str(uuid4())
+  expires_at = int(time.time() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).total_seconds())
   refresh = {
     "id": jti,
     "user_id": data["sub"],
@@ -61,9 +75,7 @@ def generate_refresh_token(data: dict, repo: AuthRepository, expires_delta: Opti
   }
   repo.table.put_item(Item=refresh)
 
-  to_encode.update({"exp": expire, "type": "refresh", "jti": jti})
-  encoded_jwt = jwt.encode(to_encode, settings.secret_key, settings.algorithm)
-  return encoded_jwt
+  return _encode_refresh_token(data, jti, expires_at)
 
 
 def generate_activation_token(user_id: str, email: EmailStr | str) -> str:
@@ -79,6 +91,9 @@ def generate_reset_token(user_id: str, email: str) -> str:
 
 
 def decode_token(token: str):
+  # jose pulls in cryptography; imported on first use so public endpoints don't pay for it
+  from jose import JWTError, jwt
+
   settings = get_jwt_settings()
   try:
     payload = jwt.decode(token, settings.secret_key, settings.algorithm)
@@ -97,8 +112,8 @@ def is_token_expired(token: str):
   return datetime.now(UTC).timestamp() > exp
 
 
-def verify_refresh_token(token: str, repo: AuthRepository) -> TokenPayload:
-  # Decode and validate payload structure
+def decode_refresh_token(token: str) -> TokenPayload:
+  """Check a refresh token's signature and claims. Its DB state is checked by rotate_refresh_token."""
   payload = decode_token(token)
   if not payload:
     raise InvalidTokenError("Invalid refresh token")
@@ -114,22 +129,97 @@ def verify_refresh_token(token: str, repo: AuthRepository) -> TokenPayload:
   if not token_payload.jti or not token_payload.sub:
     raise InvalidTokenError("Invalid refresh token")
 
-  # Verify token state in the DB by JTI
-  db_item = repo.table.get_item(Key={"id": token_payload.jti}).get("Item")
-  if not db_item:
+  return token_payload
+
+
+def rotate_refresh_token(payload: TokenPayload, data: dict, repo: AuthRepository) -> str:
+  """
+  Swap a refresh token for a new one in a single TransactWriteItems call.
+
+  The old JTI is invalidated only if it is valid, unexpired and owned by payload.sub, and
+  the new JTI is written in the same transaction. The old item records which JTI replaced
+  it, so a concurrent refresh with the same token (another tab) within
+  REFRESH_ROTATION_GRACE_SECONDS gets that token back instead of a 401.
+  """
+  serializer = TypeSerializer()
+  client = repo.dynamodb.meta.client
+  now = int(time.time())
+  jti = str(uuid4())
+  expires_at = now + REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+  new_item = {"id": jti, "user_id": payload.sub, "valid": True, "expires_at": expires_at}
+  values = {
+    ":true": True,
+    ":false": False,
+    ":user_id": payload.sub,
+    ":now": now,
+    ":jti": jti,
+    ":expires_at": expires_at,
+  }
+  transact_items = [
+    {
+      "Update": {
+        "TableName": repo.table_name,
+        "Key": {"id": serializer.serialize(payload.jti)},
+        "UpdateExpression": "SET valid = :false, rotated_to = :jti, rotated_at = :now, "
+        "rotated_expires_at = :expires_at",
+        "ConditionExpression": "valid = :true AND user_id = :user_id "
+        "AND (attribute_not_exists(expires_at) OR expires_at > :now)",
+        "ExpressionAttributeValues": {name: serializer.serialize(value) for name, value in values.items()},
+        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+      }
+    },
+    {
+      "Put": {
+        "TableName": repo.table_name,
+        "Item": {name: serializer.serialize(value) for name, value in new_item.items()},
+        "ConditionExpression": "attribute_not_exists(id)",
+      }
+    },
+  ]
+
+  for attempt in range(REFRESH_ROTATION_ATTEMPTS):
+    try:
+      client.transact_write_items(TransactItems=transact_items)
+      return _encode_refresh_token(data, jti, expires_at)
+    except ClientError as e:
+      if e.response["Error"]["Code"] != "TransactionCanceledException":
+        raise
+      reasons = e.response.get("CancellationReasons") or [{}]
+      code = reasons[0].get("Code")
+      if code == "TransactionConflict":
+        # Another tab is rotating the same token right now; its outcome decides ours
+        if attempt + 1 < REFRESH_ROTATION_ATTEMPTS:
+          time.sleep(0.05 * (attempt + 1))
+        continue
+      if code != "ConditionalCheckFailed":
+        raise
+      old = reasons[0].get("Item")
+      old = {name: TypeDeserializer().deserialize(value) for name, value in old.items()} if old else None
+      rotated_jti, rotated_expires_at = _rotated_within_grace(payload, old, now)
+      return _encode_refresh_token(data, rotated_jti, rotated_expires_at)
+
+  # Every attempt conflicted: read what the competing rotation left behind
+  old = repo.table.get_item(Key={"id": payload.jti}, ConsistentRead=True).get("Item")
+  rotated_jti, rotated_expires_at = _rotated_within_grace(payload, old, now)
+  return _encode_refresh_token(data, rotated_jti, rotated_expires_at)
+
+
+def _rotated_within_grace(payload: TokenPayload, item: dict | None, now: int) -> tuple[str, int]:
+  """Explain why rotation was refused, or return the replacement JTI if still in the grace window."""
+  if not item:
     raise RefreshTokenNotFoundError("Refresh token not found")
 
-  if db_item.get("user_id") != token_payload.sub:
+  if item.get("user_id") != payload.sub:
     raise ForbiddenError("This token does not belong to the user")
 
-  if not db_item.get("valid", False):
-    raise UnauthorizedError("Invalid token")
+  rotated_at = item.get("rotated_at")
+  if item.get("rotated_to") and rotated_at is not None and now - int(rotated_at) <= REFRESH_ROTATION_GRACE_SECONDS:
+    return item["rotated_to"], int(item["rotated_expires_at"])
 
-  expires_at = db_item.get("expires_at")
-  if expires_at and int(time.time()) >= int(expires_at):
+  expires_at = item.get("expires_at")
+  if expires_at and now >= int(expires_at):
     raise UnauthorizedError("Refresh token expired")
-
-  return token_payload
+  raise UnauthorizedError("Invalid token")
 
 
 def invalidate_token(payload: TokenPayload, repo: AuthRepository):
@@ -148,13 +238,40 @@ def invalidate_token(payload: TokenPayload, repo: AuthRepository):
   repo.table.update_item(Key={"id": jti}, UpdateExpression="SET valid = :v", ExpressionAttributeValues={":v": False})
 
 
+def resolve_principal(payload: dict, repo: UserRepository) -> User | None:
+  """
+  Resolve the user behind a decoded token, reading DynamoDB only on a principal cache miss.
+
+  Entries are keyed by user id and token iat and dropped by update_user (role/active) and
+  delete_user. With PRINCIPAL_CACHE_TRUST_TOKEN_CLAIMS the token's signed role/active
+  claims override the stored values and entries live until the token expires.
+  """
+  settings = get_principal_cache_settings()
+  cache = get_principal_cache()
+  user_id = payload.get("sub")
+  key = (user_id, payload.get("iat"))
+
+  user = cache.get(key)
+  if user is None:
+    user = get_user_by_id(user_id, repo)
+    if not user:
+      return None
+    ttl = None
+    if settings.trust_token_claims and payload.get("exp"):
+      ttl = max(0.0, payload["exp"] - time.time())
+    cache.set(key, user, ttl=ttl)
+
+  if settings.trust_token_claims and "role" in payload and "active" in payload:
+    user = user.model_copy(update={"role": payload["role"], "active": payload["active"]})
+  return user
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), repo: UserRepository = Depends(get_user_repository)):
   try:
     payload = decode_token(token)
     if not payload or (payload.get("type") != "access" and payload.get("type") != "refresh"):
       raise UnauthorizedError("Invalid or expired token")
-    user_id: str = payload.get("sub")
-    user = get_user_by_id(user_id, repo)
+    user = resolve_principal(payload, repo)
     if not user:
       raise UserNotFoundError("User not found")
     # Check if user account is active
@@ -226,4 +343,6 @@ def generate_token(
     "exp": expire_delta.timestamp(),
   }
 
+  from jose import jwt
+
   return jwt.encode(payload, settings.secret_key, algorithm="HS256")
@@ -13,21 +13,23 @@ from auth.exceptions import (
 from auth.models import Token, TokenPayload
 from auth.operations import (
   authenticate_user,
+  decode_refresh_token,
   decode_token,
   generate_access_token,
   generate_refresh_token,
   get_auth_repository,
   invalidate_token,
-  verify_refresh_token,
+  rotate_refresh_token,
 )
 from database.repositories import AuthRepository, UserRepository
-from users.operations import get_user_repository
+from users.exceptions import UserNotFoundError
+from users.operations import get_user_by_id, get_user_repository
 
 auth_router = APIRouter(tags=["auth"])
 
 
 @auth_router.post("/login", response_model=Token, status_code=status.HTTP_200_OK)
-async def login(
+def login(
   response: Response,
   form_data: OAuth2PasswordRequestForm = Depends(),
   user_repo: UserRepository = Depends(get_user_repository),
@@ -37,7 +39,7 @@ async def login(
   if not user:
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
-  access_token = generate_access_token({"sub": user.id, "role": user.role})
+  access_token = generate_access_token({"sub": user.id, "role": user.role, "active": user.active})
   refresh_token = generate_refresh_token({"sub": user.id, "role": user.role}, auth_repo)
 
   cookie_params = {
@@ -56,23 +58,27 @@ async def login(
 
 
 @auth_router.post("/refresh", response_model=Token, status_code=status.HTTP_200_OK)
-async def refresh(
+def refresh(
   response: Response,
   refresh_token: str = Cookie(None),  # Prefer HTTP-only cookie
   auth_repo: AuthRepository = Depends(get_auth_repository),
+  user_repo: UserRepository = Depends(get_user_repository),
 ):
   try:
     if not refresh_token:
       raise MissingRefreshTokenError()
 
-    payload = verify_refresh_token(refresh_token, auth_repo)
-    if not payload:
-      raise InvalidTokenError("Invalid refresh token")
+    payload = decode_refresh_token(refresh_token)
 
-    invalidate_token(payload, auth_repo)
+    # Mint from the stored user, not the refresh token: access-token role/active claims
+    # may be trusted for the token lifetime (PRINCIPAL_CACHE_TRUST_TOKEN_CLAIMS)
+    user = get_user_by_id(payload.sub, user_repo)
+    if not user.active:
+      raise UnauthorizedError("Account is not active")
 
-    new_access_token = generate_access_token({"sub": payload.sub, "role": payload.role})
-    new_refresh_token = generate_refresh_token({"sub": payload.sub, "role": payload.role}, auth_repo)
+    # One transaction invalidates the old JTI and stores the new one
+    new_refresh_token = rotate_refresh_token(payload, {"sub": user.id, "role": user.role}, auth_repo)
+    new_access_token = generate_access_token({"sub": user.id, "role": user.role, "active": user.active})
 
     # Only set domain if it's not localhost (for production)
     cookie_params = {
@@ -97,7 +103,7 @@ async def refresh(
     raise HTTPException(status_code=401, detail=str(e))
   except UnauthorizedError as e:
     raise HTTPException(status_code=401, detail=str(e))
-  except RefreshTokenNotFoundError as e:
+  except (RefreshTokenNotFoundError, UserNotFoundError) as e:
     raise HTTPException(status_code=404, detail=str(e))
   except ForbiddenError as e:
     raise HTTPException(status_code=403, detail=str(e))
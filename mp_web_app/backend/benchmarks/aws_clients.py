@@ -0,0 +1,77 @@
+"""Per-request AWS client overhead: fresh boto3 clients vs the shared registry.
+
+Simulates the setup cost every request paid before the registry existed: a new
+DynamoDB resource for the repository plus a new S3 client for the operation.
+No network calls are made, so this measures only client construction
+(credential resolution, endpoint/model loading, pool setup).
+
+Usage:
+  uv run python -m benchmarks.aws_clients --iterations 200
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+REGION = "eu-central-1"
+
+
+def _request_with_fresh_clients(boto3) -> None:
+  dynamodb = boto3.resource("dynamodb", region_name=REGION)
+  dynamodb.Table("users_table")
+  boto3.client("s3")
+
+
+def _request_with_shared_clients() -> None:
+  from utils.aws_clients import get_client, get_resource
+
+  dynamodb = get_resource("dynamodb", region_name=REGION)
+  dynamodb.Table("users_table")
+  get_client("s3")
+
+
+def _measure(fn, iterations: int) -> list[float]:
+  timings = []
+  for _ in range(iterations):
+    started = time.perf_counter()
+    fn()
+    timings.append((time.perf_counter() - started) * 1000)
+  return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+  p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) >= 20 else max(timings)
+  print(
+    f"{label:<16} mean={statistics.mean(timings):8.3f} ms  median={statistics.median(timings):8.3f} ms  "
+    f"p95={p95:8.3f} ms  total={sum(timings):9.1f} ms"
+  )
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--iterations", type=int, default=200)
+  args = parser.parse_args()
+
+  # Dummy credentials keep credential resolution local (no IMDS lookups)
+  os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+  os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+  os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+  import boto3
+
+  from utils.aws_clients import get_pool_stats, reset_clients
+
+  reset_clients()
+  before = _measure(lambda: _request_with_fresh_clients(boto3), args.iterations)
+  after = _measure(_request_with_shared_clients, args.iterations)
+
+  print(f"Per-request AWS client setup over {args.iterations} simulated requests")
+  _report("fresh clients", before)
+  _report("shared registry", after)
+  print(f"speedup: {statistics.mean(before) / statistics.mean(after):.0f}x")
+  print(f"registry: {get_pool_stats()}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,150 @@
+"""Cold-start profile of the Lambda handler: import tree and time to first response.
+
+Starts a fresh interpreter with `-X importtime`, imports `api` and sends one API Gateway
+event through the Mangum handler against in-memory tables (benchmarks.fakes), the way
+a new Lambda instance serves its first request. Prints the slowest imports as a tree
+(cumulative time, indented by nesting) plus the init and first-response times.
+
+Usage:
+  uv run python -m benchmarks.cold_start --path /api/gallery/list --top 25
+  uv run python -m benchmarks.cold_start --eager        # STARTUP_LAZY_ROUTERS=false
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+TABLES = {
+  "USERS_TABLE_NAME": ("users_table", {"email_index": ("email", None)}),
+  "UPLOADS_TABLE_NAME": ("uploads_table", {"file_type_created_at_index": ("file_type", "created_at")}),
+  "REFRESH_TABLE_NAME": ("refresh_table", {}),
+  "MEMBERS_TABLE_NAME": ("members_table", {}),
+  "NEWS_TABLE_NAME": ("news_table", {"news_created_at_index": ("news", "created_at")}),
+  "GALLERY_TABLE_NAME": ("gallery_table", {"gallery_created_at_index": ("gallery", "created_at")}),
+  "INQUIRIES_TABLE_NAME": ("inquiries_table", {}),
+  "PRODUCTS_TABLE_NAME": ("products_table", {}),
+}
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def child_env(eager: bool) -> dict[str, str]:
+  env = dict(os.environ)
+  for name, (table, _) in TABLES.items():
+    env[name] = table
+  env.setdefault("JWT_SECRET", "cold-start-benchmark")
+  env.setdefault("JWT_ALGORITHM", "HS256")
+  env.setdefault("FRONTEND_BASE_URL", "https://localhost")
+  env.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+  env.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+  env.setdefault("AWS_DEFAULT_REGION", "eu-central-1")
+  env["STARTUP_LAZY_ROUTERS"] = "false" if eager else "true"
+  return env
+
+
+def _api_gateway_event(path: str) -> dict:
+  return {
+    "resource": "/{proxy+}",
+    "path": path,
+    "httpMethod": "GET",
+    "headers": {"Host": "localhost", "Accept": "application/json"},
+    "multiValueHeaders": {"Host": ["localhost"], "Accept": ["application/json"]},
+    "queryStringParameters": None,
+    "multiValueQueryStringParameters": None,
+    "pathParameters": {"proxy": path.lstrip("/")},
+    "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": path, "stage": "prod"},
+    "body": None,
+    "isBase64Encoded": False,
+  }
+
+
+def run_child(path: str) -> None:
+  """Runs in the profiled interpreter: import the handler, serve one request, report timings on stdout."""
+  started = time.perf_counter()
+  from benchmarks.fakes import FakeTable, fake_aws
+
+  tables = {table: FakeTable(table, indexes=indexes) for table, indexes in TABLES.values()}
+  with fake_aws(tables):
+    before_import = time.perf_counter()
+    from api import handler
+
+    imported = time.perf_counter()
+    response = handler(_api_gateway_event(path), None)
+    responded = time.perf_counter()
+
+  print(
+    json.dumps(
+      {
+        "status": response["statusCode"],
+        "import_ms": (imported - before_import) * 1000,
+        "first_response_ms": (responded - imported) * 1000,
+        "total_ms": (responded - started) * 1000,
+        "modules": len(sys.modules),
+      }
+    )
+  )
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+  """(depth, cumulative µs, module) for every `-X importtime` line, in the order Python printed them."""
+  entries = []
+  for line in stderr.splitlines():
+    match = _IMPORTTIME.match(line)
+    if match:
+      _, cumulative, indent, module = match.groups()
+      entries.append((len(indent) // 2, int(cumulative), module))
+  return entries
+
+
+def profile(path: str, eager: bool = False) -> tuple[dict, list[tuple[int, int, str]]]:
+  """Run one cold start in a subprocess; returns its timings and import entries."""
+  backend_dir = Path(__file__).resolve().parent.parent
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-m", "benchmarks.cold_start", "--child", path],
+    cwd=backend_dir,
+    env=child_env(eager),
+    capture_output=True,
+    text=True,
+    check=True,
+  )
+  return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def print_tree(entries: list[tuple[int, int, str]], top: int, min_ms: float) -> None:
+  # importtime prints children before their parent; reverse to read top-down
+  slowest = {module for _, cumulative, module in sorted(entries, key=lambda e: -e[1])[:top]}
+  for depth, cumulative, module in reversed(entries):
+    if module in slowest and cumulative / 1000 >= min_ms:
+      print(f"{cumulative / 1000:9.1f} ms  {'  ' * depth}{module}")
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--path", default="/api/gallery/list", help="path of the first request")
+  parser.add_argument("--top", type=int, default=25, help="slowest imports to show")
+  parser.add_argument("--min-ms", type=float, default=1.0, help="hide imports faster than this")
+  parser.add_argument("--eager", action="store_true", help="mount every router at import (old behaviour)")
+  parser.add_argument("--child", metavar="PATH", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.child:
+    run_child(args.child)
+    return
+
+  timings, entries = profile(args.path, args.eager)
+  print(f"Import tree for a cold start serving GET {args.path} ({'eager' if args.eager else 'lazy'} routers)")
+  print_tree(entries, args.top, args.min_ms)
+  print(
+    f"\nstatus {timings['status']}, {timings['modules']} modules loaded\n"
+    f"import api          {timings['import_ms']:8.1f} ms\n"
+    f"first response      {timings['first_response_ms']:8.1f} ms\n"
+    f"time to first byte  {timings['total_ms']:8.1f} ms (incl. fake AWS setup)"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,161 @@
+"""Concurrent /api/files/list throughput: worker thread pool vs blocking the event loop.
+
+Drives the real app in-process (httpx ASGITransport) against in-memory tables from
+benchmarks.fakes that sleep --latency ms per DynamoDB call, the way a boto3 request
+blocks its thread on the network. Two routes are compared:
+
+  threadpool  /api/files/list as shipped (sync handler, runs on the worker pool)
+  event-loop  the same handler wrapped in `async def`, i.e. the old behaviour where
+              every boto3 call stalls the loop and requests are served one at a time
+
+Usage:
+  uv run python -m benchmarks.concurrency --requests 200 --concurrency 1 10 50 200
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+REGION = "eu-central-1"
+TABLES = {
+  "USERS_TABLE_NAME": "users_table",
+  "UPLOADS_TABLE_NAME": "uploads_table",
+  "REFRESH_TABLE_NAME": "refresh_table",
+  "MEMBERS_TABLE_NAME": "members_table",
+  "NEWS_TABLE_NAME": "news_table",
+  "GALLERY_TABLE_NAME": "gallery_table",
+  "INQUIRIES_TABLE_NAME": "inquiries_table",
+}
+USER_ID = "bench-user"
+
+
+def _configure_env() -> None:
+  for name, table in TABLES.items():
+    os.environ.setdefault(name, table)
+  os.environ.setdefault("JWT_SECRET_ARN", "arn:aws:secretsmanager:eu-central-1:000000000000:secret:bench")
+  os.environ.setdefault("JWT_ALGORITHM", "HS256")
+  os.environ.setdefault("FRONTEND_BASE_URL", "https://localhost")
+  os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+  os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+  os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+
+def _build_tables(latency: float, files: int):
+  from benchmarks.fakes import FakeTable
+
+  users = FakeTable(TABLES["USERS_TABLE_NAME"], latency=latency)
+  users.load(
+    [
+      {
+        "id": USER_ID,
+        "first_name": "Bench",
+        "last_name": "User",
+        "email": "bench@example.com",
+        "phone": "+359888000000",
+        "role": "board",
+        "active": True,
+        "subscribed": False,
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+      }
+    ]
+  )
+  uploads = FakeTable(
+    TABLES["UPLOADS_TABLE_NAME"],
+    indexes={"file_type_created_at_index": ("file_type", "created_at")},
+    latency=latency,
+  )
+  uploads.load(
+    [
+      {
+        "id": f"file-{i}",
+        "file_name": f"form-{i}.pdf",
+        "file_type": "forms",
+        "uploaded_by": USER_ID,
+        "created_at": f"2025-01-01T00:00:{i % 60:02d}",
+        "bucket": "uploads",
+        "key": f"forms/form-{i}.pdf",
+      }
+      for i in range(files)
+    ]
+  )
+  tables = {users.name: users, uploads.name: uploads}
+  for name in TABLES.values():
+    tables.setdefault(name, FakeTable(name, latency=latency))
+  return tables
+
+
+def _add_event_loop_route(app) -> None:
+  from fastapi import Depends
+
+  from auth.operations import role_required
+  from files.operations import get_uploads_repository
+  from files.routers import files_list
+  from users.roles import UserRole
+
+  @app.get("/bench/files/list-on-loop")
+  async def files_list_on_loop(
+    file_type: str,
+    repo=Depends(get_uploads_repository),
+    user=Depends(role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.ADMIN])),
+  ):
+    return files_list(file_type, repo, user)
+
+
+async def _run(client, path: str, token: str, requests: int, concurrency: int) -> float:
+  semaphore = asyncio.Semaphore(concurrency)
+  headers = {"Authorization": f"Bearer {token}"}
+
+  async def one() -> None:
+    async with semaphore:
+      response = await client.get(path, params={"file_type": "forms"}, headers=headers)
+      response.raise_for_status()
+
+  started = time.perf_counter()
+  await asyncio.gather(*(one() for _ in range(requests)))
+  return time.perf_counter() - started
+
+
+async def _benchmark(app, token: str, args) -> None:
+  import httpx
+
+  from utils.concurrency import configure_thread_limiter
+
+  threads = configure_thread_limiter(args.max_threads)
+  print(
+    f"{args.requests} requests per run, {args.latency:.0f} ms per DynamoDB call, {threads} worker threads\n"
+    f"{'concurrency':>11}  {'mode':<10} {'wall':>9}  {'throughput':>12}"
+  )
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+    for concurrency in args.concurrency:
+      for mode, path in (("threadpool", "/api/files/list"), ("event-loop", "/bench/files/list-on-loop")):
+        elapsed = await _run(client, path, token, args.requests, concurrency)
+        print(f"{concurrency:>11}  {mode:<10} {elapsed * 1000:7.0f} ms  {args.requests / elapsed:8.1f} rps")
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--requests", type=int, default=200)
+  parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 200])
+  parser.add_argument("--latency", type=float, default=15.0, help="simulated ms per DynamoDB call")
+  parser.add_argument("--files", type=int, default=25, help="rows returned by each list call")
+  parser.add_argument("--max-threads", type=int, default=None, help="override BLOCKING_MAX_THREADS")
+  args = parser.parse_args()
+
+  _configure_env()
+
+  from benchmarks.fakes import fake_aws
+
+  with fake_aws(_build_tables(args.latency / 1000, args.files)):
+    from api import app
+    from auth.operations import generate_access_token
+
+    _add_event_loop_route(app)
+    token = generate_access_token({"sub": USER_ID, "role": "board"})
+    asyncio.run(_benchmark(app, token, args))
+
+
+if __name__ == "__main__":
+  main()
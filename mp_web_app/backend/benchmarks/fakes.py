@@ -0,0 +1,371 @@
+"""In-memory stand-ins for the AWS services the backend talks to.
+
+Good enough to drive the real operations and routers in benchmarks without AWS:
+tables understand boto3 Key/Attr conditions (including conditional puts), GSIs,
+pagination and BatchGetItem, and every call can sleep for a fixed latency to imitate a
+network round trip. Calls, items read and read capacity units (eventually consistent:
+0.5 RCU per 4 KB read per request) are counted per table so benchmarks can report read
+amplification.
+
+FakeSES does the same for email: it records every raw MIME message sent and can reject
+sends above a maximum rate (Throttling) and add latency, like SES does.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from email import message_from_string
+from email.message import Message
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from boto3.dynamodb.conditions import ConditionBase
+from botocore.exceptions import ClientError
+
+
+def _attr_value(item: dict[str, Any], name: str) -> Any:
+  value: Any = item
+  for part in name.split("."):
+    if not isinstance(value, dict) or part not in value:
+      return _MISSING
+    value = value[part]
+  return value
+
+
+_MISSING = object()
+
+
+def evaluate(condition: ConditionBase | None, item: dict[str, Any]) -> bool:
+  """Evaluate a boto3 condition object against an item."""
+  if condition is None:
+    return True
+  expression = condition.get_expression()
+  operator = expression["operator"]
+  values = expression["values"]
+
+  if operator == "AND":
+    return evaluate(values[0], item) and evaluate(values[1], item)
+  if operator == "OR":
+    return evaluate(values[0], item) or evaluate(values[1], item)
+  if operator == "NOT":
+    return not evaluate(values[0], item)
+
+  actual = _attr_value(item, values[0].name)
+  if operator == "attribute_exists":
+    return actual is not _MISSING
+  if operator == "attribute_not_exists":
+    return actual is _MISSING
+  if actual is _MISSING:
+    return False
+
+  operands = values[1:]
+  try:
+    if operator == "=":
+      return actual == operands[0]
+    if operator == "<>":
+      return actual != operands[0]
+    if operator == "<":
+      return actual < operands[0]
+    if operator == "<=":
+      return actual <= operands[0]
+    if operator == ">":
+      return actual > operands[0]
+    if operator == ">=":
+      return actual >= operands[0]
+    if operator == "BETWEEN":
+      return operands[0] <= actual <= operands[1]
+    if operator == "IN":
+      return actual in operands[0]
+    if operator == "begins_with":
+      return isinstance(actual, str) and actual.startswith(operands[0])
+    if operator == "contains":
+      return operands[0] in (actual or [])
+  except TypeError:
+    return False
+  raise NotImplementedError(f"Condition operator {operator!r} is not supported by the fake table")
+
+
+def _project(item: dict[str, Any], projection: str | None, names: dict[str, str] | None) -> dict[str, Any]:
+  if not projection:
+    return dict(item)
+  names = names or {}
+  fields = [names.get(part.strip(), part.strip()) for part in projection.split(",")]
+  return {field: item[field] for field in fields if field in item}
+
+
+def _item_size(item: dict[str, Any]) -> int:
+  return len(json.dumps(item, default=str))
+
+
+def _read_units(size: int) -> float:
+  return max(1, math.ceil(size / 4096)) * 0.5
+
+
+class FakeTable:
+  """
+  Dict-backed DynamoDB table.
+
+  indexes maps GSI name -> (partition attribute, sort attribute or None). Items missing
+  the partition attribute are left out of that index, like a sparse GSI. Tables with a
+  composite primary key pass sort_key_name; base-table queries then sort by it.
+  """
+
+  def __init__(
+    self,
+    name: str,
+    key_name: str = "id",
+    sort_key_name: str | None = None,
+    indexes: dict[str, tuple[str, str | None]] | None = None,
+    latency: float = 0.0,
+    page_bytes: int = 1024 * 1024,
+  ) -> None:
+    self.name = name
+    self.table_name = name
+    self.key_name = key_name
+    self.sort_key_name = sort_key_name
+    self.indexes = indexes or {}
+    self.latency = latency
+    self.page_bytes = page_bytes
+    self.items: dict[Any, dict[str, Any]] = {}
+    self.calls: dict[str, int] = {}
+    self.items_read = 0
+    self.read_units = 0.0
+    self._lock = threading.Lock()
+
+  # -- helpers ---------------------------------------------------------------
+
+  def _record(self, operation: str, items_read: int = 0, read_units: float = 0.0) -> None:
+    with self._lock:
+      self.calls[operation] = self.calls.get(operation, 0) + 1
+      self.items_read += items_read
+      self.read_units += read_units
+    if self.latency:
+      time.sleep(self.latency)
+
+  def reset_counters(self) -> None:
+    with self._lock:
+      self.calls = {}
+      self.items_read = 0
+      self.read_units = 0.0
+
+  def key_of(self, item: dict[str, Any]) -> Any:
+    """Primary key of an item (or a Key dict): the partition value, or (partition, sort) for composite keys."""
+    if self.sort_key_name is None:
+      return item[self.key_name]
+    return item[self.key_name], item[self.sort_key_name]
+
+  def load(self, items: list[dict[str, Any]]) -> None:
+    for item in items:
+      self.items[self.key_of(item)] = dict(item)
+
+  def _page(self, candidates: list[dict[str, Any]], kwargs: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    """One page of a scan/query: stops at Limit evaluated items or page_bytes, like DynamoDB."""
+    start_key = kwargs.get("ExclusiveStartKey", {})
+    start = start_key.get("_offset", 0)
+    if start_key and "_offset" not in start_key:
+      # A key built by the caller from an item: resume right after that item
+      position = self.key_of(start_key)
+      start = next((i + 1 for i, item in enumerate(candidates) if self.key_of(item) == position), len(candidates))
+    limit = kwargs.get("Limit")
+    page: list[dict[str, Any]] = []
+    evaluated = 0
+    size = 0
+    for item in candidates[start:]:
+      if (limit is not None and evaluated >= limit) or size >= self.page_bytes:
+        break
+      evaluated += 1
+      size += _item_size(item)
+      if evaluate(kwargs.get("FilterExpression"), item):
+        page.append(_project(item, kwargs.get("ProjectionExpression"), kwargs.get("ExpressionAttributeNames")))
+
+    response: dict[str, Any] = {"Items": page, "Count": len(page), "ScannedCount": evaluated}
+    if start + evaluated < len(candidates):
+      response["LastEvaluatedKey"] = {"_offset": start + evaluated}
+    return response, size
+
+  # -- table API -------------------------------------------------------------
+
+  def get_item(self, Key: dict[str, Any], **kwargs) -> dict[str, Any]:  # noqa: N803
+    item = self.items.get(self.key_of(Key))
+    self._record("get_item", 1, _read_units(_item_size(item) if item else 0))
+    if item is None:
+      return {}
+    return {"Item": _project(item, kwargs.get("ProjectionExpression"), kwargs.get("ExpressionAttributeNames"))}
+
+  def put_item(self, Item: dict[str, Any], **kwargs) -> dict[str, Any]:  # noqa: N803
+    self._record("put_item")
+    key = self.key_of(Item)
+    with self._lock:
+      if "ConditionExpression" in kwargs and not evaluate(kwargs["ConditionExpression"], self.items.get(key, {})):
+        raise ClientError(
+          {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+          "PutItem",
+        )
+      self.items[key] = dict(Item)
+    return {}
+
+  def delete_item(self, Key: dict[str, Any], **kwargs) -> dict[str, Any]:  # noqa: N803
+    self._record("delete_item")
+    self.items.pop(self.key_of(Key), None)
+    return {}
+
+  @contextmanager
+  def batch_writer(self, overwrite_by_pkeys: list[str] | None = None):
+    """Writes go straight to the table (no buffering)."""
+    yield self
+
+  def scan(self, **kwargs) -> dict[str, Any]:
+    candidates = list(self.items.values())
+    if "TotalSegments" in kwargs:
+      segment, total = kwargs["Segment"], kwargs["TotalSegments"]
+      candidates = [item for i, item in enumerate(candidates) if i % total == segment]
+    if "IndexName" in kwargs:
+      partition, _ = self.indexes[kwargs["IndexName"]]
+      candidates = [item for item in candidates if partition in item]
+    response, size = self._page(candidates, kwargs)
+    self._record("scan", response["ScannedCount"], _read_units(size))
+    return response
+
+  def query(self, **kwargs) -> dict[str, Any]:
+    index = kwargs.get("IndexName")
+    if index:
+      partition, sort = self.indexes[index]
+    else:
+      partition, sort = self.key_name, self.sort_key_name
+    key_condition = kwargs["KeyConditionExpression"]
+    candidates = [item for item in self.items.values() if partition in item and evaluate(key_condition, item)]
+    if sort:
+      candidates = [item for item in candidates if sort in item]
+      candidates.sort(key=lambda item: item[sort], reverse=not kwargs.get("ScanIndexForward", True))
+    response, size = self._page(candidates, kwargs)
+    self._record("query", response["ScannedCount"], _read_units(size))
+    return response
+
+
+class FakeDynamoDBResource:
+  """Stands in for boto3.resource("dynamodb"): Table() lookups plus BatchGetItem."""
+
+  def __init__(self, tables: dict[str, FakeTable]) -> None:
+    self.tables = tables
+
+  def Table(self, name: str) -> FakeTable:  # noqa: N802
+    return self.tables[name]
+
+  def batch_get_item(self, RequestItems: dict[str, Any]) -> dict[str, Any]:  # noqa: N803
+    responses: dict[str, list[dict[str, Any]]] = {}
+    for table_name, request in RequestItems.items():
+      table = self.tables[table_name]
+      found = []
+      units = 0.0
+      for key in request["Keys"]:
+        item = table.items.get(table.key_of(key))
+        units += _read_units(_item_size(item) if item else 0)
+        if item is not None:
+          found.append(_project(item, request.get("ProjectionExpression"), request.get("ExpressionAttributeNames")))
+      responses[table_name] = found
+      table._record("batch_get_item", len(request["Keys"]), units)
+    return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+@dataclass
+class SentMessage:
+  source: str
+  destinations: list[str]
+  data: str
+
+  def parse(self) -> Message:
+    return message_from_string(self.data)
+
+
+class FakeSES:
+  """
+  SES client stand-in for send_raw_email and get_send_quota.
+
+  GetSendQuota reports max_send_rate. With enforce_rate, a send that would exceed
+  max_send_rate sends in the trailing second fails with a Throttling ClientError, as SES
+  does. Each call sleeps for latency seconds. Messages are kept in `messages` unless
+  keep_messages is False (large runs), in which case only counts and bytes are recorded.
+  """
+
+  def __init__(
+    self,
+    max_send_rate: float = 14.0,
+    latency: float = 0.0,
+    enforce_rate: bool = True,
+    keep_messages: bool = True,
+    clock: Callable[[], float] = time.monotonic,
+  ) -> None:
+    self.max_send_rate = max_send_rate
+    self.latency = latency
+    self.enforce_rate = enforce_rate
+    self.keep_messages = keep_messages
+    self.messages: list[SentMessage] = []
+    self.sent = 0
+    self.sent_bytes = 0
+    self.throttled = 0
+    self._clock = clock
+    self._window: deque[float] = deque()
+    self._lock = threading.Lock()
+
+  def get_send_quota(self) -> dict[str, float]:
+    return {"Max24HourSend": 50000.0, "MaxSendRate": self.max_send_rate, "SentLast24Hours": float(self.sent)}
+
+  def send_raw_email(self, Source: str, Destinations: list[str], RawMessage: dict[str, str], **kwargs):  # noqa: N803
+    if self.latency:
+      time.sleep(self.latency)
+    with self._lock:
+      if self.enforce_rate:
+        now = self._clock()
+        while self._window and self._window[0] <= now - 1:
+          self._window.popleft()
+        if len(self._window) >= self.max_send_rate:
+          self.throttled += 1
+          raise ClientError(
+            {"Error": {"Code": "Throttling", "Message": "Maximum sending rate exceeded."}}, "SendRawEmail"
+          )
+        self._window.append(now)
+      self.sent += 1
+      self.sent_bytes += len(RawMessage["Data"])
+      if self.keep_messages:
+        self.messages.append(SentMessage(Source, list(Destinations), RawMessage["Data"]))
+      message_id = f"fake-{self.sent:08d}"
+    return {"MessageId": message_id}
+
+  def recipients(self) -> list[str]:
+    return [address for message in self.messages for address in message.destinations]
+
+
+def fake_secrets_client(secret: str = "benchmark-secret") -> MagicMock:
+  client = MagicMock()
+  client.get_secret_value.return_value = {"SecretString": json.dumps({"JWT_SECRET": secret})}
+  return client
+
+
+@contextmanager
+def fake_aws(tables: dict[str, FakeTable], clients: dict[str, Any] | None = None):
+  """Route boto3 through the fakes for the duration of the block."""
+  from utils.aws_clients import reset_clients
+
+  resource = FakeDynamoDBResource(tables)
+  clients = {"secretsmanager": fake_secrets_client(), **(clients or {})}
+
+  def client_factory(service_name, **kwargs):
+    return clients.get(service_name) or MagicMock()
+
+  reset_clients()
+  with (
+    patch("utils.aws_clients.boto3.client", side_effect=client_factory),
+    patch("utils.aws_clients.boto3.resource", return_value=resource),
+  ):
+    yield resource
+  reset_clients()
+
+
+def to_decimal(value: float) -> Decimal:
+  return Decimal(str(value))
@@ -0,0 +1,151 @@
+"""Notification fan-out against an offline SES stand-in.
+
+Builds an in-memory users table where every user is subscribed and holds one of the
+roles an inquiry can be scoped to, then sends each notification to all of them through
+benchmarks.fakes.FakeSES, which records the messages and throttles sends above its
+MaxSendRate like SES:
+
+  news     deliver_news_notification (the outbox handler, one bulk broadcast)
+  upload   queue_upload_notifications for a minutes file, then drain_outbox, which runs
+           deliver_upload_notification (one bulk broadcast)
+  inquiry  _notify_involved for an inquiry scoped to admin, board and control (one
+           send_email_ses call per recipient)
+
+Each scenario runs twice: once for wall time and SES calls per second, then again under
+tracemalloc for peak memory (tracing slows it down, so its time is not reported).
+
+Usage:
+  uv run python -m benchmarks.mail_fanout
+  uv run python -m benchmarks.mail_fanout --recipients 2000 --ses-rate 200 --latency 20
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+
+USERS_TABLE = "users_table"
+OUTBOX_TABLE = "email_outbox_table"
+SCOPE_ROLES = ("admin", "board", "control")
+
+
+def _configure_env() -> None:
+  os.environ.setdefault("USERS_TABLE_NAME", USERS_TABLE)
+  os.environ.setdefault("EMAIL_OUTBOX_TABLE_NAME", OUTBOX_TABLE)
+  os.environ.setdefault("JWT_SECRET_ARN", "arn:aws:secretsmanager:eu-central-1:000000000000:secret:bench")
+  os.environ.setdefault("JWT_ALGORITHM", "HS256")
+  os.environ.setdefault("MAIL_SENDER", "noreply@example.com")
+  os.environ.setdefault("FRONTEND_BASE_URL", "https://murdjovpojar.com")
+  os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+  os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+  os.environ.setdefault("AWS_DEFAULT_REGION", "eu-central-1")
+
+
+def _build_table(recipients: int):
+  from benchmarks.fakes import FakeTable
+  from users.operations import ROLE_INDEX, SUBSCRIBED, SUBSCRIPTION_INDEX
+
+  table = FakeTable(
+    USERS_TABLE,
+    indexes={ROLE_INDEX: ("role", None), SUBSCRIPTION_INDEX: ("subscription", None), "email_index": ("email", None)},
+  )
+  table.load(
+    [
+      {
+        "id": f"user-{i}",
+        "first_name": f"First{i}",
+        "last_name": f"Last{i}",
+        "email": f"user{i}@example.com",
+        "phone": f"+35988{i:07d}",
+        "role": SCOPE_ROLES[i % len(SCOPE_ROLES)],
+        "active": True,
+        "subscribed": True,
+        "subscription": SUBSCRIBED,
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+      }
+      for i in range(recipients)
+    ]
+  )
+  return table
+
+
+def _scenarios() -> dict[str, Callable[[], object]]:
+  from files.models import FileMetadataFull, FileType
+  from files.operations import queue_upload_notifications
+  from inquiries.models import Inquiry
+  from inquiries.operations import _notify_involved
+  from mail.outbox import drain_outbox
+  from news.operations import deliver_news_notification
+  from users.operations import get_user_repository
+
+  upload = FileMetadataFull(
+    id="file-1",
+    file_name="Протокол от общо събрание.pdf",
+    file_type=FileType.minutes,
+    bucket="uploads",
+    key="minutes/protocol.pdf",
+    uploaded_by="user-0",
+    created_at="2025-01-01T00:00:00",
+  )
+  inquiry = Inquiry(
+    id="inquiry-1",
+    title="Ремонт на помпената станция",
+    description="...",
+    inquiry_type="proposal",
+    scope=list(SCOPE_ROLES),
+    author_id="author",
+  )
+  return {
+    "news": lambda: deliver_news_notification({"news_link": "https://murdjovpojar.com/home"}),
+    "upload": lambda: (queue_upload_notifications([upload]), drain_outbox()),
+    "inquiry": lambda: _notify_involved(inquiry, get_user_repository()),
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--recipients", type=int, default=10_000)
+  parser.add_argument("--ses-rate", type=float, default=2000.0, help="MaxSendRate of the SES stand-in (per second)")
+  parser.add_argument("--latency", type=float, default=5.0, help="simulated ms per SES call")
+  parser.add_argument("--only", choices=["news", "upload", "inquiry"], action="append", help="run only these")
+  args = parser.parse_args()
+
+  _configure_env()
+
+  from benchmarks.fakes import FakeSES, FakeTable, fake_aws
+
+  ses = FakeSES(max_send_rate=args.ses_rate, latency=args.latency / 1000, keep_messages=False)
+  tables = {USERS_TABLE: _build_table(args.recipients)}
+  with fake_aws(tables, clients={"ses": ses}):
+    from mail.outbox import QUEUE_INDEX
+
+    tables[OUTBOX_TABLE] = FakeTable(OUTBOX_TABLE, key_name="job_id", indexes={QUEUE_INDEX: ("queue", "available_at")})
+    scenarios = _scenarios()
+    print(
+      f"{args.recipients} recipients, SES stand-in at {args.ses_rate:.0f}/s, {args.latency:.0f} ms per call\n"
+      f"{'scenario':<9}{'sent':>8}{'throttled':>11}{'wall':>10}{'calls/s':>10}{'MB sent':>9}{'peak MB':>9}"
+    )
+    for name, run in scenarios.items():
+      if args.only and name not in args.only:
+        continue
+      sent, throttled, sent_bytes = ses.sent, ses.throttled, ses.sent_bytes
+      started = time.perf_counter()
+      run()
+      elapsed = time.perf_counter() - started
+      calls = ses.sent - sent + ses.throttled - throttled
+      row = (ses.sent - sent, ses.throttled - throttled, (ses.sent_bytes - sent_bytes) / 1e6)
+
+      tracemalloc.start()
+      run()
+      _, peak = tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+
+      print(
+        f"{name:<9}{row[0]:>8}{row[1]:>11}{elapsed:>9.2f}s{calls / elapsed:>10,.0f}{row[2]:>9.1f}{peak / 1e6:>9.1f}"
+      )
+
+
+if __name__ == "__main__":
+  main()
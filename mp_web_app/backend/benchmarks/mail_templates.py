@@ -0,0 +1,76 @@
+"""Email template rendering: per-send file reads vs the compiled template engine.
+
+For news_notification.html and upload_notification.html, renders the HTML and the
+plain-text alternative of one email the way every send used to (exists() + read_text()
++ format_map, then a regex over the HTML for the text part) and with the compiled
+templates of mail.template_engine, and prints renders per second for each. Values differ
+per render, as they do per recipient.
+
+Usage:
+  uv run python -m benchmarks.mail_templates
+  uv run python -m benchmarks.mail_templates --count 200000
+"""
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+
+from mail.operations import _TEMPLATES_DIR, get_template
+
+CASES = {
+  "news_notification.html": lambda i: {
+    "news_link": "https://murdjovpojar.com/home",
+    "unsubscribe_link": f"https://murdjovpojar.com/unsubscribe?email=user{i}@example.com&token=t{i}",
+  },
+  "upload_notification.html": lambda i: {
+    "file_name": f"Протокол от общо събрание {i}.pdf",
+    "category_bg": "Протоколи",
+    "documents_link": "https://murdjovpojar.com/minutes",
+  },
+}
+
+
+def render_from_disk(template_name: str, params: dict[str, str]) -> tuple[str, str]:
+  """The previous path: read and format the file for every email, then strip tags."""
+  template_path = _TEMPLATES_DIR / template_name
+  if not template_path.exists():
+    raise FileNotFoundError(template_name)
+  html = template_path.read_text(encoding="utf-8").format_map(params)
+  return html, re.sub("<[^<]+?>", "", html)
+
+
+def render_compiled(template_name: str, params: dict[str, str]) -> tuple[str, str]:
+  template = get_template(template_name)
+  return template.render(params), template.render_text(params)
+
+
+def measure(render: Callable[[str, dict[str, str]], tuple[str, str]], template_name: str, count: int) -> float:
+  """Renders per second."""
+  params = [CASES[template_name](i) for i in range(count)]
+  render(template_name, params[0])  # warm up (the engine loads the templates here)
+  started = time.perf_counter()
+  for values in params:
+    render(template_name, values)
+  return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--count", type=int, default=50_000, help="renders per template and mode")
+  args = parser.parse_args()
+
+  for template_name, make_params in CASES.items():
+    if render_from_disk(template_name, make_params(0)) != render_compiled(template_name, make_params(0)):
+      raise SystemExit(f"{template_name}: compiled output differs from format_map")
+
+  print(f"Rendering HTML + text {args.count} times per template\n")
+  print(f"{'template':<28}{'from disk/s':>14}{'compiled/s':>14}{'speed-up':>12}")
+  for template_name in CASES:
+    baseline = measure(render_from_disk, template_name, args.count)
+    compiled = measure(render_compiled, template_name, args.count)
+    print(f"{template_name:<28}{baseline:>14,.0f}{compiled:>14,.0f}{compiled / baseline:>11.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,88 @@
+"""PDF rendering throughput: inline vs the process pool of inquiries.pdf_service.
+
+Renders the same batch of inquiries inline (one core, as on Lambda) and through
+PdfRenderService with a growing number of worker processes, and prints PDFs per second
+for each. Pool start-up (spawning and warming the workers) is timed separately, since a
+long-running server pays it once. Workers print xhtml2pdf's warnings on stderr; redirect
+it to keep the table readable.
+
+Usage:
+  uv run python -m benchmarks.pdf_render --count 64 2>/dev/null
+  uv run python -m benchmarks.pdf_render --count 64 --workers 1 2 4 8 2>/dev/null
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from inquiries.models import Inquiry, InquiryStatus
+from inquiries.pdf_service import PdfRenderService
+
+
+def make_inquiries(count: int) -> list[Inquiry]:
+  return [
+    Inquiry(
+      id=f"inq-{i}",
+      title=f"Запитване относно поддръжката на обект {i}",
+      description="Описание на запитването, което се отпечатва в документа. " * 20,
+      inquiry_type="запитване",
+      scope=["admin", "board"],
+      author_id=f"user-{i % 50}",
+      author_name="Иван Иванов",
+      co_author_names=["Мария Петрова", "Георги Георгиев"],
+      status=InquiryStatus.IN_PROGRESS,
+      entry_number=f"{i + 1}/2026",
+      created_at="2026-01-15T10:00:00",
+      updated_at="2026-01-15T10:00:00",
+    )
+    for i in range(count)
+  ]
+
+
+def run(service: PdfRenderService, inquiries: list[Inquiry]) -> tuple[float, float]:
+  """(start-up seconds, PDFs per second) for one service."""
+  started = time.perf_counter()
+  service.render(inquiries[0])  # starts and warms the pool, or warms this process inline
+  startup = time.perf_counter() - started
+
+  started = time.perf_counter()
+  service.render_many(inquiries, timeout=3600)
+  elapsed = time.perf_counter() - started
+  return startup, len(inquiries) / elapsed
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--count", type=int, default=64, help="PDFs per run")
+  parser.add_argument(
+    "--workers", type=int, nargs="+", help="pool sizes to try (default: 1, 2, 4 ... up to the CPU count)"
+  )
+  args = parser.parse_args()
+
+  # xhtml2pdf logs a warning for every glyph the <title> font can't draw
+  logging.disable(logging.WARNING)
+  cpus = os.cpu_count() or 1
+  pool_sizes = args.workers or sorted({min(2**i, cpus) for i in range(cpus.bit_length() + 1)})
+  inquiries = make_inquiries(args.count)
+
+  print(f"Rendering {args.count} inquiry PDFs on {cpus} CPU(s)\n")
+  print(f"{'mode':<16}{'start-up':>12}{'PDFs/sec':>12}{'speed-up':>12}")
+  _, baseline = run(PdfRenderService(process_pool=False), inquiries)
+  print(f"{'inline':<16}{'-':>12}{baseline:>12.1f}{1.0:>11.1f}x")
+
+  for workers in pool_sizes:
+    service = PdfRenderService(workers=workers)
+    if service.mode != "process":
+      print("process pools are not supported on this machine")
+      break
+    try:
+      startup, throughput = run(service, inquiries)
+    finally:
+      service.shutdown()
+    label = f"pool x{workers}"
+    print(f"{label:<16}{startup * 1000:>9.0f} ms{throughput:>12.1f}{throughput / baseline:>11.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,123 @@
+"""User fan-out lookups: scan + filter vs the role and subscription GSIs.
+
+Builds an in-memory users table (benchmarks.fakes) with a realistic mix of roles and
+subscriptions and runs each lookup twice: the old Scan with a FilterExpression, which
+reads every user, and the GSI Query that replaced it, which reads only the matches.
+Reports DynamoDB calls, items read, consumed read capacity and wall time.
+
+Usage:
+  uv run python -m benchmarks.user_queries --users 20000
+"""
+
+import argparse
+import os
+import random
+import time
+
+USERS_TABLE = "users_table"
+ROLES = [("regular_user", 0.9), ("board", 0.04), ("control", 0.04), ("accountant", 0.01), ("admin", 0.01)]
+
+
+def _configure_env() -> None:
+  os.environ.setdefault("USERS_TABLE_NAME", USERS_TABLE)
+  os.environ.setdefault("JWT_SECRET_ARN", "arn:aws:secretsmanager:eu-central-1:000000000000:secret:bench")
+  os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+  os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+  os.environ.setdefault("AWS_DEFAULT_REGION", "eu-central-1")
+
+
+def _build_table(users: int, subscribed_ratio: float, latency: float):
+  from benchmarks.fakes import FakeTable
+  from users.operations import ROLE_INDEX, SUBSCRIBED, SUBSCRIPTION_INDEX
+
+  rng = random.Random(42)
+  table = FakeTable(
+    USERS_TABLE,
+    indexes={ROLE_INDEX: ("role", None), SUBSCRIPTION_INDEX: ("subscription", None), "email_index": ("email", None)},
+    latency=latency,
+  )
+  roles, weights = zip(*ROLES, strict=True)
+  items = []
+  for i in range(users):
+    subscribed = rng.random() < subscribed_ratio
+    item = {
+      "id": f"user-{i}",
+      "first_name": f"First{i}",
+      "last_name": f"Last{i}",
+      "email": f"user{i}@example.com",
+      "phone": f"+35988{i:07d}",
+      "role": rng.choices(roles, weights)[0],
+      "active": True,
+      "subscribed": subscribed,
+      "salt": "x" * 32,
+      "password_hash": "$argon2id$" + "x" * 86,
+      "created_at": "2025-01-01T00:00:00",
+      "updated_at": "2025-01-01T00:00:00",
+    }
+    if subscribed:
+      item["subscription"] = SUBSCRIBED
+    items.append(item)
+  table.load(items)
+  return table
+
+
+def _scan_lookups(repo):
+  from boto3.dynamodb.conditions import Attr
+
+  def scan(condition):
+    return [repo.convert_item_to_object(item) for item in repo.iter_scan(filter_expression=condition)]
+
+  return {
+    "subscribed": lambda: scan(Attr("subscribed").eq(True)),
+    "board": lambda: scan(Attr("role").eq("board")),
+    "control": lambda: scan(Attr("role").eq("control")),
+  }
+
+
+def _index_lookups(repo):
+  from users.operations import get_subscribed_users, list_users_by_role
+
+  return {
+    "subscribed": lambda: get_subscribed_users(repo),
+    "board": lambda: list_users_by_role("board", repo),
+    "control": lambda: list_users_by_role("control", repo),
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--users", type=int, default=20000)
+  parser.add_argument("--subscribed", type=float, default=0.3, help="share of subscribed users")
+  parser.add_argument("--latency", type=float, default=10.0, help="simulated ms per DynamoDB call")
+  args = parser.parse_args()
+
+  _configure_env()
+
+  from benchmarks.fakes import fake_aws
+
+  tables = {}
+  with fake_aws(tables):
+    from users.operations import get_user_repository
+
+    table = tables[USERS_TABLE] = _build_table(args.users, args.subscribed, args.latency / 1000)
+
+    repo = get_user_repository()
+    print(
+      f"{args.users} users, {args.latency:.0f} ms per DynamoDB call\n"
+      f"{'lookup':<11} {'strategy':<8} {'matches':>8} {'calls':>6} {'items read':>11} {'RCU':>8} {'wall':>9}"
+    )
+    for strategy, lookups in (("scan", _scan_lookups(repo)), ("gsi", _index_lookups(repo))):
+      for name, lookup in lookups.items():
+        table.reset_counters()
+        started = time.perf_counter()
+        matches = len(lookup())
+        elapsed = time.perf_counter() - started
+        calls = sum(table.calls.values())
+        print(
+          f"{name:<11} {strategy:<8} {matches:>8} {calls:>6} {table.items_read:>11} "
+          f"{table.read_units:>8.1f} {elapsed * 1000:7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+  main()
@@ -1,8 +1,7 @@
 from functools import lru_cache
 
-import boto3
-
 from app_config import DynamoDBSettings
+from utils.aws_clients import get_client, get_resource
 
 
 @lru_cache
@@ -12,24 +11,12 @@ def get_dynamodb_settings() -> DynamoDBSettings:
 
 
 def get_dynamodb_client():
-  """Get a DynamoDB client."""
+  """Get the shared DynamoDB client."""
   settings = get_dynamodb_settings()
-
-  client = boto3.client(
-    "dynamodb",
-    region_name=settings.region_name,
-  )
-
-  return client
+  return get_client("dynamodb", region_name=settings.region_name)
 
 
 def get_dynamodb_resource():
-  """Get a DynamoDB resource."""
+  """Get the DynamoDB resource for the current thread."""
   settings = get_dynamodb_settings()
-
-  resource = boto3.resource(
-    "dynamodb",
-    region_name=settings.region_name,
-  )
-
-  return resource
+  return get_resource("dynamodb", region_name=settings.region_name)
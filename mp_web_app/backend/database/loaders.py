@@ -0,0 +1,82 @@
+import os
+from functools import cached_property
+
+from fastapi import Request
+
+from database.repositories import FileMetadataRepository, MemberRepository, UserRepository
+from files.models import FileMetadataFull
+from members.models import Member
+from users.directory import lookup_users
+from users.models import UserDirectoryEntry
+from utils.dataloader import DataLoader
+
+USERS_TABLE_NAME = os.environ.get("USERS_TABLE_NAME")
+MEMBERS_TABLE_NAME = os.environ.get("MEMBERS_TABLE_NAME")
+UPLOADS_TABLE_NAME = os.environ.get("UPLOADS_TABLE_NAME")
+
+
+class RequestLoaders:
+  """
+  Per-request DataLoaders for users, members and file metadata.
+
+  Obtain it with Depends(get_request_loaders) so every dependency, handler and
+  background task of one request shares the same memoised lookups. Operations that
+  accept loaders=None build a throwaway instance, which still batches within the call.
+  """
+
+  def __init__(
+    self,
+    user_repo: UserRepository | None = None,
+    member_repo: MemberRepository | None = None,
+    file_repo: FileMetadataRepository | None = None,
+  ) -> None:
+    self._user_repo = user_repo
+    self._member_repo = member_repo
+    self._file_repo = file_repo
+
+  @cached_property
+  def users(self) -> DataLoader[str, UserDirectoryEntry]:
+    repo = self._user_repo or UserRepository(USERS_TABLE_NAME)
+
+    def batch(user_ids: list[str]) -> dict[str, UserDirectoryEntry]:
+      try:
+        return lookup_users(user_ids, repo)
+      except Exception as e:
+        # Names and notification addresses are best effort; don't fail the request
+        print(f"Failed to load users {user_ids}: {e}")
+        return {}
+
+    return DataLoader(batch)
+
+  @cached_property
+  def members(self) -> DataLoader[str, Member]:
+    repo = self._member_repo or MemberRepository(MEMBERS_TABLE_NAME)
+
+    def batch(member_codes: list[str]) -> dict[str, Member]:
+      items = repo.batch_get(member_codes)
+      return {code: repo.convert_item_to_object(item) for code, item in items.items()}
+
+    return DataLoader(batch)
+
+  @cached_property
+  def files(self) -> DataLoader[str, FileMetadataFull]:
+    repo = self._file_repo or FileMetadataRepository(UPLOADS_TABLE_NAME)
+
+    def batch(file_ids: list[str]) -> dict[str, FileMetadataFull]:
+      items = repo.batch_get(file_ids)
+      return {file_id: repo.convert_item_to_object_full(item) for file_id, item in items.items()}
+
+    return DataLoader(batch)
+
+  def display_names(self, user_ids) -> dict[str, str]:
+    """Map user IDs to "First Last"; unknown IDs are left out so callers can fall back to the ID."""
+    return {user_id: entry.display_name for user_id, entry in self.users.load_many(user_ids).items()}
+
+
+def get_request_loaders(request: Request) -> RequestLoaders:
+  """FastAPI dependency returning the loaders bound to the current request."""
+  loaders = getattr(request.state, "loaders", None)
+  if loaders is None:
+    loaders = RequestLoaders()
+    request.state.loaders = loaders
+  return loaders
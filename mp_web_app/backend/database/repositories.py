@@ -1,17 +1,31 @@
+import queue
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from typing import Any
 
 from auth.models import TokenPayload
-from database.db_config import get_dynamodb_resource
-from files.models import FileMetadata, FileMetadataFull
+from database.db_config import get_dynamodb_resource, get_dynamodb_settings
+from files.models import FileLabel, FileMetadata, FileMetadataFull, FileShare
 from members.models import Member
 from news.models import News
 from products.models import Product
 from users.models import User, UserSecret
 
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+
 
 class BaseRepository(ABC):
+  # Partition key attribute, used by batch_get to build keys and index results
+  key_name = "id"
+  # Set on tables with a composite primary key; batch_get only handles single-attribute keys
+  sort_key_name: str | None = None
+
   def __init__(self, table_name: str) -> None:
     self.table_name = table_name
     self.dynamodb = get_dynamodb_resource()
@@ -29,6 +43,209 @@ class BaseRepository(ABC):
   def get_table_name(self):
     return self.table_name
 
+  def iter_query(
+    self,
+    key_condition,
+    *,
+    index_name: str | None = None,
+    filter_expression=None,
+    projection: list[str] | None = None,
+    scan_forward: bool = True,
+    limit: int | None = None,
+    page_size: int | None = None,
+    start_key: dict[str, Any] | None = None,
+  ) -> Iterator[dict[str, Any]]:
+    """
+    Yield raw items matching a key condition, fetching one page at a time.
+
+    Args:
+      key_condition: boto3 Key condition for the partition (and optional sort) key
+      index_name: GSI to query instead of the base table
+      filter_expression: boto3 Attr condition applied after the key condition
+      projection: attribute names to return (reserved words are aliased automatically)
+      scan_forward: sort key order, False for newest first on *_created_at indexes
+      limit: stop after yielding this many items
+      page_size: DynamoDB Limit per request (items evaluated, not returned)
+      start_key: ExclusiveStartKey to resume after, e.g. the index key of the last item of a previous page
+    """
+    request = _build_request(filter_expression, projection, page_size)
+    request["KeyConditionExpression"] = key_condition
+    request["ScanIndexForward"] = scan_forward
+    if index_name:
+      request["IndexName"] = index_name
+    if start_key:
+      request["ExclusiveStartKey"] = start_key
+    return _take(_iter_items(self.table.query, request), limit)
+
+  def iter_scan(
+    self,
+    *,
+    filter_expression=None,
+    projection: list[str] | None = None,
+    limit: int | None = None,
+    page_size: int | None = None,
+    segments: int | None = None,
+    max_workers: int | None = None,
+  ) -> Iterator[dict[str, Any]]:
+    """
+    Yield raw items from a full table scan, fetching one page at a time.
+
+    segments defaults to the SCAN_SEGMENTS setting. With segments > 1 the scan is split
+    with Segment/TotalSegments and run on a thread pool. Pages are handed over through a
+    bounded queue, so at most a couple of pages per segment are held in memory regardless
+    of table size. Item order is not stable across segments.
+    """
+    request = _build_request(filter_expression, projection, page_size)
+    if segments is None:
+      segments = get_dynamodb_settings().scan_segments
+    if segments <= 1:
+      return _take(_iter_items(self.table.scan, request), limit)
+    return _take(_iter_parallel_scan(self.table_name, request, segments, max_workers), limit)
+
+  def batch_get(
+    self,
+    keys: Iterable[str],
+    *,
+    projection: list[str] | None = None,
+    max_retries: int = 5,
+    base_delay: float = 0.05,
+  ) -> dict[str, dict[str, Any]]:
+    """
+    Fetch many items by primary key with BatchGetItem.
+
+    Keys are deduplicated and sent in chunks of 100. UnprocessedKeys returned by DynamoDB
+    (throttling, 16 MB response cap) are retried with exponential backoff and jitter.
+
+    Returns:
+      Raw items keyed by primary key value. Keys that do not exist are simply absent.
+    """
+    if self.sort_key_name:
+      raise NotImplementedError(f"batch_get needs a single-attribute key; {self.table_name} also has a sort key")
+    unique_keys = list(dict.fromkeys(key for key in keys if key))
+    if not unique_keys:
+      return {}
+
+    request: dict[str, Any] = {}
+    if projection:
+      # The key attribute is needed to index the results
+      names = list(dict.fromkeys([self.key_name, *projection]))
+      aliases = {f"#p{i}": name for i, name in enumerate(names)}
+      request["ProjectionExpression"] = ", ".join(aliases)
+      request["ExpressionAttributeNames"] = aliases
+
+    items: dict[str, dict[str, Any]] = {}
+    for start in range(0, len(unique_keys), BATCH_GET_MAX_KEYS):
+      chunk = unique_keys[start : start + BATCH_GET_MAX_KEYS]
+      request_items = {self.table_name: {**request, "Keys": [{self.key_name: key} for key in chunk]}}
+      attempt = 0
+      while request_items:
+        response = self.dynamodb.batch_get_item(RequestItems=request_items)
+        for item in response.get("Responses", {}).get(self.table_name, []):
+          items[item[self.key_name]] = item
+        request_items = response.get("UnprocessedKeys") or {}
+        if not request_items:
+          break
+        if attempt >= max_retries:
+          raise RuntimeError(f"BatchGetItem left unprocessed keys on {self.table_name} after {max_retries} retries")
+        time.sleep(random.uniform(0, base_delay * (2**attempt)))
+        attempt += 1
+    return items
+
+
+_SEGMENT_DONE = object()
+
+
+def _build_request(filter_expression, projection: list[str] | None, page_size: int | None) -> dict[str, Any]:
+  request: dict[str, Any] = {}
+  if filter_expression is not None:
+    request["FilterExpression"] = filter_expression
+  if projection:
+    aliases = {f"#p{i}": name for i, name in enumerate(projection)}
+    request["ProjectionExpression"] = ", ".join(aliases)
+    request["ExpressionAttributeNames"] = aliases
+  if page_size:
+    request["Limit"] = page_size
+  return request
+
+
+def _iter_pages(operation, request: dict[str, Any]) -> Iterator[list[dict[str, Any]]]:
+  """Call a query/scan operation until DynamoDB stops returning LastEvaluatedKey."""
+  request = dict(request)
+  while True:
+    response = operation(**request)
+    yield response.get("Items", [])
+    if "LastEvaluatedKey" not in response:
+      return
+    request["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _iter_items(operation, request: dict[str, Any]) -> Iterator[dict[str, Any]]:
+  for page in _iter_pages(operation, request):
+    yield from page
+
+
+def _take(items: Iterator[dict[str, Any]], limit: int | None) -> Iterator[dict[str, Any]]:
+  if limit is None:
+    yield from items
+    return
+  if limit <= 0:
+    return
+  for count, item in enumerate(items, start=1):
+    yield item
+    if count >= limit:
+      return
+
+
+def _iter_parallel_scan(
+  table_name: str, request: dict[str, Any], segments: int, max_workers: int | None
+) -> Iterator[dict[str, Any]]:
+  # Two pages per segment keeps every worker busy without buffering the whole table
+  pages: queue.Queue = queue.Queue(maxsize=segments * 2)
+  stop = threading.Event()
+
+  def put(value) -> bool:
+    while not stop.is_set():
+      try:
+        pages.put(value, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def scan_segment(segment: int) -> None:
+    if stop.is_set():
+      return
+    try:
+      # boto3 resources are not thread-safe, so each pool thread uses its own Table
+      table = get_dynamodb_resource().Table(table_name)
+      segment_request = {**request, "Segment": segment, "TotalSegments": segments}
+      for page in _iter_pages(table.scan, segment_request):
+        if not put(page):
+          return
+    except Exception as e:
+      put(e)
+    finally:
+      put(_SEGMENT_DONE)
+
+  executor = ThreadPoolExecutor(max_workers=max_workers or segments, thread_name_prefix=f"scan-{table_name}")
+  try:
+    for segment in range(segments):
+      executor.submit(scan_segment, segment)
+
+    finished = 0
+    while finished < segments:
+      page = pages.get()
+      if page is _SEGMENT_DONE:
+        finished += 1
+      elif isinstance(page, Exception):
+        raise page
+      else:
+        yield from page
+  finally:
+    # Runs on exhaustion, error, limit reached or the consumer dropping the generator
+    stop.set()
+    executor.shutdown(wait=True, cancel_futures=True)
+
 
 class UserRepository(BaseRepository):
   def convert_item_to_object(self, item: dict[str, Any]) -> User:
@@ -51,6 +268,8 @@ class AuthRepository(BaseRepository):
 
 
 class MemberRepository(BaseRepository):
+  key_name = "member_code"
+
   def convert_item_to_object(self, item: dict[str, Any]):
     """Convert a DynamoDB item to a Member model."""
     return Member(**item)
@@ -66,6 +285,22 @@ class FileMetadataRepository(BaseRepository):
     return FileMetadataFull(**item)
 
 
+class FileShareRepository(BaseRepository):
+  """Convert a share index item to a FileShare model."""
+
+  sort_key_name = "share_key"
+
+  def convert_item_to_object(self, item: dict[str, Any]) -> FileShare:
+    return FileShare(**item)
+
+
+class FileLabelRepository(BaseRepository):
+  """Convert a label registry item to a FileLabel model."""
+
+  def convert_item_to_object(self, item: dict[str, Any]) -> FileLabel:
+    return FileLabel(label=item["label"], usage_count=int(item.get("usage_count", 0)))
+
+
 class NewsRepository(BaseRepository):
   """Convert a DynamoDB item to a News model."""
 
@@ -89,6 +324,60 @@ class ProductRepository(BaseRepository):
     return Product(**item)
 
 
+class InquiryParticipantRepository(BaseRepository):
+  """Convert a participant index item to an InquiryParticipant model."""
+
+  sort_key_name = "inquiry_key"
+
+  def convert_item_to_object(self, item: dict[str, Any]):
+    from inquiries.models import InquiryParticipant
+
+    return InquiryParticipant(**item)
+
+
+class InquiryStatsRepository(BaseRepository):
+  """Convert the inquiry aggregates item to an InquiryStats model."""
+
+  key_name = "stats"
+
+  def convert_item_to_object(self, item: dict[str, Any]):
+    from inquiries.models import InquiryStats, InquiryStatus
+
+    counters = {name: int(value) for name, value in item.items() if name != self.key_name}
+
+    def bucket(prefix: str) -> dict[str, int]:
+      return {name.split("#", 1)[1]: count for name, count in counters.items() if name.startswith(f"{prefix}#")}
+
+    return InquiryStats(
+      total=counters.get("total", 0),
+      by_status={**{status.value: 0 for status in InquiryStatus}, **bucket("status")},
+      by_type=bucket("type"),
+      by_scope=bucket("scope"),
+    )
+
+
+class EmailOutboxRepository(BaseRepository):
+  """Convert an outbox item to an EmailJob model."""
+
+  key_name = "job_id"
+
+  def convert_item_to_object(self, item: dict[str, Any]):
+    from mail.models import EmailJob
+
+    return EmailJob(**item)
+
+
+class NotificationDigestRepository(BaseRepository):
+  """Convert a buffered digest row to a DigestDocument model."""
+
+  sort_key_name = "event_key"
+
+  def convert_item_to_object(self, item: dict[str, Any]):
+    from mail.models import DigestDocument
+
+    return DigestDocument(**item)
+
+
 class InquiryRepository(BaseRepository):
   """Convert a DynamoDB item to an Inquiry model."""
 
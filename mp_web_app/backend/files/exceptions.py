@@ -52,3 +52,20 @@ class MissingAllowedUsersError(Exception):
 
   def __init__(self):
     super().__init__("When [private] is selected allowed users must be specified")
+
+
+class FileTooLargeError(Exception):
+  """Raised when a file exceeds the direct upload size limit."""
+
+  def __init__(self, file_name: str, max_size: int):
+    self.file_name = file_name
+    self.max_size = max_size
+    super().__init__(f"File {file_name} is larger than {max_size // (1024 * 1024)} MB")
+
+
+class FileAlreadyRegisteredError(Exception):
+  """Raised when a file record with the requested ID already exists."""
+
+  def __init__(self, file_id: str):
+    self.file_id = file_id
+    super().__init__(f"File {file_id} is already registered")
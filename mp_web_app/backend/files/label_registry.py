@@ -0,0 +1,82 @@
+import os
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from database.repositories import FileLabelRepository, FileMetadataRepository
+from files.models import FileLabel
+
+FILE_LABELS_TABLE_NAME = os.environ.get("FILE_LABELS_TABLE_NAME")
+
+# All registry items share one partition so the labels endpoint is a single query
+LABEL_PARTITION = "labels"
+
+# Label registry
+# --------------
+# file_labels_table keeps one item per label with usage_count = number of files carrying
+# it. File writes adjust the counters with atomic ADD updates; labels whose count drops to
+# zero are hidden on read. `python -m jobs.rebuild_label_registry` recomputes the counts
+# from uploads_table if they ever drift (see "Derived tables" in files/share_index.py).
+
+
+def get_label_repository() -> FileLabelRepository:
+  return FileLabelRepository(FILE_LABELS_TABLE_NAME)
+
+
+def normalise_labels(labels: Iterable[str] | None) -> set[str]:
+  """Strip labels and drop blanks; a label counts once per file."""
+  return {label.strip() for label in labels or [] if label and label.strip()}
+
+
+def label_deltas(old_labels: Iterable[str] | None, new_labels: Iterable[str] | None) -> dict[str, int]:
+  """Counter changes for a file whose labels go from old_labels to new_labels."""
+  old, new = normalise_labels(old_labels), normalise_labels(new_labels)
+  return {**dict.fromkeys(new - old, 1), **dict.fromkeys(old - new, -1)}
+
+
+def apply_label_deltas(deltas: dict[str, int], label_repo: FileLabelRepository) -> None:
+  for label, delta in deltas.items():
+    label_repo.table.update_item(
+      Key={"registry": LABEL_PARTITION, "label": label},
+      UpdateExpression="ADD usage_count :delta",
+      ExpressionAttributeValues={":delta": delta},
+    )
+
+
+def list_labels(label_repo: FileLabelRepository) -> list[FileLabel]:
+  """Labels in use, most used first (ties alphabetical)."""
+  items = label_repo.iter_query(Key("registry").eq(LABEL_PARTITION), filter_expression=Attr("usage_count").gt(0))
+  labels = [label_repo.convert_item_to_object(item) for item in items]
+  return sorted(labels, key=lambda label: (-label.usage_count, label.label))
+
+
+def count_labels(repo: FileMetadataRepository, segments: int | None = None) -> Counter[str]:
+  """Count label usage across uploads_table with a (parallel) scan."""
+  counts: Counter[str] = Counter()
+  for item in repo.iter_scan(projection=["labels"], segments=segments):
+    counts.update(normalise_labels(item.get("labels")))
+  return counts
+
+
+def rebuild_label_registry(
+  repo: FileMetadataRepository, label_repo: FileLabelRepository, segments: int | None = None
+) -> dict[str, Any]:
+  """
+  Overwrite the registry with counts recomputed from uploads_table.
+
+  Labels no longer used by any file are deleted. File writes that land while the scan
+  runs can be lost from the counts; run it again if uploads were in progress.
+  """
+  counts = count_labels(repo, segments)
+  registered = {item["label"] for item in label_repo.iter_query(Key("registry").eq(LABEL_PARTITION))}
+  stale = registered - set(counts)
+
+  with label_repo.table.batch_writer(overwrite_by_pkeys=["registry", "label"]) as batch:
+    for label, count in counts.items():
+      batch.put_item(Item={"registry": LABEL_PARTITION, "label": label, "usage_count": count})
+    for label in stale:
+      batch.delete_item(Key={"registry": LABEL_PARTITION, "label": label})
+
+  return {"labels": len(counts), "removed": len(stale)}
@@ -40,6 +40,55 @@ class UpdateFileMetadataRequest(BaseModel):
   labels: list[str] | None = None
 
 
+class DirectUploadFile(BaseModel):
+  file_name: str
+  size: int
+  content_type: str | None = None
+
+
+class InitiateUploadRequest(BaseModel):
+  file_type: FileType
+  allowed_to: list[str] = []
+  labels: list[str] = []
+  files: list[DirectUploadFile]
+
+
+class PresignedUpload(BaseModel):
+  file_name: str
+  key: str
+  url: str
+  fields: dict[str, str]  # Send as multipart form fields, followed by the file itself
+
+
+class InitiateUploadResponse(BaseModel):
+  uploads: list[PresignedUpload]
+  expires_in: int
+  max_file_size: int
+
+
+class FinalizeUploadRequest(BaseModel):
+  file_type: FileType
+  allowed_to: list[str] = []
+  labels: list[str] = []
+  keys: list[str]
+
+
+class FileShare(BaseModel):
+  """Row of the share index: one per (recipient, file) pair."""
+
+  user_id: str
+  share_key: str  # "<file created_at>#<file id>", so a recipient's shares sort newest first
+  file_id: str
+  created_at: str
+
+
+class FileLabel(BaseModel):
+  """Label registry entry: how many files currently carry the label."""
+
+  label: str
+  usage_count: int
+
+
 class SharedFileAuditEntry(BaseModel):
   file_id: str
   file_name: str | None = None
@@ -1,33 +1,61 @@
 import os
 from datetime import datetime
 from functools import lru_cache
-from uuid import uuid4
+from typing import Any
+from uuid import NAMESPACE_URL, uuid4, uuid5
 
-import boto3
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
 from fastapi import UploadFile
-from fastapi.responses import StreamingResponse
 
-from app_config import FRONTEND_BASE_URL, AllowedFileExtensions
-from database.repositories import FileMetadataRepository, UserRepository
+from app_config import FRONTEND_BASE_URL, AllowedFileExtensions, DirectUploadSettings
+from database.loaders import RequestLoaders
+from database.repositories import FileLabelRepository, FileMetadataRepository, FileShareRepository, UserRepository
 from files.exceptions import (
   FileAccessDeniedError,
+  FileAlreadyRegisteredError,
   FileNotFoundError,
+  FileTooLargeError,
   FileUploadError,
   InvalidFileExtensionError,
   InvalidMetadataError,
   MetadataError,
   MissingAllowedUsersError,
 )
-from files.models import FileMetadata, FileMetadataFull, FileType, SharedFileAuditEntry, UpdateFileMetadataRequest
-from users.models import User
+from files.label_registry import apply_label_deltas, get_label_repository, label_deltas, list_labels
+from files.models import (
+  FileMetadata,
+  FileMetadataFull,
+  FileType,
+  FinalizeUploadRequest,
+  InitiateUploadRequest,
+  InitiateUploadResponse,
+  PresignedUpload,
+  SharedFileAuditEntry,
+  UpdateFileMetadataRequest,
+)
+from files.share_index import (
+  get_share_repository,
+  index_shares,
+  iter_all_shares,
+  iter_user_shares,
+  load_shared_files,
+  unindex_shares,
+)
+from users.models import NotificationMode, User
+from users.operations import get_user_display_names
 from users.roles import UserRole
+from utils.aws_clients import get_client
 from utils.decorators import retry
+from utils.downloads import DownloadMode, serve_s3_object
 
 BUCKET = os.environ.get("UPLOADS_BUCKET")
 UPLOADS_TABLE_NAME = os.environ.get("UPLOADS_TABLE_NAME")
 USERS_TABLE_NAME = os.environ.get("USERS_TABLE_NAME")
 
+# S3 user metadata stamped on direct uploads; finalize only accepts objects the caller uploaded
+UPLOADED_BY_METADATA = "uploaded-by"
+
 # Maps each FileType value to its Bulgarian display name and frontend route path
 FILE_TYPE_DISPLAY: dict[str, dict] = {
   "governing_documents": {"bg": "Нормативни документи", "route": "governing-documents"},
@@ -38,6 +66,11 @@ FILE_TYPE_DISPLAY: dict[str, dict] = {
   "others": {"bg": "Други документи", "route": "others"},
   "private_documents": {"bg": "Лични документи", "route": "mydocuments"},
 }
+# Category heading for files shared with the recipient in combined emails
+SHARED_DISPLAY = "Споделени с вас"
+
+# Roles that hear about accounting uploads
+GOVERNANCE_ROLES = {UserRole.BOARD.value, UserRole.CONTROL.value, UserRole.ACCOUNTANT.value, UserRole.ADMIN.value}
 
 
 @lru_cache
@@ -46,7 +79,7 @@ def get_allowed_file_extensions():
   return AllowedFileExtensions().allowed_file_extensions
 
 
-def _enrich_with_user_names(files_metadata: list[FileMetadata]):
+def _enrich_with_user_names(files_metadata: list[FileMetadata], loaders: RequestLoaders | None = None):
   """Enrich file metadata with uploader names."""
   if not files_metadata:
     return
@@ -56,19 +89,8 @@ def _enrich_with_user_names(files_metadata: list[FileMetadata]):
   if not user_ids:
     return
 
-  # Fetch users and create a map
-  user_repo = UserRepository(USERS_TABLE_NAME)
-  users_map = {}
-
-  for user_id in user_ids:
-    try:
-      response = user_repo.table.get_item(Key={"id": user_id})
-      if "Item" in response:
-        user = user_repo.convert_item_to_object(response["Item"])
-        users_map[user.id] = f"{user.first_name} {user.last_name}"
-    except Exception:
-      # If fetch fails, continue without this user's name
-      continue
+  # Fetch all uploaders in one batched lookup, memoised for the rest of the request
+  users_map = (loaders or RequestLoaders()).display_names(user_ids)
 
   # Enrich file metadata with user names
   for fm in files_metadata:
@@ -76,28 +98,29 @@ def _enrich_with_user_names(files_metadata: list[FileMetadata]):
       fm.uploaded_by_name = users_map.get(fm.uploaded_by, fm.uploaded_by)
 
 
-def get_existing_labels(repo: FileMetadataRepository) -> list[str]:
-  """Scan uploads table and return a sorted deduplicated list of all label strings."""
+def get_existing_labels(label_repo: FileLabelRepository) -> list[str]:
+  """Return every label in use from the label registry, most used first."""
   try:
-    items: list[dict] = []
-    response = repo.table.scan(ProjectionExpression="labels")
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-      response = repo.table.scan(
-        ProjectionExpression="labels",
-        ExclusiveStartKey=response["LastEvaluatedKey"],
-      )
-      items.extend(response.get("Items", []))
+    return [label.label for label in list_labels(label_repo)]
   except Exception as e:
-    raise MetadataError(f"Failed to scan labels: {e}")
+    raise MetadataError(f"Failed to read labels: {e}")
 
-  label_set: set[str] = set()
-  for item in items:
-    for lbl in item.get("labels") or []:
-      if lbl and lbl.strip():
-        label_set.add(lbl.strip())
 
-  return sorted(label_set)
+def _update_label_counts(old_labels, new_labels, label_repo: FileLabelRepository | None, file_id: str) -> None:
+  deltas = label_deltas(old_labels, new_labels)
+  if not deltas:
+    return
+  try:
+    apply_label_deltas(deltas, label_repo or get_label_repository())
+  except Exception as e:
+    # Counts drift until the next `python -m jobs.rebuild_label_registry`
+    print(f"Failed to update label counts for file {file_id}: {e}")
+
+
+@lru_cache
+def get_direct_upload_settings() -> DirectUploadSettings:
+  """Get presigned upload settings from environment variables."""
+  return DirectUploadSettings()
 
 
 def get_uploads_repository():
@@ -106,7 +129,7 @@ def get_uploads_repository():
 
 @retry()
 def upload_file(file_metadata: FileMetadata, file: UploadFile, user_id: str, repo: FileMetadataRepository):
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     file_name = _create_file_name(file.filename)
     key = f"{file_metadata.file_type.value}/{file_name}"
@@ -117,13 +140,20 @@ def upload_file(file_metadata: FileMetadata, file: UploadFile, user_id: str, rep
 
 
 def create_file_metadata(
-  file_metadata: FileMetadata, new_file_name: str, key: str, user_id: str, repo: FileMetadataRepository
+  file_metadata: FileMetadata,
+  new_file_name: str,
+  key: str,
+  user_id: str,
+  repo: FileMetadataRepository,
+  file_id: str | None = None,
+  share_repo: FileShareRepository | None = None,
+  label_repo: FileLabelRepository | None = None,
 ) -> FileMetadata:
   if file_metadata.file_type == "private" and not file_metadata.allowed_to:
     raise MissingAllowedUsersError()
   allowed_to = file_metadata.allowed_to if file_metadata.allowed_to else None
   file_metadata_item = {
-    "id": str(uuid4()),
+    "id": file_id or str(uuid4()),
     "file_name": new_file_name,
     "file_type": file_metadata.file_type,
     "bucket": BUCKET,
@@ -135,37 +165,145 @@ def create_file_metadata(
     "updated_by": user_id,
     "labels": file_metadata.labels if file_metadata.labels else None,
   }
+  put = {"Item": file_metadata_item}
+  if file_id:
+    # A caller-supplied ID is stable across retries, so only the first write may land
+    put["ConditionExpression"] = Attr("id").not_exists()
   try:
-    repo.table.put_item(Item=file_metadata_item)
+    repo.table.put_item(**put)
+  except ClientError as e:
+    if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+      raise FileAlreadyRegisteredError(file_metadata_item["id"])
+    raise MetadataError(f"Failed to create metadata: {e}")
   except Exception as e:
     raise MetadataError(f"Failed to create metadata: {e}")
+
+  _update_label_counts(None, file_metadata_item["labels"], label_repo, file_metadata_item["id"])
+  if allowed_to:
+    try:
+      index_shares(file_metadata_item, allowed_to, share_repo or get_share_repository())
+    except Exception as e:
+      # The file record is written; the share index backfill picks up the missing rows
+      print(f"Failed to index shares for file {file_metadata_item['id']}: {e}")
   return repo.convert_item_to_object_full(file_metadata_item)
 
 
+def initiate_direct_upload(request: InitiateUploadRequest, user_id: str) -> InitiateUploadResponse:
+  """
+  Validate the requested files and return a presigned POST policy for each.
+
+  The browser posts the file straight to S3; the policy pins the key, content type,
+  size range and the uploader metadata that finalize_direct_upload checks.
+  """
+  if request.file_type == FileType.private_documents and not request.allowed_to:
+    raise MissingAllowedUsersError()
+
+  import mimetypes
+
+  settings = get_direct_upload_settings()
+  s3 = get_client("s3")
+  uploads = []
+  for spec in request.files:
+    if spec.size > settings.max_file_size_bytes:
+      raise FileTooLargeError(spec.file_name, settings.max_file_size_bytes)
+
+    file_name = _create_file_name(spec.file_name)
+    key = f"{request.file_type.value}/{file_name}"
+    content_type = spec.content_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    fields = {"Content-Type": content_type, f"x-amz-meta-{UPLOADED_BY_METADATA}": user_id}
+    conditions = [
+      {"Content-Type": content_type},
+      {f"x-amz-meta-{UPLOADED_BY_METADATA}": user_id},
+      ["content-length-range", 1, settings.max_file_size_bytes],
+    ]
+    try:
+      post = s3.generate_presigned_post(
+        BUCKET, key, Fields=fields, Conditions=conditions, ExpiresIn=settings.expires_seconds
+      )
+    except Exception as e:
+      raise FileUploadError(f"Failed to prepare upload for {spec.file_name}: {e}")
+    uploads.append(PresignedUpload(file_name=file_name, key=key, url=post["url"], fields=post["fields"]))
+
+  return InitiateUploadResponse(
+    uploads=uploads, expires_in=settings.expires_seconds, max_file_size=settings.max_file_size_bytes
+  )
+
+
+def finalize_direct_upload(
+  request: FinalizeUploadRequest, user_id: str, repo: FileMetadataRepository
+) -> tuple[list[FileMetadataFull], list[FileMetadataFull]]:
+  """
+  Register directly uploaded objects in the uploads table.
+
+  Each key must exist in S3 and carry the caller's uploader metadata. The record ID is
+  derived from the key and ETag, so a retried finalize finds the record the first call
+  wrote and returns it unchanged, without counting labels or indexing shares again.
+
+  Returns every record for the request and, separately, the ones this call created.
+  """
+  if request.file_type == FileType.private_documents and not request.allowed_to:
+    raise MissingAllowedUsersError()
+
+  s3 = get_client("s3")
+  prefix = f"{request.file_type.value}/"
+  results, created = [], []
+  for key in request.keys:
+    file_name = key.removeprefix(prefix)
+    if not key.startswith(prefix) or "/" in file_name:
+      raise FileUploadError(f"Key {key} is not a {request.file_type.value} upload")
+    _create_file_name(file_name)
+
+    try:
+      head = s3.head_object(Bucket=BUCKET, Key=key)
+    except ClientError as e:
+      if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+        raise FileNotFoundError(f"Upload {file_name} not found")
+      raise FileUploadError(f"Failed to verify upload {file_name}: {e.response['Error']['Message']}")
+
+    if head.get("Metadata", {}).get(UPLOADED_BY_METADATA) != user_id:
+      raise FileAccessDeniedError(file_name)
+
+    file_metadata = FileMetadataFull(
+      file_type=request.file_type,
+      allowed_to=request.allowed_to,
+      labels=request.labels or None,
+      uploaded_by=user_id,
+      created_at=datetime.now().isoformat(),
+    )
+    file_id = str(uuid5(NAMESPACE_URL, f"s3://{BUCKET}/{key}#{head.get('ETag', '')}"))
+    try:
+      record = create_file_metadata(file_metadata, file_name, key, user_id, repo, file_id=file_id)
+    except FileAlreadyRegisteredError:
+      item = repo.table.get_item(Key={"id": file_id}, ConsistentRead=True).get("Item")
+      if not item:
+        raise MetadataError(f"Failed to read metadata for {file_name}")
+      results.append(repo.convert_item_to_object_full(item))
+      continue
+    results.append(record)
+    created.append(record)
+  return results, created
+
+
 def get_files_metadata(
-  file_type: str, repo: FileMetadataRepository, user_id: str | None = None, include_allowed_to: bool = False
+  file_type: str,
+  repo: FileMetadataRepository,
+  user_id: str | None = None,
+  include_allowed_to: bool = False,
+  share_repo: FileShareRepository | None = None,
 ):
   try:
-    response = repo.table.query(
-      IndexName="file_type_created_at_index",
-      KeyConditionExpression=Key("file_type").eq(file_type),
-      ScanIndexForward=False,
-    )
-    items = response["Items"]
-
-    while "LastEvaluatedKey" in response:
-      response = repo.table.query(
-        IndexName="file_type_created_at_index",
-        KeyConditionExpression=Key("file_type").eq(file_type),
-        ScanIndexForward=False,
-        ExclusiveStartKey=response["LastEvaluatedKey"],
-      )
-      items.extend(response["Items"])
-
-    # Private documents are only visible to users explicitly listed in allowed_to
+    # Private documents are only visible to users explicitly listed in allowed_to, so read
+    # them from the caller's share index partition instead of every private document.
     # Admins (include_allowed_to=True) bypass this filter and see all private documents
     if file_type == FileType.private_documents.value and user_id and not include_allowed_to:
-      items = [item for item in items if user_id in (item.get("allowed_to") or [])]
+      shares = iter_user_shares(user_id, share_repo or get_share_repository())
+      items = (item for _, item in load_shared_files(shares, repo) if item.get("file_type") == file_type)
+    else:
+      items = repo.iter_query(
+        Key("file_type").eq(file_type),
+        index_name="file_type_created_at_index",
+        scan_forward=False,
+      )
 
     if include_allowed_to:
       files_metadata = [repo.convert_item_to_object_full(item) for item in items]
@@ -182,7 +320,12 @@ def get_files_metadata(
 
 
 def update_file_metadata(
-  file_id: str, request: UpdateFileMetadataRequest, user_id: str, repo: FileMetadataRepository
+  file_id: str,
+  request: UpdateFileMetadataRequest,
+  user_id: str,
+  repo: FileMetadataRepository,
+  loaders: RequestLoaders | None = None,
+  label_repo: FileLabelRepository | None = None,
 ) -> FileMetadata:
   """Update file_name and file_type of an existing file record."""
   try:
@@ -204,7 +347,7 @@ def update_file_metadata(
   has_labels = bool(request.labels)
 
   if old_file_type != new_file_type and old_key:
-    s3 = boto3.client("s3")
+    s3 = get_client("s3")
     # Build new key: replace first path segment with new file_type
     key_parts = old_key.split("/", 1)
     new_key = f"{new_file_type}/{key_parts[1]}" if len(key_parts) == 2 else f"{new_file_type}/{old_key}"
@@ -254,38 +397,39 @@ def update_file_metadata(
       ExpressionAttributeValues=expr_values,
     )
 
+  _update_label_counts(item.get("labels"), request.labels, label_repo, file_id)
+
   updated = repo.table.get_item(Key={"id": file_id})["Item"]
   result = repo.convert_item_to_object(updated)
-  _enrich_with_user_names([result])
-  _enrich_updated_by_names([result])
+  # Queue uploader and updater together so both names come back in one lookup
+  loaders = loaders or RequestLoaders()
+  loaders.users.prime([result.uploaded_by, result.updated_by])
+  _enrich_with_user_names([result], loaders)
+  _enrich_updated_by_names([result], loaders)
   return result
 
 
-def _enrich_updated_by_names(files_metadata: list[FileMetadata]):
+def _enrich_updated_by_names(files_metadata: list[FileMetadata], loaders: RequestLoaders | None = None):
   """Enrich file metadata with updater names."""
   if not files_metadata:
     return
   user_ids = {fm.updated_by for fm in files_metadata if fm.updated_by}
   if not user_ids:
     return
-  user_repo = UserRepository(USERS_TABLE_NAME)
-  users_map = {}
-  for user_id in user_ids:
-    try:
-      response = user_repo.table.get_item(Key={"id": user_id})
-      if "Item" in response:
-        user = user_repo.convert_item_to_object(response["Item"])
-        users_map[user.id] = f"{user.first_name} {user.last_name}"
-    except Exception:
-      continue
+  users_map = (loaders or RequestLoaders()).display_names(user_ids)
   for fm in files_metadata:
     if fm.updated_by:
       fm.updated_by_name = users_map.get(fm.updated_by, fm.updated_by)
 
 
-def delete_file(file_id: str, repo: FileMetadataRepository) -> bool:
+def delete_file(
+  file_id: str,
+  repo: FileMetadataRepository,
+  share_repo: FileShareRepository | None = None,
+  label_repo: FileLabelRepository | None = None,
+) -> bool:
   """Delete a single file by ID."""
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
 
   try:
     response = repo.table.get_item(Key={"id": file_id})
@@ -295,13 +439,20 @@ def delete_file(file_id: str, repo: FileMetadataRepository) -> bool:
     db_metadata = repo.convert_item_to_object_full(response["Item"])
     s3.delete_object(Bucket=db_metadata.bucket, Key=db_metadata.key)
     repo.table.delete_item(Key={"id": file_id})
-
-    return True
   except FileNotFoundError:
     raise
   except Exception as e:
     raise FileUploadError(f"Error when deleting the file: {e}")
 
+  _update_label_counts(db_metadata.labels, None, label_repo, file_id)
+  if db_metadata.allowed_to:
+    try:
+      unindex_shares(response["Item"], db_metadata.allowed_to, share_repo or get_share_repository())
+    except Exception as e:
+      # Readers skip rows whose file is gone, so a leftover row only costs a lookup
+      print(f"Failed to remove share index rows for file {file_id}: {e}")
+  return True
+
 
 def _create_file_name(original_name: str) -> str:
   allowed = get_allowed_file_extensions()
@@ -313,7 +464,12 @@ def _create_file_name(original_name: str) -> str:
   return file_name
 
 
-def download_file(file_metadata: FileMetadata | list[FileMetadata], user: User, repo: FileMetadataRepository):
+def download_file(
+  file_metadata: FileMetadata | list[FileMetadata],
+  user: User,
+  repo: FileMetadataRepository,
+  mode: DownloadMode | None = None,
+):
   file_meta_object = get_db_metadata(file_metadata, repo)
 
   # All logged-in users should have access to their allowed files
@@ -324,23 +480,12 @@ def download_file(file_metadata: FileMetadata | list[FileMetadata], user: User,
   if not is_allowed:
     raise FileAccessDeniedError(file_meta_object.file_name)
 
-  s3 = boto3.client("s3")
   try:
-    s3_object = s3.get_object(Bucket=file_meta_object.bucket, Key=file_meta_object.key)
-    file_stream = s3_object["Body"]
-
-    # Properly encode filename for Cyrillic and other Unicode characters
-    from urllib.parse import quote
-
-    encoded_filename = quote(file_meta_object.file_name)
-
-    return StreamingResponse(
-      file_stream,
-      media_type="application/octet-stream",
-      headers={"Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"},
-    )
-  except s3.exceptions.NoSuchKey:
-    raise FileNotFoundError("File not found")
+    return serve_s3_object(file_meta_object.bucket, file_meta_object.key, file_meta_object.file_name, mode)
+  except ClientError as e:
+    if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+      raise FileNotFoundError("File not found")
+    raise
 
 
 @retry()
@@ -408,71 +553,55 @@ def _check_file_allowed_to_user(file_metadata: FileMetadata, user_id: str, user_
   return False
 
 
-def get_shared_files_audit(repo: FileMetadataRepository, user_repo: UserRepository) -> list[SharedFileAuditEntry]:
-  """Scan uploads table and return one entry per (file, recipient) pair where allowed_to is non-empty."""
+def get_shared_files_audit(
+  repo: FileMetadataRepository, user_repo: UserRepository, share_repo: FileShareRepository | None = None
+) -> list[SharedFileAuditEntry]:
+  """Return one entry per (file, recipient) pair from the share index, newest file first."""
   try:
-    items = []
-    response = repo.table.scan()
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-      response = repo.table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
-      items.extend(response.get("Items", []))
+    shared_pairs = load_shared_files(iter_all_shares(share_repo or get_share_repository()), repo)
   except Exception as e:
-    raise MetadataError(f"Failed to scan uploads table: {e}")
-
-  # Filter to records with a non-empty allowed_to list
-  shared_items = [item for item in items if item.get("allowed_to")]
+    raise MetadataError(f"Failed to read share index: {e}")
 
-  if not shared_items:
+  if not shared_pairs:
     return []
 
   # Collect all user IDs that need resolving (uploaders + all recipients)
   user_ids: set[str] = set()
-  for item in shared_items:
+  for recipient_id, item in shared_pairs:
+    user_ids.add(recipient_id)
     if item.get("uploaded_by"):
       user_ids.add(item["uploaded_by"])
-    for uid in item.get("allowed_to", []):
-      user_ids.add(uid)
 
   # Batch-resolve names
-  users_map: dict[str, str] = {}
-  for uid in user_ids:
-    try:
-      resp = user_repo.table.get_item(Key={"id": uid})
-      if "Item" in resp:
-        user = user_repo.convert_item_to_object(resp["Item"])
-        users_map[uid] = f"{user.first_name} {user.last_name}"
-    except Exception:
-      continue
+  users_map = get_user_display_names(user_ids, user_repo)
 
-  # Expand each file into one entry per recipient
   entries: list[SharedFileAuditEntry] = []
-  for item in shared_items:
-    file_id = item.get("id", "")
-    file_name = item.get("file_name")
-    file_type = item.get("file_type")
+  for recipient_id, item in shared_pairs:
     uploaded_by_id = item.get("uploaded_by")
-    created_at = item.get("created_at", "")
-
-    for recipient_id in item.get("allowed_to", []):
-      entries.append(
-        SharedFileAuditEntry(
-          file_id=file_id,
-          file_name=file_name,
-          file_type=file_type,
-          uploaded_by_id=uploaded_by_id,
-          uploaded_by_name=users_map.get(uploaded_by_id, uploaded_by_id) if uploaded_by_id else None,
-          created_at=created_at,
-          shared_with_id=recipient_id,
-          shared_with_name=users_map.get(recipient_id, recipient_id),
-          labels=item.get("labels") or None,
-        )
+    entries.append(
+      SharedFileAuditEntry(
+        file_id=item.get("id", ""),
+        file_name=item.get("file_name"),
+        file_type=item.get("file_type"),
+        uploaded_by_id=uploaded_by_id,
+        uploaded_by_name=users_map.get(uploaded_by_id, uploaded_by_id) if uploaded_by_id else None,
+        created_at=item.get("created_at", ""),
+        shared_with_id=recipient_id,
+        shared_with_name=users_map.get(recipient_id, recipient_id),
+        labels=item.get("labels") or None,
       )
+    )
 
   return entries
 
 
-def revoke_share(file_id: str, user_id: str, repo: FileMetadataRepository, actor_id: str | None = None) -> list[str]:
+def revoke_share(
+  file_id: str,
+  user_id: str,
+  repo: FileMetadataRepository,
+  actor_id: str | None = None,
+  share_repo: FileShareRepository | None = None,
+) -> list[str]:
   """Remove a specific user from a file's allowed_to list. Returns the remaining allowed_to list."""
   try:
     response = repo.table.get_item(Key={"id": file_id})
@@ -509,104 +638,164 @@ def revoke_share(file_id: str, user_id: str, repo: FileMetadataRepository, actor
   except Exception as e:
     raise MetadataError(f"Failed to revoke share: {e}")
 
+  try:
+    unindex_shares(response["Item"], [user_id], share_repo or get_share_repository())
+  except Exception as e:
+    # Readers re-check allowed_to, so the stale row no longer grants access
+    print(f"Failed to remove share index row for file {file_id}, user {user_id}: {e}")
+
   remaining = [u for u in allowed_to if u != user_id]
   return remaining
 
 
-def notify_shared_users(file_metadata: FileMetadataFull, user_repo: UserRepository) -> None:
-  """Send a personal share notification email to each user in file_metadata.allowed_to."""
-  from mail.operations import send_file_share_notification
-  from users.operations import get_user_by_id
+def queue_upload_notifications(uploads: list[FileMetadataFull]) -> None:
+  """
+  Queue the notifications for freshly uploaded files in one outbox write.
+
+  One "upload" job for the whole batch (private documents excluded) plus one "file_share"
+  job per user in any allowed_to, listing every file shared with them, so a multi-file
+  upload reaches each recipient as one email. Never raises: the upload has already succeeded.
+  """
+  from mail.outbox import queue_emails
+
+  files = [
+    {"file_name": upload.file_name, "file_type": upload.file_type.value}
+    for upload in uploads
+    if upload.file_type != FileType.private_documents
+  ]
+  shared: dict[str, list[str | None]] = {}
+  for upload in uploads:
+    for user_id in upload.allowed_to or []:
+      shared.setdefault(user_id, []).append(upload.file_name)
+
+  jobs = [("upload", {"files": files})] if files else []
+  jobs.extend(("file_share", {"user_id": user_id, "files": file_names}) for user_id, file_names in shared.items())
+  try:
+    queue_emails(jobs)
+  except Exception as e:
+    print(f"Failed to queue upload notifications: {e}")
+
+
+def queue_share_notifications(file_name: str | None, user_ids: list[str]) -> None:
+  """Queue a share notification for each newly added user. Never raises."""
+  from mail.outbox import queue_emails
+
+  try:
+    queue_emails(("file_share", {"user_id": user_id, "files": [file_name]}) for user_id in user_ids)
+  except Exception as e:
+    print(f"Failed to queue file share notifications: {e}")
+
+
+def deliver_upload_notification(params: dict[str, Any]) -> None:
+  """
+  Outbox handler for "upload" jobs: the broadcast only, shares are separate jobs. Raises
+  on failure so the job is retried.
+  """
+  from users.operations import get_user_repository
+
+  # Jobs queued before batching carried a single file_name + file_type
+  notify_uploads(params.get("files") or [params], get_user_repository())
+
 
-  if not file_metadata.allowed_to:
+def deliver_share_notification(params: dict[str, Any]) -> None:
+  """Outbox handler for "file_share" jobs. Raises on failure so the job is retried."""
+  from mail.digest import buffer_documents
+  from mail.operations import send_documents_digest, send_file_share_notification
+  from users.operations import get_user_by_id, get_user_repository
+
+  user = get_user_by_id(params["user_id"], get_user_repository())
+  file_names = params.get("files") or [params["file_name"]]
+  if user.notification_mode == NotificationMode.OFF:
     return
+  if user.notification_mode == NotificationMode.DAILY:
+    buffer_documents(user.id, [_shared_document(file_name) for file_name in file_names])
+  elif len(file_names) == 1:
+    send_file_share_notification(
+      email=user.email,
+      file_name=file_names[0],
+      download_link=f"{FRONTEND_BASE_URL}/mydocuments",
+    )
+  else:
+    send_documents_digest(user.email, [_shared_document(file_name) for file_name in file_names])
 
-  download_link = f"{FRONTEND_BASE_URL}/mydocuments"
 
-  for user_id in file_metadata.allowed_to:
-    try:
-      user = get_user_by_id(user_id, user_repo)
-      send_file_share_notification(
-        email=user.email,
-        file_name=file_metadata.file_name,
-        download_link=download_link,
-      )
-    except Exception as e:
-      print(f"Failed to send file share notification to user {user_id}: {e}")
-      continue
+def _document(file_name: str | None, file_type: str) -> dict[str, str]:
+  """A new document as the notification emails list it: name, category and its page."""
+  file_info = FILE_TYPE_DISPLAY.get(file_type, {"bg": file_type, "route": "home"})
+  return {
+    "file_name": file_name or "",
+    "category_bg": file_info["bg"],
+    "documents_link": f"{FRONTEND_BASE_URL}/{file_info['route']}",
+  }
+
+
+def _shared_document(file_name: str | None) -> dict[str, str]:
+  return {
+    "file_name": file_name or "",
+    "category_bg": SHARED_DISPLAY,
+    "documents_link": f"{FRONTEND_BASE_URL}/mydocuments",
+  }
 
 
-def notify_upload(file_metadata: FileMetadataFull, user_repo: UserRepository) -> None:
-  """Broadcast an upload notification to eligible subscribed users, then send personal share emails if needed.
+def notify_uploads(files: list[dict[str, Any]], user_repo: UserRepository) -> None:
+  """
+  Tell subscribed users about a batch of uploaded files ({"file_name", "file_type"} each).
 
   Routing rules:
   - private_documents: no broadcast; personal share only (handled by allowed_to list)
   - accounting: broadcast to governance roles (board, control, accountant, admin) only
   - all other types: broadcast to all subscribed users
 
-  After broadcasting, if allowed_to is non-empty, also sends personal share emails.
+  Per notification_mode, users set to off are skipped, daily users get the files buffered
+  for their digest, and immediate users get one email for the batch: the single-file
+  notification, or one message listing every file they may see by category. Failures
+  propagate, for the outbox to retry; recipients who can't be reached individually are
+  counted in the broadcast report instead.
   """
-  from mail.operations import send_upload_notification
+  from mail.digest import buffer_documents
+  from mail.operations import send_documents_broadcast, send_upload_broadcast
   from users.operations import get_subscribed_users
 
-  file_type = file_metadata.file_type.value
-  file_info = FILE_TYPE_DISPLAY.get(file_type, {"bg": file_type, "route": "home"})
-  category_bg = file_info["bg"]
-  documents_link = f"{FRONTEND_BASE_URL}/{file_info['route']}"
+  # private_documents: skip broadcast entirely — only personal share emails apply
+  files = [file for file in files if file["file_type"] != FileType.private_documents.value]
+  if not files:
+    return
+  documents = [_document(file["file_name"], file["file_type"]) for file in files]
 
-  governance_roles = {
-    UserRole.BOARD.value,
-    UserRole.CONTROL.value,
-    UserRole.ACCOUNTANT.value,
-    UserRole.ADMIN.value,
-  }
+  subscribed_users = get_subscribed_users(user_repo)
 
-  # private_documents: skip broadcast entirely — only personal share emails apply
-  if file_type != FileType.private_documents.value:
-    try:
-      subscribed_users = get_subscribed_users(user_repo)
-    except Exception as e:
-      print(f"Failed to fetch subscribed users for upload notification: {e}")
-      subscribed_users = []
-
-    for user in subscribed_users:
-      # Accounting files: governance roles only
-      if file_type == FileType.accounting.value and user.role not in governance_roles:
-        continue
-      try:
-        send_upload_notification(
-          email=user.email,
-          file_name=file_metadata.file_name,
-          category_bg=category_bg,
-          documents_link=documents_link,
-        )
-      except Exception as e:
-        print(f"Failed to send upload notification to {user.email}: {e}")
-        continue
-
-  # Always send personal share emails to users explicitly listed in allowed_to
-  if file_metadata.allowed_to:
-    notify_shared_users(file_metadata, user_repo)
-
-
-def get_files_shared_with_user(user_id: str, repo: FileMetadataRepository) -> list[FileMetadata]:
-  """Return all files where the given user_id appears in allowed_to, regardless of file_type."""
-  try:
-    items = []
-    response = repo.table.scan(
-      FilterExpression="contains(allowed_to, :uid)",
-      ExpressionAttributeValues={":uid": user_id},
+  # Users who may see the same files get the same message: one broadcast per file set
+  recipients: dict[tuple[int, ...], list[str]] = {}
+  for user in subscribed_users:
+    if user.notification_mode == NotificationMode.OFF:
+      continue
+    # Accounting files: governance roles only
+    visible = tuple(
+      i
+      for i, file in enumerate(files)
+      if file["file_type"] != FileType.accounting.value or user.role in GOVERNANCE_ROLES
     )
-    items.extend(response.get("Items", []))
-    while "LastEvaluatedKey" in response:
-      response = repo.table.scan(
-        FilterExpression="contains(allowed_to, :uid)",
-        ExpressionAttributeValues={":uid": user_id},
-        ExclusiveStartKey=response["LastEvaluatedKey"],
-      )
-      items.extend(response.get("Items", []))
+    if not visible:
+      continue
+    if user.notification_mode == NotificationMode.DAILY:
+      buffer_documents(user.id, [documents[i] for i in visible])
+      continue
+    recipients.setdefault(visible, []).append(user.email)
 
-    files_metadata = [repo.convert_item_to_object(item) for item in items]
+  for visible, emails in recipients.items():
+    if len(visible) == 1:
+      send_upload_broadcast(emails, **documents[visible[0]])
+    else:
+      send_documents_broadcast(emails, [documents[i] for i in visible])
+
+
+def get_files_shared_with_user(
+  user_id: str, repo: FileMetadataRepository, share_repo: FileShareRepository | None = None
+) -> list[FileMetadata]:
+  """Return all files where the given user_id appears in allowed_to, regardless of file_type."""
+  try:
+    shared = load_shared_files(iter_user_shares(user_id, share_repo or get_share_repository()), repo)
+    files_metadata = [repo.convert_item_to_object(item) for _, item in shared]
     _enrich_with_user_names(files_metadata)
     return files_metadata
   except Exception as e:
@@ -614,7 +803,11 @@ def get_files_shared_with_user(user_id: str, repo: FileMetadataRepository) -> li
 
 
 def add_share(
-  file_id: str, user_ids: list[str], repo: FileMetadataRepository, actor_id: str | None = None
+  file_id: str,
+  user_ids: list[str],
+  repo: FileMetadataRepository,
+  actor_id: str | None = None,
+  share_repo: FileShareRepository | None = None,
 ) -> list[str]:
   """Append new user IDs to a file's allowed_to list. Returns the updated allowed_to list."""
   try:
@@ -628,6 +821,12 @@ def add_share(
   existing: list[str] = response["Item"].get("allowed_to") or []
   new_ids = [uid for uid in user_ids if uid not in existing]
 
+  # Index every requested recipient, not just new ones, so re-sharing repairs a missing row
+  try:
+    index_shares(response["Item"], user_ids, share_repo or get_share_repository())
+  except Exception as e:
+    raise MetadataError(f"Failed to update share index: {e}")
+
   if not new_ids:
     return existing
 
@@ -1,22 +1,28 @@
 import os
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 
 from auth.operations import role_required
-from database.repositories import FileMetadataRepository, UserRepository
+from database.loaders import RequestLoaders, get_request_loaders
+from database.repositories import FileLabelRepository, FileMetadataRepository, UserRepository
 from files.exceptions import (
   FileAccessDeniedError,
   FileNotFoundError,
+  FileTooLargeError,
   FileUploadError,
   InvalidFileExtensionError,
   InvalidMetadataError,
   MetadataError,
   MissingAllowedUsersError,
 )
+from files.label_registry import get_label_repository
 from files.models import (
   FileMetadata,
   FileMetadataFull,
   FileType,
+  FinalizeUploadRequest,
+  InitiateUploadRequest,
+  InitiateUploadResponse,
   SharedFileAuditEntry,
   ShareFileRequest,
   ShareFileResponse,
@@ -26,13 +32,15 @@ from files.operations import (
   add_share,
   delete_file,
   download_file,
+  finalize_direct_upload,
   get_existing_labels,
   get_files_metadata,
   get_files_shared_with_user,
   get_shared_files_audit,
   get_uploads_repository,
-  notify_shared_users,
-  notify_upload,
+  initiate_direct_upload,
+  queue_share_notifications,
+  queue_upload_notifications,
   revoke_share,
   update_file_metadata,
   upload_file,
@@ -46,33 +54,33 @@ def get_users_repository():
 
 
 from users.roles import UserRole
+from utils.downloads import DownloadMode
 
 file_router = APIRouter(tags=["files"])
 
 
 @file_router.get("/labels", response_model=list[str], status_code=status.HTTP_200_OK)
-async def list_labels(
-  repo: FileMetadataRepository = Depends(get_uploads_repository),
+def list_labels(
+  label_repo: FileLabelRepository = Depends(get_label_repository),
   user=Depends(role_required([UserRole.ADMIN, UserRole.ACCOUNTANT])),
 ):
-  """Return a sorted, deduplicated list of all label strings used across uploaded files."""
+  """Return every label used across uploaded files, most used first."""
   try:
-    return get_existing_labels(repo)
+    return get_existing_labels(label_repo)
   except MetadataError as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 
 @file_router.post("/create", response_model=list[FileMetadata], status_code=status.HTTP_201_CREATED)
-async def file_create(
+def file_create(
   file_type: FileType = Form(...),
   allowed_to: list[str] = Form([]),
   labels: list[str] = Form([]),
   files: list[UploadFile] = File(...),
-  background_tasks: BackgroundTasks = BackgroundTasks(),
   repo: FileMetadataRepository = Depends(get_uploads_repository),
-  user_repo: UserRepository = Depends(get_users_repository),
   user=Depends(role_required([UserRole.ADMIN, UserRole.ACCOUNTANT])),
 ):
+  """Upload documents through the API. Fallback for clients that can't use /upload/initiate."""
   try:
     # Accountants can only upload accounting documents
     if user.role == UserRole.ACCOUNTANT.value and file_type != FileType.accounting:
@@ -87,8 +95,8 @@ async def file_create(
         file_type=file_type, allowed_to=allowed_to, labels=normalised_labels, uploaded_by=user.id
       )
       result = upload_file(file_metadata=file_metadata, file=file, user_id=user.id, repo=repo)
-      background_tasks.add_task(notify_upload, result, user_repo)
       results.append(result)
+    queue_upload_notifications(results)
     return results
   except MissingAllowedUsersError as e:
     raise HTTPException(status_code=400, detail=str(e))
@@ -100,8 +108,57 @@ async def file_create(
     raise HTTPException(status_code=500, detail=str(e))
 
 
+@file_router.post("/upload/initiate", response_model=InitiateUploadResponse, status_code=status.HTTP_200_OK)
+def file_upload_initiate(
+  request: InitiateUploadRequest,
+  user=Depends(role_required([UserRole.ADMIN, UserRole.ACCOUNTANT])),
+):
+  """Return presigned POST policies so the browser can upload documents straight to S3."""
+  if user.role == UserRole.ACCOUNTANT.value and request.file_type != FileType.accounting:
+    raise HTTPException(status_code=403, detail="Accountants can only upload accounting documents")
+  try:
+    return initiate_direct_upload(request, user.id)
+  except MissingAllowedUsersError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except InvalidFileExtensionError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except FileTooLargeError as e:
+    raise HTTPException(status_code=413, detail=str(e))
+  except FileUploadError as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+
+@file_router.post("/upload/finalize", response_model=list[FileMetadata], status_code=status.HTTP_201_CREATED)
+def file_upload_finalize(
+  request: FinalizeUploadRequest,
+  repo: FileMetadataRepository = Depends(get_uploads_repository),
+  user=Depends(role_required([UserRole.ADMIN, UserRole.ACCOUNTANT])),
+):
+  """Register documents uploaded through /upload/initiate once they are in S3."""
+  if user.role == UserRole.ACCOUNTANT.value and request.file_type != FileType.accounting:
+    raise HTTPException(status_code=403, detail="Accountants can only upload accounting documents")
+  try:
+    results, created = finalize_direct_upload(request, user.id, repo)
+    # A retried finalize returns the existing records; only new ones notify
+    if created:
+      queue_upload_notifications(created)
+    return results
+  except MissingAllowedUsersError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except InvalidFileExtensionError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except FileAccessDeniedError as e:
+    raise HTTPException(status_code=403, detail=str(e))
+  except FileNotFoundError as e:
+    raise HTTPException(status_code=404, detail=str(e))
+  except FileUploadError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except MetadataError as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+
 @file_router.get("/list", status_code=status.HTTP_200_OK)
-async def files_list(
+def files_list(
   file_type: str,
   repo: FileMetadataRepository = Depends(get_uploads_repository),
   user=Depends(
@@ -124,7 +181,7 @@ async def files_list(
 
 
 @file_router.delete("/delete/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def file_delete(
+def file_delete(
   file_id: str,
   repo: FileMetadataRepository = Depends(get_uploads_repository),
   user=Depends(role_required([UserRole.ADMIN, UserRole.ACCOUNTANT])),
@@ -151,13 +208,15 @@ async def file_delete(
 
 
 @file_router.post("/download", status_code=status.HTTP_200_OK)
-async def download_files(
+def download_files(
   file_metadata: FileMetadata | list[FileMetadata],
+  mode: DownloadMode | None = Query(None),
   repo: FileMetadataRepository = Depends(get_uploads_repository),
   user=Depends(role_required([UserRole.REGULAR_USER])),
 ):
+  """Download a document: 302 to a presigned S3 URL, the URL as JSON (mode=url) or streamed (mode=proxy)."""
   try:
-    return download_file(file_metadata=file_metadata, repo=repo, user=user)
+    return download_file(file_metadata=file_metadata, repo=repo, user=user, mode=mode)
   except FileAccessDeniedError as e:
     raise HTTPException(status_code=403, detail=str(e))
   except FileNotFoundError as e:
@@ -169,7 +228,7 @@ async def download_files(
 
 
 @file_router.get("/shared-with-me", response_model=list[FileMetadata], status_code=status.HTTP_200_OK)
-async def files_shared_with_me(
+def files_shared_with_me(
   repo: FileMetadataRepository = Depends(get_uploads_repository),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.ACCOUNTANT, UserRole.BOARD, UserRole.CONTROL, UserRole.ADMIN])
@@ -183,7 +242,7 @@ async def files_shared_with_me(
 
 
 @file_router.get("/shared-audit", response_model=list[SharedFileAuditEntry], status_code=status.HTTP_200_OK)
-async def shared_files_audit(
+def shared_files_audit(
   repo: FileMetadataRepository = Depends(get_uploads_repository),
   user_repo: UserRepository = Depends(get_users_repository),
   user=Depends(role_required([UserRole.ADMIN])),
@@ -196,7 +255,7 @@ async def shared_files_audit(
 
 
 @file_router.delete("/{file_id}/shared-with/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def revoke_file_share(
+def revoke_file_share(
   file_id: str,
   user_id: str,
   repo: FileMetadataRepository = Depends(get_uploads_repository),
@@ -223,12 +282,10 @@ async def revoke_file_share(
 
 
 @file_router.patch("/{file_id}/share", response_model=ShareFileResponse, status_code=status.HTTP_200_OK)
-async def share_file(
+def share_file(
   file_id: str,
   request: ShareFileRequest,
-  background_tasks: BackgroundTasks = BackgroundTasks(),
   repo: FileMetadataRepository = Depends(get_uploads_repository),
-  user_repo: UserRepository = Depends(get_users_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
   """Add users to a file's allowed_to list. Sends email notifications to newly added users."""
@@ -240,12 +297,9 @@ async def share_file(
     new_ids = [uid for uid in request.user_ids if uid not in existing_ids]
 
     if new_ids:
-      # Build a minimal FileMetadataFull with only the new recipients for notification
-      file_response = repo.table.get_item(Key={"id": file_id})
+      file_response = repo.table.get_item(Key={"id": file_id}, ProjectionExpression="file_name")
       if "Item" in file_response:
-        file_meta = repo.convert_item_to_object_full(file_response["Item"])
-        file_meta.allowed_to = new_ids
-        background_tasks.add_task(notify_shared_users, file_meta, user_repo)
+        queue_share_notifications(file_response["Item"].get("file_name"), new_ids)
 
     return ShareFileResponse(allowed_to=updated_allowed_to)
   except FileNotFoundError as e:
@@ -255,15 +309,16 @@ async def share_file(
 
 
 @file_router.patch("/{file_id}/metadata", response_model=FileMetadata, status_code=status.HTTP_200_OK)
-async def update_file_metadata_route(
+def update_file_metadata_route(
   file_id: str,
   request: UpdateFileMetadataRequest,
   repo: FileMetadataRepository = Depends(get_uploads_repository),
+  loaders: RequestLoaders = Depends(get_request_loaders),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
   """Update file_name and file_type of an existing file (ADMIN only)."""
   try:
-    return update_file_metadata(file_id, request, user.id, repo)
+    return update_file_metadata(file_id, request, user.id, repo, loaders)
   except FileNotFoundError as e:
     raise HTTPException(status_code=404, detail=str(e))
   except MetadataError as e:
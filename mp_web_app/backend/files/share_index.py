@@ -0,0 +1,106 @@
+import os
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from boto3.dynamodb.conditions import Key
+
+from database.repositories import FileMetadataRepository, FileShareRepository
+
+FILE_SHARES_TABLE_NAME = os.environ.get("FILE_SHARES_TABLE_NAME")
+
+# Every share row carries share = "share" so the audit can read all of them from one GSI
+# partition, newest first (same constant-partition pattern as the news and gallery indexes).
+SHARE_AUDIT_INDEX = "share_created_at_index"
+SHARE_PARTITION = "share"
+
+# Share index
+# -----------
+# uploads_table.allowed_to stays the source of truth. file_shares_table mirrors it as one
+# row per (recipient, file) so "shared with me", private listings and the audit are
+# single-partition queries. Writes to the two tables are not transactional: readers
+# re-check allowed_to on the file record, so a stale row is harmless, and
+# `python -m jobs.backfill_share_index` repairs missing rows.
+
+# Derived tables
+# --------------
+# The share index, the inquiry participant index, the label registry and the inquiry
+# stats counters are derived from a source table and written after it, outside any
+# transaction, so a failed second write leaves them behind. They all follow one policy.
+# Readers trust the source table: index rows are re-checked against it and labels with a
+# zero count are hidden. Each has a job under jobs/ that rebuilds it from the source
+# (backfill_share_index, backfill_inquiry_index, rebuild_label_registry,
+# rebuild_inquiry_stats). Run the job once after the deploy that adds the table or index,
+# and again whenever a failed write has been logged. The jobs are safe to repeat: index
+# rows are keyed by (owner, item) and overwritten, and counters are recomputed. Index rows
+# for revoked shares or removed co-authors and scopes are left in place; readers ignore them.
+
+
+def get_share_repository() -> FileShareRepository:
+  return FileShareRepository(FILE_SHARES_TABLE_NAME)
+
+
+def share_key(created_at: str | None, file_id: str) -> str:
+  return f"{created_at or ''}#{file_id}"
+
+
+def index_shares(file_item: dict[str, Any], user_ids: Iterable[str], share_repo: FileShareRepository) -> None:
+  """Write a share row for every recipient. Idempotent: rows are keyed by recipient and file."""
+  key = share_key(file_item.get("created_at"), file_item["id"])
+  with share_repo.table.batch_writer(overwrite_by_pkeys=["user_id", "share_key"]) as batch:
+    for user_id in dict.fromkeys(user_ids):
+      batch.put_item(
+        Item={
+          "user_id": user_id,
+          "share_key": key,
+          "file_id": file_item["id"],
+          "created_at": file_item.get("created_at") or "",
+          "share": SHARE_PARTITION,
+        }
+      )
+
+
+def unindex_shares(file_item: dict[str, Any], user_ids: Iterable[str], share_repo: FileShareRepository) -> None:
+  """Delete the share rows of the given recipients for a file."""
+  key = share_key(file_item.get("created_at"), file_item["id"])
+  with share_repo.table.batch_writer(overwrite_by_pkeys=["user_id", "share_key"]) as batch:
+    for user_id in dict.fromkeys(user_ids):
+      batch.delete_item(Key={"user_id": user_id, "share_key": key})
+
+
+def iter_user_shares(user_id: str, share_repo: FileShareRepository) -> Iterator[dict[str, Any]]:
+  """Share rows of one recipient, newest file first."""
+  return share_repo.iter_query(Key("user_id").eq(user_id), scan_forward=False)
+
+
+def iter_all_shares(share_repo: FileShareRepository) -> Iterator[dict[str, Any]]:
+  """Every share row, newest file first."""
+  return share_repo.iter_query(Key("share").eq(SHARE_PARTITION), index_name=SHARE_AUDIT_INDEX, scan_forward=False)
+
+
+def load_shared_files(
+  shares: Iterable[dict[str, Any]], repo: FileMetadataRepository
+) -> list[tuple[str, dict[str, Any]]]:
+  """
+  Resolve share rows to (recipient, file item) pairs, keeping the row order.
+
+  Rows whose file is gone or whose recipient is no longer in allowed_to are dropped.
+  """
+  shares = list(shares)
+  files = repo.batch_get(share["file_id"] for share in shares)
+  pairs = []
+  for share in shares:
+    item = files.get(share["file_id"])
+    if item and share["user_id"] in (item.get("allowed_to") or []):
+      pairs.append((share["user_id"], item))
+  return pairs
+
+
+def backfill_share_index(repo: FileMetadataRepository, share_repo: FileShareRepository) -> int:
+  """Write share rows for every file with a non-empty allowed_to. Returns the number of rows written."""
+  written = 0
+  for item in repo.iter_scan(projection=["id", "created_at", "allowed_to"]):
+    allowed_to = item.get("allowed_to") or []
+    if allowed_to:
+      index_shares(item, allowed_to, share_repo)
+      written += len(set(allowed_to))
+  return written
@@ -2,7 +2,6 @@ import os
 from datetime import datetime
 from uuid import uuid4
 
-import boto3
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
@@ -16,6 +15,7 @@ from gallery.exceptions import (
   PresignedUrlError,
 )
 from gallery.models import GalleryImageMetadata, UpdateGalleryImageMetadataRequest
+from utils.aws_clients import get_client
 
 GALLERY_BUCKET = os.environ.get("UPLOADS_BUCKET")
 GALLERY_TABLE_NAME = os.environ.get("GALLERY_TABLE_NAME")
@@ -60,7 +60,7 @@ def upload_gallery_image(
   s3_key = f"gallery/{timestamp}_{image_id}.{file_extension}"
 
   # Upload to S3
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     s3.upload_fileobj(file.file, GALLERY_BUCKET, s3_key)
   except ClientError as e:
@@ -104,20 +104,7 @@ def get_gallery_images(repo: GalleryRepository, include_urls: bool = True):
     List of gallery image objects with optional URLs
   """
   try:
-    response = repo.table.query(
-      IndexName="gallery_created_at_index", KeyConditionExpression=Key("gallery").eq("gallery"), ScanIndexForward=False
-    )
-    items = response["Items"]
-
-    while "LastEvaluatedKey" in response:
-      response = repo.table.query(
-        IndexName="gallery_created_at_index",
-        KeyConditionExpression=Key("gallery").eq("gallery"),
-        ScanIndexForward=False,
-        ExclusiveStartKey=response["LastEvaluatedKey"],
-      )
-      items.extend(response["Items"])
-
+    items = repo.iter_query(Key("gallery").eq("gallery"), index_name="gallery_created_at_index", scan_forward=False)
     images = [repo.convert_item_to_object(item) for item in items]
 
     # Add URLs to each image if requested
@@ -149,7 +136,7 @@ def delete_gallery_image(image_id: str, repo: GalleryRepository) -> bool:
     raise DatabaseError(f"Database error: {e.response['Error']['Message']}")
 
   # Delete from S3
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     s3.delete_object(Bucket=s3_bucket, Key=s3_key)
   except ClientError as e:
@@ -176,7 +163,7 @@ def generate_presigned_url(s3_key: str, bucket: str, expiration: int = 3600) ->
     return f"https://{CLOUDFRONT_DOMAIN}/{s3_key}"
 
   # Fallback to S3 presigned URL
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     url = s3.generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": s3_key}, ExpiresIn=expiration)
     return url
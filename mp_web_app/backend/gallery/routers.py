@@ -24,7 +24,7 @@ gallery_router = APIRouter(tags=["gallery"])
 
 
 @gallery_router.post("/create", response_model=list[GalleryImageMetadata], status_code=status.HTTP_201_CREATED)
-async def gallery_create(
+def gallery_create(
   files: list[UploadFile] = File(...),
   image_name: str = Form(None),
   category: str = Form(""),
@@ -51,7 +51,7 @@ async def gallery_create(
 
 
 @gallery_router.get("/list", status_code=status.HTTP_200_OK)
-async def gallery_list(gallery_repo: GalleryRepository = Depends(get_gallery_repository)):
+def gallery_list(gallery_repo: GalleryRepository = Depends(get_gallery_repository)):
   """List all gallery images (public access)."""
   try:
     return get_gallery_images(repo=gallery_repo)
@@ -62,7 +62,7 @@ async def gallery_list(gallery_repo: GalleryRepository = Depends(get_gallery_rep
 
 
 @gallery_router.delete("/delete/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def gallery_delete(
+def gallery_delete(
   image_id: str,
   gallery_repo: GalleryRepository = Depends(get_gallery_repository),
   user=Depends(role_required([UserRole.ADMIN])),
@@ -81,7 +81,7 @@ async def gallery_delete(
 
 
 @gallery_router.get("/{image_id}/url", status_code=status.HTTP_200_OK)
-async def gallery_image_url(image_id: str, gallery_repo: GalleryRepository = Depends(get_gallery_repository)):
+def gallery_image_url(image_id: str, gallery_repo: GalleryRepository = Depends(get_gallery_repository)):
   """Get presigned URL for a gallery image."""
   try:
     response = gallery_repo.table.get_item(Key={"id": image_id})
@@ -100,7 +100,7 @@ async def gallery_image_url(image_id: str, gallery_repo: GalleryRepository = Dep
 
 
 @gallery_router.patch("/{image_id}/metadata", response_model=GalleryImageMetadata, status_code=status.HTTP_200_OK)
-async def gallery_update_metadata(
+def gallery_update_metadata(
   image_id: str,
   request: UpdateGalleryImageMetadataRequest,
   gallery_repo: GalleryRepository = Depends(get_gallery_repository),
@@ -11,3 +11,8 @@ class InquiryAccessDeniedError(Exception):
 class InquiryStatusError(Exception):
   def __init__(self, message: str):
     super().__init__(message)
+
+
+class PdfRenderTimeoutError(Exception):
+  def __init__(self, count: int, timeout: float):
+    super().__init__(f"Rendering {count} PDF(s) did not finish within {timeout:g} seconds")
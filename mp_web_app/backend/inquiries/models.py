@@ -89,3 +89,29 @@ class AssignEntryNumber(BaseModel):
 class CloseInquiry(BaseModel):
   final_status: str  # closed | finished | failed
   reason: str
+
+
+class InquiryParticipant(BaseModel):
+  """Row of the participant index: a co-author or a scope role with access to an inquiry."""
+
+  participant: str  # co-author user id, or "scope#<role>" for board/control
+  inquiry_key: str  # "<inquiry created_at>#<inquiry id>", so a participant's inquiries sort newest first
+  inquiry_id: str
+  created_at: str
+  relation: str  # "co_author" or "scope"
+
+
+class PdfArchiveExport(BaseModel):
+  """Progress of a registry archive export queued for the outbox worker."""
+
+  export_id: str
+  status: str  # pending, sending, sent or failed
+
+
+class InquiryStats(BaseModel):
+  """Inquiry counts for the dashboards, read from the aggregates item."""
+
+  total: int = 0
+  by_status: dict[str, int] = {}  # every status, 0 when none
+  by_type: dict[str, int] = {}
+  by_scope: dict[str, int] = {}  # admin is in every scope, so it equals total
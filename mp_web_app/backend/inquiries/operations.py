@@ -1,13 +1,24 @@
+import heapq
 import os
+from collections.abc import Callable, Iterator
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
-import boto3
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
-from database.repositories import InquiryRepository, UserRepository
+from database.loaders import RequestLoaders
+from database.repositories import (
+  InquiryParticipantRepository,
+  InquiryRepository,
+  InquiryStatsRepository,
+  UserRepository,
+)
 from inquiries.exceptions import InquiryAccessDeniedError, InquiryNotFoundError, InquiryStatusError
 from inquiries.models import (
   IMMUTABLE_AFTER,
@@ -19,14 +30,47 @@ from inquiries.models import (
   InquiryStatus,
   InquiryUpdate,
 )
+from inquiries.participant_index import (
+  get_participant_repository,
+  index_participants,
+  inquiry_key,
+  iter_participant_rows,
+  participants_of,
+  reindex_participants,
+  scope_participant,
+  unindex_participants,
+)
+from inquiries.pdf_service import get_pdf_render_settings, get_pdf_service
+from inquiries.stats import apply_stats_deltas, get_stats_repository, stats_deltas
+from mail.models import EmailJob
+from users.operations import get_user_display_names, list_users_by_role
 from users.roles import UserRole
+from utils.aws_clients import get_client
+from utils.cursors import InvalidCursorError, decode_cursor, encode_cursor
 
 INQUIRIES_TABLE_NAME = os.environ.get("INQUIRIES_TABLE_NAME")
 USERS_TABLE_NAME = os.environ.get("USERS_TABLE_NAME")
 BUCKET = os.environ.get("UPLOADS_BUCKET")
+# Cached PDF exports live next to the attachments: inquiries/{id}/renditions/{hash}.pdf
+RENDITIONS_FOLDER = "renditions"
+# Bulk PDF archives built for the registry by the outbox worker, served via presigned URL
+EXPORTS_PREFIX = "exports/inquiries"
 
 MAX_FILE_SIZE_BYTES = 5 * 1024 * 1024  # 5 MB
 
+# GSIs on inquiries_table. The author index sorts by created_at; the registry indexes sort by
+# entry_sort, the numeric form of entry_number. Every inquiry carries inquiry = "inquiry" so the
+# admin registry reads one partition (as the news and gallery indexes do).
+AUTHOR_INDEX = "author_created_at_index"
+REGISTRY_INDEX = "registry_entry_index"
+STATUS_INDEX = "status_entry_index"
+ALL_PARTITION = "inquiry"
+# entry_sort of inquiries still waiting for an entry number: above any real one, so they head the registry
+UNREGISTERED_ENTRY_SORT = 10**15
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 def get_inquiry_repository() -> InquiryRepository:
   return InquiryRepository(INQUIRIES_TABLE_NAME)
@@ -41,41 +85,15 @@ def get_user_repository() -> UserRepository:
 # ---------------------------------------------------------------------------
 
 
-def _resolve_user_name(user_id: str, user_repo: UserRepository) -> str:
-  """Return 'First Last' for a user ID, or the raw ID as fallback."""
-  try:
-    resp = user_repo.table.get_item(Key={"id": user_id})
-    if "Item" in resp:
-      u = user_repo.convert_item_to_object(resp["Item"])
-      return f"{u.first_name} {u.last_name}"
-  except Exception:
-    pass
-  return user_id
-
-
 def _resolve_names_for_list(user_ids: list[str], user_repo: UserRepository) -> list[str]:
-  return [_resolve_user_name(uid, user_repo) for uid in user_ids]
+  names = get_user_display_names(user_ids, user_repo)
+  return [names.get(uid, uid) for uid in user_ids]
 
 
 def _get_users_by_role(role: str, user_repo: UserRepository) -> list[Any]:
-  """Scan users table and return all users that have the given role."""
+  """Return all users that have the given role (role GSI query)."""
   try:
-    items: list[dict] = []
-    resp = user_repo.table.scan(
-      FilterExpression="#r = :r",
-      ExpressionAttributeNames={"#r": "role"},
-      ExpressionAttributeValues={":r": role},
-    )
-    items.extend(resp.get("Items", []))
-    while "LastEvaluatedKey" in resp:
-      resp = user_repo.table.scan(
-        FilterExpression="#r = :r",
-        ExpressionAttributeNames={"#r": "role"},
-        ExpressionAttributeValues={":r": role},
-        ExclusiveStartKey=resp["LastEvaluatedKey"],
-      )
-      items.extend(resp.get("Items", []))
-    return [user_repo.convert_item_to_object(item) for item in items]
+    return list_users_by_role(role, user_repo)
   except Exception:
     return []
 
@@ -99,7 +117,7 @@ def _upload_inquiry_files(files: list[UploadFile], inquiry_id: str) -> list[str]
   """
   if not files:
     return []
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   keys: list[str] = []
   for f in files:
     if not f.filename:
@@ -118,7 +136,7 @@ def _delete_inquiry_files(s3_keys: list[str]) -> None:
   """Delete a list of S3 objects. Silently ignores errors."""
   if not s3_keys:
     return
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     s3.delete_objects(
       Bucket=BUCKET,
@@ -130,7 +148,7 @@ def _delete_inquiry_files(s3_keys: list[str]) -> None:
 
 def _delete_inquiry_folder(inquiry_id: str) -> None:
   """Delete all S3 objects under inquiries/{inquiry_id}/."""
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   prefix = f"inquiries/{inquiry_id}/"
   try:
     paginator = s3.get_paginator("list_objects_v2")
@@ -146,7 +164,7 @@ def _delete_inquiry_folder(inquiry_id: str) -> None:
 
 def get_file_download_url(s3_key: str, expires_in: int = 300) -> str:
   """Return a presigned S3 URL for downloading the given key (valid for *expires_in* seconds)."""
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   # Derive the original filename: strip the UUID prefix + underscore
   filename = s3_key.split("/")[-1]
   if "_" in filename:
@@ -162,25 +180,41 @@ def get_file_download_url(s3_key: str, expires_in: int = 300) -> str:
   )
 
 
-def _sort_inquiries(inquiries: list[Inquiry]) -> list[Inquiry]:
-  """Sort inquiries: null entry_number first, then descending numeric entry_number."""
-
-  def sort_key(inq: Inquiry):
-    if not inq.entry_number:
-      return (0, 0)
-    try:
-      return (1, -int(inq.entry_number))
-    except ValueError:
-      return (1, 0)
+def entry_sort_value(entry_number: str | None) -> int:
+  """
+  Registry position of an entry number, stored as entry_sort and read in descending order.
 
-  return sorted(inquiries, key=sort_key)
+  "42" sorts as 42 and "42/2026" as 2026000042, so a later year comes first. Inquiries
+  without an entry number head the registry; numbers that parse as neither sort last.
+  """
+  if not entry_number:
+    return UNREGISTERED_ENTRY_SORT
+  number, _, year = entry_number.strip().partition("/")
+  try:
+    value = int(year) * 1_000_000 + int(number) if year else int(number)
+  except ValueError:
+    return 0
+  return min(max(value, 0), UNREGISTERED_ENTRY_SORT - 1)
 
 
-def _enrich_inquiry(inquiry: Inquiry, user_repo: UserRepository) -> None:
+def _enrich_inquiry(inquiry: Inquiry, user_repo: UserRepository, loaders: RequestLoaders | None = None) -> None:
   """Resolve author and co-author names in place."""
-  inquiry.author_name = _resolve_user_name(inquiry.author_id, user_repo)
-  if inquiry.co_authors:
-    inquiry.co_author_names = _resolve_names_for_list(inquiry.co_authors, user_repo)
+  _enrich_inquiries([inquiry], user_repo, loaders)
+
+
+def _enrich_inquiries(
+  inquiries: list[Inquiry], user_repo: UserRepository, loaders: RequestLoaders | None = None
+) -> None:
+  """Resolve author and co-author names for many inquiries with a single batched lookup."""
+  user_ids: set[str] = set()
+  for inq in inquiries:
+    user_ids.add(inq.author_id)
+    user_ids.update(inq.co_authors or [])
+  names = (loaders or RequestLoaders(user_repo=user_repo)).display_names(user_ids)
+  for inq in inquiries:
+    inq.author_name = names.get(inq.author_id, inq.author_id)
+    if inq.co_authors:
+      inq.co_author_names = [names.get(uid, uid) for uid in inq.co_authors]
 
 
 # ---------------------------------------------------------------------------
@@ -188,6 +222,22 @@ def _enrich_inquiry(inquiry: Inquiry, user_repo: UserRepository) -> None:
 # ---------------------------------------------------------------------------
 
 
+def _update_stats(
+  before: dict[str, Any] | None,
+  after: dict[str, Any] | None,
+  stats_repo: InquiryStatsRepository | None,
+  inquiry_id: str,
+) -> None:
+  deltas = stats_deltas(before, after)
+  if not deltas:
+    return
+  try:
+    apply_stats_deltas(deltas, stats_repo or get_stats_repository())
+  except Exception as e:
+    # Counts drift until the next `python -m jobs.rebuild_inquiry_stats`
+    print(f"Failed to update inquiry stats for inquiry {inquiry_id}: {e}")
+
+
 def get_inquiry(inquiry_id: str, repo: InquiryRepository) -> Inquiry:
   response = repo.table.get_item(Key={"id": inquiry_id})
   if "Item" not in response:
@@ -201,6 +251,9 @@ def create_inquiry(
   author_id: str,
   repo: InquiryRepository,
   user_repo: UserRepository,
+  loaders: RequestLoaders | None = None,
+  participant_repo: InquiryParticipantRepository | None = None,
+  stats_repo: InquiryStatsRepository | None = None,
 ) -> Inquiry:
   if data.inquiry_type.strip() == "":
     raise ValueError("Inquiry type cannot be empty")
@@ -217,8 +270,10 @@ def create_inquiry(
 
   inquiry_id = str(uuid4())
   now = datetime.now().isoformat()
-  author_name = _resolve_user_name(author_id, user_repo)
-  co_author_names = _resolve_names_for_list(data.co_authors, user_repo) if data.co_authors else []
+  # Author and co-authors in one lookup; _notify_involved reuses the memoised entries
+  names = (loaders or RequestLoaders(user_repo=user_repo)).display_names([author_id, *data.co_authors])
+  author_name = names.get(author_id, author_id)
+  co_author_names = [names.get(uid, uid) for uid in data.co_authors]
 
   s3_keys = _upload_inquiry_files(files, inquiry_id)
 
@@ -238,6 +293,8 @@ def create_inquiry(
     "closing_record": None,
     "created_at": now,
     "updated_at": now,
+    "inquiry": ALL_PARTITION,
+    "entry_sort": UNREGISTERED_ENTRY_SORT,
   }
 
   try:
@@ -246,6 +303,15 @@ def create_inquiry(
     _delete_inquiry_files(s3_keys)
     raise RuntimeError(f"Database error: {e.response['Error']['Message']}")
 
+  participants = participants_of(item)
+  if participants:
+    try:
+      index_participants(item, participants, participant_repo or get_participant_repository())
+    except Exception as e:
+      # The inquiry is written; the participant index backfill picks up the missing rows
+      print(f"Failed to index participants of inquiry {inquiry_id}: {e}")
+  _update_stats(None, item, stats_repo, inquiry_id)
+
   inquiry = repo.convert_item_to_object(item)
   return inquiry
 
@@ -256,6 +322,8 @@ def update_inquiry(
   files: list[UploadFile],
   repo: InquiryRepository,
   user_repo: UserRepository,
+  participant_repo: InquiryParticipantRepository | None = None,
+  stats_repo: InquiryStatsRepository | None = None,
 ) -> Inquiry:
   """Update an inquiry. Title/description/type locked once status != sent."""
   immutable = inquiry.status in IMMUTABLE_AFTER
@@ -318,7 +386,17 @@ def update_inquiry(
     ExpressionAttributeNames=attr_names,
     ReturnValues="ALL_NEW",
   )
-  return repo.convert_item_to_object(response["Attributes"])
+  updated = response["Attributes"]
+
+  if data.scope is not None or data.co_authors is not None:
+    try:
+      reindex_participants(inquiry.model_dump(), updated, participant_repo or get_participant_repository())
+    except Exception as e:
+      # Readers re-check scope and co_authors, so stale rows never grant access
+      print(f"Failed to update participant index of inquiry {inquiry.id}: {e}")
+  # Type and scope are counted too
+  _update_stats(inquiry.model_dump(), updated, stats_repo, inquiry.id)
+  return repo.convert_item_to_object(updated)
 
 
 def add_inquiry_files(
@@ -353,40 +431,173 @@ def add_inquiry_files(
 # ---------------------------------------------------------------------------
 
 
-def _full_scan(repo: InquiryRepository) -> list[Inquiry]:
-  items: list[dict] = []
-  resp = repo.table.scan()
-  items.extend(resp.get("Items", []))
-  while "LastEvaluatedKey" in resp:
-    resp = repo.table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"])
-    items.extend(resp.get("Items", []))
-  return [repo.convert_item_to_object(item) for item in items]
+# Listings page newest first with a keyset cursor: the (created_at, id) of the last inquiry
+# returned. Each page is one bounded query per source (limit + 1 items, to tell whether
+# another page exists), merged in Python for "mine", plus a BatchGetItem for index rows.
+# created_at has microsecond resolution, so inquiries sharing one are rare; the id
+# tiebreak keeps them from repeating across pages. The admin registry pages in entry number
+# order instead, resuming after the index key of the last inquiry returned.
+
+
+def _position(item: dict[str, Any]) -> tuple[str, str]:
+  return item.get("created_at") or "", item.get("inquiry_id") or item["id"]
+
 
+def _created_at_cursor(item: dict[str, Any]) -> dict[str, Any]:
+  created_at, inquiry_id = _position(item)
+  return {"created_at": created_at, "id": inquiry_id}
 
-def list_inquiries_for_user(user_id: str, repo: InquiryRepository, user_repo: UserRepository) -> list[Inquiry]:
-  """Return inquiries where user is author or co-author."""
-  all_inquiries = _full_scan(repo)
-  result = [inq for inq in all_inquiries if inq.author_id == user_id or user_id in (inq.co_authors or [])]
-  for inq in result:
-    _enrich_inquiry(inq, user_repo)
-  return _sort_inquiries(result)
 
+def _registry_cursor(item: dict[str, Any]) -> dict[str, Any]:
+  return {"id": item["id"], "entry_sort": int(item["entry_sort"])}
 
-def list_inquiries_for_scope(role: str, repo: InquiryRepository, user_repo: UserRepository) -> list[Inquiry]:
-  """Return inquiries that include the given role in their scope."""
-  all_inquiries = _full_scan(repo)
-  result = [inq for inq in all_inquiries if role in (inq.scope or [])]
-  for inq in result:
-    _enrich_inquiry(inq, user_repo)
-  return _sort_inquiries(result)
 
+def _decode_position(cursor: str | None) -> tuple[str, str] | None:
+  if cursor is None:
+    return None
+  position = decode_cursor(cursor, ("created_at", "id"))
+  return position["created_at"], position["id"]
 
-def list_all_inquiries(repo: InquiryRepository, user_repo: UserRepository) -> list[Inquiry]:
-  """Admin-only: return all inquiries."""
-  all_inquiries = _full_scan(repo)
-  for inq in all_inquiries:
-    _enrich_inquiry(inq, user_repo)
-  return _sort_inquiries(all_inquiries)
+
+def _iter_index(
+  repo: InquiryRepository, index: str, partition: str, value: str, before: tuple[str, str] | None, page_size: int
+) -> Iterator[dict[str, Any]]:
+  """Inquiries in one partition of a created_at index, newest first, strictly before the cursor position."""
+  condition = Key(partition).eq(value)
+  if before is not None:
+    # <= keeps inquiries sharing the cursor's created_at; the cursor's own item comes back
+    # too and is skipped below, so read one extra to still fill the page in one request
+    condition = condition & Key("created_at").lte(before[0])
+    page_size += 1
+  for item in repo.iter_query(condition, index_name=index, scan_forward=False, page_size=page_size):
+    if before is None or _position(item) < before:
+      yield item
+
+
+def _iter_rows(
+  participant: str, before: tuple[str, str] | None, page_size: int, participant_repo: InquiryParticipantRepository
+) -> Iterator[dict[str, Any]]:
+  before_key = inquiry_key(*before) if before else None
+  return iter_participant_rows(participant, participant_repo, before=before_key, page_size=page_size)
+
+
+def _page(
+  entries: Iterator[dict[str, Any]],
+  limit: int,
+  repo: InquiryRepository,
+  user_repo: UserRepository,
+  visible: Callable[[Inquiry], bool] | None = None,
+  cursor_of: Callable[[dict[str, Any]], dict[str, Any]] = _created_at_cursor,
+) -> tuple[list[Inquiry], str | None]:
+  """
+  Take one page from an ordered stream of inquiry items and participant index rows.
+
+  Index rows are resolved with one BatchGetItem; rows whose inquiry is gone or no longer
+  passes visible (stale after an edit) are dropped, so a page can come back short.
+  """
+  taken = list(islice(entries, limit + 1))
+  has_more = len(taken) > limit
+  taken = taken[:limit]
+
+  rows = [entry for entry in taken if "participant" in entry]
+  loaded = repo.batch_get(row["inquiry_id"] for row in rows) if rows else {}
+  inquiries = []
+  for entry in taken:
+    item = loaded.get(entry["inquiry_id"]) if "participant" in entry else entry
+    if item is None:
+      continue
+    inquiry = repo.convert_item_to_object(item)
+    if visible is None or visible(inquiry):
+      inquiries.append(inquiry)
+
+  _enrich_inquiries(inquiries, user_repo)
+  next_cursor = encode_cursor(cursor_of(taken[-1])) if has_more else None
+  return inquiries, next_cursor
+
+
+def list_inquiries_for_user(
+  user_id: str,
+  repo: InquiryRepository,
+  user_repo: UserRepository,
+  limit: int = DEFAULT_PAGE_SIZE,
+  cursor: str | None = None,
+  participant_repo: InquiryParticipantRepository | None = None,
+) -> tuple[list[Inquiry], str | None]:
+  """
+  One page of the inquiries the user authored or co-authors, newest first.
+
+  Merges the author index with the user's co-author rows in the participant index.
+  Returns the page and the cursor of the next one (None on the last page).
+  """
+  before = _decode_position(cursor)
+  authored = _iter_index(repo, AUTHOR_INDEX, "author_id", user_id, before, limit + 1)
+  co_authored = _iter_rows(user_id, before, limit + 1, participant_repo or get_participant_repository())
+  merged = heapq.merge(authored, co_authored, key=_position, reverse=True)
+  return _page(
+    merged,
+    limit,
+    repo,
+    user_repo,
+    visible=lambda inq: inq.author_id == user_id or user_id in (inq.co_authors or []),
+  )
+
+
+def list_inquiries_for_scope(
+  role: str,
+  repo: InquiryRepository,
+  user_repo: UserRepository,
+  limit: int = DEFAULT_PAGE_SIZE,
+  cursor: str | None = None,
+  participant_repo: InquiryParticipantRepository | None = None,
+) -> tuple[list[Inquiry], str | None]:
+  """One page of the inquiries that include the role in their scope, newest first."""
+  if role == UserRole.ADMIN:
+    # Admin is in every scope: the whole registry
+    return list_all_inquiries(repo, user_repo, limit, cursor)
+  before = _decode_position(cursor)
+  rows = _iter_rows(scope_participant(role), before, limit + 1, participant_repo or get_participant_repository())
+  return _page(rows, limit, repo, user_repo, visible=lambda inq: role in (inq.scope or []))
+
+
+def list_all_inquiries(
+  repo: InquiryRepository,
+  user_repo: UserRepository,
+  limit: int = DEFAULT_PAGE_SIZE,
+  cursor: str | None = None,
+  status: str | None = None,
+  inquiry_type: str | None = None,
+) -> tuple[list[Inquiry], str | None]:
+  """
+  Admin-only: one page of the registry, unregistered inquiries first, then descending entry number.
+
+  status reads that partition of status_entry_index; inquiry_type filters the page, so a
+  rare type can take several index reads to fill it.
+  """
+  partition, value, index = ("status", status, STATUS_INDEX) if status else ("inquiry", ALL_PARTITION, REGISTRY_INDEX)
+  start_key = None
+  if cursor is not None:
+    position = decode_cursor(cursor, ("id", "entry_sort"))
+    if not isinstance(position["id"], str) or type(position["entry_sort"]) is not int:
+      raise InvalidCursorError()
+    start_key = {"id": position["id"], "entry_sort": position["entry_sort"], partition: value}
+  items = repo.iter_query(
+    Key(partition).eq(value),
+    index_name=index,
+    filter_expression=Attr("inquiry_type").eq(inquiry_type) if inquiry_type else None,
+    scan_forward=False,
+    page_size=limit + 1,
+    start_key=start_key,
+  )
+  return _page(items, limit, repo, user_repo, cursor_of=_registry_cursor)
+
+
+def list_registered_inquiries(repo: InquiryRepository, user_repo: UserRepository) -> list[Inquiry]:
+  """Admin-only: inquiries with an entry number, i.e. everything in the registry, in registry order."""
+  condition = Key("inquiry").eq(ALL_PARTITION) & Key("entry_sort").lt(UNREGISTERED_ENTRY_SORT)
+  items = repo.iter_query(condition, index_name=REGISTRY_INDEX, scan_forward=False)
+  registered = [repo.convert_item_to_object(item) for item in items]
+  _enrich_inquiries(registered, user_repo)
+  return registered
 
 
 # ---------------------------------------------------------------------------
@@ -399,6 +610,8 @@ def assign_entry_number(
   data: AssignEntryNumber,
   repo: InquiryRepository,
   user_repo: UserRepository,
+  loaders: RequestLoaders | None = None,
+  stats_repo: InquiryStatsRepository | None = None,
 ) -> Inquiry:
   if inquiry.status != InquiryStatus.SENT:
     raise InquiryStatusError("Entry number can only be assigned to inquiries with status 'sent'")
@@ -407,27 +620,28 @@ def assign_entry_number(
   # Set entry_number + move directly to in_progress (accepted is a brief intermediate)
   response = repo.table.update_item(
     Key={"id": inquiry.id},
-    UpdateExpression="SET #entry_number = :en, #status = :s, #updated_at = :ua",
+    UpdateExpression="SET #entry_number = :en, #entry_sort = :es, #status = :s, #updated_at = :ua",
     ExpressionAttributeNames={
       "#entry_number": "entry_number",
+      "#entry_sort": "entry_sort",
       "#status": "status",
       "#updated_at": "updated_at",
     },
     ExpressionAttributeValues={
       ":en": data.entry_number.strip(),
+      ":es": entry_sort_value(data.entry_number),
       ":s": InquiryStatus.IN_PROGRESS,
       ":ua": now,
     },
     ReturnValues="ALL_NEW",
   )
+  _update_stats(inquiry.model_dump(), response["Attributes"], stats_repo, inquiry.id)
   updated = repo.convert_item_to_object(response["Attributes"])
-  _enrich_inquiry(updated, user_repo)
+  loaders = loaders or RequestLoaders(user_repo=user_repo)
+  _enrich_inquiry(updated, user_repo, loaders)
 
   # Notify author of status change
-  try:
-    _notify_author_status_change(updated, user_repo)
-  except Exception as e:
-    print(f"Failed to send status change notification: {e}")
+  _queue_status_notification(updated)
 
   return updated
 
@@ -456,6 +670,8 @@ def close_inquiry(
   closing_user_role: str,
   repo: InquiryRepository,
   user_repo: UserRepository,
+  loaders: RequestLoaders | None = None,
+  stats_repo: InquiryStatsRepository | None = None,
 ) -> Inquiry:
   if not _can_close(inquiry, closing_user_id, closing_user_role):
     raise InquiryAccessDeniedError()
@@ -476,14 +692,17 @@ def close_inquiry(
       raise ValueError("Closing PDF exceeds the 5 MB limit")
     safe_name = pdf_file.filename.replace(" ", "_")
     pdf_key = f"inquiries/{inquiry.id}/{uuid4()}_closing_{safe_name}"
-    s3 = boto3.client("s3")
+    s3 = get_client("s3")
     try:
       s3.upload_fileobj(pdf_file.file, BUCKET, pdf_key)
     except ClientError as e:
       raise RuntimeError(f"Failed to upload closing PDF: {e.response['Error']['Message']}")
 
   now = datetime.now().isoformat()
-  closing_name = _resolve_user_name(closing_user_id, user_repo)
+  loaders = loaders or RequestLoaders(user_repo=user_repo)
+  # Closer, author and co-authors are resolved together for the record, enrichment and notification
+  loaders.users.prime([closing_user_id, inquiry.author_id, *(inquiry.co_authors or [])])
+  closing_name = loaders.display_names([closing_user_id]).get(closing_user_id, closing_user_id)
   closing_record = ClosingRecord(
     closed_by_id=closing_user_id,
     closed_by_name=closing_name,
@@ -510,13 +729,11 @@ def close_inquiry(
     },
     ReturnValues="ALL_NEW",
   )
+  _update_stats(inquiry.model_dump(), response["Attributes"], stats_repo, inquiry.id)
   updated = repo.convert_item_to_object(response["Attributes"])
-  _enrich_inquiry(updated, user_repo)
+  _enrich_inquiry(updated, user_repo, loaders)
 
-  try:
-    _notify_author_status_change(updated, user_repo)
-  except Exception as e:
-    print(f"Failed to send closure notification: {e}")
+  _queue_status_notification(updated)
 
   return updated
 
@@ -531,6 +748,8 @@ def delete_inquiry(
   caller_id: str,
   caller_role: str,
   repo: InquiryRepository,
+  participant_repo: InquiryParticipantRepository | None = None,
+  stats_repo: InquiryStatsRepository | None = None,
 ) -> None:
   if caller_role != UserRole.ADMIN and inquiry.author_id != caller_id:
     raise InquiryAccessDeniedError()
@@ -538,60 +757,79 @@ def delete_inquiry(
   _delete_inquiry_folder(inquiry.id)
   repo.table.delete_item(Key={"id": inquiry.id})
 
+  item = inquiry.model_dump()
+  _update_stats(item, None, stats_repo, inquiry.id)
+  participants = participants_of(item)
+  if participants:
+    try:
+      unindex_participants(item, participants, participant_repo or get_participant_repository())
+    except Exception as e:
+      # Readers skip rows whose inquiry is gone, so a leftover row only costs a lookup
+      print(f"Failed to remove participant index rows of inquiry {inquiry.id}: {e}")
+
 
 # ---------------------------------------------------------------------------
 # PDF export
 # ---------------------------------------------------------------------------
 
 
-def export_pdf(inquiry: Inquiry) -> bytes:
-  """Render the inquiry PDF template and return PDF bytes."""
-  import base64
-  from pathlib import Path
+_TEMPLATES_DIR = Path(__file__).parent / "templates"
 
-  template_path = Path(__file__).parent / "templates" / "inquiry_pdf.html"
-  html_content = template_path.read_text(encoding="utf-8")
-  font_dir = Path(__file__).parent / "templates" / "fonts"
-  font_regular = (font_dir / "DejaVuSans.ttf").resolve().as_posix()
-  font_bold = (font_dir / "DejaVuSans-Bold.ttf").resolve().as_posix()
+# Bulgarian labels for status and scope
+_STATUS_BG = {
+  "sent": "Изпратено",
+  "accepted": "Прието",
+  "in_progress": "В процес",
+  "closed": "Затворено",
+  "finished": "Приключено",
+  "failed": "Неуспешно",
+}
+_SCOPE_BG = {"admin": "Администрация", "board": "Управителен съвет", "control": "Контролен съвет"}
 
-  # Encode logo as base64 for embedding
-  logo_path = Path(__file__).parent / "templates" / "logo.svg"
-  logo_b64 = ""
-  if logo_path.exists():
-    logo_b64 = base64.b64encode(logo_path.read_bytes()).decode("utf-8")
 
-  # Bulgarian labels for status and scope
-  status_map = {
-    "sent": "Изпратено",
-    "accepted": "Прието",
-    "in_progress": "В процес",
-    "closed": "Затворено",
-    "finished": "Приключено",
-    "failed": "Неуспешно",
+@lru_cache
+def _pdf_assets() -> dict[str, str]:
+  """Template, embedded logo and font paths, read once per process."""
+  import base64
+  import hashlib
+
+  template = (_TEMPLATES_DIR / "inquiry_pdf.html").read_text(encoding="utf-8")
+  logo_path = _TEMPLATES_DIR / "logo.svg"
+  logo_b64 = base64.b64encode(logo_path.read_bytes()).decode("utf-8") if logo_path.exists() else ""
+  return {
+    "template": template,
+    "logo_b64": logo_b64,
+    "font_regular": (_TEMPLATES_DIR / "fonts" / "DejaVuSans.ttf").resolve().as_posix(),
+    "font_bold": (_TEMPLATES_DIR / "fonts" / "DejaVuSans-Bold.ttf").resolve().as_posix(),
+    # Part of the rendition key, so editing the template or logo invalidates cached PDFs
+    "version": hashlib.sha256((template + logo_b64).encode("utf-8")).hexdigest()[:12],
   }
-  scope_map = {"admin": "Администрация", "board": "Управителен съвет", "control": "Контролен съвет"}
 
-  scope_bg = ", ".join(scope_map.get(s, s) for s in (inquiry.scope or []))
-  status_bg = status_map.get(inquiry.status, inquiry.status)
-  co_author_names = ", ".join(inquiry.co_author_names) if inquiry.co_author_names else "—"
-  entry_number = inquiry.entry_number or "—"
-  created_at = inquiry.created_at[:10] if inquiry.created_at else "—"
 
-  html = html_content.format_map(
+def _pdf_fields(inquiry: Inquiry) -> dict[str, str]:
+  """Inquiry-specific values substituted into the PDF template."""
+  return {
+    "entry_number": inquiry.entry_number or "—",
+    "title": inquiry.title,
+    "inquiry_type": inquiry.inquiry_type.upper(),
+    "description": inquiry.description,
+    "author_name": inquiry.author_name or inquiry.author_id,
+    "co_author_names": ", ".join(inquiry.co_author_names) if inquiry.co_author_names else "—",
+    "scope_bg": ", ".join(_SCOPE_BG.get(s, s) for s in (inquiry.scope or [])),
+    "created_at": inquiry.created_at[:10] if inquiry.created_at else "—",
+    "status_bg": _STATUS_BG.get(inquiry.status, inquiry.status),
+  }
+
+
+def export_pdf(inquiry: Inquiry) -> bytes:
+  """Render the inquiry PDF template and return PDF bytes."""
+  assets = _pdf_assets()
+  html = assets["template"].format_map(
     {
-      "entry_number": entry_number,
-      "title": inquiry.title,
-      "inquiry_type": inquiry.inquiry_type.upper(),
-      "description": inquiry.description,
-      "author_name": inquiry.author_name or inquiry.author_id,
-      "co_author_names": co_author_names,
-      "scope_bg": scope_bg,
-      "created_at": created_at,
-      "status_bg": status_bg,
-      "logo_b64": logo_b64,
-      "font_regular": font_regular,
-      "font_bold": font_bold,
+      **_pdf_fields(inquiry),
+      "logo_b64": assets["logo_b64"],
+      "font_regular": assets["font_regular"],
+      "font_bold": assets["font_bold"],
     }
   )
 
@@ -607,38 +845,198 @@ def export_pdf(inquiry: Inquiry) -> bytes:
     return html.encode("utf-8")
 
 
+def pdf_rendition_key(inquiry: Inquiry) -> str:
+  """
+  S3 key of the inquiry's PDF rendition.
+
+  Derived from a hash of everything printed on it (enriched names included) plus the
+  template version, so any change that would alter the PDF yields a new key.
+  """
+  import hashlib
+  import json
+
+  fields = {"template": _pdf_assets()["version"], **_pdf_fields(inquiry)}
+  digest = hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+  return f"inquiries/{inquiry.id}/{RENDITIONS_FOLDER}/{digest[:24]}.pdf"
+
+
+def get_pdf_rendition(inquiry: Inquiry) -> str:
+  """
+  Return the S3 key of the inquiry's cached PDF, rendering and storing it first if needed.
+
+  Expects an enriched inquiry (author and co-author names). Older renditions of the
+  inquiry are deleted when a new one is written.
+  """
+  key = pdf_rendition_key(inquiry)
+  s3 = get_client("s3")
+  try:
+    s3.head_object(Bucket=BUCKET, Key=key)
+    return key
+  except ClientError as e:
+    if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+      raise
+
+  _store_pdf_rendition(inquiry, key, get_pdf_service().render(inquiry))
+  return key
+
+
+def _store_pdf_rendition(inquiry: Inquiry, key: str, pdf: bytes) -> None:
+  get_client("s3").put_object(Bucket=BUCKET, Key=key, Body=pdf, ContentType="application/pdf")
+  _delete_stale_renditions(inquiry.id, keep=key)
+
+
+def _delete_stale_renditions(inquiry_id: str, keep: str) -> None:
+  s3 = get_client("s3")
+  prefix = f"inquiries/{inquiry_id}/{RENDITIONS_FOLDER}/"
+  try:
+    response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix)
+    stale = [{"Key": obj["Key"]} for obj in response.get("Contents", []) if obj["Key"] != keep]
+    if stale:
+      s3.delete_objects(Bucket=BUCKET, Delete={"Objects": stale})
+  except ClientError as e:
+    print(f"Failed to delete stale PDF renditions of {inquiry_id}: {e}")
+
+
+def _load_or_render_pdfs(inquiries: list[Inquiry]) -> list[bytes]:
+  """PDFs for a batch of enriched inquiries: cached renditions from S3, the rest rendered in one batch and cached."""
+  s3 = get_client("s3")
+  keys = [pdf_rendition_key(inquiry) for inquiry in inquiries]
+  pdfs: list[bytes | None] = []
+  for key in keys:
+    try:
+      pdfs.append(s3.get_object(Bucket=BUCKET, Key=key)["Body"].read())
+    except ClientError as e:
+      if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+        raise
+      pdfs.append(None)
+
+  missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+  rendered = get_pdf_service().render_many([inquiries[i] for i in missing])
+  for i, pdf in zip(missing, rendered, strict=True):
+    _store_pdf_rendition(inquiries[i], keys[i], pdf)
+    pdfs[i] = pdf
+  return pdfs
+
+
+def _archive_name(inquiry: Inquiry) -> str:
+  entry = (inquiry.entry_number or "").replace("/", "-").replace("\\", "-")
+  return f"{entry}_{inquiry.id}.pdf" if entry else f"{inquiry.id}.pdf"
+
+
+class _ZipChunks:
+  """Write-only file object collecting what ZipFile writes, so the archive can be yielded piece by piece."""
+
+  def __init__(self) -> None:
+    self._buffer = bytearray()
+
+  def write(self, data: bytes) -> int:
+    self._buffer += data
+    return len(data)
+
+  def flush(self) -> None:
+    pass
+
+  def take(self) -> bytes:
+    data = bytes(self._buffer)
+    self._buffer.clear()
+    return data
+
+
+def iter_pdf_archive(inquiries: list[Inquiry], batch_size: int | None = None) -> Iterator[bytes]:
+  """
+  Yield a ZIP of the inquiries' PDFs (stored, PDFs are already compressed) as it is built.
+
+  Expects enriched inquiries. Works through them batch_size at a time so at most one
+  batch of PDFs is held in memory; each batch is rendered in parallel by the PDF service.
+  """
+  import zipfile
+
+  batch_size = batch_size or get_pdf_render_settings().batch_size
+  chunks = _ZipChunks()
+  with zipfile.ZipFile(chunks, "w", compression=zipfile.ZIP_STORED) as archive:
+    for start in range(0, len(inquiries), batch_size):
+      batch = inquiries[start : start + batch_size]
+      for inquiry, pdf in zip(batch, _load_or_render_pdfs(batch), strict=True):
+        archive.writestr(_archive_name(inquiry), pdf)
+        yield chunks.take()
+  # Central directory, written on close
+  yield chunks.take()
+
+
+def store_pdf_archive(inquiries: list[Inquiry], key: str | None = None) -> str:
+  """Build the PDF archive in a temporary file, upload it and return its S3 key."""
+  import tempfile
+
+  key = key or f"{EXPORTS_PREFIX}/{datetime.now().strftime('%Y%m%d-%H%M%S')}_{uuid4().hex[:8]}.zip"
+  with tempfile.TemporaryFile() as archive:
+    for chunk in iter_pdf_archive(inquiries):
+      archive.write(chunk)
+    archive.seek(0)
+    get_client("s3").upload_fileobj(archive, BUCKET, key, ExtraArgs={"ContentType": "application/zip"})
+  return key
+
+
+def queue_pdf_archive(user_id: str) -> str:
+  """
+  Queue a registry archive export for the outbox worker and return its job ID.
+
+  Rendering every registered inquiry doesn't fit in an API request, so the worker builds
+  the ZIP and the caller polls get_pdf_archive_job until it is stored.
+  """
+  from mail.outbox import queue_emails
+
+  key = f"{EXPORTS_PREFIX}/{datetime.now().strftime('%Y%m%d-%H%M%S')}_{uuid4().hex[:8]}.zip"
+  (job_id,) = queue_emails([("inquiry_export", {"key": key, "requested_by": user_id})])
+  return job_id
+
+
+def get_pdf_archive_job(job_id: str) -> EmailJob | None:
+  """The export job queued by queue_pdf_archive, or None if there is no such export."""
+  from mail.outbox import get_job
+
+  job = get_job(job_id)
+  return job if job and job.kind == "inquiry_export" else None
+
+
+def deliver_pdf_archive(params: dict[str, Any]) -> None:
+  """
+  Outbox handler for "inquiry_export" jobs: builds the registry archive and stores it at
+  params["key"]. A retry picks up the renditions an earlier attempt already cached.
+  """
+  inquiries = list_registered_inquiries(get_inquiry_repository(), get_user_repository())
+  store_pdf_archive(inquiries, params["key"])
+
+
 # ---------------------------------------------------------------------------
 # Email notifications
 # ---------------------------------------------------------------------------
 
 
-def _notify_involved(inquiry: Inquiry, user_repo: UserRepository) -> None:
-  """Send notification to co-authors and scope-role users when an inquiry is created."""
+def _notify_involved(
+  inquiry: Inquiry,
+  user_repo: UserRepository,
+  loaders: RequestLoaders | None = None,
+  notified: list[str] | None = None,
+) -> None:
+  """
+  Send notification to co-authors and scope-role users when an inquiry is created.
+
+  Users already in notified are skipped and each successful send is appended to it, so a
+  retry only re-sends to the recipients that failed. Raises after trying everyone when
+  any send failed.
+  """
   from app_config import FRONTEND_BASE_URL
+  from mail.exceptions import EmailSendError
   from mail.operations import send_inquiry_notification
 
   inquiry_link = f"{FRONTEND_BASE_URL}/inquiries/{inquiry.id}"
-  notified: set[str] = set()
+  notified = [] if notified is None else notified
+  recipients: dict[str, tuple[str | None, str]] = {}
 
-  # Co-authors
-  for uid in inquiry.co_authors or []:
-    if uid in notified:
-      continue
-    try:
-      resp = user_repo.table.get_item(Key={"id": uid})
-      if "Item" in resp:
-        u = user_repo.convert_item_to_object(resp["Item"])
-        if u.email:
-          send_inquiry_notification(
-            email=u.email,
-            recipient_name=f"{u.first_name} {u.last_name}",
-            inquiry_title=inquiry.title,
-            status_bg="Изпратено",
-            inquiry_link=inquiry_link,
-          )
-          notified.add(uid)
-    except Exception as e:
-      print(f"Failed to notify co-author {uid}: {e}")
+  # Co-authors (already loaded by create_inquiry when the request's loaders are passed)
+  co_authors = (loaders or RequestLoaders(user_repo=user_repo)).users.load_many(inquiry.co_authors or [])
+  for uid, u in co_authors.items():
+    recipients[uid] = (u.email, u.display_name)
 
   # Scope roles (board / control) — get all users with those roles
   for scope_role in inquiry.scope or []:
@@ -652,23 +1050,31 @@ def _notify_involved(inquiry: Inquiry, user_repo: UserRepository) -> None:
       continue
 
     for u in _get_users_by_role(role_value, user_repo):
-      if u.id in notified:
-        continue
-      try:
-        if u.email:
-          send_inquiry_notification(
-            email=u.email,
-            recipient_name=f"{u.first_name} {u.last_name}",
-            inquiry_title=inquiry.title,
-            status_bg="Изпратено",
-            inquiry_link=inquiry_link,
-          )
-          notified.add(u.id)
-      except Exception as e:
-        print(f"Failed to notify scope user {u.id}: {e}")
-
-
-def _notify_author_status_change(inquiry: Inquiry, user_repo: UserRepository) -> None:
+      recipients.setdefault(u.id, (u.email, f"{u.first_name} {u.last_name}"))
+
+  failed = []
+  for uid, (email, name) in recipients.items():
+    if uid in notified or not email:
+      continue
+    try:
+      send_inquiry_notification(
+        email=email,
+        recipient_name=name,
+        inquiry_title=inquiry.title,
+        status_bg="Изпратено",
+        inquiry_link=inquiry_link,
+      )
+      notified.append(uid)
+    except Exception as e:
+      print(f"Failed to notify user {uid} about inquiry {inquiry.id}: {e}")
+      failed.append(uid)
+  if failed:
+    raise EmailSendError(f"Failed to notify {len(failed)} of {len(recipients)} users about inquiry {inquiry.id}")
+
+
+def _notify_author_status_change(
+  inquiry: Inquiry, user_repo: UserRepository, loaders: RequestLoaders | None = None
+) -> None:
   """Notify the inquiry author of a status change."""
   from app_config import FRONTEND_BASE_URL
   from mail.operations import send_inquiry_notification
@@ -681,20 +1087,61 @@ def _notify_author_status_change(inquiry: Inquiry, user_repo: UserRepository) ->
     "finished": "Приключено",
     "failed": "Неуспешно",
   }
+  author = (loaders or RequestLoaders(user_repo=user_repo)).users.load(inquiry.author_id)
+  if author is None or not author.email:
+    return
+  inquiry_link = f"{FRONTEND_BASE_URL}/inquiries/{inquiry.id}"
+  send_inquiry_notification(
+    email=author.email,
+    recipient_name=author.display_name,
+    inquiry_title=inquiry.title,
+    status_bg=status_map.get(inquiry.status, inquiry.status),
+    inquiry_link=inquiry_link,
+  )
+
+
+def queue_inquiry_notification(inquiry: Inquiry) -> None:
+  """Queue the new-inquiry notifications to co-authors and scope roles. Never raises."""
+  from mail.outbox import queue_emails
+
   try:
-    resp = user_repo.table.get_item(Key={"id": inquiry.author_id})
-    if "Item" not in resp:
-      return
-    author = user_repo.convert_item_to_object(resp["Item"])
-    if not author.email:
-      return
-    inquiry_link = f"{FRONTEND_BASE_URL}/inquiries/{inquiry.id}"
-    send_inquiry_notification(
-      email=author.email,
-      recipient_name=f"{author.first_name} {author.last_name}",
-      inquiry_title=inquiry.title,
-      status_bg=status_map.get(inquiry.status, inquiry.status),
-      inquiry_link=inquiry_link,
-    )
+    queue_emails([("inquiry_created", {"inquiry_id": inquiry.id})])
   except Exception as e:
-    print(f"Failed to notify author {inquiry.author_id} of status change: {e}")
+    print(f"Failed to queue notifications for inquiry {inquiry.id}: {e}")
+
+
+def _queue_status_notification(inquiry: Inquiry) -> None:
+  from mail.outbox import queue_emails
+
+  try:
+    queue_emails([("inquiry_status", {"inquiry_id": inquiry.id, "status": inquiry.status})])
+  except Exception as e:
+    print(f"Failed to queue status change notification for inquiry {inquiry.id}: {e}")
+
+
+def deliver_inquiry_created(params: dict[str, Any]) -> None:
+  """
+  Outbox handler for "inquiry_created" jobs. Skips inquiries deleted since. Raises so a
+  failed send is retried; params["notified"] keeps the users already emailed, so the
+  retry only reaches the rest.
+  """
+  try:
+    inquiry = get_inquiry(params["inquiry_id"], get_inquiry_repository())
+  except InquiryNotFoundError:
+    print(f"Inquiry {params['inquiry_id']} no longer exists, not notifying")
+    return
+  _notify_involved(inquiry, get_user_repository(), notified=params.setdefault("notified", []))
+
+
+def deliver_inquiry_status(params: dict[str, Any]) -> None:
+  """
+  Outbox handler for "inquiry_status" jobs: tells the author about the status the job was
+  queued for, even if the inquiry has moved on since. Raises so a failed send is retried.
+  """
+  try:
+    inquiry = get_inquiry(params["inquiry_id"], get_inquiry_repository())
+  except InquiryNotFoundError:
+    print(f"Inquiry {params['inquiry_id']} no longer exists, not notifying")
+    return
+  inquiry.status = params["status"]
+  _notify_author_status_change(inquiry, get_user_repository())
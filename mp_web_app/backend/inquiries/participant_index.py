@@ -0,0 +1,109 @@
+import os
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from boto3.dynamodb.conditions import Key
+
+from database.repositories import InquiryParticipantRepository, InquiryRepository
+from users.roles import UserRole
+
+INQUIRY_PARTICIPANTS_TABLE_NAME = os.environ.get("INQUIRY_PARTICIPANTS_TABLE_NAME")
+
+CO_AUTHOR = "co_author"
+SCOPE = "scope"
+
+# Participant index
+# -----------------
+# inquiries_table stays the source of truth for co_authors and scope. The participant
+# table mirrors them as one row per (co-author, inquiry) and per (scope role, inquiry), so
+# "mine" and "addressed to me" are single-partition queries, newest first. "admin" is in
+# every scope and gets no rows: admins read the registry_entry_index instead. Writes to
+# the two tables are not transactional; readers re-check the inquiry, so a stale row is
+# harmless, and `python -m jobs.backfill_inquiry_index` repairs missing rows (see "Derived
+# tables" in files/share_index.py).
+
+
+def get_participant_repository() -> InquiryParticipantRepository:
+  return InquiryParticipantRepository(INQUIRY_PARTICIPANTS_TABLE_NAME)
+
+
+def inquiry_key(created_at: str | None, inquiry_id: str) -> str:
+  return f"{created_at or ''}#{inquiry_id}"
+
+
+def scope_participant(role: str) -> str:
+  return f"{SCOPE}#{role}"
+
+
+def participants_of(inquiry_item: dict[str, Any]) -> dict[str, str]:
+  """participant -> relation for every index row the inquiry should have."""
+  participants = {scope_participant(role): SCOPE for role in inquiry_item.get("scope") or [] if role != UserRole.ADMIN}
+  for user_id in inquiry_item.get("co_authors") or []:
+    if user_id != inquiry_item.get("author_id"):
+      participants[user_id] = CO_AUTHOR
+  return participants
+
+
+def index_participants(
+  inquiry_item: dict[str, Any], participants: dict[str, str], participant_repo: InquiryParticipantRepository
+) -> None:
+  """Write a row for every participant. Idempotent: rows are keyed by participant and inquiry."""
+  key = inquiry_key(inquiry_item.get("created_at"), inquiry_item["id"])
+  with participant_repo.table.batch_writer(overwrite_by_pkeys=["participant", "inquiry_key"]) as batch:
+    for participant, relation in participants.items():
+      batch.put_item(
+        Item={
+          "participant": participant,
+          "inquiry_key": key,
+          "inquiry_id": inquiry_item["id"],
+          "created_at": inquiry_item.get("created_at") or "",
+          "relation": relation,
+        }
+      )
+
+
+def unindex_participants(
+  inquiry_item: dict[str, Any], participants: Iterable[str], participant_repo: InquiryParticipantRepository
+) -> None:
+  """Delete the rows of the given participants for an inquiry."""
+  key = inquiry_key(inquiry_item.get("created_at"), inquiry_item["id"])
+  with participant_repo.table.batch_writer(overwrite_by_pkeys=["participant", "inquiry_key"]) as batch:
+    for participant in dict.fromkeys(participants):
+      batch.delete_item(Key={"participant": participant, "inquiry_key": key})
+
+
+def reindex_participants(
+  before: dict[str, Any], after: dict[str, Any], participant_repo: InquiryParticipantRepository
+) -> None:
+  """Bring the rows in line after co_authors or scope changed: drop removed participants, add new ones."""
+  old, new = participants_of(before), participants_of(after)
+  removed = [participant for participant in old if participant not in new]
+  added = {participant: relation for participant, relation in new.items() if old.get(participant) != relation}
+  if removed:
+    unindex_participants(after, removed, participant_repo)
+  if added:
+    index_participants(after, added, participant_repo)
+
+
+def iter_participant_rows(
+  participant: str,
+  participant_repo: InquiryParticipantRepository,
+  before: str | None = None,
+  page_size: int | None = None,
+) -> Iterator[dict[str, Any]]:
+  """Rows of one participant, newest inquiry first, optionally only those older than the inquiry_key before."""
+  condition = Key("participant").eq(participant)
+  if before is not None:
+    condition = condition & Key("inquiry_key").lt(before)
+  return participant_repo.iter_query(condition, scan_forward=False, page_size=page_size)
+
+
+def backfill_participant_index(repo: InquiryRepository, participant_repo: InquiryParticipantRepository) -> int:
+  """Write participant rows for every inquiry. Returns the number of rows written."""
+  written = 0
+  for item in repo.iter_scan(projection=["id", "created_at", "author_id", "co_authors", "scope"]):
+    participants = participants_of(item)
+    if participants:
+      index_participants(item, participants, participant_repo)
+      written += len(participants)
+  return written
@@ -0,0 +1,156 @@
+import atexit
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app_config import PdfRenderSettings
+from inquiries.exceptions import PdfRenderTimeoutError
+from inquiries.models import Inquiry
+
+
+@lru_cache
+def get_pdf_render_settings() -> PdfRenderSettings:
+  """Get PDF rendering settings from environment variables."""
+  return PdfRenderSettings()
+
+
+def _render(inquiry: Inquiry) -> bytes:
+  # Looked up on each call so tests can patch inquiries.operations.export_pdf
+  from inquiries import operations
+
+  return operations.export_pdf(inquiry)
+
+
+def _warm_worker() -> None:
+  """
+  Pool initializer: pay the per-process setup once instead of on each worker's first PDF.
+
+  Reads the template and logo (_pdf_assets is cached per process), imports xhtml2pdf and
+  renders one throwaway document, which registers the DejaVu fonts with reportlab, so
+  later documents in this worker reuse the parsed fonts.
+  """
+  from inquiries.operations import _pdf_assets
+
+  _pdf_assets()
+  try:
+    _render(Inquiry(id="warm-up", title="—", description="—", inquiry_type="inquiry", author_id="—"))
+  except Exception as e:
+    print(f"PDF worker warm-up failed: {e}")
+
+
+def processes_supported() -> bool:
+  """multiprocessing needs POSIX semaphores, i.e. /dev/shm; Lambda doesn't provide it."""
+  return os.name == "nt" or Path("/dev/shm").is_dir()
+
+
+class PdfRenderService:
+  """
+  Renders inquiry PDFs off the request thread, in a small pool of worker processes.
+
+  Rendering is pure Python and CPU-bound, so threads can't run two at once; separate
+  processes can, one per core. Each worker is warmed up by _warm_worker when it starts.
+  The pool is created on first use. With process_pool off, or where processes aren't
+  supported, documents are rendered inline in the calling thread instead.
+
+  render_many() returns PDFs in input order or raises PdfRenderTimeoutError once timeout
+  seconds have passed for the batch. A timed-out pool is terminated (a stuck worker can't
+  be interrupted otherwise) and replaced on the next call.
+  """
+
+  def __init__(
+    self,
+    workers: int | None = None,
+    timeout: float = 60.0,
+    process_pool: bool = True,
+    start_method: str = "spawn",
+  ) -> None:
+    self.workers = max(1, workers or os.cpu_count() or 1)
+    self.timeout = timeout
+    self.start_method = start_method
+    self.mode = "process" if process_pool and processes_supported() else "inline"
+    self._pool: Any = None
+    self._lock = threading.Lock()
+    self.rendered = 0
+    self.timeouts = 0
+    self.total_render_ms = 0.0
+
+  def _get_pool(self) -> Any:
+    with self._lock:
+      if self._pool is None and self.mode == "process":
+        import multiprocessing
+
+        try:
+          context = multiprocessing.get_context(self.start_method)
+          self._pool = context.Pool(self.workers, initializer=_warm_worker)
+        except (OSError, ImportError, ValueError) as e:
+          print(f"PDF process pool unavailable, rendering inline: {e}")
+          self.mode = "inline"
+      return self._pool
+
+  def render(self, inquiry: Inquiry, timeout: float | None = None) -> bytes:
+    return self.render_many([inquiry], timeout)[0]
+
+  def render_many(self, inquiries: list[Inquiry], timeout: float | None = None) -> list[bytes]:
+    if not inquiries:
+      return []
+    timeout = self.timeout if timeout is None else timeout
+    started = time.perf_counter()
+    pool = self._get_pool()
+    if pool is None:
+      pdfs = self._render_inline(inquiries, started, timeout)
+    else:
+      import multiprocessing
+
+      try:
+        pdfs = pool.map_async(_render, inquiries, chunksize=1).get(timeout)
+      except multiprocessing.TimeoutError:
+        self.timeouts += 1
+        self.shutdown()
+        raise PdfRenderTimeoutError(len(inquiries), timeout)
+
+    self.rendered += len(pdfs)
+    self.total_render_ms += (time.perf_counter() - started) * 1000
+    return pdfs
+
+  def _render_inline(self, inquiries: list[Inquiry], started: float, timeout: float) -> list[bytes]:
+    pdfs = []
+    for inquiry in inquiries:
+      # A document can't be interrupted mid-render; the deadline is checked between them
+      if time.perf_counter() - started > timeout:
+        self.timeouts += 1
+        raise PdfRenderTimeoutError(len(inquiries), timeout)
+      pdfs.append(_render(inquiry))
+    return pdfs
+
+  def shutdown(self) -> None:
+    with self._lock:
+      if self._pool is not None:
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+
+  def stats(self) -> dict[str, Any]:
+    return {
+      "mode": self.mode,
+      "workers": self.workers if self.mode == "process" else 1,
+      "rendered": self.rendered,
+      "timeouts": self.timeouts,
+      "ms_per_pdf": round(self.total_render_ms / self.rendered, 1) if self.rendered else None,
+    }
+
+
+@lru_cache
+def get_pdf_service() -> PdfRenderService:
+  """Process-wide PDF rendering service; its pool is terminated at interpreter exit."""
+  settings = get_pdf_render_settings()
+  service = PdfRenderService(
+    workers=settings.workers,
+    timeout=settings.timeout_seconds,
+    process_pool=settings.process_pool,
+    start_method=settings.start_method,
+  )
+  atexit.register(service.shutdown)
+  return service
@@ -1,30 +1,54 @@
 import json
 import os
+from collections.abc import Callable
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
-from fastapi.responses import Response
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
 
 from auth.operations import role_required
-from database.repositories import InquiryRepository, UserRepository
-from inquiries.exceptions import InquiryAccessDeniedError, InquiryNotFoundError, InquiryStatusError
-from inquiries.models import AssignEntryNumber, CloseInquiry, Inquiry, InquiryCreate, InquiryUpdate
+from database.loaders import RequestLoaders, get_request_loaders
+from database.repositories import InquiryRepository, InquiryStatsRepository, UserRepository
+from inquiries.exceptions import (
+  InquiryAccessDeniedError,
+  InquiryNotFoundError,
+  InquiryStatusError,
+  PdfRenderTimeoutError,
+)
+from inquiries.models import (
+  AssignEntryNumber,
+  CloseInquiry,
+  Inquiry,
+  InquiryCreate,
+  InquiryStats,
+  InquiryStatus,
+  InquiryUpdate,
+  PdfArchiveExport,
+)
 from inquiries.operations import (
-  _notify_involved,
+  BUCKET,
+  DEFAULT_PAGE_SIZE,
+  MAX_PAGE_SIZE,
   add_inquiry_files,
   assign_entry_number,
   close_inquiry,
   create_inquiry,
   delete_inquiry,
-  export_pdf,
   get_inquiry,
   get_inquiry_repository,
+  get_pdf_archive_job,
+  get_pdf_rendition,
   get_user_repository,
   list_all_inquiries,
   list_inquiries_for_scope,
   list_inquiries_for_user,
+  queue_inquiry_notification,
+  queue_pdf_archive,
   update_inquiry,
 )
+from inquiries.stats import get_inquiry_stats, get_stats_repository
 from users.roles import UserRole
+from utils.cursors import NEXT_CURSOR_HEADER, InvalidCursorError
+from utils.downloads import DownloadMode, serve_s3_object
 
 inquiry_router = APIRouter(tags=["inquiries"])
 
@@ -68,8 +92,7 @@ def _check_visibility(inquiry: Inquiry, user_id: str, user_role: str) -> None:
 
 
 @inquiry_router.post("/create", response_model=Inquiry, status_code=status.HTTP_201_CREATED)
-async def inquiry_create(
-  background_tasks: BackgroundTasks,
+def inquiry_create(
   title: str = Form(...),
   description: str = Form(...),
   inquiry_type: str = Form(...),
@@ -78,6 +101,7 @@ async def inquiry_create(
   files: list[UploadFile] = File(default=[]),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
+  loaders: RequestLoaders = Depends(get_request_loaders),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.CONTROL, UserRole.ACCOUNTANT, UserRole.ADMIN])
   ),
@@ -86,8 +110,8 @@ async def inquiry_create(
     title=title, description=description, inquiry_type=inquiry_type, scope=scope, co_authors=co_authors
   )
   try:
-    inquiry = create_inquiry(data, files, user.id, repo, user_repo)
-    background_tasks.add_task(_notify_involved, inquiry, user_repo)
+    inquiry = create_inquiry(data, files, user.id, repo, user_repo, loaders)
+    queue_inquiry_notification(inquiry)
     return inquiry
   except ValueError as e:
     raise HTTPException(status_code=400, detail=str(e))
@@ -95,55 +119,121 @@ async def inquiry_create(
     raise HTTPException(status_code=500, detail=str(e))
 
 
+def _paged(response: Response, list_page: Callable[[], tuple[list[Inquiry], str | None]]) -> list[Inquiry]:
+  """Run a paginated listing; the next page's cursor goes in the X-Next-Cursor header."""
+  try:
+    inquiries, next_cursor = list_page()
+  except InvalidCursorError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  if next_cursor:
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+  return inquiries
+
+
 @inquiry_router.get("/mine", response_model=list[Inquiry], status_code=status.HTTP_200_OK)
-async def inquiries_mine(
+def inquiries_mine(
+  response: Response,
+  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+  cursor: str | None = Query(None),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.CONTROL, UserRole.ACCOUNTANT, UserRole.ADMIN])
   ),
 ):
-  return list_inquiries_for_user(user.id, repo, user_repo)
+  return _paged(response, lambda: list_inquiries_for_user(user.id, repo, user_repo, limit, cursor))
 
 
 @inquiry_router.get("/addressed-to-me", response_model=list[Inquiry], status_code=status.HTTP_200_OK)
-async def inquiries_addressed_to_me(
+def inquiries_addressed_to_me(
+  response: Response,
+  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+  cursor: str | None = Query(None),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.BOARD, UserRole.CONTROL, UserRole.ADMIN])),
 ):
-  return list_inquiries_for_scope(user.role, repo, user_repo)
+  return _paged(response, lambda: list_inquiries_for_scope(user.role, repo, user_repo, limit, cursor))
 
 
 @inquiry_router.get("/all", response_model=list[Inquiry], status_code=status.HTTP_200_OK)
-async def inquiries_all(
+def inquiries_all(
+  response: Response,
+  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+  cursor: str | None = Query(None),
+  inquiry_status: InquiryStatus | None = Query(None, alias="status"),
+  inquiry_type: str | None = Query(None),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
-  return list_all_inquiries(repo, user_repo)
+  """The inquiry registry: unregistered inquiries first, then descending entry number."""
+  return _paged(
+    response,
+    lambda: list_all_inquiries(repo, user_repo, limit, cursor, status=inquiry_status, inquiry_type=inquiry_type),
+  )
+
+
+@inquiry_router.get("/stats", response_model=InquiryStats, status_code=status.HTTP_200_OK)
+def inquiries_stats(
+  stats_repo: InquiryStatsRepository = Depends(get_stats_repository),
+  user=Depends(role_required([UserRole.BOARD, UserRole.ADMIN])),
+):
+  """Inquiry counts by status, type and scope for the dashboards."""
+  try:
+    return get_inquiry_stats(stats_repo)
+  except ClientError as e:
+    raise HTTPException(status_code=500, detail=f"Could not read inquiry stats: {e.response['Error']['Message']}")
+
+
+@inquiry_router.post("/export", response_model=PdfArchiveExport, status_code=status.HTTP_202_ACCEPTED)
+def inquiries_export_archive(user=Depends(role_required([UserRole.ADMIN]))):
+  """
+  Queue a ZIP of the PDFs of every registered inquiry, for the registry archive. The
+  outbox worker builds it; poll GET /export/{export_id} until it is ready.
+  """
+  try:
+    export_id = queue_pdf_archive(user.id)
+  except ClientError as e:
+    raise HTTPException(status_code=500, detail=f"Could not queue the export: {e.response['Error']['Message']}")
+  return PdfArchiveExport(export_id=export_id, status="pending")
+
+
+@inquiry_router.get("/export/{export_id}", status_code=status.HTTP_200_OK)
+def inquiries_export_download(
+  export_id: str,
+  response: Response,
+  mode: DownloadMode | None = Query(None),
+  user=Depends(role_required([UserRole.ADMIN])),
+):
+  """The archive once stored (delivered like any download), else its progress with 202."""
+  job = get_pdf_archive_job(export_id)
+  if job is None:
+    raise HTTPException(status_code=404, detail="Export not found")
+  if job.status == "failed":
+    raise HTTPException(status_code=500, detail=f"Could not export PDFs: {job.last_error}")
+  if job.status != "sent":
+    response.status_code = status.HTTP_202_ACCEPTED
+    return PdfArchiveExport(export_id=export_id, status=job.status)
+  filename = f"zapitvania_{job.created_at[:10]}.zip"
+  try:
+    return serve_s3_object(BUCKET, job.params["key"], filename, mode)
+  except ClientError as e:
+    raise HTTPException(status_code=500, detail=f"Could not export PDFs: {e.response['Error']['Message']}")
 
 
 # File download — registered before /{inquiry_id} to prevent route shadowing
 @inquiry_router.get("/{inquiry_id}/files/{file_key:path}", status_code=status.HTTP_200_OK)
-async def inquiry_download_file(
+def inquiry_download_file(
   inquiry_id: str,
   file_key: str,
+  mode: DownloadMode | None = Query(None),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.CONTROL, UserRole.ACCOUNTANT, UserRole.ADMIN])
   ),
 ):
-  """Stream the file from S3 through the backend — avoids S3 CORS issues."""
-  import mimetypes
-  from urllib.parse import quote
-
-  import boto3
-  from botocore.exceptions import ClientError
-  from fastapi.responses import StreamingResponse
-
-  from inquiries.operations import BUCKET
-
+  """Download an attachment: 302 to a presigned S3 URL, the URL as JSON (mode=url) or streamed (mode=proxy)."""
   try:
     inquiry = get_inquiry(inquiry_id, repo)
   except InquiryNotFoundError as e:
@@ -161,25 +251,14 @@ async def inquiry_download_file(
   if "_" in filename:
     filename = filename.split("_", 1)[1]
 
-  mime_type, _ = mimetypes.guess_type(filename)
-  content_type = mime_type or "application/octet-stream"
-  safe_ascii = filename.encode("ascii", errors="replace").decode("ascii")
-  content_disposition = f"attachment; filename=\"{safe_ascii}\"; filename*=UTF-8''{quote(filename)}"
-
   try:
-    s3 = boto3.client("s3")
-    s3_obj = s3.get_object(Bucket=BUCKET, Key=full_key)
-    return StreamingResponse(
-      s3_obj["Body"].iter_chunks(chunk_size=65536),
-      media_type=content_type,
-      headers={"Content-Disposition": content_disposition},
-    )
+    return serve_s3_object(BUCKET, full_key, filename, mode)
   except ClientError as e:
     raise HTTPException(status_code=500, detail=f"Could not retrieve file: {e.response['Error']['Message']}")
 
 
 @inquiry_router.get("/{inquiry_id}", response_model=Inquiry, status_code=status.HTTP_200_OK)
-async def inquiry_get(
+def inquiry_get(
   inquiry_id: str,
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
@@ -199,7 +278,7 @@ async def inquiry_get(
 
 
 @inquiry_router.put("/{inquiry_id}", response_model=Inquiry, status_code=status.HTTP_200_OK)
-async def inquiry_update(
+def inquiry_update(
   inquiry_id: str,
   description: str | None = Form(None),
   title: str | None = Form(None),
@@ -254,7 +333,7 @@ async def inquiry_update(
 
 
 @inquiry_router.post("/{inquiry_id}/files", response_model=Inquiry, status_code=status.HTTP_200_OK)
-async def inquiry_add_files(
+def inquiry_add_files(
   inquiry_id: str,
   files: list[UploadFile] = File(...),
   repo: InquiryRepository = Depends(get_inquiry_repository),
@@ -288,16 +367,17 @@ async def inquiry_add_files(
 
 
 @inquiry_router.post("/{inquiry_id}/entry-number", response_model=Inquiry, status_code=status.HTTP_200_OK)
-async def inquiry_assign_entry_number(
+def inquiry_assign_entry_number(
   inquiry_id: str,
   data: AssignEntryNumber,
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
+  loaders: RequestLoaders = Depends(get_request_loaders),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
   try:
     inquiry = get_inquiry(inquiry_id, repo)
-    return assign_entry_number(inquiry, data, repo, user_repo)
+    return assign_entry_number(inquiry, data, repo, user_repo, loaders)
   except InquiryNotFoundError as e:
     raise HTTPException(status_code=404, detail=str(e))
   except InquiryStatusError as e:
@@ -307,10 +387,11 @@ async def inquiry_assign_entry_number(
 
 
 @inquiry_router.get("/{inquiry_id}/pdf", status_code=status.HTTP_200_OK)
-async def inquiry_export_pdf(
+def inquiry_export_pdf(
   inquiry_id: str,
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
+  mode: DownloadMode | None = Query(None),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.CONTROL, UserRole.ACCOUNTANT, UserRole.ADMIN])
   ),
@@ -332,18 +413,12 @@ async def inquiry_export_pdf(
   _enrich_inquiry(inquiry, user_repo)
 
   try:
-    pdf_bytes = export_pdf(inquiry)
-    ascii_id = inquiry.entry_number or inquiry.id
-    filename_ascii = f"inquiry_{ascii_id}.pdf"
-    from urllib.parse import quote
-
-    safe_title = inquiry.title[:50]
-    filename_utf8 = quote(f"zapitване_{ascii_id}_{safe_title}.pdf")
-    return Response(
-      content=pdf_bytes,
-      media_type="application/pdf",
-      headers={"Content-Disposition": f"attachment; filename=\"{filename_ascii}\"; filename*=UTF-8''{filename_utf8}"},
-    )
+    # Rendered once per version of the inquiry and cached in S3, then served like an attachment
+    key = get_pdf_rendition(inquiry)
+    filename = f"zapitване_{inquiry.entry_number or inquiry.id}_{inquiry.title[:50]}.pdf"
+    return serve_s3_object(BUCKET, key, filename, mode)
+  except PdfRenderTimeoutError as e:
+    raise HTTPException(status_code=504, detail=str(e))
   except Exception as e:
     import traceback
 
@@ -352,13 +427,14 @@ async def inquiry_export_pdf(
 
 
 @inquiry_router.post("/{inquiry_id}/close", response_model=Inquiry, status_code=status.HTTP_200_OK)
-async def inquiry_close(
+def inquiry_close(
   inquiry_id: str,
   final_status: str = Form(...),
   reason: str = Form(...),
   pdf_file: UploadFile | None = File(None),
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user_repo: UserRepository = Depends(get_user_repository),
+  loaders: RequestLoaders = Depends(get_request_loaders),
   user=Depends(
     role_required([UserRole.REGULAR_USER, UserRole.BOARD, UserRole.CONTROL, UserRole.ACCOUNTANT, UserRole.ADMIN])
   ),
@@ -370,7 +446,7 @@ async def inquiry_close(
 
   data = CloseInquiry(final_status=final_status, reason=reason)
   try:
-    return close_inquiry(inquiry, data, pdf_file, user.id, user.role, repo, user_repo)
+    return close_inquiry(inquiry, data, pdf_file, user.id, user.role, repo, user_repo, loaders)
   except InquiryAccessDeniedError as e:
     raise HTTPException(status_code=403, detail=str(e))
   except InquiryStatusError as e:
@@ -382,7 +458,7 @@ async def inquiry_close(
 
 
 @inquiry_router.delete("/{inquiry_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def inquiry_delete(
+def inquiry_delete(
   inquiry_id: str,
   repo: InquiryRepository = Depends(get_inquiry_repository),
   user=Depends(
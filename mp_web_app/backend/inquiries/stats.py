@@ -0,0 +1,80 @@
+import os
+from collections import Counter
+from typing import Any
+
+from database.repositories import InquiryRepository, InquiryStatsRepository
+from inquiries.models import InquiryStats
+
+INQUIRY_STATS_TABLE_NAME = os.environ.get("INQUIRY_STATS_TABLE_NAME")
+
+# Key of the single aggregates item
+STATS_KEY = "inquiries"
+TOTAL = "total"
+
+# Inquiry statistics
+# ------------------
+# inquiry_stats_table holds one item with a counter per status, type and scope role
+# ("status#sent", "type#сигнал", "scope#board") plus "total". Every write to an inquiry
+# that can move it between buckets applies the difference with one atomic ADD update, so
+# the stats endpoint is a single get_item. `python -m jobs.rebuild_inquiry_stats`
+# recomputes the counters from inquiries_table if they ever drift (see "Derived tables"
+# in files/share_index.py).
+
+
+def get_stats_repository() -> InquiryStatsRepository:
+  return InquiryStatsRepository(INQUIRY_STATS_TABLE_NAME)
+
+
+def counters_of(inquiry_item: dict[str, Any] | None) -> Counter[str]:
+  """The counters one inquiry contributes to: total, its status, its type and every scope role."""
+  if inquiry_item is None:
+    return Counter()
+  counters = Counter([TOTAL, f"status#{inquiry_item.get('status')}", f"type#{inquiry_item.get('inquiry_type')}"])
+  counters.update(f"scope#{role}" for role in set(inquiry_item.get("scope") or []))
+  return counters
+
+
+def stats_deltas(before: dict[str, Any] | None, after: dict[str, Any] | None) -> dict[str, int]:
+  """Counter changes for an inquiry going from before to after (None when created or deleted)."""
+  deltas = counters_of(after)
+  deltas.subtract(counters_of(before))
+  return {counter: delta for counter, delta in deltas.items() if delta}
+
+
+def apply_stats_deltas(deltas: dict[str, int], stats_repo: InquiryStatsRepository) -> None:
+  """Apply every counter change in one atomic update."""
+  names = {f"#c{i}": counter for i, counter in enumerate(deltas)}
+  values = {f":d{i}": delta for i, delta in enumerate(deltas.values())}
+  stats_repo.table.update_item(
+    Key={"stats": STATS_KEY},
+    UpdateExpression="ADD " + ", ".join(f"#c{i} :d{i}" for i in range(len(deltas))),
+    ExpressionAttributeNames=names,
+    ExpressionAttributeValues=values,
+  )
+
+
+def get_inquiry_stats(stats_repo: InquiryStatsRepository) -> InquiryStats:
+  response = stats_repo.table.get_item(Key={"stats": STATS_KEY})
+  return stats_repo.convert_item_to_object(response.get("Item") or {})
+
+
+def count_inquiries(repo: InquiryRepository, segments: int | None = None) -> Counter[str]:
+  """Recompute every counter with a (parallel) scan of inquiries_table."""
+  counts: Counter[str] = Counter()
+  for item in repo.iter_scan(projection=["status", "inquiry_type", "scope"], segments=segments):
+    counts.update(counters_of(item))
+  return counts
+
+
+def rebuild_inquiry_stats(
+  repo: InquiryRepository, stats_repo: InquiryStatsRepository, segments: int | None = None
+) -> InquiryStats:
+  """
+  Overwrite the aggregates item with counters recomputed from inquiries_table.
+
+  Inquiry writes that land while the scan runs can be lost from the counts; run it again
+  if inquiries were being created or closed.
+  """
+  item = {"stats": STATS_KEY, **count_inquiries(repo, segments)}
+  stats_repo.table.put_item(Item=item)
+  return stats_repo.convert_item_to_object(item)
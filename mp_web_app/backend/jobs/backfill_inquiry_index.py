@@ -0,0 +1,38 @@
+"""Tag inquiries for the registry indexes and rebuild their participant rows.
+
+Sets inquiry and entry_sort where missing or stale, then rewrites the
+inquiry_participants_table rows from co_authors and scope. When to run it: see "Derived
+tables" in files/share_index.py.
+
+Usage:
+  uv run python -m jobs.backfill_inquiry_index
+"""
+
+import argparse
+
+
+def main() -> None:
+  argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+  from inquiries.operations import ALL_PARTITION, entry_sort_value, get_inquiry_repository
+  from inquiries.participant_index import backfill_participant_index, get_participant_repository
+
+  repo = get_inquiry_repository()
+  tagged = 0
+  for item in repo.iter_scan(projection=["id", "inquiry", "entry_number", "entry_sort"]):
+    entry_sort = entry_sort_value(item.get("entry_number"))
+    if item.get("inquiry") != ALL_PARTITION or item.get("entry_sort") != entry_sort:
+      repo.table.update_item(
+        Key={"id": item["id"]},
+        UpdateExpression="SET #p = :p, #es = :es",
+        ExpressionAttributeNames={"#p": "inquiry", "#es": "entry_sort"},
+        ExpressionAttributeValues={":p": ALL_PARTITION, ":es": entry_sort},
+      )
+      tagged += 1
+
+  written = backfill_participant_index(repo, get_participant_repository())
+  print(f"Tagged {tagged} inquiries for the registry indexes, indexed {written} participant rows")
+
+
+if __name__ == "__main__":
+  main()
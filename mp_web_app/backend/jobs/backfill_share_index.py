@@ -0,0 +1,23 @@
+"""Rebuild file_shares_table rows from uploads_table.allowed_to.
+
+When to run it: see "Derived tables" in files/share_index.py.
+
+Usage:
+  uv run python -m jobs.backfill_share_index
+"""
+
+import argparse
+
+
+def main() -> None:
+  argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+  from files.operations import get_uploads_repository
+  from files.share_index import backfill_share_index, get_share_repository
+
+  written = backfill_share_index(get_uploads_repository(), get_share_repository())
+  print(f"Indexed {written} share rows")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,38 @@
+"""Add the sparse subscription_index key to users created before the index existed.
+
+Sets subscription = "subscribed" on every user with subscribed = true that lacks it,
+and removes a stray key from unsubscribed users. Safe to re-run.
+
+Usage:
+  uv run python -m jobs.backfill_subscription_index
+"""
+
+import argparse
+
+
+def main() -> None:
+  argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+  from users.operations import SUBSCRIBED, get_user_repository
+
+  repo = get_user_repository()
+  added = removed = 0
+  for item in repo.iter_scan(projection=["id", "subscribed", "subscription"]):
+    if item.get("subscribed") and item.get("subscription") != SUBSCRIBED:
+      repo.table.update_item(
+        Key={"id": item["id"]},
+        UpdateExpression="SET #s = :s",
+        ExpressionAttributeNames={"#s": "subscription"},
+        ExpressionAttributeValues={":s": SUBSCRIBED},
+      )
+      added += 1
+    elif not item.get("subscribed") and "subscription" in item:
+      repo.table.update_item(
+        Key={"id": item["id"]}, UpdateExpression="REMOVE #s", ExpressionAttributeNames={"#s": "subscription"}
+      )
+      removed += 1
+  print(f"Indexed {added} subscribed users, cleared {removed}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,34 @@
+"""Send the queued notification emails, like the outbox worker Lambda does.
+
+For local development and for draining the queue by hand: claims due jobs from
+email_outbox_table in batches, delivers them and records the outcome. With --loop it
+keeps polling, picking up retries as their backoff runs out.
+
+Usage:
+  uv run python -m jobs.drain_outbox
+  uv run python -m jobs.drain_outbox --loop --interval 5
+"""
+
+import argparse
+import time
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--loop", action="store_true", help="keep polling for new jobs")
+  parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --loop")
+  args = parser.parse_args()
+
+  from mail.outbox import drain_outbox
+
+  while True:
+    counts = drain_outbox()
+    if counts["sent"] or counts["retried"] or counts["failed"] or not args.loop:
+      print(f"Outbox drained: {counts['sent']} sent, {counts['retried']} to retry, {counts['failed']} failed")
+    if not args.loop:
+      break
+    time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,27 @@
+"""Recompute the inquiry_stats_table counters from inquiries_table.
+
+Scans inquiries_table in parallel segments and overwrites the aggregates item with the
+counts by status, type and scope. When to run it: see "Derived tables" in
+files/share_index.py.
+
+Usage:
+  uv run python -m jobs.rebuild_inquiry_stats --segments 4
+"""
+
+import argparse
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--segments", type=int, default=4, help="parallel scan segments")
+  args = parser.parse_args()
+
+  from inquiries.operations import get_inquiry_repository
+  from inquiries.stats import get_stats_repository, rebuild_inquiry_stats
+
+  stats = rebuild_inquiry_stats(get_inquiry_repository(), get_stats_repository(), segments=args.segments)
+  print(f"Counted {stats.total} inquiries: {', '.join(f'{k} {v}' for k, v in stats.by_status.items())}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,27 @@
+"""Recompute file_labels_table usage counts from uploads_table.
+
+Scans uploads_table in parallel segments, overwrites every label's usage_count and
+deletes labels no file uses any more. When to run it: see "Derived tables" in
+files/share_index.py.
+
+Usage:
+  uv run python -m jobs.rebuild_label_registry --segments 4
+"""
+
+import argparse
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--segments", type=int, default=4, help="parallel scan segments")
+  args = parser.parse_args()
+
+  from files.label_registry import get_label_repository, rebuild_label_registry
+  from files.operations import get_uploads_repository
+
+  result = rebuild_label_registry(get_uploads_repository(), get_label_repository(), segments=args.segments)
+  print(f"Registered {result['labels']} labels, removed {result['removed']} unused")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,24 @@
+"""Send the daily notification digests that are due, like the hourly worker run does.
+
+Emails every user with notification_mode = daily whose oldest buffered document is at
+least DIGEST_WINDOW_HOURS old, then clears what was sent. Set DIGEST_WINDOW_HOURS=0 to
+flush every buffered digest now.
+
+Usage:
+  uv run python -m jobs.send_digests
+"""
+
+import argparse
+
+
+def main() -> None:
+  argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+  from mail.digest import send_due_digests
+
+  counts = send_due_digests()
+  print(f"Digests: {counts['sent']} sent, {counts['failed']} failed, {counts['dropped']} dropped")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from botocore.exceptions import ClientError
+
+from app_config import BulkMailSettings
+from mail.models import BulkMailReport, BulkRecipient
+from mail.operations import build_raw_message, get_mail_settings, get_template
+from utils.aws_clients import get_client
+
+# Error codes SES returns when a send exceeds the account's maximum send rate
+THROTTLING_CODES = {"Throttling", "ThrottlingException", "TooManyRequestsException"}
+# Pace used when GetSendQuota can't be read: the SES sandbox limit
+DEFAULT_SEND_RATE = 1.0
+
+
+@lru_cache
+def get_bulk_mail_settings() -> BulkMailSettings:
+  """Get bulk email settings from environment variables."""
+  return BulkMailSettings()
+
+
+class TokenBucket:
+  """
+  Paces callers to rate acquisitions per second, with bursts of up to capacity.
+
+  Thread-safe. acquire() reserves a token under the lock (the balance may go negative)
+  and sleeps outside it, so waiting threads are released in order, one every 1/rate
+  seconds, instead of polling.
+  """
+
+  def __init__(
+    self,
+    rate: float,
+    capacity: float | None = None,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+  ) -> None:
+    if rate <= 0:
+      raise ValueError("Token bucket rate must be positive")
+    self.rate = rate
+    self.capacity = capacity if capacity is not None else max(1.0, rate)
+    self._tokens = self.capacity
+    self._clock = clock
+    self._sleep = sleep
+    self._updated = clock()
+    self._lock = threading.Lock()
+
+  def acquire(self) -> float:
+    """Take one token, sleeping until it is due. Returns the seconds waited."""
+    with self._lock:
+      now = self._clock()
+      self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+      self._updated = now
+      self._tokens -= 1
+      wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+    if wait:
+      self._sleep(wait)
+    return wait
+
+
+@lru_cache
+def ses_max_send_rate() -> float:
+  """The account's SES MaxSendRate (messages per second), read once per process."""
+  ses = get_client("ses", region_name=get_mail_settings().region)
+  try:
+    return float(ses.get_send_quota()["MaxSendRate"])
+  except (ClientError, KeyError, TypeError, ValueError) as e:
+    print(f"Could not read the SES send quota, sending at {DEFAULT_SEND_RATE}/s: {e}")
+    return DEFAULT_SEND_RATE
+
+
+@lru_cache
+def get_send_bucket() -> TokenBucket:
+  """
+  Token bucket shared by every broadcast in the process.
+
+  The SES limit is per account, so concurrent broadcasts draw from the same bucket
+  rather than each sending at the full rate.
+  """
+  return TokenBucket(get_bulk_mail_settings().max_send_rate or ses_max_send_rate())
+
+
+def _token(field: str) -> str:
+  # Control characters never occur in header values, so the token can't clash with content
+  return f"\x1f{field}\x1f"
+
+
+class BulkMessage:
+  """
+  One email for many recipients, compiled once and personalised per recipient.
+
+  The template is bound to the shared params, leaving only the fields in
+  recipient_fields open in the HTML and the plain-text part. Header values may use the
+  same {field} placeholders (e.g. List-Unsubscribe).
+  """
+
+  def __init__(
+    self,
+    subject: str,
+    template_name: str,
+    shared: dict[str, str] | None = None,
+    recipient_fields: Iterable[str] = (),
+    headers: dict[str, str] | None = None,
+  ) -> None:
+    self.fields = tuple(recipient_fields)
+    tokens = {field: _token(field) for field in self.fields}
+    self.subject = subject
+    self.template = get_template(template_name).bind(shared or {})
+    missing = self.template.fields - set(self.fields)
+    if missing:
+      raise KeyError(f"{template_name} needs {', '.join(sorted(missing))}")
+    self.headers = {name: value.format_map(tokens) for name, value in (headers or {}).items()}
+
+  def _fill(self, content: str, recipient: BulkRecipient) -> str:
+    for field in self.fields:
+      content = content.replace(_token(field), recipient.fields[field])
+    return content
+
+  def raw_for(self, recipient: BulkRecipient) -> str:
+    """The MIME message for one recipient."""
+    return build_raw_message(
+      recipient.email,
+      self.subject,
+      self.template.render(recipient.fields),
+      headers={name: self._fill(value, recipient) for name, value in self.headers.items()},
+      text_body=self.template.render_text(recipient.fields),
+    )
+
+
+def send_bulk(
+  broadcast: str,
+  message: BulkMessage,
+  recipients: Iterable[BulkRecipient],
+  bucket: TokenBucket | None = None,
+  workers: int | None = None,
+) -> BulkMailReport:
+  """
+  Send a message to every recipient from a pool of threads and report the outcome.
+
+  Each send takes a token from the bucket first, so the pool never outruns the SES rate.
+  A send that SES throttles anyway is retried (after another token) up to max_attempts
+  times; any other error fails that recipient only. Never raises for individual sends.
+  """
+  settings = get_bulk_mail_settings()
+  sender = get_mail_settings().sender
+  ses = get_client("ses", region_name=get_mail_settings().region)
+  bucket = bucket or get_send_bucket()
+  recipients = list(recipients)
+  started = time.perf_counter()
+
+  def deliver(recipient: BulkRecipient) -> tuple[bool, bool]:
+    """(delivered, throttled at least once) for one recipient."""
+    throttled = False
+    try:
+      raw = message.raw_for(recipient)
+      for _ in range(settings.max_attempts):
+        bucket.acquire()
+        try:
+          ses.send_raw_email(Source=sender, Destinations=[recipient.email], RawMessage={"Data": raw})
+          return True, throttled
+        except ClientError as e:
+          if e.response["Error"]["Code"] not in THROTTLING_CODES:
+            raise
+          throttled = True
+      print(f"Broadcast {broadcast}: gave up on {recipient.email} after {settings.max_attempts} throttled attempts")
+    except Exception as e:
+      print(f"Broadcast {broadcast}: failed to send to {recipient.email}: {e}")
+    return False, throttled
+
+  results: list[tuple[bool, bool]] = []
+  if recipients:
+    with ThreadPoolExecutor(max_workers=min(workers or settings.workers, len(recipients))) as pool:
+      results = list(pool.map(deliver, recipients))
+
+  delivered = sum(1 for ok, _ in results if ok)
+  report = BulkMailReport(
+    broadcast=broadcast,
+    recipients=len(recipients),
+    delivered=delivered,
+    failed=len(recipients) - delivered,
+    throttled=sum(1 for _, throttled in results if throttled),
+    elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+    send_rate=bucket.rate,
+  )
+  print(
+    f"Broadcast {broadcast}: {report.delivered}/{report.recipients} delivered, {report.failed} failed, "
+    f"{report.throttled} throttled in {report.elapsed_ms:.0f} ms"
+  )
+  return report
@@ -0,0 +1,105 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any
+from uuid import uuid4
+
+from app_config import DigestSettings
+from database.repositories import NotificationDigestRepository, UserRepository
+
+NOTIFICATION_DIGEST_TABLE_NAME = os.environ.get("NOTIFICATION_DIGEST_TABLE_NAME")
+
+# Notification digests
+# --------------------
+# notification_digest_table buffers the documents a user with notification_mode = daily
+# should hear about: one row per (user, document), keyed by user_id + "created_at#uuid",
+# holding what the email lists (file_name, category_bg, documents_link). The outbox worker
+# runs send_due_digests hourly (`python -m jobs.send_digests` locally): a user whose oldest
+# row is DIGEST_WINDOW_HOURS old gets every buffered document in one email, then the rows
+# are deleted. A failed send keeps the rows for the next run.
+
+
+@lru_cache
+def get_digest_settings() -> DigestSettings:
+  """Get notification digest settings from environment variables."""
+  return DigestSettings()
+
+
+def get_digest_repository() -> NotificationDigestRepository:
+  return NotificationDigestRepository(NOTIFICATION_DIGEST_TABLE_NAME)
+
+
+def buffer_documents(
+  user_id: str, documents: list[dict[str, str]], digest_repo: NotificationDigestRepository | None = None
+) -> None:
+  """Hold documents for a user's next digest, in one batch write."""
+  if not documents:
+    return
+  digest_repo = digest_repo or get_digest_repository()
+  now = datetime.now()
+  expires_at = int((now + timedelta(days=get_digest_settings().retention_days)).timestamp())
+  with digest_repo.table.batch_writer() as batch:
+    for document in documents:
+      batch.put_item(
+        Item={
+          "user_id": user_id,
+          "event_key": f"{now.isoformat()}#{uuid4()}",
+          "file_name": document["file_name"],
+          "category_bg": document["category_bg"],
+          "documents_link": document["documents_link"],
+          "created_at": now.isoformat(),
+          "expires_at": expires_at,
+        }
+      )
+
+
+def _delete_rows(rows: list[dict[str, Any]], digest_repo: NotificationDigestRepository) -> None:
+  with digest_repo.table.batch_writer() as batch:
+    for row in rows:
+      batch.delete_item(Key={"user_id": row["user_id"], "event_key": row["event_key"]})
+
+
+def send_due_digests(
+  digest_repo: NotificationDigestRepository | None = None,
+  user_repo: UserRepository | None = None,
+  now: datetime | None = None,
+) -> dict[str, int]:
+  """
+  Email every user whose oldest buffered document is at least window_hours old.
+
+  Users who switched to off (or were deleted) since are dropped without an email; users
+  who switched back to immediate still get what was buffered. Returns the number of
+  digests sent, failed and dropped.
+  """
+  from mail.operations import send_documents_digest
+  from users.models import NotificationMode
+  from users.operations import get_user_repository
+
+  digest_repo = digest_repo or get_digest_repository()
+  user_repo = user_repo or get_user_repository()
+  cutoff = ((now or datetime.now()) - timedelta(hours=get_digest_settings().window_hours)).isoformat()
+
+  rows_by_user: dict[str, list[dict[str, Any]]] = defaultdict(list)
+  for row in digest_repo.iter_scan():
+    rows_by_user[row["user_id"]].append(row)
+  due = {user_id: rows for user_id, rows in rows_by_user.items() if min(row["created_at"] for row in rows) <= cutoff}
+
+  counts = {"sent": 0, "failed": 0, "dropped": 0}
+  users = user_repo.batch_get(list(due), projection=["email", "notification_mode"])
+  for user_id, rows in due.items():
+    rows.sort(key=lambda row: row["event_key"])
+    user = users.get(user_id)
+    if user is None or not user.get("email") or user.get("notification_mode") == NotificationMode.OFF:
+      _delete_rows(rows, digest_repo)
+      counts["dropped"] += 1
+      continue
+    try:
+      send_documents_digest(user["email"], rows)
+    except Exception as e:
+      print(f"Failed to send the documents digest to user {user_id}: {e}")
+      counts["failed"] += 1
+      continue
+    _delete_rows(rows, digest_repo)
+    counts["sent"] += 1
+  return counts
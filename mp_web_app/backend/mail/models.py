@@ -0,0 +1,54 @@
+from enum import StrEnum
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class BulkRecipient(BaseModel):
+  email: str
+  fields: dict[str, str] = {}  # per-recipient template values, e.g. unsubscribe_link
+
+
+class BulkMailReport(BaseModel):
+  """Outcome of one broadcast."""
+
+  broadcast: str
+  recipients: int
+  delivered: int
+  failed: int
+  throttled: int  # recipients SES throttled at least once (they may still have been delivered)
+  elapsed_ms: float
+  send_rate: float  # messages per second the broadcast was paced at
+
+
+class EmailJobStatus(StrEnum):
+  PENDING = "pending"
+  SENDING = "sending"  # claimed by a worker; back to claimable when the lease runs out
+  SENT = "sent"
+  FAILED = "failed"  # gave up after max_attempts
+
+
+class EmailJob(BaseModel):
+  """A queued notification: the kind of email and the params its handler renders it from."""
+
+  job_id: str
+  kind: str
+  params: dict[str, Any] = {}
+  status: EmailJobStatus = EmailJobStatus.PENDING
+  attempts: int = 0
+  created_at: str
+  available_at: int  # epoch seconds the job may next be claimed
+  sent_at: str | None = None
+  last_error: str | None = None
+  result: dict[str, Any] | None = None
+
+
+class DigestDocument(BaseModel):
+  """A document held for a user's next daily digest."""
+
+  user_id: str
+  event_key: str  # created_at#uuid
+  file_name: str
+  category_bg: str
+  documents_link: str
+  created_at: str
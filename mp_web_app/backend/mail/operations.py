@@ -1,11 +1,9 @@
+from collections.abc import Iterable
 from email.header import Header
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import Request
 from pydantic import EmailStr
@@ -13,17 +11,27 @@ from pydantic import EmailStr
 from app_config import FRONTEND_BASE_URL, SesSettings
 from auth.operations import generate_activation_token, generate_reset_token, generate_unsubscribe_token
 from mail.exceptions import EmailSendError
+from mail.models import BulkMailReport, BulkRecipient
+from mail.template_engine import CompiledTemplate, get_template_engine, strip_tags
+from utils.aws_clients import get_client
 
 _TEMPLATES_DIR = Path(__file__).parent / "templates"
 
 
+def get_template(template_name: str) -> CompiledTemplate:
+  """A compiled template from mail/templates/ (all of them are loaded on first use)."""
+  return get_template_engine(_TEMPLATES_DIR).get(template_name)
+
+
 def render_template(template_name: str, **kwargs) -> str:
-  """Load an HTML template from mail/templates/ and substitute variables."""
-  template_path = _TEMPLATES_DIR / template_name
-  if not template_path.exists():
-    raise FileNotFoundError(f"Email template not found: {template_name}")
-  content = template_path.read_text(encoding="utf-8")
-  return content.format_map(kwargs)
+  """Render an HTML template from mail/templates/ with the given variables."""
+  return get_template(template_name).render(kwargs)
+
+
+def render_email(template_name: str, **kwargs) -> tuple[str, str]:
+  """The HTML and plain-text bodies of a template, both from the compiled template."""
+  template = get_template(template_name)
+  return template.render(kwargs), template.render_text(kwargs)
 
 
 @lru_cache
@@ -34,27 +42,32 @@ def get_mail_settings():
   return SesSettings()
 
 
-def send_email_ses(
+def html_to_text(html_body: str) -> str:
+  """Plain-text fallback for an HTML body: the markup with its tags stripped."""
+  return strip_tags(html_body)
+
+
+def build_raw_message(
   to_address: str,
   subject: str,
   html_body: str,
   headers: Optional[dict[str, str]] = None,
   text_body: Optional[str] = None,
   reply_to: Optional[str] = None,
-):
+) -> str:
   """
-  Send an email using AWS SES, supporting custom headers (e.g., List-Unsubscribe).
+  Build the MIME message (plain text + HTML alternatives) for send_raw_email.
   """
   settings = get_mail_settings()
-  ses_client = boto3.client("ses", region_name=settings.region)
 
   if text_body is None:
     # Fallback to plain text if not provided
-    import re
-
-    text_body = re.sub("<[^<]+?>", "", html_body)
+    text_body = html_to_text(html_body)
 
   # Build the MIME message
+  from email.mime.multipart import MIMEMultipart
+  from email.mime.text import MIMEText
+
   msg = MIMEMultipart("alternative")
   msg["Subject"] = Header(subject, "utf-8")
   msg["From"] = settings.sender
@@ -72,10 +85,33 @@ def send_email_ses(
   part2 = MIMEText(html_body, "html", "utf-8")
   msg.attach(part1)
   msg.attach(part2)
+  return msg.as_string()
+
+
+def send_email_ses(
+  to_address: str,
+  subject: str,
+  html_body: str,
+  headers: Optional[dict[str, str]] = None,
+  text_body: Optional[str] = None,
+  reply_to: Optional[str] = None,
+):
+  """
+  Send an email using AWS SES, supporting custom headers (e.g., List-Unsubscribe).
+
+  Takes a token from the process-wide send bucket first, so single sends and broadcasts
+  share the account's SES rate.
+  """
+  from mail.bulk import get_send_bucket
+
+  settings = get_mail_settings()
+  ses_client = get_client("ses", region_name=settings.region)
+  raw_message = build_raw_message(to_address, subject, html_body, headers, text_body, reply_to)
 
   try:
+    get_send_bucket().acquire()
     response = ses_client.send_raw_email(
-      Source=settings.sender, Destinations=[to_address], RawMessage={"Data": msg.as_string()}
+      Source=settings.sender, Destinations=[to_address], RawMessage={"Data": raw_message}
     )
     return response
   except ClientError as e:
@@ -88,9 +124,9 @@ def send_verification_email(
   verification_link: str,
 ):
   subject = "Потвърдете регистрацията си в ГПК Мурджов Пожар"
-  html_body = render_template("verification.html", verification_link=verification_link)
+  html_body, text_body = render_email("verification.html", verification_link=verification_link)
   try:
-    send_email_ses(to_address=email, subject=subject, html_body=html_body)
+    send_email_ses(to_address=email, subject=subject, html_body=html_body, text_body=text_body)
   except Exception as e:
     raise EmailSendError(f"Failed to send email: {e}")
 
@@ -101,28 +137,47 @@ def send_news_notification(
   email: EmailStr,
   news_link: str,
 ):
-  unsubscribe_link = construct_unsubscribe_link(user_id, email, request)
+  unsubscribe_link = construct_unsubscribe_link(user_id, email)
   subject = "ГПК Мурджов Пожар – нова новина"
-  html_body = render_template("news_notification.html", news_link=news_link, unsubscribe_link=unsubscribe_link)
+  html_body, text_body = render_email("news_notification.html", news_link=news_link, unsubscribe_link=unsubscribe_link)
   try:
     send_email_ses(
       to_address=email,
       subject=subject,
       html_body=html_body,
       headers={"List-Unsubscribe": f"<{unsubscribe_link}>"},
+      text_body=text_body,
     )
   except Exception:
     raise EmailSendError("Failed to send email")
 
 
+def send_news_broadcast(users: Iterable[Any], news_link: str) -> BulkMailReport:
+  """Send the news notification to every user, each with their own unsubscribe link."""
+  from mail.bulk import BulkMessage, send_bulk
+
+  message = BulkMessage(
+    subject="ГПК Мурджов Пожар – нова новина",
+    template_name="news_notification.html",
+    shared={"news_link": news_link},
+    recipient_fields=("unsubscribe_link",),
+    headers={"List-Unsubscribe": "<{unsubscribe_link}>"},
+  )
+  recipients = [
+    BulkRecipient(email=user.email, fields={"unsubscribe_link": construct_unsubscribe_link(user.id, user.email)})
+    for user in users
+  ]
+  return send_bulk("news", message, recipients)
+
+
 def send_reset_email(
   email: EmailStr | str,
   verification_link: str,
 ):
   subject = "Рестартирайте паролата си в ГПК Мурджов Пожар"
-  html_body = render_template("reset_password.html", verification_link=verification_link)
+  html_body, text_body = render_email("reset_password.html", verification_link=verification_link)
   try:
-    send_email_ses(to_address=email, subject=subject, html_body=html_body)
+    send_email_ses(to_address=email, subject=subject, html_body=html_body, text_body=text_body)
   except Exception as e:
     raise EmailSendError(f"Failed to send email: {e}")
 
@@ -134,31 +189,80 @@ def send_file_share_notification(
 ) -> None:
   """Send a personal email notifying a user that a file was shared specifically with them."""
   subject = "ГПК Мурджов Пожар – споделен файл"
-  html_body = render_template("share_notification.html", file_name=file_name, download_link=download_link)
+  html_body, text_body = render_email("share_notification.html", file_name=file_name, download_link=download_link)
   try:
-    send_email_ses(to_address=email, subject=subject, html_body=html_body)
+    send_email_ses(to_address=email, subject=subject, html_body=html_body, text_body=text_body)
   except Exception as e:
     raise EmailSendError(f"Failed to send file share notification: {e}")
 
 
-def send_upload_notification(
-  email: str,
+def send_upload_broadcast(
+  emails: Iterable[str],
   file_name: str,
   category_bg: str,
   documents_link: str,
-) -> None:
-  """Send a broadcast email notifying a subscribed user that a new file was uploaded."""
-  subject = f"ГПК Мурджов Пожар – нов файл в {category_bg}"
-  html_body = render_template(
-    "upload_notification.html",
-    file_name=file_name,
-    category_bg=category_bg,
-    documents_link=documents_link,
+) -> BulkMailReport:
+  """Send the new-file notification to every address; the message is the same for all of them."""
+  from mail.bulk import BulkMessage, send_bulk
+
+  message = BulkMessage(
+    subject=f"ГПК Мурджов Пожар – нов файл в {category_bg}",
+    template_name="upload_notification.html",
+    shared={"file_name": file_name, "category_bg": category_bg, "documents_link": documents_link},
   )
+  return send_bulk("upload", message, [BulkRecipient(email=email) for email in emails])
+
+
+def format_documents(documents: Iterable[dict[str, str]]) -> str:
+  """
+  HTML list of documents grouped by category, in first-seen order.
+
+  Each document is {"file_name", "category_bg", "documents_link"}. Names are escaped;
+  each category heading links to its documents page.
+  """
+  from html import escape
+
+  categories: dict[tuple[str, str], list[str]] = {}
+  for document in documents:
+    categories.setdefault((document["category_bg"], document["documents_link"]), []).append(document["file_name"])
+
+  lines = []
+  for (category_bg, documents_link), file_names in categories.items():
+    lines.append(
+      f'<p style="margin:16px 0 4px 0;font-weight:bold;">'
+      f'<a href="{escape(documents_link)}" style="color:#16a34a;">{escape(category_bg)}</a></p>'
+    )
+    lines.append('<ul style="margin:0 0 8px 0;padding-left:20px;">')
+    lines.extend(f"<li>{escape(file_name or '')}</li>" for file_name in file_names)
+    lines.append("</ul>")
+  return "\n".join(lines)
+
+
+def _documents_subject(count: int) -> str:
+  return f"ГПК Мурджов Пожар – нови документи ({count})"
+
+
+def send_documents_broadcast(emails: Iterable[str], documents: list[dict[str, str]]) -> BulkMailReport:
+  """Send one combined email listing several new documents to every address."""
+  from mail.bulk import BulkMessage, send_bulk
+
+  message = BulkMessage(
+    subject=_documents_subject(len(documents)),
+    template_name="documents_digest.html",
+    shared={"documents": format_documents(documents)},
+  )
+  return send_bulk("documents", message, [BulkRecipient(email=email) for email in emails])
+
+
+def send_documents_digest(email: str, documents: list[dict[str, str]]) -> None:
+  """Send one user a combined email listing their new and shared documents."""
+  html_body, text_body = render_email("documents_digest.html", documents=format_documents(documents))
   try:
-    send_email_ses(to_address=email, subject=subject, html_body=html_body)
+    send_email_ses(
+      to_address=email, subject=_documents_subject(len(documents)), html_body=html_body, text_body=text_body
+    )
   except Exception as e:
-    raise EmailSendError(f"Failed to send upload notification: {e}")
+    raise EmailSendError(f"Failed to send documents digest: {e}")
 
 
 def construct_verification_link(user_id: str, email: EmailStr | str, request: Request) -> str:
@@ -167,7 +271,7 @@ def construct_verification_link(user_id: str, email: EmailStr | str, request: Re
   return f"{base_url}/api/users/activate-account?email={email}&token={token}"
 
 
-def construct_unsubscribe_link(user_id: str, email: EmailStr | str, request: Request) -> str:
+def construct_unsubscribe_link(user_id: str, email: EmailStr | str) -> str:
   token = generate_unsubscribe_token(user_id, email)
   return f"{FRONTEND_BASE_URL}/unsubscribe?email={email}&token={token}"
 
@@ -186,7 +290,7 @@ def send_inquiry_notification(
 ) -> None:
   """Send an inquiry creation or status-change notification email."""
   subject = f"ГПК Мурджов Пожар – запитване: {inquiry_title}"
-  html_body = render_template(
+  html_body, text_body = render_email(
     "inquiry_notification.html",
     recipient_name=recipient_name,
     inquiry_title=inquiry_title,
@@ -194,6 +298,6 @@ def send_inquiry_notification(
     inquiry_link=inquiry_link,
   )
   try:
-    send_email_ses(to_address=email, subject=subject, html_body=html_body)
+    send_email_ses(to_address=email, subject=subject, html_body=html_body, text_body=text_body)
   except Exception as e:
     raise EmailSendError(f"Failed to send inquiry notification: {e}")
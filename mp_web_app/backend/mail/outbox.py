@@ -0,0 +1,219 @@
+import importlib
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+from uuid import uuid4
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app_config import EmailOutboxSettings
+from database.repositories import EmailOutboxRepository
+from mail.models import BulkMailReport, EmailJob, EmailJobStatus
+
+EMAIL_OUTBOX_TABLE_NAME = os.environ.get("EMAIL_OUTBOX_TABLE_NAME")
+
+# Sparse GSI of the jobs still to deliver: queue = "pending" while a job waits or is
+# leased, sorted by available_at. Sent and failed jobs drop the attribute and leave it.
+QUEUE_INDEX = "outbox_queue_index"
+QUEUE = "pending"
+
+# Job kind -> "module:function" that delivers it. Imported on first use, so queueing a job
+# doesn't load the mail stack into the request path.
+JOB_HANDLERS = {
+  "news": "news.operations:deliver_news_notification",
+  "upload": "files.operations:deliver_upload_notification",
+  "file_share": "files.operations:deliver_share_notification",
+  "inquiry_created": "inquiries.operations:deliver_inquiry_created",
+  "inquiry_status": "inquiries.operations:deliver_inquiry_status",
+  # Not an email, but too slow for an API request: the registry PDF archive
+  "inquiry_export": "inquiries.operations:deliver_pdf_archive",
+}
+
+# Email outbox
+# ------------
+# Endpoints that notify someone write a compact job (kind + params) to email_outbox_table
+# and return; nothing is rendered or sent in the request. The outbox worker (outbox_worker.py
+# on Lambda, `python -m jobs.drain_outbox` locally) claims due jobs as threads free up by
+# leasing them with a conditional write, runs the kind's handler, and records the outcome. A handler
+# that raises is retried with exponential backoff until max_attempts, then marked failed.
+# Handlers must be safe to repeat: a worker that dies mid-job leaves it to be claimed again
+# once its lease runs out. A handler that sends to several recipients records its progress
+# in the job's params (e.g. params["notified"]); they are saved with the retry, so the next
+# attempt skips the recipients already reached.
+
+
+@lru_cache
+def get_outbox_settings() -> EmailOutboxSettings:
+  """Get email outbox settings from environment variables."""
+  return EmailOutboxSettings()
+
+
+def get_outbox_repository() -> EmailOutboxRepository:
+  return EmailOutboxRepository(EMAIL_OUTBOX_TABLE_NAME)
+
+
+def queue_emails(
+  jobs: Iterable[tuple[str, dict[str, Any]]], outbox_repo: EmailOutboxRepository | None = None
+) -> list[str]:
+  """Queue (kind, params) jobs with one batch write and return their ids."""
+  jobs = list(jobs)
+  for kind, _ in jobs:
+    if kind not in JOB_HANDLERS:
+      raise ValueError(f"Unknown email job kind: {kind}")
+  if not jobs:
+    return []
+
+  outbox_repo = outbox_repo or get_outbox_repository()
+  now = int(time.time())
+  created_at = datetime.now().isoformat()
+  items = [
+    {
+      "job_id": str(uuid4()),
+      "kind": kind,
+      "params": params,
+      "status": EmailJobStatus.PENDING.value,
+      "attempts": 0,
+      "created_at": created_at,
+      "available_at": now,
+      "queue": QUEUE,
+    }
+    for kind, params in jobs
+  ]
+  with outbox_repo.table.batch_writer() as batch:
+    for item in items:
+      batch.put_item(Item=item)
+  return [item["job_id"] for item in items]
+
+
+def get_job(job_id: str, outbox_repo: EmailOutboxRepository | None = None) -> EmailJob | None:
+  """Read a queued job, e.g. to report its progress to the user who queued it."""
+  outbox_repo = outbox_repo or get_outbox_repository()
+  item = outbox_repo.table.get_item(Key={"job_id": job_id}).get("Item")
+  return EmailJob(**item) if item else None
+
+
+def _put_if(item: dict[str, Any], condition, outbox_repo: EmailOutboxRepository) -> bool:
+  """Conditional put; False when another worker got there first."""
+  try:
+    outbox_repo.table.put_item(Item=item, ConditionExpression=condition)
+  except ClientError as e:
+    if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+      return False
+    raise
+  return True
+
+
+def claim_jobs(limit: int, outbox_repo: EmailOutboxRepository, now: int | None = None) -> list[dict[str, Any]]:
+  """
+  Lease up to limit due jobs.
+
+  Each job is claimed with a put conditioned on the available_at the query returned, so
+  two workers racing for a job can't both win; the loser just skips it.
+  """
+  now = int(time.time()) if now is None else now
+  settings = get_outbox_settings()
+  response = outbox_repo.table.query(
+    IndexName=QUEUE_INDEX,
+    KeyConditionExpression=Key("queue").eq(QUEUE) & Key("available_at").lte(now),
+    Limit=limit,
+  )
+  claimed = []
+  for item in response.get("Items", []):
+    leased = {
+      **item,
+      "status": EmailJobStatus.SENDING.value,
+      "attempts": int(item.get("attempts", 0)) + 1,
+      "available_at": now + settings.lease_seconds,
+    }
+    if _put_if(leased, Attr("queue").eq(QUEUE) & Attr("available_at").eq(item["available_at"]), outbox_repo):
+      claimed.append(leased)
+  return claimed
+
+
+def _handler(kind: str) -> Callable[[dict[str, Any]], Any]:
+  module_name, function_name = JOB_HANDLERS[kind].split(":")
+  return getattr(importlib.import_module(module_name), function_name)
+
+
+def _start(job: dict[str, Any], outbox_repo: EmailOutboxRepository, now: int) -> dict[str, Any] | None:
+  """Renew a claimed job's lease as it starts, so it runs with a full lease_seconds ahead."""
+  started = {**job, "available_at": now + get_outbox_settings().lease_seconds}
+  if not _put_if(started, Attr("queue").eq(QUEUE) & Attr("available_at").eq(job["available_at"]), outbox_repo):
+    return None
+  return started
+
+
+def run_job(job: dict[str, Any], outbox_repo: EmailOutboxRepository, now: int | None = None) -> EmailJobStatus | None:
+  """
+  Deliver one leased job and record the outcome: sent, retried later or failed.
+
+  Returns the job's new status (PENDING when it will be retried), or None when the lease
+  was lost before the job started (another worker has it) and nothing was run.
+  """
+  settings = get_outbox_settings()
+  job = _start(job, outbox_repo, int(time.time()) if now is None else now)
+  if job is None:
+    return None
+  lease = Attr("available_at").eq(job["available_at"])
+  try:
+    outcome = _handler(job["kind"])(job["params"])
+  except Exception as e:
+    now = int(time.time()) if now is None else now
+    attempts = int(job["attempts"])
+    print(f"Email job {job['job_id']} ({job['kind']}) attempt {attempts} failed: {e}")
+    if attempts >= settings.max_attempts:
+      status = EmailJobStatus.FAILED
+      update = {"expires_at": now + settings.retention_days * 86400}
+    else:
+      status = EmailJobStatus.PENDING
+      backoff = min(settings.retry_base_seconds * 2 ** (attempts - 1), settings.retry_max_seconds)
+      update = {"queue": QUEUE, "available_at": now + backoff}
+    item = {key: value for key, value in job.items() if key != "queue"}
+    _put_if({**item, **update, "status": status.value, "last_error": str(e)[:1000]}, lease, outbox_repo)
+    return status
+
+  now = int(time.time()) if now is None else now
+  item = {key: value for key, value in job.items() if key != "queue"}
+  item.update(
+    status=EmailJobStatus.SENT.value,
+    sent_at=datetime.now().isoformat(),
+    expires_at=now + settings.retention_days * 86400,
+  )
+  if isinstance(outcome, BulkMailReport):
+    item["result"] = outcome.model_dump(include={"recipients", "delivered", "failed", "throttled"})
+  if not _put_if(item, lease, outbox_repo):
+    print(f"Email job {job['job_id']} was sent after its lease ran out")
+  return EmailJobStatus.SENT
+
+
+def drain_outbox(outbox_repo: EmailOutboxRepository | None = None, deadline: float | None = None) -> dict[str, int]:
+  """
+  Claim and deliver due jobs until the queue is empty.
+
+  Jobs are claimed only as threads free up, at most `workers` at a time, so none waits
+  out its lease in a local queue. No job is claimed once time.monotonic() passes deadline
+  (the Lambda's remaining time); running jobs are waited for. Returns how many jobs ended
+  up sent, retried and failed.
+  """
+  outbox_repo = outbox_repo or get_outbox_repository()
+  settings = get_outbox_settings()
+  counts = {status.value: 0 for status in (EmailJobStatus.SENT, EmailJobStatus.PENDING, EmailJobStatus.FAILED)}
+  running: set[Future] = set()
+  with ThreadPoolExecutor(max_workers=settings.workers) as pool:
+    while True:
+      if deadline is None or time.monotonic() < deadline:
+        for job in claim_jobs(settings.workers - len(running), outbox_repo):
+          running.add(pool.submit(run_job, job, outbox_repo))
+      if not running:
+        break
+      done, running = wait(running, return_when=FIRST_COMPLETED)
+      for future in done:
+        status = future.result()
+        if status is not None:
+          counts[status.value] += 1
+  return {"sent": counts["sent"], "retried": counts["pending"], "failed": counts["failed"]}
@@ -13,7 +13,7 @@ mail_router = APIRouter(tags=["email"])
 
 
 @mail_router.post("/send-news", status_code=status.HTTP_200_OK)
-async def send_notification(request: Request, user_id: str, user_email: str, link: str):
+def send_notification(request: Request, user_id: str, user_email: str, link: str):
   try:
     user_id = user_id
     user_email = user_email
@@ -24,7 +24,7 @@ async def send_notification(request: Request, user_id: str, user_email: str, lin
 
 
 @mail_router.post("/forgot-password", status_code=status.HTTP_200_OK)
-async def send_reset_request(user_data: UserUpdatePasswordEmail, repo: UserRepository = Depends(get_user_repository)):
+def send_reset_request(user_data: UserUpdatePasswordEmail, repo: UserRepository = Depends(get_user_repository)):
   try:
     email = user_data.email
     user = get_user_by_email(email, repo, secret=True)
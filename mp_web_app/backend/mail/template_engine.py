@@ -0,0 +1,140 @@
+"""Email templates compiled once per process.
+
+Every *.html file in a template directory is read on first use and split into literal
+and placeholder segments (the str.format {name} syntax the templates have always used).
+The plain-text alternative is derived from the markup at the same time, so rendering an
+email is a join of precomputed strings: no disk access, format parsing or regex per send.
+"""
+
+import re
+import string
+from collections.abc import Callable, Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+_TAG = re.compile("<[^<]+?>")
+# Marks a placeholder while the text alternative is derived; never occurs in templates
+_TOKEN = re.compile("\x1f([^\x1f]*)\x1f")
+
+
+def strip_tags(html: str) -> str:
+  return _TAG.sub("", html)
+
+
+def _join(literals: Sequence[str], values: Sequence[str]) -> str:
+  """literals[0] + values[0] + literals[1] + ... with one allocation for the result."""
+  parts: list[str] = [""] * (len(literals) + len(values))
+  parts[0::2] = literals
+  parts[1::2] = values
+  return "".join(parts)
+
+
+def _text_value(value: Any) -> str:
+  """A value as it appears in the text part: with any markup stripped, like the rest of the HTML."""
+  value = str(value)
+  return strip_tags(value) if "<" in value else value
+
+
+def _bind(
+  literals: tuple[str, ...],
+  fields: tuple[str, ...],
+  params: Mapping[str, Any],
+  convert: Callable[[Any], str] = str,
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+  """Fold the fields present in params into the literals around them."""
+  bound_literals = [literals[0]]
+  bound_fields = []
+  for field, literal in zip(fields, literals[1:], strict=True):
+    if field in params:
+      bound_literals[-1] += convert(params[field]) + literal
+    else:
+      bound_fields.append(field)
+      bound_literals.append(literal)
+  return tuple(bound_literals), tuple(bound_fields)
+
+
+class CompiledTemplate:
+  """
+  A template split into literals and placeholders, for the HTML and the plain-text part.
+
+  render() fills the HTML, render_text() the text alternative: the HTML with its tags
+  stripped, as html_to_text() would produce from the rendered HTML. A placeholder inside
+  a tag (e.g. href="{link}") only appears in the HTML; markup in a value (e.g. a list of
+  documents) is stripped from the text part.
+  """
+
+  __slots__ = ("_fields", "_literals", "_text_fields", "_text_literals", "name")
+
+  def __init__(
+    self,
+    name: str,
+    literals: tuple[str, ...],
+    fields: tuple[str, ...],
+    text_literals: tuple[str, ...],
+    text_fields: tuple[str, ...],
+  ) -> None:
+    self.name = name
+    self._literals = literals
+    self._fields = fields
+    self._text_literals = text_literals
+    self._text_fields = text_fields
+
+  @classmethod
+  def compile(cls, name: str, source: str) -> "CompiledTemplate":
+    literals, fields, pending = [], [], []
+    for literal, field, format_spec, conversion in string.Formatter().parse(source):
+      pending.append(literal)
+      if field is None:
+        continue
+      if format_spec or conversion or not field.isidentifier():
+        raise ValueError(f"Email template {name}: only plain {{name}} placeholders are supported, not {{{field}}}")
+      literals.append("".join(pending))
+      fields.append(field)
+      pending = []
+    literals.append("".join(pending))
+
+    text = _TOKEN.split(strip_tags(_join(literals, [f"\x1f{field}\x1f" for field in fields])))
+    return cls(name, tuple(literals), tuple(fields), tuple(text[0::2]), tuple(text[1::2]))
+
+  @property
+  def fields(self) -> frozenset[str]:
+    return frozenset(self._fields)
+
+  def render(self, params: Mapping[str, Any]) -> str:
+    """The HTML with every placeholder filled. Raises KeyError for a missing one, like format_map."""
+    return _join(self._literals, [str(params[field]) for field in self._fields])
+
+  def render_text(self, params: Mapping[str, Any]) -> str:
+    return _join(self._text_literals, [_text_value(params[field]) for field in self._text_fields])
+
+  def bind(self, params: Mapping[str, Any]) -> "CompiledTemplate":
+    """A copy with the given placeholders filled and the rest left open, e.g. shared values of a broadcast."""
+    return CompiledTemplate(
+      self.name,
+      *_bind(self._literals, self._fields, params),
+      *_bind(self._text_literals, self._text_fields, params, _text_value),
+    )
+
+
+class TemplateEngine:
+  """Every template of a directory, compiled when the engine is created."""
+
+  def __init__(self, directory: Path) -> None:
+    self.directory = directory
+    self._templates = {
+      path.name: CompiledTemplate.compile(path.name, path.read_text(encoding="utf-8"))
+      for path in sorted(directory.glob("*.html"))
+    }
+
+  def get(self, template_name: str) -> CompiledTemplate:
+    try:
+      return self._templates[template_name]
+    except KeyError:
+      raise FileNotFoundError(f"Email template not found: {template_name}") from None
+
+
+@lru_cache
+def get_template_engine(directory: Path) -> TemplateEngine:
+  """The engine for a template directory, loaded once per process."""
+  return TemplateEngine(directory)
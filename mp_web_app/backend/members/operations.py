@@ -1,4 +1,3 @@
-import csv
 import io
 import os
 from typing import Any
@@ -34,6 +33,8 @@ def is_member_code_valid(member_code: str, repo: MemberRepository) -> Member | N
 async def convert_members_list(file: UploadFile) -> list[dict[str, Any]]:
   contents = await file.read()
   decoded = contents.decode("utf-8-sig")  # utf-8-sig strips BOM if present
+  import csv
+
   dialect = csv.Sniffer().sniff(decoded[:1024])  # sample the first 1KB
   reader = csv.DictReader(io.StringIO(decoded), dialect=dialect)
   return list(reader)
@@ -258,6 +259,8 @@ def members_list_to_csv(repo: MemberRepository) -> io.BytesIO:
   )
   fieldnames = ["member_code", "first_name", "middle_name", "last_name", "email", "phone", "proxy", "board", "control"]
 
+  import csv
+
   buf = io.StringIO()
   writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore", lineterminator="\n")
   writer.writeheader()
@@ -281,16 +284,4 @@ def members_list_to_csv(repo: MemberRepository) -> io.BytesIO:
 
 
 def _get_members_from_db(repo: MemberRepository) -> list[dict[str, Any]]:
-  members = []
-  scan_kwargs = {}
-  table = repo.table
-
-  while True:
-    response = table.scan(**scan_kwargs)
-    members.extend(response.get("Items", []))
-
-    if "LastEvaluatedKey" not in response:
-      break
-    scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
-
-  return members
+  return list(repo.iter_scan())
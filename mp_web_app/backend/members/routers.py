@@ -19,6 +19,7 @@ from members.operations import (
 )
 from users.models import User
 from users.roles import UserRole
+from utils.concurrency import run_blocking
 
 member_router = APIRouter(tags=["member"])
 
@@ -28,7 +29,7 @@ PRIVILEGED_ROLES = [UserRole.ADMIN, UserRole.BOARD, UserRole.CONTROL]
 @member_router.get(
   "/list/members", response_model=Union[list[MemberGovernance], list[MemberPublic]], status_code=status.HTTP_200_OK
 )
-async def members_list_members(
+def members_list_members(
   member_repo: MemberRepository = Depends(get_member_repository),
   current_user: User = Depends(role_required([UserRole.REGULAR_USER])),
 ):
@@ -80,7 +81,7 @@ async def members_list_members(
 @member_router.get(
   "/list/proxy", response_model=Union[list[MemberGovernance], list[MemberProxy]], status_code=status.HTTP_200_OK
 )
-async def members_list_proxy(
+def members_list_proxy(
   member_repo: MemberRepository = Depends(get_member_repository),
   current_user: User = Depends(role_required([UserRole.REGULAR_USER])),
 ):
@@ -131,7 +132,7 @@ async def members_list_proxy(
 
 
 @member_router.get("/list/{governance}", response_model=Union[list[MemberGovernance]], status_code=status.HTTP_200_OK)
-async def members_list_governance(
+def members_list_governance(
   governance: str,
   member_repo: MemberRepository = Depends(get_member_repository),
   user=Depends(role_required([UserRole.REGULAR_USER, UserRole.ACCOUNTANT])),
@@ -169,7 +170,7 @@ async def members_list_governance(
 
 
 @member_router.get("/export", status_code=status.HTTP_200_OK)
-async def members_export(
+def members_export(
   member_repo: MemberRepository = Depends(get_member_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
@@ -195,7 +196,7 @@ async def members_upload(
     file_name = file.filename
     is_valid_file_type(file_name)
     data = await convert_members_list(file)
-    sync_members_list(data, member_repo)
+    await run_blocking(sync_members_list, data, member_repo)
   except InvalidFileTypeError as e:
     raise HTTPException(status_code=400, detail=str(e))
   except DatabaseError as e:
@@ -1,5 +1,6 @@
 import os
 from datetime import datetime, timedelta
+from typing import Any
 from uuid import uuid4
 
 from boto3.dynamodb.conditions import Attr, Key
@@ -9,7 +10,8 @@ from fastapi import Request
 from app_config import FRONTEND_BASE_URL
 from auth.operations import is_token_expired
 from database.exceptions import DatabaseError
-from database.repositories import NewsRepository, UserRepository
+from database.repositories import NewsRepository
+from mail.models import BulkMailReport
 from news.exceptions import NewsNotFoundError
 from news.models import News, NewsType, NewsUpdate
 
@@ -118,45 +120,34 @@ def get_news(repo: NewsRepository, token: str | None = None):
   one_year_ago = datetime.now() - timedelta(days=365)
   one_year_ago_iso = one_year_ago.isoformat()
 
-  query_kwargs = {
-    "IndexName": "news_created_at_index",
-    "KeyConditionExpression": Key("news").eq("news") & Key("created_at").gte(one_year_ago_iso),
-    "ScanIndexForward": False,
-  }
-
+  filter_expression = None
   if not token or is_token_expired(token):
-    query_kwargs["FilterExpression"] = Attr("news_type").eq(NewsType.regular)
-
-  response = repo.table.query(**query_kwargs)
-  items = response["Items"]
-
-  while "LastEvaluatedKey" in response:
-    query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
-    response = repo.table.query(**query_kwargs)
-    items.extend(response["Items"])
-  return items
+    filter_expression = Attr("news_type").eq(NewsType.regular)
+
+  return list(
+    repo.iter_query(
+      Key("news").eq("news") & Key("created_at").gte(one_year_ago_iso),
+      index_name="news_created_at_index",
+      filter_expression=filter_expression,
+      scan_forward=False,
+    )
+  )
 
 
-def notify_subscribed_users(request: Request, user_repo: UserRepository):
-  """Send email notifications to subscribed users about new news."""
-  from mail.operations import send_news_notification
-  from users.operations import get_subscribed_users
+def queue_news_notification() -> None:
+  """Queue the new-news broadcast to subscribed users. Never raises: the news is already saved."""
+  from mail.outbox import queue_emails
 
   try:
-    # Get all subscribed users
-    subscribed_users = get_subscribed_users(user_repo)
-
-    # Construct news link
-    news_link = f"{FRONTEND_BASE_URL}/home"
-
-    # Send email to each subscribed user
-    for user in subscribed_users:
-      try:
-        send_news_notification(request=request, user_id=user.id, email=user.email, news_link=news_link)
-      except Exception as e:
-        # Log individual email failures but continue
-        print(f"Failed to send email to {user.email}: {e}")
-        continue
+    queue_emails([("news", {"news_link": f"{FRONTEND_BASE_URL}/home"})])
   except Exception as e:
-    # Log error but don't raise exception
-    print(f"Error in notify_subscribed_users: {e}")
+    print(f"Failed to queue news notification: {e}")
+
+
+def deliver_news_notification(params: dict[str, Any]) -> BulkMailReport:
+  """Outbox handler for "news" jobs: one bulk send to every subscribed user."""
+  from mail.operations import send_news_broadcast
+  from users.operations import get_subscribed_users, get_user_repository
+
+  # Failures of individual emails are counted in the report, not raised
+  return send_news_broadcast(get_subscribed_users(get_user_repository()), params["news_link"])
@@ -1,10 +1,10 @@
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 
 from auth.operations import role_required
 from database.exceptions import DatabaseError
-from database.repositories import NewsRepository, UserRepository
+from database.repositories import NewsRepository
 from news.exceptions import NewsNotFoundError
 from news.models import News, NewsUpdate
 from news.operations import (
@@ -12,17 +12,16 @@ from news.operations import (
   delete_news,
   get_news,
   get_news_repository,
-  notify_subscribed_users,
+  queue_news_notification,
   update_news,
 )
-from users.operations import get_user_repository
 from users.roles import UserRole
 
 news_router = APIRouter(tags=["news"])
 
 
 @news_router.get("/list", status_code=status.HTTP_200_OK)
-async def news_list(
+def news_list(
   news_repo: NewsRepository = Depends(get_news_repository),
   token: Optional[str] = None,  # Query param (legacy support)
   authorization: Optional[str] = Header(None),  # Authorization header (standard)
@@ -38,17 +37,14 @@ async def news_list(
 
 
 @news_router.post("/create", status_code=status.HTTP_201_CREATED)
-async def news_create(
-  request: Request,
+def news_create(
   news_data: News,
-  background_tasks: BackgroundTasks,
   news_repo: NewsRepository = Depends(get_news_repository),
-  user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
   try:
     result = create_news(news_data=news_data, repo=news_repo, user_id=user.id)
-    background_tasks.add_task(notify_subscribed_users, request, user_repo)
+    queue_news_notification()
     return result
   except DatabaseError as e:
     raise HTTPException(status_code=500, detail=str(e))
@@ -57,7 +53,7 @@ async def news_create(
 
 
 @news_router.put("/update/{news_id}", status_code=status.HTTP_200_OK)
-async def news_update(
+def news_update(
   news_id: str,
   update: NewsUpdate,
   news_repo: NewsRepository = Depends(get_news_repository),
@@ -74,7 +70,7 @@ async def news_update(
 
 
 @news_router.delete("/delete/{news_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def news_delete(
+def news_delete(
   news_id: str, news_repo: NewsRepository = Depends(get_news_repository), user=Depends(role_required([UserRole.ADMIN]))
 ):
   try:
@@ -0,0 +1,29 @@
+"""Lambda entry point of the email outbox worker (see mail/outbox.py).
+
+Triggered by the outbox table's stream when jobs are queued and by a schedule that picks
+up retries; either way it drains every due job, stopping to claim new ones shortly before
+the invocation would time out. The hourly {"task": "digests"} schedule sends the daily
+notification digests instead (see mail/digest.py).
+"""
+
+import time
+
+from mail.digest import send_due_digests
+from mail.outbox import drain_outbox
+
+# Seconds before the Lambda timeout after which no new batch is claimed
+SAFETY_MARGIN_SECONDS = 30
+
+
+def handler(event, context):
+  if isinstance(event, dict) and event.get("task") == "digests":
+    counts = send_due_digests()
+    print(f"Digests: {counts['sent']} sent, {counts['failed']} failed, {counts['dropped']} dropped")
+    return counts
+
+  deadline = None
+  if context is not None:
+    deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - SAFETY_MARGIN_SECONDS
+  counts = drain_outbox(deadline=deadline)
+  print(f"Outbox drained: {counts['sent']} sent, {counts['retried']} to retry, {counts['failed']} failed")
+  return counts
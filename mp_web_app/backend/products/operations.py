@@ -2,7 +2,6 @@ import os
 from typing import Any
 from uuid import uuid4
 
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
@@ -10,6 +9,7 @@ from database.exceptions import DatabaseError
 from database.repositories import ProductRepository
 from products.exceptions import ProductNotFoundError
 from products.models import Product, ProductSize, ProductUpdate
+from utils.aws_clients import get_client
 
 PRODUCTS_TABLE_NAME = os.getenv("PRODUCTS_TABLE_NAME")
 PRODUCTS_BUCKET = os.environ.get("UPLOADS_BUCKET")
@@ -33,7 +33,7 @@ def get_product_repository() -> ProductRepository:
 def _generate_picture_url(s3_key: str) -> str:
   if USE_CLOUDFRONT and CLOUDFRONT_DOMAIN:
     return f"https://{CLOUDFRONT_DOMAIN}/{s3_key}"
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   return s3.generate_presigned_url(
     "get_object",
     Params={"Bucket": PRODUCTS_BUCKET, "Key": s3_key},
@@ -53,7 +53,7 @@ def upload_product_picture(file: UploadFile) -> str:
   if file_size > MAX_IMAGE_SIZE_BYTES:
     raise ValueError(f"File too large. Maximum: {MAX_IMAGE_SIZE_MB}MB")
   s3_key = f"products/{uuid4()}.{ext}"
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     s3.upload_fileobj(file.file, PRODUCTS_BUCKET, s3_key)
   except ClientError as e:
@@ -62,7 +62,7 @@ def upload_product_picture(file: UploadFile) -> str:
 
 
 def delete_product_picture(s3_key: str) -> None:
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   try:
     s3.delete_object(Bucket=PRODUCTS_BUCKET, Key=s3_key)
   except ClientError:
@@ -220,16 +220,7 @@ def list_products(repo: ProductRepository) -> list[Product]:
 
 
 def _get_products_from_db(repo: ProductRepository) -> list[dict[Any, Any]]:
-  products = []
-  scan_kwargs: dict[str, Any] = {}
-  table = repo.table
-  while True:
-    response = table.scan(**scan_kwargs)
-    products.extend(response.get("Items", []))
-    if "LastEvaluatedKey" not in response:
-      break
-    scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
-  return products
+  return list(repo.iter_scan())
 
 
 # ---------------------------------------------------------------------------
@@ -240,7 +231,7 @@ def _get_products_from_db(repo: ProductRepository) -> list[dict[Any, Any]]:
 def list_orphaned_pictures(repo: ProductRepository) -> list[str]:
   items = _get_products_from_db(repo)
   referenced: set[str] = {item["picture_s3_key"] for item in items if item.get("picture_s3_key")}
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   all_keys: list[str] = []
   paginator = s3.get_paginator("list_objects_v2")
   for page in paginator.paginate(Bucket=PRODUCTS_BUCKET, Prefix="products/"):
@@ -252,6 +243,6 @@ def list_orphaned_pictures(repo: ProductRepository) -> list[str]:
 def delete_orphaned_pictures(keys: list[str]) -> int:
   if not keys:
     return 0
-  s3 = boto3.client("s3")
+  s3 = get_client("s3")
   s3.delete_objects(Bucket=PRODUCTS_BUCKET, Delete={"Objects": [{"Key": k} for k in keys]})
   return len(keys)
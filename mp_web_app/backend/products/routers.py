@@ -22,7 +22,7 @@ product_router = APIRouter(tags=["product"])
 
 
 @product_router.get("/list", response_model=list[Product], status_code=status.HTTP_200_OK)
-async def products_list(product_repo: ProductRepository = Depends(get_product_repository)):
+def products_list(product_repo: ProductRepository = Depends(get_product_repository)):
   try:
     return list_products(product_repo)
   except DatabaseError as e:
@@ -32,7 +32,7 @@ async def products_list(product_repo: ProductRepository = Depends(get_product_re
 
 
 @product_router.post("/create", response_model=Product, status_code=status.HTTP_201_CREATED)
-async def product_create(
+def product_create(
   name: str = Form(...),
   description: str | None = Form(None),
   sizes: str | None = Form(None),
@@ -51,7 +51,7 @@ async def product_create(
 
 
 @product_router.put("/update/{product_id}", response_model=Product, status_code=status.HTTP_200_OK)
-async def product_update(
+def product_update(
   product_id: str,
   name: str | None = Form(None),
   description: str | None = Form(None),
@@ -89,7 +89,7 @@ async def product_update(
 
 
 @product_router.delete("/delete/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def product_delete(
+def product_delete(
   product_id: str,
   product_repo: ProductRepository = Depends(get_product_repository),
   user=Depends(role_required([UserRole.ADMIN])),
@@ -106,7 +106,7 @@ async def product_delete(
 
 
 @product_router.get("/orphans", status_code=status.HTTP_200_OK)
-async def products_orphans_list(
+def products_orphans_list(
   product_repo: ProductRepository = Depends(get_product_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
@@ -118,7 +118,7 @@ async def products_orphans_list(
 
 
 @product_router.delete("/orphans", status_code=status.HTTP_200_OK)
-async def products_orphans_delete(
+def products_orphans_delete(
   product_repo: ProductRepository = Depends(get_product_repository),
   user=Depends(role_required([UserRole.ADMIN])),
 ):
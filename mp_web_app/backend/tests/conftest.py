@@ -3,6 +3,7 @@ Pytest configuration and shared fixtures.
 """
 
 import os
+from functools import partial
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
@@ -17,7 +18,17 @@ def pytest_configure(config):
   os.environ["UPLOADS_TABLE_NAME"] = "test_uploads_table"
   os.environ["NEWS_TABLE_NAME"] = "test_news_table"
   os.environ["GALLERY_TABLE_NAME"] = "test_gallery_table"
+  os.environ["FILE_SHARES_TABLE_NAME"] = "test_file_shares_table"
+  os.environ["FILE_LABELS_TABLE_NAME"] = "test_file_labels_table"
+  os.environ["INQUIRY_PARTICIPANTS_TABLE_NAME"] = "test_inquiry_participants_table"
+  os.environ["INQUIRY_STATS_TABLE_NAME"] = "test_inquiry_stats_table"
+  os.environ["EMAIL_OUTBOX_TABLE_NAME"] = "test_email_outbox_table"
+  os.environ["NOTIFICATION_DIGEST_TABLE_NAME"] = "test_notification_digest_table"
   os.environ["UPLOADS_BUCKET"] = "test-bucket"
+  # Render PDFs inline so tests can patch export_pdf
+  os.environ["PDF_RENDER_PROCESS_POOL"] = "false"
+  # Every SES send is paced; don't let tests wait on the sandbox rate
+  os.environ["BULK_MAIL_MAX_SEND_RATE"] = "1000"
   os.environ["FRONTEND_BASE_URL"] = "http://localhost:3000"
   os.environ["COOKIE_DOMAIN"] = "localhost"
   os.environ["MAIL_SENDER"] = "test@example.com"
@@ -48,10 +59,64 @@ def pytest_configure(config):
   patcher_resource.start()
 
 
+@pytest.fixture
+def bind_paginators():
+  """Attach the real BaseRepository paginators and batch_get to a mock repo so they drive its table."""
+  from database.repositories import BaseRepository
+
+  def bind(repo):
+    repo.iter_query = partial(BaseRepository.iter_query, repo)
+    repo.iter_scan = partial(BaseRepository.iter_scan, repo)
+    repo.batch_get = partial(BaseRepository.batch_get, repo)
+    repo.key_name = BaseRepository.key_name
+    return repo
+
+  return bind
+
+
 @pytest.fixture(scope="function")
-def mock_repo():
+def mock_repo(bind_paginators):
   """Create a mock repository for tests."""
   repo = Mock()
   repo.table = Mock()
   repo.convert_item_to_object = Mock()
-  return repo
+  return bind_paginators(repo)
+
+
+@pytest.fixture(autouse=True)
+def reset_aws_clients():
+  """Drop the process-wide boto3 clients so each test starts with fresh mocks."""
+  from utils.aws_clients import reset_clients
+
+  reset_clients()
+  yield
+  reset_clients()
+
+
+@pytest.fixture(autouse=True)
+def reset_user_directory():
+  """Start each test with fresh user directory and principal caches and zeroed counters."""
+  from users.directory import get_user_directory
+  from users.principals import get_principal_cache, get_principal_cache_settings
+
+  get_user_directory.cache_clear()
+  get_principal_cache.cache_clear()
+  get_principal_cache_settings.cache_clear()
+  yield
+  get_user_directory.cache_clear()
+  get_principal_cache.cache_clear()
+  get_principal_cache_settings.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_bulk_mail():
+  """Re-read bulk mail settings and the SES send quota, and start with a full token bucket."""
+  from mail.bulk import get_bulk_mail_settings, get_send_bucket, ses_max_send_rate
+
+  get_bulk_mail_settings.cache_clear()
+  ses_max_send_rate.cache_clear()
+  get_send_bucket.cache_clear()
+  yield
+  get_bulk_mail_settings.cache_clear()
+  ses_max_send_rate.cache_clear()
+  get_send_bucket.cache_clear()
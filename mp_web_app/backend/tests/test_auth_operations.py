@@ -2,18 +2,27 @@ from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
 import pytest
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
 from jose import jwt
 
+from auth.exceptions import ForbiddenError, InvalidTokenError, RefreshTokenNotFoundError, UnauthorizedError
+from auth.models import TokenPayload
 from auth.operations import (
   authenticate_user,
+  decode_refresh_token,
   decode_token,
   generate_access_token,
   generate_activation_token,
   generate_refresh_token,
   generate_reset_token,
   generate_unsubscribe_token,
+  get_current_user,
   is_token_expired,
+  rotate_refresh_token,
 )
+from users.principals import get_principal_cache_stats, invalidate_principal
 
 
 @pytest.fixture
@@ -47,6 +56,7 @@ class TestGenerateAccessToken:
     assert payload["role"] == "admin"
     assert payload["type"] == "access"
     assert "exp" in payload
+    assert "iat" in payload
 
   def test_respects_custom_expiry(self, mock_jwt_settings):
     data = {"sub": "user123"}
@@ -80,6 +90,127 @@ class TestGenerateRefreshToken:
     assert "expires_at" in item
 
 
+def _cancelled(code, item=None):
+  reason = {"Code": code}
+  if item is not None:
+    reason["Item"] = {name: TypeSerializer().serialize(value) for name, value in item.items()}
+  return ClientError(
+    {
+      "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+      "CancellationReasons": [reason, {"Code": "None"}],
+    },
+    "TransactWriteItems",
+  )
+
+
+class TestRotateRefreshToken:
+  payload = TokenPayload(sub="user123", role="regular_user", exp=4_000_000_000, type="refresh", jti="old-jti")
+
+  def _claims(self, token):
+    return jwt.decode(token, "test_secret_key", algorithms=["HS256"])
+
+  def test_rotates_in_one_transaction(self, mock_jwt_settings, mock_repo):
+    token = rotate_refresh_token(self.payload, {"sub": "user123", "role": "regular_user"}, mock_repo)
+
+    client = mock_repo.dynamodb.meta.client
+    client.transact_write_items.assert_called_once()
+    mock_repo.table.get_item.assert_not_called()
+    mock_repo.table.put_item.assert_not_called()
+    update, put = client.transact_write_items.call_args[1]["TransactItems"]
+    assert update["Update"]["Key"] == {"id": {"S": "old-jti"}}
+    assert "valid = :true AND user_id = :user_id" in update["Update"]["ConditionExpression"]
+    new_jti = put["Put"]["Item"]["id"]["S"]
+    claims = self._claims(token)
+    assert claims["jti"] == new_jti
+    assert claims["type"] == "refresh"
+    assert claims["exp"] == int(put["Put"]["Item"]["expires_at"]["N"])
+
+  def test_returns_rotated_token_within_grace(self, mock_jwt_settings, mock_repo):
+    now = int(datetime.now(UTC).timestamp())
+    old = {"id": "old-jti", "user_id": "user123", "valid": False, "rotated_to": "new-jti", "rotated_at": now - 5}
+    old["rotated_expires_at"] = now + 1000
+    mock_repo.dynamodb.meta.client.transact_write_items.side_effect = _cancelled("ConditionalCheckFailed", old)
+
+    token = rotate_refresh_token(self.payload, {"sub": "user123", "role": "regular_user"}, mock_repo)
+
+    claims = self._claims(token)
+    assert claims["jti"] == "new-jti"
+    assert claims["exp"] == now + 1000
+
+  def test_retries_on_transaction_conflict(self, mock_jwt_settings, mock_repo):
+    now = int(datetime.now(UTC).timestamp())
+    old = {"user_id": "user123", "valid": False, "rotated_to": "new-jti", "rotated_at": now, "rotated_expires_at": now}
+    mock_repo.dynamodb.meta.client.transact_write_items.side_effect = [
+      _cancelled("TransactionConflict"),
+      _cancelled("ConditionalCheckFailed", old),
+    ]
+
+    with patch("auth.operations.time.sleep"):
+      token = rotate_refresh_token(self.payload, {"sub": "user123", "role": "regular_user"}, mock_repo)
+
+    assert self._claims(token)["jti"] == "new-jti"
+
+  def test_every_attempt_conflicting_falls_back_to_the_stored_token(self, mock_jwt_settings, mock_repo):
+    now = int(datetime.now(UTC).timestamp())
+    client = mock_repo.dynamodb.meta.client
+    client.transact_write_items.side_effect = _cancelled("TransactionConflict")
+    mock_repo.table.get_item.return_value = {
+      "Item": {
+        "user_id": "user123",
+        "valid": False,
+        "rotated_to": "new-jti",
+        "rotated_at": now,
+        "rotated_expires_at": now,
+      }
+    }
+
+    with patch("auth.operations.time.sleep"):
+      token = rotate_refresh_token(self.payload, {"sub": "user123", "role": "regular_user"}, mock_repo)
+
+      assert self._claims(token)["jti"] == "new-jti"
+      assert client.transact_write_items.call_count == 3
+      mock_repo.table.get_item.assert_called_once_with(Key={"id": "old-jti"}, ConsistentRead=True)
+
+      # The competing rotation didn't win either: a 401, not an unhandled ClientError
+      mock_repo.table.get_item.return_value = {"Item": {"user_id": "user123", "valid": True, "expires_at": now + 60}}
+      with pytest.raises(UnauthorizedError):
+        rotate_refresh_token(self.payload, {"sub": "user123"}, mock_repo)
+
+  def test_rejects_reuse_after_grace(self, mock_jwt_settings, mock_repo):
+    now = int(datetime.now(UTC).timestamp())
+    old = {"user_id": "user123", "valid": False, "rotated_to": "new-jti", "rotated_at": now - 600}
+    mock_repo.dynamodb.meta.client.transact_write_items.side_effect = _cancelled("ConditionalCheckFailed", old)
+
+    with pytest.raises(UnauthorizedError):
+      rotate_refresh_token(self.payload, {"sub": "user123"}, mock_repo)
+
+  def test_rejects_expired_token(self, mock_jwt_settings, mock_repo):
+    now = int(datetime.now(UTC).timestamp())
+    old = {"user_id": "user123", "valid": True, "expires_at": now - 1}
+    mock_repo.dynamodb.meta.client.transact_write_items.side_effect = _cancelled("ConditionalCheckFailed", old)
+
+    with pytest.raises(UnauthorizedError, match="expired"):
+      rotate_refresh_token(self.payload, {"sub": "user123"}, mock_repo)
+
+  def test_rejects_foreign_and_unknown_tokens(self, mock_jwt_settings, mock_repo):
+    client = mock_repo.dynamodb.meta.client
+    client.transact_write_items.side_effect = _cancelled("ConditionalCheckFailed", {"user_id": "someone-else"})
+    with pytest.raises(ForbiddenError):
+      rotate_refresh_token(self.payload, {"sub": "user123"}, mock_repo)
+
+    client.transact_write_items.side_effect = _cancelled("ConditionalCheckFailed")
+    with pytest.raises(RefreshTokenNotFoundError):
+      rotate_refresh_token(self.payload, {"sub": "user123"}, mock_repo)
+
+
+class TestDecodeRefreshToken:
+  def test_rejects_access_tokens(self, mock_jwt_settings):
+    token = generate_access_token({"sub": "user123", "role": "admin"})
+
+    with pytest.raises(InvalidTokenError):
+      decode_refresh_token(token)
+
+
 class TestDecodeToken:
   def test_decodes_valid_token(self, mock_jwt_settings):
     data = {"sub": "user123", "role": "admin"}
@@ -179,3 +310,63 @@ class TestSpecialTokenGeneration:
     assert token is not None
     payload = jwt.decode(token, "test_secret_key", algorithms=["HS256"])
     assert payload["type"] == "reset"
+
+
+class TestGetCurrentUser:
+  def _payload(self, **claims):
+    return {"sub": "user123", "type": "access", "iat": 1000, "exp": 4_000_000_000, **claims}
+
+  def _user(self, role="regular_user", active=True):
+    user = Mock(role=role, active=active)
+    user.model_copy.side_effect = lambda update: Mock(**update)
+    return user
+
+  @patch("auth.operations.get_user_by_id")
+  @patch("auth.operations.decode_token")
+  def test_caches_principal_per_token(self, mock_decode, mock_get_user):
+    mock_decode.return_value = self._payload()
+    mock_get_user.return_value = self._user()
+
+    first = get_current_user("token", Mock())
+    second = get_current_user("token", Mock())
+
+    assert first is second
+    mock_get_user.assert_called_once()
+    assert get_principal_cache_stats()["user_reads_saved"] == 1
+
+  @patch("auth.operations.get_user_by_id")
+  @patch("auth.operations.decode_token")
+  def test_new_token_resolves_again(self, mock_decode, mock_get_user):
+    mock_get_user.return_value = self._user()
+
+    mock_decode.return_value = self._payload(iat=1000)
+    get_current_user("token", Mock())
+    mock_decode.return_value = self._payload(iat=2000)
+    get_current_user("token", Mock())
+
+    assert mock_get_user.call_count == 2
+
+  @patch("auth.operations.get_user_by_id")
+  @patch("auth.operations.decode_token")
+  def test_invalidation_forces_a_read(self, mock_decode, mock_get_user):
+    mock_decode.return_value = self._payload()
+    mock_get_user.return_value = self._user()
+    get_current_user("token", Mock())
+
+    mock_get_user.return_value = self._user(active=False)
+    invalidate_principal("user123")
+
+    with pytest.raises(HTTPException) as exc:
+      get_current_user("token", Mock())
+    assert exc.value.status_code == 401
+
+  @patch("auth.operations.get_user_by_id")
+  @patch("auth.operations.decode_token")
+  def test_trusted_claims_override_stored_role(self, mock_decode, mock_get_user, monkeypatch):
+    monkeypatch.setenv("PRINCIPAL_CACHE_TRUST_TOKEN_CLAIMS", "true")
+    mock_decode.return_value = self._payload(role="board", active=True)
+    mock_get_user.return_value = self._user(role="regular_user")
+
+    user = get_current_user("token", Mock())
+
+    assert user.role == "board"
@@ -0,0 +1,94 @@
+"""Tests for utils/aws_clients.py — shared boto3 client registry."""
+
+from unittest.mock import MagicMock, patch
+
+from utils.aws_clients import get_botocore_config, get_client, get_pool_stats, get_resource
+
+
+class TestGetClient:
+  @patch("utils.aws_clients.boto3.client")
+  def test_creates_client_once_per_service(self, mock_client):
+    mock_client.side_effect = lambda service_name, **kwargs: MagicMock(name=service_name)
+
+    first = get_client("s3")
+    second = get_client("s3")
+
+    assert first is second
+    mock_client.assert_called_once()
+
+  @patch("utils.aws_clients.boto3.client")
+  def test_separate_clients_per_service_and_region(self, mock_client):
+    mock_client.side_effect = lambda service_name, **kwargs: MagicMock(name=service_name)
+
+    s3 = get_client("s3")
+    ses = get_client("ses", region_name="eu-central-1")
+    ses_other = get_client("ses", region_name="us-east-1")
+
+    assert s3 is not ses
+    assert ses is not ses_other
+    assert mock_client.call_count == 3
+
+  @patch("utils.aws_clients.boto3.client")
+  def test_passes_shared_config(self, mock_client):
+    get_client("s3")
+
+    config = mock_client.call_args[1]["config"]
+    assert config is get_botocore_config()
+    assert config.max_pool_connections == 50
+    assert config.retries == {"max_attempts": 5, "mode": "adaptive"}
+    assert config.tcp_keepalive is True
+
+  @patch("utils.aws_clients.boto3.client")
+  def test_region_only_passed_when_given(self, mock_client):
+    get_client("s3")
+    get_client("ses", region_name="eu-central-1")
+
+    assert "region_name" not in mock_client.call_args_list[0][1]
+    assert mock_client.call_args_list[1][1]["region_name"] == "eu-central-1"
+
+
+class TestGetResource:
+  @patch("utils.aws_clients.boto3.resource")
+  def test_caches_resource_within_thread(self, mock_resource):
+    mock_resource.side_effect = lambda service_name, **kwargs: MagicMock(name=service_name)
+
+    assert get_resource("dynamodb") is get_resource("dynamodb")
+    mock_resource.assert_called_once()
+
+  @patch("utils.aws_clients.boto3.resource")
+  def test_new_resource_per_thread(self, mock_resource):
+    import threading
+
+    mock_resource.side_effect = lambda service_name, **kwargs: MagicMock(name=service_name)
+    main = get_resource("dynamodb")
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_resource("dynamodb")))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not main
+
+
+class TestGetPoolStats:
+  @patch("utils.aws_clients.boto3.client")
+  def test_reports_hits_per_client(self, mock_client):
+    get_client("s3")
+    get_client("s3")
+    get_client("s3")
+
+    stats = get_pool_stats()
+
+    assert stats["max_pool_connections"] == 50
+    assert len(stats["clients"]) == 1
+    assert stats["clients"][0]["service"] == "s3"
+    assert stats["clients"][0]["hits"] == 2
+
+  def test_reads_connection_pools_from_real_client(self):
+    import boto3
+
+    with patch("utils.aws_clients.boto3.client", wraps=boto3.session.Session().client):
+      get_client("s3", region_name="eu-central-1")
+
+    stats = get_pool_stats()
+
+    assert stats["clients"][0]["connection_pool"] == {"pools": 0, "open_connections": 0, "requests": 0}
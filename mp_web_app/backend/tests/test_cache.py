@@ -0,0 +1,88 @@
+from utils.cache import TTLCache
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self):
+    return self.now
+
+
+class TestTTLCache:
+  def test_get_counts_hits_and_misses(self):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b", "default") == "default"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+  def test_entries_expire_after_ttl(self):
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+  def test_evicts_least_recently_used(self):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+  def test_caches_none_values(self):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("missing-user", None)
+
+    found, missing = cache.get_many(["missing-user", "other"])
+
+    assert found == {"missing-user": None}
+    assert missing == ["other"]
+
+  def test_invalidate_and_clear(self):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert "a" not in cache
+    assert "b" in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+  def test_per_entry_ttl_overrides_default(self):
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("short", 1, ttl=5)
+    cache.set("default", 2)
+
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+
+  def test_invalidate_where(self):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("u1", 1), "a")
+    cache.set(("u1", 2), "b")
+    cache.set(("u2", 1), "c")
+
+    assert cache.invalidate_where(lambda key: key[0] == "u1") == 2
+    assert ("u2", 1) in cache
+    assert len(cache) == 1
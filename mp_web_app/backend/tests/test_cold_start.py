@@ -0,0 +1,87 @@
+"""Cold-start regression checks for the Lambda handler (runs a fresh interpreter per test)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.cold_start import parse_importtime, profile
+
+# Generous headroom over a ~150 ms local import so slow CI machines don't flake; an
+# accidental eager router or heavy top-level import shows up as a multiple of this.
+IMPORT_BUDGET_MS = 1000
+
+# Must not be loaded to import the handler and serve a public endpoint
+HEAVY_MODULES = {"argon2", "jose", "cryptography", "xhtml2pdf", "reportlab", "PIL", "email.mime.multipart"}
+OTHER_ROUTERS = {"users.routers", "auth.routers", "files.routers", "inquiries.routers", "members.routers"}
+
+
+@pytest.fixture(scope="module")
+def cold_start():
+  return profile("/api/gallery/list")
+
+
+class TestColdStart:
+  def test_first_request_succeeds(self, cold_start):
+    timings, _ = cold_start
+    assert timings["status"] == 200
+
+  def test_handler_import_within_budget(self, cold_start):
+    timings, _ = cold_start
+    assert timings["import_ms"] < IMPORT_BUDGET_MS
+
+  def test_public_request_skips_heavy_dependencies(self, cold_start):
+    _, entries = cold_start
+    loaded = {module for _, _, module in entries}
+
+    assert not loaded & HEAVY_MODULES
+    assert not loaded & OTHER_ROUTERS
+    assert "gallery.routers" in loaded
+
+
+class TestParseImporttime:
+  def test_parses_depth_and_cumulative_time(self):
+    stderr = (
+      "import time: self [us] | cumulative | imported package\n"
+      "import time:       100 |        100 |   child\n"
+      "import time:        50 |        150 | parent\n"
+    )
+
+    assert parse_importtime(stderr) == [(1, 100, "child"), (0, 150, "parent")]
+
+
+class TestLazyRouterMiddleware:
+  def _app(self):
+    from fastapi import FastAPI
+
+    from utils.lazy_routers import LazyRouter, LazyRouterMiddleware
+
+    app = FastAPI(openapi_url="/api/openapi.json")
+    routers = [
+      LazyRouter("/api/gallery", "gallery.routers", "gallery_router"),
+      LazyRouter("/api/products", "products.routers", "product_router"),
+    ]
+    app.add_middleware(LazyRouterMiddleware, fastapi_app=app, routers=routers, mount_all_paths={"/api/openapi.json"})
+    return app
+
+  def _paths(self, app):
+    return {route.path for route in app.routes}
+
+  def test_mounts_only_the_requested_prefix(self):
+    from fastapi.testclient import TestClient
+
+    app = self._app()
+    with patch("gallery.routers.get_gallery_images", return_value=[]):
+      response = TestClient(app).get("/api/gallery/list")
+
+    assert response.status_code == 200
+    assert "/api/gallery/list" in self._paths(app)
+    assert not any(path.startswith("/api/products") for path in self._paths(app))
+
+  def test_docs_mount_everything(self):
+    from fastapi.testclient import TestClient
+
+    app = self._app()
+    schema = TestClient(app).get("/api/openapi.json").json()
+
+    assert "/api/gallery/list" in schema["paths"]
+    assert any(path.startswith("/api/products") for path in schema["paths"])
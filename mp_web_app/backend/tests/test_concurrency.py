@@ -0,0 +1,120 @@
+import asyncio
+import inspect
+import threading
+
+import anyio.to_thread
+
+from utils.concurrency import ThreadLimiterMiddleware, configure_thread_limiter, run_blocking, thread_limiter_stats
+
+# Handlers allowed to stay async: they await request bodies or do no I/O at all
+ASYNC_HANDLERS = {"members_upload", "get_me"}
+
+
+class TestRunBlocking:
+  def test_runs_off_the_event_loop_thread(self):
+    async def main():
+      loop_thread = threading.get_ident()
+      worker_thread = await run_blocking(threading.get_ident)
+      return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+
+    assert loop_thread != worker_thread
+
+  def test_passes_arguments(self):
+    async def main():
+      return await run_blocking(lambda a, b=0: a + b, 2, b=3)
+
+    assert asyncio.run(main()) == 5
+
+
+class TestThreadLimiter:
+  def test_configure_sets_total_tokens(self):
+    async def main():
+      total = configure_thread_limiter(7)
+      return total, anyio.to_thread.current_default_thread_limiter().total_tokens, thread_limiter_stats()
+
+    total, tokens, stats = asyncio.run(main())
+
+    assert total == tokens == 7
+    assert stats == {"total": 7, "borrowed": 0}
+
+  def test_defaults_to_settings(self, monkeypatch):
+    from utils.concurrency import get_concurrency_settings
+
+    monkeypatch.setenv("BLOCKING_MAX_THREADS", "12")
+    get_concurrency_settings.cache_clear()
+    try:
+      assert asyncio.run(self._configure()) == 12
+    finally:
+      get_concurrency_settings.cache_clear()
+
+  @staticmethod
+  async def _configure():
+    return configure_thread_limiter()
+
+  def test_middleware_sizes_limiter_under_mangum(self):
+    from mangum import Mangum
+
+    seen = []
+
+    async def app(scope, receive, send):
+      seen.append(anyio.to_thread.current_default_thread_limiter().total_tokens)
+      await send({"type": "http.response.start", "status": 200, "headers": []})
+      await send({"type": "http.response.body", "body": b""})
+
+    handler = Mangum(ThreadLimiterMiddleware(app, max_threads=9), lifespan="off")
+    event = {
+      "version": "2.0",
+      "routeKey": "$default",
+      "rawPath": "/api/files/list",
+      "rawQueryString": "",
+      "headers": {"host": "example.com"},
+      "requestContext": {"http": {"method": "GET", "path": "/api/files/list", "sourceIp": "127.0.0.1"}},
+      "isBase64Encoded": False,
+    }
+
+    # Mangum runs each invocation on the thread's current loop, as on Lambda
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+      handler(event, None)
+      handler(event, None)
+    finally:
+      asyncio.set_event_loop(None)
+      loop.close()
+
+    assert seen == [9, 9]
+
+
+class TestRouteHandlers:
+  def test_blocking_handlers_are_sync(self):
+    from auth.routers import auth_router
+    from files.routers import file_router
+    from gallery.routers import gallery_router
+    from inquiries.routers import inquiry_router
+    from mail.routers import mail_router
+    from members.routers import member_router
+    from news.routers import news_router
+    from products.routers import product_router
+    from users.routers import user_router
+
+    routers = [
+      auth_router,
+      file_router,
+      gallery_router,
+      inquiry_router,
+      mail_router,
+      member_router,
+      news_router,
+      product_router,
+      user_router,
+    ]
+    async_handlers = {
+      route.endpoint.__name__
+      for router in routers
+      for route in router.routes
+      if inspect.iscoroutinefunction(route.endpoint)
+    }
+
+    assert async_handlers == ASYNC_HANDLERS
@@ -0,0 +1,114 @@
+from unittest.mock import Mock, patch
+
+from database.loaders import RequestLoaders, get_request_loaders
+from utils.dataloader import DataLoader
+
+
+def _user_repo(users: dict[str, dict]):
+  repo = Mock()
+  repo.batch_get = Mock(side_effect=lambda keys, **kwargs: {k: users[k] for k in keys if k in users})
+  return repo
+
+
+USERS = {
+  "author": {"id": "author", "first_name": "Иван", "last_name": "Иванов", "email": "ivan@example.com"},
+  "co-1": {"id": "co-1", "first_name": "Мария", "last_name": "Петрова", "email": "maria@example.com"},
+  "co-2": {"id": "co-2", "first_name": "Петър", "last_name": "Георгиев", "email": None},
+}
+
+
+class TestDataLoader:
+  def test_load_many_issues_one_batch(self):
+    batch_fn = Mock(side_effect=lambda keys: {k: k.upper() for k in keys})
+    loader = DataLoader(batch_fn)
+
+    result = loader.load_many(["a", "b", "a"])
+
+    assert result == {"a": "A", "b": "B"}
+    batch_fn.assert_called_once_with(["a", "b"])
+
+  def test_memoises_found_and_missing_keys(self):
+    batch_fn = Mock(side_effect=lambda keys: {k: k for k in keys if k != "ghost"})
+    loader = DataLoader(batch_fn)
+
+    loader.load_many(["a", "ghost"])
+    assert loader.load("a") == "a"
+    assert loader.load("ghost") is None
+
+    assert batch_fn.call_count == 1
+
+  def test_primed_keys_join_the_next_dispatch(self):
+    batch_fn = Mock(side_effect=lambda keys: {k: k for k in keys})
+    loader = DataLoader(batch_fn)
+
+    loader.prime(["a", "b"])
+    loader.load("c")
+    loader.load("a")
+    loader.load("b")
+
+    batch_fn.assert_called_once_with(["a", "b", "c"])
+    assert loader.stats() == {"batches": 1, "loaded": 3, "queued": 0}
+
+  def test_clear_forces_refetch(self):
+    batch_fn = Mock(side_effect=lambda keys: {k: k for k in keys})
+    loader = DataLoader(batch_fn)
+
+    loader.load("a")
+    loader.clear("a")
+    loader.load("a")
+
+    assert batch_fn.call_count == 2
+
+  def test_ignores_empty_keys(self):
+    batch_fn = Mock(return_value={})
+    loader = DataLoader(batch_fn)
+
+    assert loader.load_many([None, ""]) == {}
+    batch_fn.assert_not_called()
+
+
+class TestRequestLoaders:
+  def test_dependency_reuses_loaders_within_request(self):
+    request = Mock()
+    request.state = type("State", (), {})()
+
+    first = get_request_loaders(request)
+    second = get_request_loaders(request)
+
+    assert first is second
+
+  def test_user_loader_failure_is_swallowed(self):
+    repo = Mock()
+    repo.batch_get.side_effect = Exception("DynamoDB down")
+
+    assert RequestLoaders(user_repo=repo).display_names(["u1"]) == {}
+
+  def test_member_loader_converts_items(self):
+    member_repo = Mock()
+    member_repo.batch_get.return_value = {"M1": {"member_code": "M1"}}
+    member_repo.convert_item_to_object.side_effect = lambda item: ("member", item["member_code"])
+
+    loaders = RequestLoaders(member_repo=member_repo)
+
+    assert loaders.members.load_many(["M1", "M2"]) == {"M1": ("member", "M1")}
+
+  @patch("inquiries.operations._upload_inquiry_files", return_value=[])
+  @patch("mail.operations.send_inquiry_notification")
+  def test_create_and_notify_inquiry_fetch_users_once(self, mock_send, mock_upload):
+    from inquiries.models import Inquiry, InquiryCreate
+    from inquiries.operations import _notify_involved, create_inquiry
+
+    user_repo = _user_repo(USERS)
+    inquiry_repo = Mock()
+    inquiry_repo.convert_item_to_object.side_effect = lambda item: Inquiry(**item)
+    loaders = RequestLoaders(user_repo=user_repo)
+
+    data = InquiryCreate(title="T", description="D", inquiry_type="general", scope=[], co_authors=["co-1", "co-2"])
+    inquiry = create_inquiry(data, [], "author", inquiry_repo, user_repo, loaders)
+    _notify_involved(inquiry, user_repo, loaders)
+
+    assert inquiry.author_name == "Иван Иванов"
+    assert inquiry.co_author_names == ["Мария Петрова", "Петър Георгиев"]
+    # co-2 has no email, so only co-1 is notified
+    assert [c.kwargs["email"] for c in mock_send.call_args_list] == ["maria@example.com"]
+    user_repo.batch_get.assert_called_once()
@@ -3,13 +3,13 @@ from unittest.mock import Mock, patch
 import pytest
 
 from files.exceptions import InvalidFileExtensionError
-from files.models import FileMetadata, FileMetadataFull, FileType
+from files.label_registry import count_labels, label_deltas
+from files.models import FileLabel, FileMetadata, FileMetadataFull, FileType
 from files.operations import (
   _check_file_allowed_to_user,
   _create_file_name,
   _validate_metadata,
   get_existing_labels,
-  notify_shared_users,
 )
 
 
@@ -181,75 +181,77 @@ class TestCheckFileAllowedToUser:
     assert result is True
 
 
-class TestNotifySharedUsers:
-  def _make_file_meta(self, allowed_to):
-    return FileMetadataFull(
-      id="file-1",
-      file_name="report.pdf",
-      file_type=FileType.private_documents,
-      bucket="test-bucket",
-      key="private_documents/report.pdf",
-      uploaded_by="admin-1",
-      created_at="2024-01-01T00:00:00",
-      allowed_to=allowed_to,
-    )
+class TestDeliverShareNotification:
+  """Outbox handler for "file_share" jobs: one job per recipient."""
 
-  @patch("mail.operations.send_file_share_notification")
-  @patch("users.operations.get_user_by_id")
-  def test_sends_one_email_per_recipient(self, mock_get_user, mock_send):
-    user_a = Mock(email="a@example.com")
-    user_b = Mock(email="b@example.com")
-    mock_get_user.side_effect = [user_a, user_b]
+  def _deliver(self, user, files):
+    from files.operations import deliver_share_notification
 
-    file_meta = self._make_file_meta(["uid-a", "uid-b"])
-    user_repo = Mock()
+    with (
+      patch("users.operations.get_user_repository"),
+      patch("users.operations.get_user_by_id", return_value=user) as mock_get_user,
+    ):
+      deliver_share_notification({"user_id": "uid-1", "files": files})
+    return mock_get_user
 
-    notify_shared_users(file_meta, user_repo)
+  @patch("mail.operations.send_file_share_notification")
+  def test_sends_one_email_for_a_single_file(self, mock_send):
+    self._deliver(Mock(id="uid-1", email="a@example.com", notification_mode="immediate"), ["report.pdf"])
 
-    assert mock_send.call_count == 2
-    emails_called = {c.kwargs["email"] for c in mock_send.call_args_list}
-    assert emails_called == {"a@example.com", "b@example.com"}
+    mock_send.assert_called_once()
+    assert mock_send.call_args.kwargs["email"] == "a@example.com"
+    assert mock_send.call_args.kwargs["file_name"] == "report.pdf"
 
   @patch("mail.operations.send_file_share_notification")
-  @patch("users.operations.get_user_by_id")
-  def test_continues_after_individual_failure(self, mock_get_user, mock_send):
-    user_b = Mock(email="b@example.com")
-    # First user lookup raises, second succeeds
-    mock_get_user.side_effect = [Exception("DB error"), user_b]
+  def test_download_link_points_to_my_documents(self, mock_send):
+    self._deliver(Mock(id="uid-1", email="user@example.com", notification_mode="immediate"), ["report.pdf"])
 
-    file_meta = self._make_file_meta(["uid-a", "uid-b"])
-    user_repo = Mock()
+    download_link = mock_send.call_args.kwargs["download_link"]
+    assert download_link.endswith("/mydocuments")
 
-    # Should not raise
-    notify_shared_users(file_meta, user_repo)
+  @patch("mail.operations.send_documents_digest")
+  @patch("mail.operations.send_file_share_notification")
+  def test_several_files_are_one_combined_email(self, mock_send, mock_send_documents):
+    self._deliver(Mock(id="uid-1", email="a@example.com", notification_mode="immediate"), ["a.pdf", "b.pdf"])
 
-    # Only the second recipient gets an email
-    assert mock_send.call_count == 1
-    assert mock_send.call_args.kwargs["email"] == "b@example.com"
+    mock_send.assert_not_called()
+    email, documents = mock_send_documents.call_args.args
+    assert email == "a@example.com"
+    assert [(d["file_name"], d["category_bg"]) for d in documents] == [
+      ("a.pdf", "Споделени с вас"),
+      ("b.pdf", "Споделени с вас"),
+    ]
 
+  @patch("mail.digest.buffer_documents")
   @patch("mail.operations.send_file_share_notification")
-  @patch("users.operations.get_user_by_id")
-  def test_does_nothing_when_allowed_to_is_empty(self, mock_get_user, mock_send):
-    file_meta = self._make_file_meta([])
-    user_repo = Mock()
-
-    notify_shared_users(file_meta, user_repo)
+  def test_follows_the_users_notification_mode(self, mock_send, mock_buffer):
+    self._deliver(Mock(id="uid-1", email="a@example.com", notification_mode="daily"), ["report.pdf"])
+    self._deliver(Mock(id="uid-1", email="a@example.com", notification_mode="off"), ["report.pdf"])
 
-    mock_get_user.assert_not_called()
     mock_send.assert_not_called()
+    mock_buffer.assert_called_once()
+    user_id, documents = mock_buffer.call_args.args
+    assert user_id == "uid-1"
+    assert documents == [
+      {
+        "file_name": "report.pdf",
+        "category_bg": "Споделени с вас",
+        "documents_link": "http://localhost:3000/mydocuments",
+      }
+    ]
 
-  @patch("mail.operations.send_file_share_notification")
-  @patch("users.operations.get_user_by_id")
-  def test_download_link_points_to_my_documents(self, mock_get_user, mock_send):
-    mock_get_user.return_value = Mock(email="user@example.com")
+  @patch("mail.operations.send_file_share_notification", side_effect=RuntimeError("SES down"))
+  def test_raises_so_the_job_is_retried(self, mock_send):
+    with pytest.raises(RuntimeError, match="SES down"):
+      self._deliver(Mock(id="uid-1", email="a@example.com", notification_mode="immediate"), ["report.pdf"])
 
-    file_meta = self._make_file_meta(["uid-1"])
-    user_repo = Mock()
+  @patch("mail.outbox.queue_emails")
+  def test_queues_nothing_without_new_recipients(self, mock_queue):
+    from files.operations import queue_share_notifications
 
-    notify_shared_users(file_meta, user_repo)
+    queue_share_notifications("report.pdf", [])
 
-    download_link = mock_send.call_args.kwargs["download_link"]
-    assert download_link.endswith("/mydocuments")
+    assert list(mock_queue.call_args.args[0]) == []
 
 
 class TestAddShare:
@@ -334,41 +336,37 @@ class TestNotifyUpload:
       allowed_to=allowed_to,
     )
 
-  def _make_user(self, role, email):
+  def _make_user(self, role, email, notification_mode="immediate"):
     user = Mock()
     user.role = role
     user.email = email
     user.id = f"user-{email}"
+    user.notification_mode = notification_mode
     return user
 
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
+  def _files(self, file_type):
+    return [{"file_name": "document.pdf", "file_type": file_type}]
+
+  @patch("mail.operations.send_upload_broadcast")
   @patch("users.operations.get_subscribed_users")
-  def test_broadcasts_to_all_subscribers_for_regular_file_type(
-    self, mock_get_users, mock_send_upload, mock_notify_shared
-  ):
-    from files.operations import notify_upload
+  def test_broadcasts_to_all_subscribers_for_regular_file_type(self, mock_get_users, mock_send_upload):
+    from files.operations import notify_uploads
 
     users = [
       self._make_user("regular", "a@example.com"),
       self._make_user("board", "b@example.com"),
     ]
     mock_get_users.return_value = users
-    file_meta = self._make_file_meta("minutes")
-    user_repo = Mock()
 
-    notify_upload(file_meta, user_repo)
+    notify_uploads(self._files("minutes"), Mock())
 
-    assert mock_send_upload.call_count == 2
-    emails = {c.kwargs["email"] for c in mock_send_upload.call_args_list}
-    assert emails == {"a@example.com", "b@example.com"}
-    mock_notify_shared.assert_not_called()
+    mock_send_upload.assert_called_once()
+    assert mock_send_upload.call_args.args[0] == ["a@example.com", "b@example.com"]
 
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
+  @patch("mail.operations.send_upload_broadcast")
   @patch("users.operations.get_subscribed_users")
-  def test_accounting_excludes_regular_users(self, mock_get_users, mock_send_upload, mock_notify_shared):
-    from files.operations import notify_upload
+  def test_accounting_excludes_regular_users(self, mock_get_users, mock_send_upload):
+    from files.operations import notify_uploads
 
     users = [
       self._make_user("regular", "regular@example.com"),
@@ -378,84 +376,148 @@ class TestNotifyUpload:
       self._make_user("admin", "admin@example.com"),
     ]
     mock_get_users.return_value = users
-    file_meta = self._make_file_meta("accounting")
-    user_repo = Mock()
 
-    notify_upload(file_meta, user_repo)
+    notify_uploads(self._files("accounting"), Mock())
 
-    emails = {c.kwargs["email"] for c in mock_send_upload.call_args_list}
+    emails = set(mock_send_upload.call_args.args[0])
     assert "regular@example.com" not in emails
     assert {"board@example.com", "control@example.com", "accountant@example.com", "admin@example.com"} == emails
 
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
+  @patch("mail.operations.send_upload_broadcast")
   @patch("users.operations.get_subscribed_users")
-  def test_private_documents_skips_broadcast(self, mock_get_users, mock_send_upload, mock_notify_shared):
-    from files.operations import notify_upload
-
-    file_meta = self._make_file_meta("private_documents", allowed_to=["uid-1"])
-    user_repo = Mock()
+  def test_private_documents_skips_broadcast(self, mock_get_users, mock_send_upload):
+    from files.operations import notify_uploads
 
-    notify_upload(file_meta, user_repo)
+    notify_uploads(self._files("private_documents"), Mock())
 
     mock_get_users.assert_not_called()
     mock_send_upload.assert_not_called()
-    mock_notify_shared.assert_called_once_with(file_meta, user_repo)
-
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
-  @patch("users.operations.get_subscribed_users")
-  def test_calls_notify_shared_users_when_allowed_to_set(self, mock_get_users, mock_send_upload, mock_notify_shared):
-    from files.operations import notify_upload
 
-    mock_get_users.return_value = []
-    file_meta = self._make_file_meta("minutes", allowed_to=["uid-1", "uid-2"])
-    user_repo = Mock()
+  @patch("mail.outbox.queue_emails")
+  def test_private_upload_queues_shares_only(self, mock_queue):
+    from files.operations import queue_upload_notifications
 
-    notify_upload(file_meta, user_repo)
+    queue_upload_notifications([self._make_file_meta("private_documents", allowed_to=["uid-1"])])
 
-    mock_notify_shared.assert_called_once_with(file_meta, user_repo)
+    assert list(mock_queue.call_args.args[0]) == [("file_share", {"user_id": "uid-1", "files": ["document.pdf"]})]
 
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
-  @patch("users.operations.get_subscribed_users")
-  def test_does_not_call_notify_shared_when_allowed_to_empty(
-    self, mock_get_users, mock_send_upload, mock_notify_shared
-  ):
-    from files.operations import notify_upload
+  @patch("mail.outbox.queue_emails")
+  def test_queues_no_shares_when_allowed_to_empty(self, mock_queue):
+    from files.operations import queue_upload_notifications
 
-    mock_get_users.return_value = []
-    file_meta = self._make_file_meta("minutes", allowed_to=None)
-    user_repo = Mock()
+    queue_upload_notifications([self._make_file_meta("minutes", allowed_to=None)])
 
-    notify_upload(file_meta, user_repo)
+    assert [kind for kind, _ in mock_queue.call_args.args[0]] == ["upload"]
 
-    mock_notify_shared.assert_not_called()
-
-  @patch("files.operations.notify_shared_users")
-  @patch("mail.operations.send_upload_notification")
+  @patch("mail.operations.send_upload_broadcast")
   @patch("users.operations.get_subscribed_users")
-  def test_upload_notification_includes_correct_category_and_link(
-    self, mock_get_users, mock_send_upload, mock_notify_shared
-  ):
-    from files.operations import notify_upload
+  def test_upload_notification_includes_correct_category_and_link(self, mock_get_users, mock_send_upload):
+    from files.operations import notify_uploads
 
     mock_get_users.return_value = [self._make_user("regular", "user@example.com")]
-    file_meta = self._make_file_meta("governing_documents")
-    user_repo = Mock()
 
-    notify_upload(file_meta, user_repo)
+    notify_uploads(self._files("governing_documents"), Mock())
 
     call_kwargs = mock_send_upload.call_args.kwargs
     assert call_kwargs["category_bg"] == "Нормативни документи"
     assert call_kwargs["documents_link"].endswith("/governing-documents")
     assert call_kwargs["file_name"] == "document.pdf"
 
+  @patch("mail.outbox.queue_emails")
+  def test_queues_one_broadcast_per_batch_and_one_share_per_recipient(self, mock_queue):
+    from files.operations import queue_upload_notifications
+
+    queue_upload_notifications(
+      [
+        self._make_file_meta("minutes", allowed_to=["u1"]),
+        self._make_file_meta("forms"),
+        self._make_file_meta("private_documents", ["u1", "u2"]),
+      ]
+    )
+
+    assert list(mock_queue.call_args.args[0]) == [
+      (
+        "upload",
+        {
+          "files": [
+            {"file_name": "document.pdf", "file_type": "minutes"},
+            {"file_name": "document.pdf", "file_type": "forms"},
+          ]
+        },
+      ),
+      ("file_share", {"user_id": "u1", "files": ["document.pdf", "document.pdf"]}),
+      ("file_share", {"user_id": "u2", "files": ["document.pdf"]}),
+    ]
+
+  @patch("mail.digest.buffer_documents")
+  @patch("mail.operations.send_documents_broadcast")
+  @patch("mail.operations.send_upload_broadcast")
+  @patch("users.operations.get_subscribed_users")
+  def test_batch_is_one_email_per_user_by_notification_mode(
+    self, mock_get_users, mock_send_upload, mock_send_documents, mock_buffer
+  ):
+    from files.operations import notify_uploads
+
+    mock_get_users.return_value = [
+      self._make_user("regular", "regular@example.com"),
+      self._make_user("board", "board@example.com"),
+      self._make_user("admin", "daily@example.com", notification_mode="daily"),
+      self._make_user("board", "off@example.com", notification_mode="off"),
+    ]
+    files = [
+      {"file_name": "minutes.pdf", "file_type": "minutes"},
+      {"file_name": "balance.pdf", "file_type": "accounting"},
+      {"file_name": "mine.pdf", "file_type": "private_documents"},
+    ]
+
+    notify_uploads(files, Mock())
+
+    # Regular users only see the minutes: the single-file notification
+    mock_send_upload.assert_called_once()
+    assert mock_send_upload.call_args.args[0] == ["regular@example.com"]
+    assert mock_send_upload.call_args.kwargs["file_name"] == "minutes.pdf"
+    # Governance roles see both: one combined message grouped by category
+    mock_send_documents.assert_called_once()
+    emails, documents = mock_send_documents.call_args.args
+    assert emails == ["board@example.com"]
+    assert [(d["file_name"], d["category_bg"]) for d in documents] == [
+      ("minutes.pdf", "Протоколи"),
+      ("balance.pdf", "Счетоводни документи"),
+    ]
+    # Daily users are buffered for their digest, off users hear nothing
+    mock_buffer.assert_called_once()
+    user_id, buffered = mock_buffer.call_args.args
+    assert user_id == "user-daily@example.com"
+    assert [d["file_name"] for d in buffered] == ["minutes.pdf", "balance.pdf"]
+
+  @patch("mail.operations.send_upload_broadcast")
+  @patch("users.operations.get_subscribed_users", side_effect=RuntimeError("throttled"))
+  def test_upload_job_fails_when_subscribers_cant_be_read(self, mock_get_users, mock_send_upload):
+    from files.operations import deliver_upload_notification
+
+    # Raising lets the outbox retry the job instead of recording it as sent
+    with pytest.raises(RuntimeError, match="throttled"), patch("users.operations.get_user_repository"):
+      deliver_upload_notification({"files": [{"file_name": "a.pdf", "file_type": "minutes"}]})
+
+    mock_send_upload.assert_not_called()
+
+  @patch("mail.outbox.queue_emails", side_effect=RuntimeError("table missing"))
+  def test_queue_failure_does_not_fail_the_upload(self, mock_queue):
+    from files.operations import queue_upload_notifications
+
+    queue_upload_notifications([self._make_file_meta("minutes")])
+
+    mock_queue.assert_called_once()
+
+
+class TestCountLabels:
+  @pytest.fixture(autouse=True)
+  def _bind(self, bind_paginators):
+    self.bind_paginators = bind_paginators
 
-class TestGetExistingLabels:
   def _make_repo(self, scan_pages: list[list[dict]]):
     """Build a mock repo whose table.scan returns paginated results."""
-    repo = Mock()
+    repo = self.bind_paginators(Mock())
     responses = []
     for i, page in enumerate(scan_pages):
       resp: dict = {"Items": page}
@@ -465,19 +527,19 @@ class TestGetExistingLabels:
     repo.table.scan.side_effect = responses
     return repo
 
-  def test_returns_empty_list_when_no_items(self):
+  def test_returns_empty_when_no_items(self):
     repo = self._make_repo([[]])
 
-    result = get_existing_labels(repo)
+    result = count_labels(repo)
 
-    assert result == []
+    assert result == {}
 
-  def test_returns_empty_list_when_items_have_no_labels(self):
+  def test_returns_empty_when_items_have_no_labels(self):
     repo = self._make_repo([[{"id": "f1"}, {"id": "f2", "labels": None}]])
 
-    result = get_existing_labels(repo)
+    result = count_labels(repo)
 
-    assert result == []
+    assert result == {}
 
   def test_collects_labels_from_single_page(self):
     repo = self._make_repo(
@@ -489,11 +551,11 @@ class TestGetExistingLabels:
       ]
     )
 
-    result = get_existing_labels(repo)
+    result = count_labels(repo)
 
-    assert result == ["alpha", "beta", "gamma"]
+    assert result == {"alpha": 1, "beta": 1, "gamma": 1}
 
-  def test_deduplicates_labels_across_items(self):
+  def test_counts_labels_across_items(self):
     repo = self._make_repo(
       [
         [
@@ -503,9 +565,9 @@ class TestGetExistingLabels:
       ]
     )
 
-    result = get_existing_labels(repo)
+    result = count_labels(repo)
 
-    assert result == ["alpha", "beta", "gamma"]
+    assert result == {"alpha": 1, "beta": 2, "gamma": 1}
 
   def test_collects_labels_across_paginated_results(self):
     repo = self._make_repo(
@@ -515,22 +577,419 @@ class TestGetExistingLabels:
       ]
     )
 
-    result = get_existing_labels(repo)
+    result = count_labels(repo)
+
+    assert result == {"alpha": 1, "beta": 1}
+
+  def test_ignores_empty_string_labels_and_repeats_within_a_file(self):
+    repo = self._make_repo([[{"id": "f1", "labels": ["alpha", "", "  ", " alpha"]}]])
+
+    result = count_labels(repo)
 
-    assert result == ["alpha", "beta"]
+    assert result == {"alpha": 1}
 
-  def test_ignores_empty_string_labels(self):
-    repo = self._make_repo([[{"id": "f1", "labels": ["alpha", "", "  "]}]])
 
-    result = get_existing_labels(repo)
+class TestLabelRegistry:
+  def _label_repo(self, items=None):
+    label_repo = Mock()
+    label_repo.iter_query.return_value = iter(items or [])
+    label_repo.convert_item_to_object.side_effect = lambda item: FileLabel(**item)
+    batch = Mock()
+    label_repo.table.batch_writer.return_value.__enter__ = Mock(return_value=batch)
+    label_repo.table.batch_writer.return_value.__exit__ = Mock(return_value=False)
+    return label_repo, batch
+
+  def _deltas(self, label_repo):
+    return {
+      c.kwargs["Key"]["label"]: c.kwargs["ExpressionAttributeValues"][":delta"]
+      for c in label_repo.table.update_item.call_args_list
+    }
+
+  def test_existing_labels_sorted_by_usage(self):
+    label_repo, _ = self._label_repo(
+      [
+        {"label": "бюджет", "usage_count": 2},
+        {"label": "2025", "usage_count": 5},
+        {"label": "анкета", "usage_count": 2},
+      ]
+    )
 
-    assert result == ["alpha"]
+    assert get_existing_labels(label_repo) == ["2025", "анкета", "бюджет"]
+    label_repo.table.scan.assert_not_called()
 
-  def test_raises_metadata_error_on_scan_failure(self):
+  def test_raises_metadata_error_on_query_failure(self):
     from files.exceptions import MetadataError
 
-    repo = Mock()
-    repo.table.scan.side_effect = Exception("DynamoDB down")
+    label_repo = Mock()
+    label_repo.iter_query.side_effect = Exception("DynamoDB down")
 
     with pytest.raises(MetadataError):
-      get_existing_labels(repo)
+      get_existing_labels(label_repo)
+
+  def test_label_deltas(self):
+    assert label_deltas(["a", "b"], ["b", " c "]) == {"c": 1, "a": -1}
+    assert label_deltas(None, None) == {}
+
+  def test_create_increments_labels(self):
+    from files.operations import create_file_metadata
+
+    repo = Mock()
+    label_repo, _ = self._label_repo()
+    meta = FileMetadataFull(file_type=FileType.forms, labels=["2025", "анкета"])
+
+    create_file_metadata(meta, "a.pdf", "forms/a.pdf", "u1", repo, label_repo=label_repo)
+
+    assert self._deltas(label_repo) == {"2025": 1, "анкета": 1}
+    assert label_repo.table.update_item.call_args.kwargs["UpdateExpression"] == "ADD usage_count :delta"
+
+  def test_update_applies_label_diff(self):
+    from files.models import UpdateFileMetadataRequest
+    from files.operations import update_file_metadata
+
+    item = {"id": "f1", "file_type": "forms", "key": "forms/a.pdf", "file_name": "a.pdf", "labels": ["old", "kept"]}
+    repo = Mock()
+    repo.table.get_item.return_value = {"Item": item}
+    repo.convert_item_to_object.side_effect = lambda i: FileMetadata(**i)
+    label_repo, _ = self._label_repo()
+    request = UpdateFileMetadataRequest(file_name="a.pdf", file_type=FileType.forms, labels=["kept", "new"])
+
+    with patch("files.operations._enrich_with_user_names"), patch("files.operations._enrich_updated_by_names"):
+      update_file_metadata("f1", request, "u1", repo, loaders=Mock(), label_repo=label_repo)
+
+    assert self._deltas(label_repo) == {"new": 1, "old": -1}
+
+  def test_delete_decrements_labels(self):
+    from files.operations import delete_file
+
+    repo = Mock()
+    repo.table.get_item.return_value = {
+      "Item": {"id": "f1", "file_type": "forms", "bucket": "b", "key": "forms/a.pdf", "labels": ["2025"]}
+    }
+    repo.convert_item_to_object_full.side_effect = lambda i: FileMetadataFull(**i)
+    label_repo, _ = self._label_repo()
+
+    with patch("files.operations.get_client"):
+      delete_file("f1", repo, label_repo=label_repo)
+
+    assert self._deltas(label_repo) == {"2025": -1}
+
+  def test_rebuild_overwrites_counts_and_drops_unused(self):
+    from files.label_registry import rebuild_label_registry
+
+    repo = Mock()
+    repo.iter_scan.return_value = iter([{"labels": ["a", "b"]}, {"labels": ["b"]}])
+    label_repo, batch = self._label_repo([{"label": "a"}, {"label": "gone"}])
+
+    result = rebuild_label_registry(repo, label_repo, segments=4)
+
+    written = {c.kwargs["Item"]["label"]: c.kwargs["Item"]["usage_count"] for c in batch.put_item.call_args_list}
+    assert written == {"a": 1, "b": 2}
+    batch.delete_item.assert_called_once_with(Key={"registry": "labels", "label": "gone"})
+    assert repo.iter_scan.call_args.kwargs["segments"] == 4
+    assert result == {"labels": 2, "removed": 1}
+
+
+class TestDirectUpload:
+  def _s3(self, head=None, head_error=None):
+    from botocore.exceptions import ClientError
+
+    s3 = Mock()
+    s3.generate_presigned_post.side_effect = lambda bucket, key, **kwargs: {
+      "url": "https://test-bucket.s3.amazonaws.com/",
+      "fields": {"key": key, **kwargs["Fields"], "policy": "p", "x-amz-signature": "s"},
+    }
+    if head_error:
+      s3.head_object.side_effect = ClientError({"Error": {"Code": head_error, "Message": "Not Found"}}, "HeadObject")
+    else:
+      s3.head_object.return_value = head or {}
+    return s3
+
+  def test_initiate_returns_policy_per_file(self):
+    from files.models import DirectUploadFile, InitiateUploadRequest
+    from files.operations import initiate_direct_upload
+
+    s3 = self._s3()
+    request = InitiateUploadRequest(
+      file_type=FileType.forms, files=[DirectUploadFile(file_name="my form.pdf", size=1024)]
+    )
+    with patch("files.operations.get_client", return_value=s3):
+      response = initiate_direct_upload(request, "user-1")
+
+    upload = response.uploads[0]
+    assert upload.key == "forms/my_form.pdf"
+    assert upload.fields["Content-Type"] == "application/pdf"
+    assert upload.fields["x-amz-meta-uploaded-by"] == "user-1"
+    conditions = s3.generate_presigned_post.call_args.kwargs["Conditions"]
+    assert ["content-length-range", 1, response.max_file_size] in conditions
+    assert {"x-amz-meta-uploaded-by": "user-1"} in conditions
+
+  def test_initiate_rejects_oversized_file(self):
+    from files.exceptions import FileTooLargeError
+    from files.models import DirectUploadFile, InitiateUploadRequest
+    from files.operations import initiate_direct_upload
+
+    request = InitiateUploadRequest(
+      file_type=FileType.forms, files=[DirectUploadFile(file_name="big.pdf", size=10 * 1024**3)]
+    )
+    with patch("files.operations.get_client", return_value=self._s3()), pytest.raises(FileTooLargeError):
+      initiate_direct_upload(request, "user-1")
+
+  def test_initiate_private_requires_allowed_users(self):
+    from files.exceptions import MissingAllowedUsersError
+    from files.models import DirectUploadFile, InitiateUploadRequest
+    from files.operations import initiate_direct_upload
+
+    request = InitiateUploadRequest(
+      file_type=FileType.private_documents, files=[DirectUploadFile(file_name="a.pdf", size=1)]
+    )
+    with pytest.raises(MissingAllowedUsersError):
+      initiate_direct_upload(request, "user-1")
+
+  def test_finalize_writes_metadata_with_stable_id(self):
+    from files.models import FinalizeUploadRequest
+    from files.operations import finalize_direct_upload
+
+    s3 = self._s3(head={"ETag": '"abc"', "Metadata": {"uploaded-by": "user-1"}})
+    repo = Mock()
+    repo.convert_item_to_object_full.side_effect = lambda item: FileMetadataFull(**item)
+    request = FinalizeUploadRequest(file_type=FileType.forms, labels=["2025"], keys=["forms/a.pdf"])
+
+    with patch("files.operations.get_client", return_value=s3), patch("files.operations._update_label_counts"):
+      results, created = finalize_direct_upload(request, "user-1", repo)
+
+    assert created == results
+    item = repo.table.put_item.call_args.kwargs["Item"]
+    assert item["id"] == results[0].id
+    assert item["key"] == "forms/a.pdf"
+    assert item["file_name"] == "a.pdf"
+    assert item["labels"] == ["2025"]
+    assert item["uploaded_by"] == "user-1"
+    assert repo.table.put_item.call_args.kwargs["ConditionExpression"] is not None
+
+  def test_finalize_retry_returns_existing_record_without_side_effects(self):
+    from botocore.exceptions import ClientError
+
+    from files.models import FinalizeUploadRequest
+    from files.operations import finalize_direct_upload
+
+    s3 = self._s3(head={"ETag": '"abc"', "Metadata": {"uploaded-by": "user-1"}})
+    repo = Mock()
+    repo.convert_item_to_object_full.side_effect = lambda item: FileMetadataFull(**item)
+    request = FinalizeUploadRequest(
+      file_type=FileType.private_documents, labels=["2025"], allowed_to=["user-2"], keys=["private_documents/a.pdf"]
+    )
+
+    with (
+      patch("files.operations.get_client", return_value=s3),
+      patch("files.operations._update_label_counts") as update_label_counts,
+      patch("files.operations.index_shares") as index_shares,
+      patch("files.operations.get_share_repository"),
+    ):
+      first, _ = finalize_direct_upload(request, "user-1", repo)
+      stored = repo.table.put_item.call_args.kwargs["Item"]
+      repo.table.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "exists"}}, "PutItem"
+      )
+      repo.table.get_item.return_value = {"Item": stored}
+      second, created = finalize_direct_upload(request, "user-1", repo)
+
+    assert created == []
+    assert second[0].id == first[0].id
+    assert second[0].created_at == first[0].created_at
+    update_label_counts.assert_called_once()
+    index_shares.assert_called_once()
+    assert repo.table.get_item.call_args.kwargs == {"Key": {"id": first[0].id}, "ConsistentRead": True}
+
+  def test_finalize_missing_object(self):
+    from files.exceptions import FileNotFoundError
+    from files.models import FinalizeUploadRequest
+    from files.operations import finalize_direct_upload
+
+    request = FinalizeUploadRequest(file_type=FileType.forms, keys=["forms/a.pdf"])
+    s3 = self._s3(head_error="404")
+    with patch("files.operations.get_client", return_value=s3), pytest.raises(FileNotFoundError):
+      finalize_direct_upload(request, "user-1", Mock())
+
+  def test_finalize_rejects_object_uploaded_by_someone_else(self):
+    from files.exceptions import FileAccessDeniedError
+    from files.models import FinalizeUploadRequest
+    from files.operations import finalize_direct_upload
+
+    s3 = self._s3(head={"Metadata": {"uploaded-by": "user-2"}})
+    repo = Mock()
+    request = FinalizeUploadRequest(file_type=FileType.forms, keys=["forms/a.pdf"])
+
+    with patch("files.operations.get_client", return_value=s3), pytest.raises(FileAccessDeniedError):
+      finalize_direct_upload(request, "user-1", repo)
+    repo.table.put_item.assert_not_called()
+
+  def test_finalize_rejects_key_outside_file_type(self):
+    from files.exceptions import FileUploadError
+    from files.models import FinalizeUploadRequest
+    from files.operations import finalize_direct_upload
+
+    request = FinalizeUploadRequest(file_type=FileType.forms, keys=["accounting/a.pdf"])
+    with patch("files.operations.get_client", return_value=self._s3()), pytest.raises(FileUploadError):
+      finalize_direct_upload(request, "user-1", Mock())
+
+
+class TestDownloadFile:
+  def _meta(self, file_type=FileType.forms, allowed_to=None):
+    return FileMetadataFull(
+      id="file-1",
+      file_name="отчет 2025.pdf",
+      file_type=file_type,
+      bucket="test-bucket",
+      key="forms/отчет_2025.pdf",
+      allowed_to=allowed_to,
+    )
+
+  def _download(self, meta, mode=None, user_id="user-1", role="regular_user"):
+    from files.operations import download_file
+
+    s3 = Mock()
+    s3.generate_presigned_url.return_value = "https://test-bucket.s3.amazonaws.com/signed"
+    s3.get_object.return_value = {"Body": Mock(iter_chunks=Mock(return_value=iter([b"pdf"])))}
+    user = Mock(id=user_id, role=role)
+    with (
+      patch("files.operations.get_db_metadata", return_value=meta),
+      patch("utils.downloads.get_client", return_value=s3),
+    ):
+      return download_file(meta, user, Mock(), mode=mode), s3
+
+  def test_default_redirects_to_presigned_url(self):
+    response, s3 = self._download(self._meta())
+
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://test-bucket.s3.amazonaws.com/signed"
+    params = s3.generate_presigned_url.call_args.kwargs["Params"]
+    assert params["Key"] == "forms/отчет_2025.pdf"
+    assert params["ResponseContentType"] == "application/pdf"
+    assert "filename*=UTF-8''%D0%BE%D1%82%D1%87%D0%B5%D1%82%202025.pdf" in params["ResponseContentDisposition"]
+    s3.get_object.assert_not_called()
+
+  def test_url_mode_returns_json(self):
+    import json
+
+    response, _ = self._download(self._meta(), mode="url")
+
+    body = json.loads(response.body)
+    assert body["url"] == "https://test-bucket.s3.amazonaws.com/signed"
+    assert body["file_name"] == "отчет 2025.pdf"
+
+  def test_proxy_mode_streams_object(self):
+    response, s3 = self._download(self._meta(), mode="proxy")
+
+    assert response.media_type == "application/pdf"
+    s3.get_object.assert_called_once_with(Bucket="test-bucket", Key="forms/отчет_2025.pdf")
+    s3.generate_presigned_url.assert_not_called()
+
+  def test_access_check_runs_before_presigning(self):
+    from files.exceptions import FileAccessDeniedError
+
+    meta = self._meta(file_type=FileType.private_documents, allowed_to=["someone-else"])
+    with pytest.raises(FileAccessDeniedError):
+      self._download(meta)
+
+
+SHARED_FILES = {
+  "f1": {"id": "f1", "file_name": "a.pdf", "file_type": "private_documents", "allowed_to": ["u1"]},
+  "f2": {"id": "f2", "file_name": "b.pdf", "file_type": "minutes", "allowed_to": ["u1", "u2"]},
+  "f3": {"id": "f3", "file_name": "c.pdf", "file_type": "private_documents", "allowed_to": ["u2"]},
+}
+
+
+class TestShareIndex:
+  def _share_repo(self, rows=None):
+    share_repo = Mock()
+    share_repo.iter_query.return_value = iter(rows or [])
+    batch = Mock()
+    share_repo.table.batch_writer.return_value.__enter__ = Mock(return_value=batch)
+    share_repo.table.batch_writer.return_value.__exit__ = Mock(return_value=False)
+    return share_repo, batch
+
+  def _files_repo(self, items):
+    repo = Mock()
+    repo.batch_get.side_effect = lambda ids, **kwargs: {i: items[i] for i in ids if i in items}
+    repo.convert_item_to_object.side_effect = lambda item: FileMetadata(**item)
+    return repo
+
+  def test_add_share_indexes_requested_recipients(self):
+    from files.operations import add_share
+
+    repo = Mock()
+    repo.table.get_item.return_value = {"Item": {"id": "f1", "created_at": "2025-01-01", "allowed_to": ["u1"]}}
+    share_repo, batch = self._share_repo()
+
+    add_share("f1", ["u1", "u2"], repo, share_repo=share_repo)
+
+    rows = [c.kwargs["Item"] for c in batch.put_item.call_args_list]
+    assert [r["user_id"] for r in rows] == ["u1", "u2"]
+    assert rows[0]["share_key"] == "2025-01-01#f1"
+    assert rows[0]["share"] == "share"
+
+  def test_revoke_share_removes_row(self):
+    from files.operations import revoke_share
+
+    repo = Mock()
+    repo.table.get_item.return_value = {"Item": {"id": "f1", "created_at": "2025-01-01", "allowed_to": ["u1"]}}
+    share_repo, batch = self._share_repo()
+
+    revoke_share("f1", "u1", repo, share_repo=share_repo)
+
+    batch.delete_item.assert_called_once_with(Key={"user_id": "u1", "share_key": "2025-01-01#f1"})
+
+  def test_shared_with_me_queries_user_partition_and_drops_stale_rows(self):
+    from files.operations import get_files_shared_with_user
+
+    rows = [{"user_id": "u1", "file_id": f} for f in ("f2", "f3", "gone", "f1")]
+    share_repo, _ = self._share_repo(rows)
+    repo = self._files_repo(SHARED_FILES)
+
+    with patch("files.operations._enrich_with_user_names"):
+      result = get_files_shared_with_user("u1", repo, share_repo=share_repo)
+
+    # f3 no longer lists u1 and "gone" was deleted; order follows the index
+    assert [f.id for f in result] == ["f2", "f1"]
+    repo.table.scan.assert_not_called()
+
+  def test_private_listing_reads_share_index(self):
+    from files.operations import get_files_metadata
+
+    rows = [{"user_id": "u1", "file_id": "f2"}, {"user_id": "u1", "file_id": "f1"}]
+    share_repo, _ = self._share_repo(rows)
+    repo = self._files_repo(SHARED_FILES)
+
+    with patch("files.operations._enrich_with_user_names"):
+      result = get_files_metadata("private_documents", repo, user_id="u1", share_repo=share_repo)
+
+    assert [f.id for f in result] == ["f1"]
+    repo.iter_query.assert_not_called()
+
+  def test_audit_expands_index_rows(self):
+    from files.operations import get_shared_files_audit
+
+    rows = [
+      {"user_id": "u2", "file_id": "f3"},
+      {"user_id": "u1", "file_id": "f2"},
+      {"user_id": "u2", "file_id": "f2"},
+    ]
+    share_repo, _ = self._share_repo(rows)
+    repo = self._files_repo(SHARED_FILES)
+
+    with patch("files.operations.get_user_display_names", return_value={"u1": "Иван Иванов"}):
+      entries = get_shared_files_audit(repo, Mock(), share_repo=share_repo)
+
+    assert [(e.file_id, e.shared_with_id) for e in entries] == [("f3", "u2"), ("f2", "u1"), ("f2", "u2")]
+    assert entries[1].shared_with_name == "Иван Иванов"
+    assert share_repo.iter_query.call_args.kwargs["index_name"] == "share_created_at_index"
+
+  def test_backfill_indexes_every_shared_file(self):
+    from files.share_index import backfill_share_index
+
+    repo = Mock()
+    repo.iter_scan.return_value = iter(SHARED_FILES.values())
+    share_repo, batch = self._share_repo()
+
+    assert backfill_share_index(repo, share_repo) == 4
+    assert batch.put_item.call_count == 4
@@ -12,17 +12,29 @@ from inquiries.models import (
   InquiryUpdate,
 )
 from inquiries.operations import (
-  _sort_inquiries,
+  ALL_PARTITION,
+  AUTHOR_INDEX,
+  REGISTRY_INDEX,
+  STATUS_INDEX,
+  UNREGISTERED_ENTRY_SORT,
   assign_entry_number,
   close_inquiry,
   create_inquiry,
   delete_inquiry,
+  entry_sort_value,
   export_pdf,
   get_inquiry,
+  get_pdf_rendition,
+  list_all_inquiries,
   list_inquiries_for_scope,
   list_inquiries_for_user,
+  list_registered_inquiries,
+  pdf_rendition_key,
   update_inquiry,
 )
+from inquiries.participant_index import index_participants, participants_of, reindex_participants
+from inquiries.stats import rebuild_inquiry_stats, stats_deltas
+from utils.cursors import InvalidCursorError, encode_cursor
 
 # ---------------------------------------------------------------------------
 # Fixtures
@@ -52,17 +64,17 @@ def _make_inquiry(**kwargs) -> Inquiry:
 
 
 @pytest.fixture
-def mock_repo():
+def mock_repo(bind_paginators):
   repo = Mock()
   repo.table = Mock()
   repo.convert_item_to_object = Mock(
     side_effect=lambda item: Inquiry(**{k: v for k, v in item.items() if k in Inquiry.model_fields})
   )
-  return repo
+  return bind_paginators(repo)
 
 
 @pytest.fixture
-def mock_user_repo():
+def mock_user_repo(bind_paginators):
   repo = Mock()
   repo.table = Mock()
   repo.table.get_item = Mock(
@@ -98,7 +110,7 @@ def mock_user_repo():
       subscribed=True,
     )
   )
-  return repo
+  return bind_paginators(repo)
 
 
 # ---------------------------------------------------------------------------
@@ -128,7 +140,7 @@ class TestGetInquiry:
 
 
 class TestCreateInquiry:
-  @patch("inquiries.operations.boto3.client")
+  @patch("inquiries.operations.get_client")
   def test_creates_inquiry_no_files(self, mock_boto, mock_repo, mock_user_repo):
     mock_repo.table.put_item = Mock()
     created_inquiry = _make_inquiry()
@@ -151,7 +163,7 @@ class TestCreateInquiry:
     assert "admin" in item["scope"]
     assert "id" in item
 
-  @patch("inquiries.operations.boto3.client")
+  @patch("inquiries.operations.get_client")
   def test_admin_always_in_scope(self, mock_boto, mock_repo, mock_user_repo):
     mock_repo.table.put_item = Mock()
     mock_repo.convert_item_to_object = Mock(return_value=_make_inquiry())
@@ -189,7 +201,7 @@ class TestCreateInquiry:
     with pytest.raises(ValueError, match="Description is required"):
       create_inquiry(data, [], "user-1", mock_repo, mock_user_repo)
 
-  @patch("inquiries.operations.boto3.client")
+  @patch("inquiries.operations.get_client")
   def test_raises_when_files_exceed_5mb(self, mock_boto, mock_repo, mock_user_repo):
     big_file = Mock()
     big_file.filename = "big.pdf"
@@ -261,6 +273,51 @@ class TestExportPdf:
     assert "/usr/share/fonts/truetype/dejavu" not in html
 
 
+class TestPdfRendition:
+  def test_key_is_stable_for_unchanged_inquiry(self):
+    key = pdf_rendition_key(_make_inquiry(status="accepted"))
+
+    assert key == pdf_rendition_key(_make_inquiry(status="accepted"))
+    assert key.startswith("inquiries/inq-1/renditions/")
+    assert key.endswith(".pdf")
+
+  def test_key_changes_with_printed_content(self):
+    base = pdf_rendition_key(_make_inquiry(status="accepted"))
+
+    assert pdf_rendition_key(_make_inquiry(status="finished")) != base
+    assert pdf_rendition_key(_make_inquiry(status="accepted", author_name="Мария Петрова")) != base
+
+  @patch("inquiries.operations.export_pdf")
+  @patch("inquiries.operations.get_client")
+  def test_serves_cached_rendition_without_rendering(self, mock_get_client, mock_export):
+    s3 = mock_get_client.return_value
+
+    key = get_pdf_rendition(_make_inquiry(status="accepted"))
+
+    s3.head_object.assert_called_once()
+    assert s3.head_object.call_args[1]["Key"] == key
+    mock_export.assert_not_called()
+    s3.put_object.assert_not_called()
+
+  @patch("inquiries.operations.export_pdf", return_value=b"%PDF")
+  @patch("inquiries.operations.get_client")
+  def test_renders_and_replaces_stale_renditions_on_miss(self, mock_get_client, mock_export):
+    from botocore.exceptions import ClientError
+
+    s3 = mock_get_client.return_value
+    s3.head_object.side_effect = ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+    s3.list_objects_v2.return_value = {"Contents": [{"Key": "inquiries/inq-1/renditions/old.pdf"}]}
+
+    key = get_pdf_rendition(_make_inquiry(status="accepted"))
+
+    mock_export.assert_called_once()
+    s3.put_object.assert_called_once()
+    assert s3.put_object.call_args[1]["Key"] == key
+    assert s3.put_object.call_args[1]["Body"] == b"%PDF"
+    s3.delete_objects.assert_called_once()
+    assert s3.delete_objects.call_args[1]["Delete"]["Objects"] == [{"Key": "inquiries/inq-1/renditions/old.pdf"}]
+
+
 # ---------------------------------------------------------------------------
 # assign_entry_number
 # ---------------------------------------------------------------------------
@@ -273,11 +330,12 @@ class TestAssignEntryNumber:
     mock_repo.table.update_item = Mock(return_value={"Attributes": updated_inq.model_dump()})
     mock_repo.convert_item_to_object = Mock(return_value=updated_inq)
 
-    with patch("inquiries.operations._notify_author_status_change"):
+    with patch("inquiries.operations._queue_status_notification"):
       result = assign_entry_number(inq, AssignEntryNumber(entry_number="42"), mock_repo, mock_user_repo)
 
     assert result.status == InquiryStatus.IN_PROGRESS
     assert result.entry_number == "42"
+    assert mock_repo.table.update_item.call_args.kwargs["ExpressionAttributeValues"][":es"] == 42
 
   def test_raises_when_not_sent(self, mock_repo, mock_user_repo):
     inq = _make_inquiry(status=InquiryStatus.IN_PROGRESS, entry_number="10")
@@ -298,7 +356,7 @@ class TestCloseInquiry:
     mock_repo.table.update_item = Mock(return_value={"Attributes": closed_inq.model_dump()})
     mock_repo.convert_item_to_object = Mock(return_value=closed_inq)
 
-    with patch("inquiries.operations._notify_author_status_change"):
+    with patch("inquiries.operations._queue_status_notification"):
       result = close_inquiry(
         inq,
         CloseInquiry(final_status="closed", reason="Done"),
@@ -330,7 +388,7 @@ class TestCloseInquiry:
     mock_repo.table.update_item = Mock(return_value={"Attributes": closed_inq.model_dump()})
     mock_repo.convert_item_to_object = Mock(return_value=closed_inq)
 
-    with patch("inquiries.operations._notify_author_status_change"):
+    with patch("inquiries.operations._queue_status_notification"):
       result = close_inquiry(
         inq,
         CloseInquiry(final_status="finished", reason="Resolved"),
@@ -409,69 +467,308 @@ class TestDeleteInquiry:
 # ---------------------------------------------------------------------------
 
 
-class TestListingFilters:
-  @patch("inquiries.operations._full_scan")
-  @patch("inquiries.operations._enrich_inquiry")
-  def test_list_for_user_returns_authored(self, mock_enrich, mock_scan, mock_repo, mock_user_repo):
-    inq1 = _make_inquiry(id="i1", author_id="user-1")
-    inq2 = _make_inquiry(id="i2", author_id="user-2")
-    mock_scan.return_value = [inq1, inq2]
+@pytest.fixture
+def inquiry_tables():
+  """In-memory inquiries and participant tables with the indexes the listings query."""
+  from benchmarks.fakes import FakeTable, fake_aws
+  from database.repositories import InquiryParticipantRepository, InquiryRepository
+
+  tables = {
+    "inquiries": FakeTable(
+      "inquiries",
+      indexes={
+        AUTHOR_INDEX: ("author_id", "created_at"),
+        REGISTRY_INDEX: ("inquiry", "entry_sort"),
+        STATUS_INDEX: ("status", "entry_sort"),
+      },
+    ),
+    "participants": FakeTable("participants", key_name="participant", sort_key_name="inquiry_key"),
+  }
+  with fake_aws(tables):
+    yield InquiryRepository("inquiries"), InquiryParticipantRepository("participants"), tables
+
+
+def _seed(repo, participant_repo, **kwargs) -> dict:
+  inquiry = _make_inquiry(**kwargs)
+  item = {**inquiry.model_dump(), "inquiry": ALL_PARTITION, "entry_sort": entry_sort_value(inquiry.entry_number)}
+  repo.table.put_item(Item=item)
+  index_participants(item, participants_of(item), participant_repo)
+  return item
+
+
+def _all_pages(list_page) -> list[list[str]]:
+  pages, cursor = [], None
+  while True:
+    inquiries, cursor = list_page(cursor)
+    pages.append([inq.id for inq in inquiries])
+    if cursor is None:
+      return pages
+
+
+@patch("inquiries.operations._enrich_inquiries")
+class TestListingQueries:
+  def test_mine_merges_authored_and_co_authored_newest_first(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, tables = inquiry_tables
+    _seed(repo, participant_repo, id="a1", author_id="user-1", created_at="2024-01-01T00:00:00")
+    _seed(repo, participant_repo, id="c1", author_id="user-2", co_authors=["user-1"], created_at="2024-01-02T00:00:00")
+    _seed(repo, participant_repo, id="x1", author_id="user-2", created_at="2024-01-03T00:00:00")
+    _seed(repo, participant_repo, id="a2", author_id="user-1", created_at="2024-01-04T00:00:00")
+    _seed(repo, participant_repo, id="c2", author_id="user-3", co_authors=["user-1"], created_at="2024-01-05T00:00:00")
+
+    pages = _all_pages(
+      lambda cursor: list_inquiries_for_user("user-1", repo, mock_user_repo, 2, cursor, participant_repo)
+    )
+
+    assert pages == [["c2", "a2"], ["c1", "a1"]]
+    assert tables["inquiries"].calls.get("scan") is None
+
+  def test_pages_are_bounded_queries(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, tables = inquiry_tables
+    for i in range(30):
+      _seed(repo, participant_repo, id=f"i{i:02d}", entry_number=str(i), status=InquiryStatus.IN_PROGRESS)
+    tables["inquiries"].reset_counters()
+
+    first, cursor = list_all_inquiries(repo, mock_user_repo, limit=5)
+    second, _ = list_all_inquiries(repo, mock_user_repo, limit=5, cursor=cursor)
+
+    assert [inq.id for inq in first] == ["i29", "i28", "i27", "i26", "i25"]
+    assert [inq.id for inq in second] == ["i24", "i23", "i22", "i21", "i20"]
+    assert tables["inquiries"].calls == {"query": 2}
+    # limit + 1 per page: the second resumes right after the cursor's index key
+    assert tables["inquiries"].items_read == 12
+
+  def test_registry_lists_unregistered_first_then_descending_entry_number(
+    self, mock_enrich, inquiry_tables, mock_user_repo
+  ):
+    repo, participant_repo, _ = inquiry_tables
+    _seed(repo, participant_repo, id="n5", entry_number="5", status=InquiryStatus.IN_PROGRESS)
+    _seed(repo, participant_repo, id="n10", entry_number="10", status=InquiryStatus.CLOSED)
+    _seed(repo, participant_repo, id="new1", created_at="2024-02-01T00:00:00")
+    _seed(repo, participant_repo, id="n1", entry_number="1", status=InquiryStatus.FINISHED)
+    _seed(repo, participant_repo, id="new2", created_at="2024-02-02T00:00:00")
+
+    pages = _all_pages(lambda cursor: list_all_inquiries(repo, mock_user_repo, 2, cursor))
+
+    assert sorted(pages[0]) == ["new1", "new2"]
+    assert pages[1:] == [["n10", "n5"], ["n1"]]
+
+  def test_registry_filters_by_status_and_type(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, tables = inquiry_tables
+    _seed(repo, participant_repo, id="p1", entry_number="1", status=InquiryStatus.IN_PROGRESS)
+    _seed(repo, participant_repo, id="p2", entry_number="2", status=InquiryStatus.IN_PROGRESS, inquiry_type="сигнал")
+    _seed(repo, participant_repo, id="p3", entry_number="3", status=InquiryStatus.IN_PROGRESS)
+    _seed(repo, participant_repo, id="c4", entry_number="4", status=InquiryStatus.CLOSED)
+
+    in_progress = _all_pages(
+      lambda cursor: list_all_inquiries(repo, mock_user_repo, 1, cursor, status=InquiryStatus.IN_PROGRESS)
+    )
+    requests, _ = list_all_inquiries(repo, mock_user_repo, inquiry_type="запитване")
+
+    assert in_progress == [["p3"], ["p2"], ["p1"]]
+    assert [inq.id for inq in requests] == ["c4", "p3", "p1"]
+    assert tables["inquiries"].calls.get("scan") is None
+
+  def test_registered_inquiries_in_registry_order(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, _ = inquiry_tables
+    _seed(repo, participant_repo, id="n2", entry_number="2", status=InquiryStatus.IN_PROGRESS)
+    _seed(repo, participant_repo, id="new", entry_number=None)
+    _seed(repo, participant_repo, id="n7", entry_number="7", status=InquiryStatus.CLOSED)
+
+    result = list_registered_inquiries(repo, mock_user_repo)
+
+    assert [inq.id for inq in result] == ["n7", "n2"]
+
+  def test_scope_listing_reads_scope_rows_and_drops_stale_ones(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, _ = inquiry_tables
+    _seed(repo, participant_repo, id="b1", scope=["admin", "board"], created_at="2024-01-01T00:00:00")
+    stale = _seed(repo, participant_repo, id="b2", scope=["admin", "board"], created_at="2024-01-02T00:00:00")
+    _seed(repo, participant_repo, id="c1", scope=["admin", "control"], created_at="2024-01-03T00:00:00")
+    # Board removed from scope without the index being updated
+    repo.table.put_item(Item={**stale, "scope": ["admin"]})
+
+    result, cursor = list_inquiries_for_scope("board", repo, mock_user_repo, participant_repo=participant_repo)
+
+    assert [inq.id for inq in result] == ["b1"]
+    assert cursor is None
+
+  def test_admin_scope_reads_all_inquiries(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, participant_repo, _ = inquiry_tables
+    _seed(repo, participant_repo, id="i1", scope=["admin"], entry_number="1", status=InquiryStatus.IN_PROGRESS)
+    _seed(repo, participant_repo, id="i2", scope=["admin", "board"], entry_number="2", status=InquiryStatus.IN_PROGRESS)
+
+    result, _ = list_inquiries_for_scope("admin", repo, mock_user_repo, participant_repo=participant_repo)
+
+    assert [inq.id for inq in result] == ["i2", "i1"]
 
-    result = list_inquiries_for_user("user-1", mock_repo, mock_user_repo)
-    assert all(i.id == "i1" for i in result)
+  def test_rejects_malformed_cursor(self, mock_enrich, inquiry_tables, mock_user_repo):
+    repo, _, _ = inquiry_tables
 
-  @patch("inquiries.operations._full_scan")
-  @patch("inquiries.operations._enrich_inquiry")
-  def test_list_for_user_includes_co_authors(self, mock_enrich, mock_scan, mock_repo, mock_user_repo):
-    inq1 = _make_inquiry(id="i1", author_id="user-2", co_authors=["user-1"])
-    inq2 = _make_inquiry(id="i2", author_id="user-3", co_authors=[])
-    mock_scan.return_value = [inq1, inq2]
+    with pytest.raises(InvalidCursorError):
+      list_all_inquiries(repo, mock_user_repo, cursor="not-a-cursor")
+    with pytest.raises(InvalidCursorError):
+      list_all_inquiries(repo, mock_user_repo, cursor=encode_cursor({"id": "i1", "entry_sort": "5"}))
 
-    result = list_inquiries_for_user("user-1", mock_repo, mock_user_repo)
-    assert len(result) == 1
-    assert result[0].id == "i1"
 
-  @patch("inquiries.operations._full_scan")
-  @patch("inquiries.operations._enrich_inquiry")
-  def test_list_for_scope_filters_by_role(self, mock_enrich, mock_scan, mock_repo, mock_user_repo):
-    inq1 = _make_inquiry(id="i1", scope=["admin", "board"])
-    inq2 = _make_inquiry(id="i2", scope=["admin"])
-    mock_scan.return_value = [inq1, inq2]
+class TestParticipantIndex:
+  def test_rows_for_co_authors_and_non_admin_scopes(self):
+    item = _make_inquiry(author_id="user-1", co_authors=["user-1", "user-2"], scope=["admin", "board"]).model_dump()
 
-    result = list_inquiries_for_scope("board", mock_repo, mock_user_repo)
-    assert len(result) == 1
-    assert result[0].id == "i1"
+    assert participants_of(item) == {"scope#board": "scope", "user-2": "co_author"}
+
+  def test_update_moves_rows(self, inquiry_tables):
+    repo, participant_repo, tables = inquiry_tables
+    before = _seed(repo, participant_repo, co_authors=["user-2"], scope=["admin", "board"])
+    after = {**before, "co_authors": ["user-3"], "scope": ["admin", "control"]}
+
+    reindex_participants(before, after, participant_repo)
+
+    assert {participant for participant, _ in tables["participants"].items} == {"user-3", "scope#control"}
+
+  def test_create_and_delete_maintain_rows(self, mock_user_repo, inquiry_tables):
+    repo, participant_repo, tables = inquiry_tables
+    data = InquiryCreate(title="T", description="D", inquiry_type="запитване", scope=["board"], co_authors=["user-2"])
+
+    with patch("inquiries.operations.RequestLoaders") as mock_loaders:
+      mock_loaders.return_value.display_names.return_value = {}
+      inquiry = create_inquiry(data, [], "user-1", repo, mock_user_repo, participant_repo=participant_repo)
+
+    assert {participant for participant, _ in tables["participants"].items} == {"user-2", "scope#board"}
+    assert tables["inquiries"].items[inquiry.id]["inquiry"] == ALL_PARTITION
+    assert tables["inquiries"].items[inquiry.id]["entry_sort"] == UNREGISTERED_ENTRY_SORT
+
+    with patch("inquiries.operations._delete_inquiry_folder"):
+      delete_inquiry(inquiry, "user-1", "regular", repo, participant_repo)
+
+    assert tables["participants"].items == {}
 
 
 # ---------------------------------------------------------------------------
-# sorting
+# statistics counters
 # ---------------------------------------------------------------------------
 
 
-class TestSortInquiries:
-  def test_null_entry_number_comes_first(self):
-    inq_no_num = _make_inquiry(id="a", entry_number=None)
-    inq_with_num = _make_inquiry(id="b", entry_number="5")
+class TestInquiryStats:
+  def _stats_repo(self):
+    from database.repositories import InquiryStatsRepository
+
+    stats_repo = Mock()
+    stats_repo.convert_item_to_object.side_effect = lambda item: InquiryStatsRepository.convert_item_to_object(
+      Mock(key_name="stats"), item
+    )
+    return stats_repo
+
+  def _deltas(self, stats_repo) -> dict[str, int]:
+    (call,) = stats_repo.table.update_item.call_args_list
+    names, values = call.kwargs["ExpressionAttributeNames"], call.kwargs["ExpressionAttributeValues"]
+    return {names[f"#c{i}"]: values[f":d{i}"] for i in range(len(names))}
+
+  def test_create_counts_total_status_type_and_scope(self):
+    item = _make_inquiry(scope=["admin", "board"], inquiry_type="сигнал").model_dump()
+
+    assert stats_deltas(None, item) == {
+      "total": 1,
+      "status#sent": 1,
+      "type#сигнал": 1,
+      "scope#admin": 1,
+      "scope#board": 1,
+    }
+
+  def test_edit_without_bucket_change_writes_nothing(self):
+    item = _make_inquiry().model_dump()
+
+    assert stats_deltas(item, {**item, "description": "changed"}) == {}
+
+  def test_assign_entry_number_moves_status_in_one_update(self, mock_repo, mock_user_repo):
+    inq = _make_inquiry(status=InquiryStatus.SENT)
+    updated = _make_inquiry(status=InquiryStatus.IN_PROGRESS, entry_number="7")
+    mock_repo.table.update_item = Mock(return_value={"Attributes": updated.model_dump()})
+    stats_repo = self._stats_repo()
+
+    with patch("inquiries.operations._queue_status_notification"):
+      assign_entry_number(inq, AssignEntryNumber(entry_number="7"), mock_repo, mock_user_repo, stats_repo=stats_repo)
+
+    assert self._deltas(stats_repo) == {"status#sent": -1, "status#in_progress": 1}
+    assert stats_repo.table.update_item.call_args.kwargs["UpdateExpression"].startswith("ADD ")
+
+  def test_close_moves_status(self, mock_repo, mock_user_repo):
+    inq = _make_inquiry(status=InquiryStatus.IN_PROGRESS, entry_number="7")
+    closed = _make_inquiry(status=InquiryStatus.FAILED, entry_number="7")
+    mock_repo.table.update_item = Mock(return_value={"Attributes": closed.model_dump()})
+    stats_repo = self._stats_repo()
+
+    with patch("inquiries.operations._queue_status_notification"):
+      close_inquiry(
+        inq,
+        CloseInquiry(final_status="failed", reason="r"),
+        None,
+        "admin-1",
+        "admin",
+        mock_repo,
+        mock_user_repo,
+        stats_repo=stats_repo,
+      )
 
-    result = _sort_inquiries([inq_with_num, inq_no_num])
-    assert result[0].id == "a"
+    assert self._deltas(stats_repo) == {"status#in_progress": -1, "status#failed": 1}
+
+  def test_delete_decrements_every_counter(self, mock_repo):
+    inq = _make_inquiry(scope=["admin", "control"])
+    stats_repo = self._stats_repo()
+
+    with patch("inquiries.operations._delete_inquiry_folder"):
+      delete_inquiry(inq, "user-1", "regular", mock_repo, participant_repo=Mock(), stats_repo=stats_repo)
+
+    assert self._deltas(stats_repo) == {
+      "total": -1,
+      "status#sent": -1,
+      "type#запитване": -1,
+      "scope#admin": -1,
+      "scope#control": -1,
+    }
+
+  def test_stats_list_every_status(self):
+    stats = self._stats_repo().convert_item_to_object({"stats": "inquiries", "total": 2, "status#sent": 2})
+
+    assert stats.total == 2
+    assert stats.by_status == {"sent": 2, "accepted": 0, "in_progress": 0, "closed": 0, "finished": 0, "failed": 0}
+
+  def test_rebuild_overwrites_counters_from_scan(self):
+    repo = Mock()
+    repo.iter_scan.return_value = iter(
+      [
+        {"status": "sent", "inquiry_type": "молба", "scope": ["admin"]},
+        {"status": "closed", "inquiry_type": "молба", "scope": ["admin", "board"]},
+      ]
+    )
+    stats_repo = self._stats_repo()
+
+    stats = rebuild_inquiry_stats(repo, stats_repo, segments=4)
+
+    item = stats_repo.table.put_item.call_args.kwargs["Item"]
+    assert item["stats"] == "inquiries"
+    assert item["total"] == 2
+    assert stats.by_type == {"молба": 2}
+    assert stats.by_scope == {"admin": 2, "board": 1}
+    assert repo.iter_scan.call_args.kwargs["segments"] == 4
+
+
+# ---------------------------------------------------------------------------
+# registry order
+# ---------------------------------------------------------------------------
+
+
+class TestEntrySortValue:
+  def test_missing_entry_number_comes_first(self):
+    assert entry_sort_value(None) == UNREGISTERED_ENTRY_SORT
+    assert entry_sort_value("") > entry_sort_value("999999")
 
   def test_higher_entry_number_comes_first(self):
-    inq_low = _make_inquiry(id="low", entry_number="2")
-    inq_high = _make_inquiry(id="high", entry_number="10")
-
-    result = _sort_inquiries([inq_low, inq_high])
-    assert result[0].id == "high"
-
-  def test_mixed_sorting(self):
-    inqs = [
-      _make_inquiry(id="n5", entry_number="5"),
-      _make_inquiry(id="n1", entry_number="1"),
-      _make_inquiry(id="none", entry_number=None),
-      _make_inquiry(id="n10", entry_number="10"),
-    ]
-    result = _sort_inquiries(inqs)
-    assert result[0].id == "none"
-    assert result[1].id == "n10"
-    assert result[2].id == "n5"
-    assert result[3].id == "n1"
+    assert entry_sort_value("10") > entry_sort_value("2")
+    assert entry_sort_value(" 42 ") == 42
+
+  def test_later_year_comes_first(self):
+    assert entry_sort_value("1/2025") > entry_sort_value("30/2024")
+    assert entry_sort_value("12/2024") == 2024000012
+
+  def test_unparseable_entry_number_comes_last(self):
+    assert entry_sort_value("abc") == 0
+    assert entry_sort_value("1") > entry_sort_value("abc")
@@ -1,4 +1,4 @@
-"""Tests for mail/operations.py — render_template and notification routing."""
+"""Tests for mail/operations.py — render_template and notification routing — plus bulk sends and the outbox."""
 
 import pytest
 
@@ -37,3 +37,509 @@ class TestRenderTemplate:
     result = render_template("static.html")
 
     assert result == "<p>Статичен текст</p>"
+
+  def test_templates_are_read_once_per_process(self, tmp_path, monkeypatch):
+    template = tmp_path / "cached.html"
+    template.write_text("<p>{name}</p>", encoding="utf-8")
+
+    import mail.operations as mail_ops
+
+    monkeypatch.setattr(mail_ops, "_TEMPLATES_DIR", tmp_path)
+    render_template("cached.html", name="a")
+    template.unlink()
+
+    assert render_template("cached.html", name="b") == "<p>b</p>"
+
+
+SAMPLE_VALUES = {
+  "news_link": "https://x/home",
+  "unsubscribe_link": "https://x/unsub?email=a@example.com",
+  "file_name": "Протокол.pdf",
+  "category_bg": "Протоколи",
+  "documents_link": "https://x/minutes",
+  "download_link": "https://x/mydocuments",
+  "verification_link": "https://x/verify",
+  "recipient_name": "Иван Иванов",
+  "inquiry_title": "Ремонт",
+  "status_bg": "Прието",
+  "inquiry_link": "https://x/inquiries/1",
+  "documents": '<p><a href="https://x/minutes">Протоколи</a></p>\n<ul><li>a.pdf</li></ul>',
+}
+
+
+class TestCompiledTemplate:
+  @pytest.mark.parametrize(
+    "template_name",
+    [
+      "documents_digest.html",
+      "inquiry_notification.html",
+      "news_notification.html",
+      "reset_password.html",
+      "share_notification.html",
+      "upload_notification.html",
+      "verification.html",
+    ],
+  )
+  def test_matches_format_map_and_stripped_markup(self, template_name):
+    from mail.operations import _TEMPLATES_DIR, html_to_text, render_email
+
+    expected = (_TEMPLATES_DIR / template_name).read_text(encoding="utf-8").format_map(SAMPLE_VALUES)
+
+    html, text = render_email(template_name, **SAMPLE_VALUES)
+
+    assert html == expected
+    assert text == html_to_text(expected)
+
+  def test_escaped_braces_and_missing_values(self):
+    from mail.template_engine import CompiledTemplate
+
+    template = CompiledTemplate.compile("t.html", "<style>p {{ color: red }}</style><p>{a}{b}</p>")
+
+    assert template.render({"a": 1, "b": 2}) == "<style>p { color: red }</style><p>12</p>"
+    assert template.render_text({"a": 1, "b": 2}) == "p { color: red }12"
+    with pytest.raises(KeyError, match="b"):
+      template.render({"a": 1})
+
+  def test_bind_leaves_only_the_other_fields_open(self):
+    from mail.template_engine import CompiledTemplate
+
+    template = CompiledTemplate.compile("t.html", '<a href="{link}">{title}</a> {who}').bind(
+      {"title": "Нова", "who": "x"}
+    )
+
+    assert template.fields == {"link"}
+    assert template.render({"link": "https://x"}) == '<a href="https://x">Нова</a> x'
+    assert template.render_text({}) == "Нова x"
+
+  def test_rejects_format_specs(self):
+    from mail.template_engine import CompiledTemplate
+
+    with pytest.raises(ValueError, match="amount"):
+      CompiledTemplate.compile("t.html", "{amount:.2f}")
+
+
+class TestTokenBucket:
+  def _bucket(self, rate, capacity=None):
+    from mail.bulk import TokenBucket
+
+    clock = {"now": 0.0}
+    slept = []
+
+    def sleep(seconds):
+      slept.append(seconds)
+      clock["now"] += seconds
+
+    return TokenBucket(rate, capacity, clock=lambda: clock["now"], sleep=sleep), clock, slept
+
+  def test_bursts_up_to_capacity_then_paces_at_rate(self):
+    bucket, _, slept = self._bucket(rate=10, capacity=2)
+
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.1, 0.1])
+    assert sum(slept) == pytest.approx(0.2)
+
+  def test_refills_while_idle(self):
+    bucket, clock, _ = self._bucket(rate=2, capacity=1)
+    bucket.acquire()
+
+    clock["now"] += 0.5
+
+    assert bucket.acquire() == 0.0
+
+  def test_rejects_non_positive_rate(self):
+    from mail.bulk import TokenBucket
+
+    with pytest.raises(ValueError):
+      TokenBucket(0)
+
+
+class TestBulkSend:
+  @pytest.fixture
+  def templates(self, tmp_path, monkeypatch):
+    import mail.operations as mail_ops
+
+    (tmp_path / "broadcast.html").write_text('<p>{title}</p><a href="{unsubscribe_link}">x</a>', encoding="utf-8")
+    monkeypatch.setattr(mail_ops, "_TEMPLATES_DIR", tmp_path)
+
+  @pytest.fixture
+  def ses(self):
+    from unittest.mock import Mock, patch
+
+    ses = Mock()
+    with patch("mail.bulk.get_client", return_value=ses):
+      yield ses
+
+  def _message(self):
+    from mail.bulk import BulkMessage
+
+    return BulkMessage(
+      subject="Тема",
+      template_name="broadcast.html",
+      shared={"title": "Новина"},
+      recipient_fields=("unsubscribe_link",),
+      headers={"List-Unsubscribe": "<{unsubscribe_link}>"},
+    )
+
+  def _recipient(self, email):
+    from mail.models import BulkRecipient
+
+    return BulkRecipient(email=email, fields={"unsubscribe_link": f"https://x/unsub?email={email}"})
+
+  def _bucket(self):
+    from mail.bulk import TokenBucket
+
+    return TokenBucket(1000, clock=lambda: 0.0, sleep=lambda seconds: None)
+
+  def test_renders_template_once_and_personalises_each_message(self, templates):
+    from email import message_from_string
+    from unittest.mock import patch
+
+    from mail.operations import get_template
+
+    with patch("mail.bulk.get_template", wraps=get_template) as load:
+      message = self._message()
+      raw = message.raw_for(self._recipient("a@example.com"))
+
+    load.assert_called_once()
+    parsed = message_from_string(raw)
+    text, html = (part.get_payload(decode=True).decode("utf-8") for part in parsed.get_payload())
+    assert parsed["List-Unsubscribe"] == "<https://x/unsub?email=a@example.com>"
+    assert html == '<p>Новина</p><a href="https://x/unsub?email=a@example.com">x</a>'
+    assert text == "Новинаx"
+
+  def test_reports_delivered_failed_and_throttled(self, templates, ses):
+    from botocore.exceptions import ClientError
+
+    from mail.bulk import send_bulk
+
+    throttled_once = set()
+
+    def send_raw_email(Source, Destinations, RawMessage):  # noqa: N803
+      (email,) = Destinations
+      if email == "bad@example.com":
+        raise ClientError({"Error": {"Code": "MessageRejected", "Message": "rejected"}}, "SendRawEmail")
+      if email == "slow@example.com" and email not in throttled_once:
+        throttled_once.add(email)
+        raise ClientError(
+          {"Error": {"Code": "Throttling", "Message": "Maximum sending rate exceeded."}}, "SendRawEmail"
+        )
+      return {"MessageId": email}
+
+    ses.send_raw_email.side_effect = send_raw_email
+    recipients = [self._recipient(email) for email in ("a@example.com", "bad@example.com", "slow@example.com")]
+
+    report = send_bulk("news", self._message(), recipients, bucket=self._bucket(), workers=2)
+
+    assert (report.recipients, report.delivered, report.failed, report.throttled) == (3, 2, 1, 1)
+    assert ses.send_raw_email.call_count == 4
+
+  def test_gives_up_after_max_attempts_of_throttling(self, templates, ses, monkeypatch):
+    from botocore.exceptions import ClientError
+
+    from mail.bulk import get_bulk_mail_settings, send_bulk
+
+    monkeypatch.setattr(get_bulk_mail_settings(), "max_attempts", 2)
+    ses.send_raw_email.side_effect = ClientError({"Error": {"Code": "Throttling", "Message": "slow"}}, "SendRawEmail")
+
+    report = send_bulk("news", self._message(), [self._recipient("a@example.com")], bucket=self._bucket())
+
+    assert (report.delivered, report.failed, report.throttled) == (0, 1, 1)
+    assert ses.send_raw_email.call_count == 2
+
+  def test_send_rate_defaults_to_the_ses_quota(self, ses, monkeypatch):
+    from mail.bulk import get_send_bucket, ses_max_send_rate
+
+    monkeypatch.delenv("BULK_MAIL_MAX_SEND_RATE", raising=False)
+    ses.get_send_quota.return_value = {"Max24HourSend": 50000.0, "MaxSendRate": 14.0, "SentLast24Hours": 0.0}
+
+    assert get_send_bucket().rate == 14.0
+    assert ses_max_send_rate() == 14.0
+    ses.get_send_quota.assert_called_once()
+
+  def test_offline_ses_records_messages_and_throttles_above_its_rate(self, templates):
+    from unittest.mock import patch
+
+    from benchmarks.fakes import FakeSES
+    from mail.bulk import send_bulk
+
+    now = [0.0]
+    ses = FakeSES(max_send_rate=2, clock=lambda: now[0])
+    recipients = [self._recipient(f"user{i}@example.com") for i in range(3)]
+
+    with patch("mail.bulk.get_client", return_value=ses):
+      report = send_bulk("news", self._message(), recipients, bucket=self._bucket(), workers=1)
+      now[0] = 1.0
+      retried = send_bulk("news", self._message(), recipients[2:], bucket=self._bucket(), workers=1)
+
+    # Only two sends fit in the first second; the third is throttled on every attempt
+    assert (report.delivered, report.failed, ses.throttled) == (2, 1, 3)
+    assert retried.delivered == 1
+    assert ses.recipients() == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert ses.messages[0].parse()["List-Unsubscribe"] == "<https://x/unsub?email=user0@example.com>"
+
+
+@pytest.fixture
+def outbox():
+  """An in-memory email_outbox_table with the queue index."""
+  from benchmarks.fakes import FakeTable, fake_aws
+  from database.repositories import EmailOutboxRepository
+  from mail.outbox import EMAIL_OUTBOX_TABLE_NAME, QUEUE_INDEX
+
+  table = FakeTable(EMAIL_OUTBOX_TABLE_NAME, key_name="job_id", indexes={QUEUE_INDEX: ("queue", "available_at")})
+  with fake_aws({EMAIL_OUTBOX_TABLE_NAME: table}):
+    yield EmailOutboxRepository(EMAIL_OUTBOX_TABLE_NAME), table
+
+
+class TestEmailOutbox:
+  def test_queues_jobs_in_one_batch(self, outbox):
+    from mail.outbox import QUEUE, queue_emails
+
+    repo, table = outbox
+    ids = queue_emails([("news", {"news_link": "https://x/home"}), ("file_share", {"user_id": "u1"})], repo)
+
+    assert [table.items[job_id]["kind"] for job_id in ids] == ["news", "file_share"]
+    assert {item["status"] for item in table.items.values()} == {"pending"}
+    assert {item["queue"] for item in table.items.values()} == {QUEUE}
+
+  def test_rejects_unknown_kinds(self, outbox):
+    from mail.outbox import queue_emails
+
+    repo, table = outbox
+    with pytest.raises(ValueError, match="nope"):
+      queue_emails([("news", {}), ("nope", {})], repo)
+    assert table.items == {}
+
+  def test_a_claimed_job_is_leased_to_one_worker(self, outbox):
+    from mail.outbox import claim_jobs, queue_emails
+
+    repo, table = outbox
+    (job_id,) = queue_emails([("news", {})], repo)
+    now = table.items[job_id]["available_at"]
+
+    first = claim_jobs(10, repo, now=now)
+    second = claim_jobs(10, repo, now=now)
+
+    assert [job["job_id"] for job in first] == [job_id]
+    assert second == []
+    assert table.items[job_id]["status"] == "sending"
+    assert table.items[job_id]["attempts"] == 1
+
+  def test_drain_delivers_and_records_the_outcome(self, outbox):
+    from unittest.mock import patch
+
+    from mail.models import BulkMailReport
+    from mail.outbox import drain_outbox, queue_emails
+
+    repo, table = outbox
+    (job_id,) = queue_emails([("news", {"news_link": "https://x/home"})], repo)
+    report = BulkMailReport(
+      broadcast="news", recipients=3, delivered=2, failed=1, throttled=0, elapsed_ms=5.0, send_rate=14.0
+    )
+
+    with patch("news.operations.deliver_news_notification", return_value=report) as deliver:
+      counts = drain_outbox(repo)
+
+    deliver.assert_called_once_with({"news_link": "https://x/home"})
+    assert counts == {"sent": 1, "retried": 0, "failed": 0}
+    item = table.items[job_id]
+    assert item["status"] == "sent"
+    assert "queue" not in item and item["expires_at"] > item["available_at"] - 1
+    assert item["result"] == {"recipients": 3, "delivered": 2, "failed": 1, "throttled": 0}
+
+  def test_drain_claims_no_more_jobs_than_it_has_threads(self, outbox, monkeypatch):
+    from unittest.mock import patch
+
+    from mail import outbox as outbox_module
+    from mail.outbox import drain_outbox, get_outbox_settings, queue_emails
+
+    monkeypatch.setattr(get_outbox_settings(), "workers", 2)
+    repo, table = outbox
+    queue_emails([("news", {"news_link": f"https://x/{i}"}) for i in range(5)], repo)
+    claims = []
+    claim_jobs = outbox_module.claim_jobs
+
+    def recording_claim(limit, outbox_repo, now=None):
+      claims.append(limit)
+      return claim_jobs(limit, outbox_repo, now)
+
+    with (
+      patch("mail.outbox.claim_jobs", side_effect=recording_claim),
+      patch("news.operations.deliver_news_notification"),
+    ):
+      counts = drain_outbox(repo)
+
+    assert counts == {"sent": 5, "retried": 0, "failed": 0}
+    assert claims[0] == 2 and max(claims) <= 2
+
+  def test_a_job_renews_its_lease_when_it_starts(self, outbox):
+    from unittest.mock import patch
+
+    from mail.outbox import claim_jobs, get_outbox_settings, queue_emails, run_job
+
+    repo, table = outbox
+    (job_id,) = queue_emails([("news", {})], repo)
+    now = table.items[job_id]["available_at"]
+    (job,) = claim_jobs(10, repo, now=now)
+    lease_seconds = get_outbox_settings().lease_seconds
+
+    def deliver(params):
+      # Started later than claimed: the lease counts from the start
+      assert table.items[job_id]["available_at"] == now + 60 + lease_seconds
+
+    with patch("news.operations.deliver_news_notification", side_effect=deliver):
+      assert run_job(job, repo, now=now + 60) == "sent"
+
+    # A stale claim (the job has been leased again since) doesn't run it twice
+    table.items[job_id] = {**table.items[job_id], "queue": "pending", "available_at": now + 1}
+    with patch("news.operations.deliver_news_notification") as deliver_again:
+      assert run_job(job, repo, now=now + 120) is None
+    deliver_again.assert_not_called()
+
+  def test_failed_jobs_back_off_then_give_up(self, outbox, monkeypatch):
+    from unittest.mock import patch
+
+    from mail.outbox import claim_jobs, get_outbox_settings, queue_emails, run_job
+
+    monkeypatch.setattr(get_outbox_settings(), "max_attempts", 2)
+    repo, table = outbox
+    (job_id,) = queue_emails([("file_share", {"user_id": "u1", "file_name": "a.pdf"})], repo)
+    now = table.items[job_id]["available_at"]
+
+    with patch("files.operations.deliver_share_notification", side_effect=RuntimeError("SES down")):
+      (job,) = claim_jobs(10, repo, now=now)
+      assert run_job(job, repo, now=now) == "pending"
+      retry_at = table.items[job_id]["available_at"]
+      assert retry_at == now + get_outbox_settings().retry_base_seconds
+      assert claim_jobs(10, repo, now=retry_at - 1) == []
+
+      (job,) = claim_jobs(10, repo, now=retry_at)
+      assert run_job(job, repo, now=retry_at) == "failed"
+
+    item = table.items[job_id]
+    assert (item["status"], item["attempts"], item["last_error"]) == ("failed", 2, "SES down")
+    assert "queue" not in item
+
+  def test_failed_inquiry_notification_stays_pending_and_skips_notified_users(self, outbox):
+    from unittest.mock import Mock, patch
+
+    from inquiries.models import Inquiry
+    from mail.outbox import claim_jobs, queue_emails, run_job
+
+    repo, table = outbox
+    (job_id,) = queue_emails([("inquiry_created", {"inquiry_id": "inq-1"})], repo)
+    now = table.items[job_id]["available_at"]
+    inquiry = Inquiry(id="inq-1", title="T", description="D", inquiry_type="proposal", scope=["board"], author_id="a")
+    board = [Mock(id=f"u{i}", email=f"u{i}@example.com", first_name="F", last_name="L") for i in range(1, 4)]
+
+    def send(email, **kwargs):
+      if email == "u2@example.com":
+        raise RuntimeError("SES down")
+
+    with (
+      patch("inquiries.operations.get_inquiry", return_value=inquiry),
+      patch("inquiries.operations.get_inquiry_repository"),
+      patch("inquiries.operations.get_user_repository"),
+      patch("inquiries.operations._get_users_by_role", return_value=board),
+      patch("mail.operations.send_inquiry_notification", side_effect=send) as send_mock,
+    ):
+      (job,) = claim_jobs(10, repo, now=now)
+      assert run_job(job, repo, now=now) == "pending"
+      item = table.items[job_id]
+      assert (item["status"], item["params"]["notified"]) == ("pending", ["u1", "u3"])
+
+      send_mock.reset_mock(side_effect=True)
+      (job,) = claim_jobs(10, repo, now=item["available_at"])
+      assert run_job(job, repo, now=item["available_at"]) == "sent"
+
+    assert [c.kwargs["email"] for c in send_mock.call_args_list] == ["u2@example.com"]
+    assert table.items[job_id]["params"]["notified"] == ["u1", "u3", "u2"]
+
+  def test_worker_handler_stops_before_the_lambda_timeout(self, outbox):
+    from unittest.mock import Mock, patch
+
+    import outbox_worker
+    from mail.outbox import queue_emails
+
+    context = Mock()
+    context.get_remaining_time_in_millis.return_value = 1000  # inside the safety margin
+    repo, table = outbox
+    queue_emails([("news", {})], repo)
+
+    with patch("news.operations.deliver_news_notification") as deliver:
+      counts = outbox_worker.handler({}, context)
+
+    assert counts == {"sent": 0, "retried": 0, "failed": 0}
+    deliver.assert_not_called()
+
+
+@pytest.fixture
+def digests():
+  """In-memory notification_digest_table and users table."""
+  from benchmarks.fakes import FakeTable, fake_aws
+  from database.repositories import NotificationDigestRepository, UserRepository
+  from mail.digest import NOTIFICATION_DIGEST_TABLE_NAME
+
+  digest_table = FakeTable(NOTIFICATION_DIGEST_TABLE_NAME, key_name="user_id", sort_key_name="event_key")
+  users_table = FakeTable("test_users_table")
+  with fake_aws({NOTIFICATION_DIGEST_TABLE_NAME: digest_table, "test_users_table": users_table}):
+    yield (
+      NotificationDigestRepository(NOTIFICATION_DIGEST_TABLE_NAME),
+      digest_table,
+      UserRepository("test_users_table"),
+      users_table,
+    )
+
+
+class TestNotificationDigest:
+  def _document(self, file_name, category_bg="Протоколи"):
+    return {"file_name": file_name, "category_bg": category_bg, "documents_link": "https://x/minutes"}
+
+  def test_sends_due_digests_grouped_by_category_and_clears_them(self, digests):
+    from datetime import datetime, timedelta
+    from unittest.mock import patch
+
+    from mail.digest import buffer_documents, send_due_digests
+    from mail.operations import format_documents
+
+    digest_repo, digest_table, user_repo, users_table = digests
+    users_table.load(
+      [
+        {"id": "u1", "email": "u1@example.com", "notification_mode": "daily"},
+        {"id": "u2", "email": "u2@example.com", "notification_mode": "off"},
+      ]
+    )
+    buffer_documents("u1", [self._document("a.pdf"), self._document("<b>.pdf", "Бланки")], digest_repo)
+    buffer_documents("u1", [self._document("c.pdf")], digest_repo)
+    buffer_documents("u2", [self._document("a.pdf")], digest_repo)
+
+    with patch("mail.operations.send_email_ses") as send:
+      assert send_due_digests(digest_repo, user_repo) == {"sent": 0, "failed": 0, "dropped": 0}
+      counts = send_due_digests(digest_repo, user_repo, now=datetime.now() + timedelta(days=1))
+
+    assert counts == {"sent": 1, "failed": 0, "dropped": 1}
+    send.assert_called_once()
+    kwargs = send.call_args.kwargs
+    assert kwargs["to_address"] == "u1@example.com"
+    assert kwargs["subject"].endswith("(3)")
+    assert format_documents([self._document("a.pdf"), self._document("c.pdf")]) in kwargs["html_body"]
+    assert "&lt;b&gt;.pdf" in kwargs["html_body"]
+    assert "<b>.pdf" not in kwargs["text_body"] and "Бланки" in kwargs["text_body"]
+    assert digest_table.items == {}
+
+  def test_failed_send_keeps_the_documents(self, digests):
+    from datetime import datetime, timedelta
+    from unittest.mock import patch
+
+    from mail.digest import buffer_documents, send_due_digests
+
+    digest_repo, digest_table, user_repo, users_table = digests
+    users_table.load([{"id": "u1", "email": "u1@example.com", "notification_mode": "daily"}])
+    buffer_documents("u1", [self._document("a.pdf")], digest_repo)
+
+    with patch("mail.operations.send_email_ses", side_effect=RuntimeError("SES down")):
+      counts = send_due_digests(digest_repo, user_repo, now=datetime.now() + timedelta(days=1))
+
+    assert counts == {"sent": 0, "failed": 1, "dropped": 0}
+    assert len(digest_table.items) == 1
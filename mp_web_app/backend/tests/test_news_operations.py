@@ -14,11 +14,11 @@ from news.operations import (
 
 
 @pytest.fixture
-def mock_repo():
+def mock_repo(bind_paginators):
   repo = Mock()
   repo.table = Mock()
   repo.convert_item_to_object = Mock()
-  return repo
+  return bind_paginators(repo)
 
 
 class TestCreateNews:
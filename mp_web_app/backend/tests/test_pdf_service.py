@@ -0,0 +1,167 @@
+import io
+import time
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from inquiries.exceptions import PdfRenderTimeoutError
+from inquiries.models import Inquiry, InquiryStatus
+from inquiries.operations import iter_pdf_archive, pdf_rendition_key, store_pdf_archive
+from inquiries.pdf_service import PdfRenderService
+
+
+def _make_inquiry(inquiry_id: str, entry_number: str | None = "1/2024") -> Inquiry:
+  return Inquiry(
+    id=inquiry_id,
+    title=f"Запитване {inquiry_id}",
+    description="Описание",
+    inquiry_type="запитване",
+    scope=["admin"],
+    author_id="user-1",
+    author_name="Иван Иванов",
+    status=InquiryStatus.ACCEPTED,
+    entry_number=entry_number,
+    created_at="2024-01-01T00:00:00",
+    updated_at="2024-01-01T00:00:00",
+  )
+
+
+def _not_found(operation: str) -> ClientError:
+  return ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, operation)
+
+
+class TestPdfRenderService:
+  @patch("inquiries.operations.export_pdf", side_effect=lambda inq: f"pdf-{inq.id}".encode())
+  def test_inline_renders_in_input_order(self, mock_export):
+    service = PdfRenderService(process_pool=False)
+
+    pdfs = service.render_many([_make_inquiry("a"), _make_inquiry("b"), _make_inquiry("c")])
+
+    assert service.mode == "inline"
+    assert pdfs == [b"pdf-a", b"pdf-b", b"pdf-c"]
+    assert service.stats()["rendered"] == 3
+
+  @patch("inquiries.operations.export_pdf", side_effect=lambda inq: time.sleep(0.05) or b"%PDF")
+  def test_inline_batch_times_out_between_documents(self, mock_export):
+    service = PdfRenderService(process_pool=False)
+
+    with pytest.raises(PdfRenderTimeoutError):
+      service.render_many([_make_inquiry(str(i)) for i in range(5)], timeout=0.01)
+
+    assert mock_export.call_count < 5
+    assert service.stats()["timeouts"] == 1
+
+  def test_falls_back_to_inline_without_shared_memory(self):
+    with patch("inquiries.pdf_service.processes_supported", return_value=False):
+      service = PdfRenderService(process_pool=True)
+
+    assert service.mode == "inline"
+
+  @patch("inquiries.operations.export_pdf", return_value=b"%PDF")
+  def test_falls_back_to_inline_when_pool_cannot_start(self, mock_export):
+    service = PdfRenderService(workers=2)
+    service.mode = "process"
+
+    with patch("multiprocessing.get_context", side_effect=OSError(38, "Function not implemented")):
+      assert service.render(_make_inquiry("a")) == b"%PDF"
+
+    assert service.mode == "inline"
+
+  def test_process_pool_renders_real_pdfs(self):
+    service = PdfRenderService(workers=1, timeout=60)
+    if service.mode != "process":
+      pytest.skip("process pools are not supported here")
+    try:
+      pdfs = service.render_many([_make_inquiry("a"), _make_inquiry("b", entry_number="2/2024")])
+    finally:
+      service.shutdown()
+
+    assert len(pdfs) == 2
+    assert all(pdf.startswith(b"%PDF") for pdf in pdfs)
+
+
+class TestPdfArchive:
+  @patch("inquiries.operations.get_pdf_service")
+  @patch("inquiries.operations.get_client")
+  def test_zip_uses_cached_renditions_and_renders_the_rest(self, mock_get_client, mock_get_service):
+    cached, missing = _make_inquiry("a", "1/2024"), _make_inquiry("b", "2/2024")
+    cached_key = pdf_rendition_key(cached)
+    s3 = mock_get_client.return_value
+
+    def get_object(Bucket, Key):  # noqa: N803
+      if Key != cached_key:
+        raise _not_found("GetObject")
+      return {"Body": io.BytesIO(b"%PDF cached")}
+
+    s3.get_object.side_effect = get_object
+    s3.list_objects_v2.return_value = {}
+    service = mock_get_service.return_value
+    service.render_many.return_value = [b"%PDF rendered"]
+
+    data = b"".join(iter_pdf_archive([cached, missing], batch_size=10))
+
+    service.render_many.assert_called_once_with([missing])
+    s3.put_object.assert_called_once()
+    assert s3.put_object.call_args[1]["Key"] == pdf_rendition_key(missing)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+      assert archive.namelist() == ["1-2024_a.pdf", "2-2024_b.pdf"]
+      assert archive.read("1-2024_a.pdf") == b"%PDF cached"
+      assert archive.read("2-2024_b.pdf") == b"%PDF rendered"
+
+  @patch("inquiries.operations.get_pdf_service")
+  @patch("inquiries.operations.get_client")
+  def test_renders_in_batches(self, mock_get_client, mock_get_service):
+    s3 = mock_get_client.return_value
+    s3.get_object.side_effect = _not_found("GetObject")
+    s3.list_objects_v2.return_value = {}
+    service = mock_get_service.return_value
+    service.render_many.side_effect = lambda batch: [b"%PDF"] * len(batch)
+
+    inquiries = [_make_inquiry(str(i)) for i in range(5)]
+    list(iter_pdf_archive(inquiries, batch_size=2))
+
+    assert [len(call.args[0]) for call in service.render_many.call_args_list] == [2, 2, 1]
+
+  @patch("inquiries.operations.get_pdf_service")
+  @patch("inquiries.operations.get_client")
+  def test_store_uploads_archive(self, mock_get_client, mock_get_service):
+    s3 = mock_get_client.return_value
+    s3.get_object.return_value = {"Body": Mock(read=Mock(return_value=b"%PDF"))}
+    uploaded = {}
+    s3.upload_fileobj.side_effect = lambda fileobj, bucket, key, ExtraArgs: uploaded.update(data=fileobj.read())  # noqa: N803
+
+    key = store_pdf_archive([_make_inquiry("a")])
+
+    assert key.startswith("exports/inquiries/") and key.endswith(".zip")
+    with zipfile.ZipFile(io.BytesIO(uploaded["data"])) as archive:
+      assert archive.read("1-2024_a.pdf") == b"%PDF"
+    mock_get_service.return_value.render_many.assert_called_once_with([])
+
+  def test_export_is_queued_and_built_by_the_outbox_worker(self):
+    from benchmarks.fakes import FakeTable, fake_aws
+    from inquiries.operations import get_pdf_archive_job, queue_pdf_archive
+    from mail.outbox import EMAIL_OUTBOX_TABLE_NAME, QUEUE_INDEX, drain_outbox, queue_emails
+
+    table = FakeTable(EMAIL_OUTBOX_TABLE_NAME, key_name="job_id", indexes={QUEUE_INDEX: ("queue", "available_at")})
+    inquiries = [_make_inquiry("a")]
+    with (
+      fake_aws({EMAIL_OUTBOX_TABLE_NAME: table}),
+      patch("inquiries.operations.get_inquiry_repository"),
+      patch("inquiries.operations.get_user_repository"),
+      patch("inquiries.operations.list_registered_inquiries", return_value=inquiries),
+      patch("inquiries.operations.store_pdf_archive") as store,
+    ):
+      export_id = queue_pdf_archive("admin-1")
+      store.assert_not_called()
+      assert get_pdf_archive_job(export_id).status == "pending"
+
+      drain_outbox()
+      job = get_pdf_archive_job(export_id)
+      (news_id,) = queue_emails([("news", {})])
+      assert get_pdf_archive_job(news_id) is None
+
+    assert job.status == "sent"
+    assert job.params["key"].startswith("exports/inquiries/")
+    store.assert_called_once_with(inquiries, job.params["key"])
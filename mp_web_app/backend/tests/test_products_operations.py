@@ -16,13 +16,13 @@ from products.operations import (
 
 
 @pytest.fixture
-def mock_repo():
+def mock_repo(bind_paginators):
   repo = Mock()
   repo.table = Mock()
   repo.convert_item_to_object = Mock(
     side_effect=lambda item: Product(**{k: v for k, v in item.items() if k in Product.model_fields})
   )
-  return repo
+  return bind_paginators(repo)
 
 
 class TestParseSizes:
@@ -67,7 +67,7 @@ class TestGetProduct:
 
 
 class TestCreateProduct:
-  @patch("products.operations.boto3.client")
+  @patch("products.operations.get_client")
   def test_creates_product_without_picture(self, mock_boto, mock_repo):
     mock_repo.table.put_item = Mock()
     mock_repo.convert_item_to_object = Mock(return_value=Mock(picture_s3_key=None))
@@ -83,7 +83,7 @@ class TestCreateProduct:
     assert call_item["picture_s3_key"] is None
     assert "id" in call_item
 
-  @patch("products.operations.boto3.client")
+  @patch("products.operations.get_client")
   def test_creates_product_with_sizes(self, mock_boto, mock_repo):
     mock_repo.table.put_item = Mock()
     mock_repo.convert_item_to_object = Mock(return_value=Mock(picture_s3_key=None))
@@ -94,7 +94,7 @@ class TestCreateProduct:
     call_item = mock_repo.table.put_item.call_args[1]["Item"]
     assert call_item["sizes"] == [{"label": "Малък", "value": "10x5 cm"}]
 
-  @patch("products.operations.boto3.client")
+  @patch("products.operations.get_client")
   def test_raises_database_error_on_dynamo_failure(self, mock_boto, mock_repo):
     from botocore.exceptions import ClientError
 
@@ -148,7 +148,7 @@ class TestListProducts:
 
 
 class TestListOrphanedPictures:
-  @patch("products.operations.boto3.client")
+  @patch("products.operations.get_client")
   @patch("products.operations._get_products_from_db")
   def test_returns_unreferenced_keys(self, mock_get_db, mock_boto, mock_repo):
     mock_get_db.return_value = [
@@ -165,7 +165,7 @@ class TestListOrphanedPictures:
 
     assert result == ["products/orphan.jpg"]
 
-  @patch("products.operations.boto3.client")
+  @patch("products.operations.get_client")
   @patch("products.operations._get_products_from_db")
   def test_returns_empty_when_no_orphans(self, mock_get_db, mock_boto, mock_repo):
     mock_get_db.return_value = [
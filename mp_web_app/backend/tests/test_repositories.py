@@ -0,0 +1,244 @@
+import threading
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+
+from database.repositories import NewsRepository
+
+
+class SegmentedTable:
+  """Table stand-in that serves `pages_per_segment` pages of `page_size` items per scan segment."""
+
+  def __init__(self, pages_per_segment: int, page_size: int, fail_segment: int | None = None):
+    self.pages_per_segment = pages_per_segment
+    self.page_size = page_size
+    self.fail_segment = fail_segment
+    self.calls: list[dict] = []
+    self.threads: set[str] = set()
+    self._lock = threading.Lock()
+
+  def scan(self, **kwargs):
+    with self._lock:
+      self.calls.append(kwargs)
+      self.threads.add(threading.current_thread().name)
+    segment = kwargs.get("Segment", 0)
+    if segment == self.fail_segment:
+      raise RuntimeError("segment failed")
+    page = kwargs.get("ExclusiveStartKey", {}).get("page", 0)
+    items = [{"id": f"{segment}-{page}-{i}"} for i in range(self.page_size)]
+    response = {"Items": items}
+    if page + 1 < self.pages_per_segment:
+      response["LastEvaluatedKey"] = {"page": page + 1}
+    return response
+
+
+@pytest.fixture
+def repo():
+  with patch("database.repositories.get_dynamodb_resource"):
+    repository = NewsRepository("news_table")
+  repository.table = Mock()
+  return repository
+
+
+def _patch_thread_tables(table):
+  resource = MagicMock()
+  resource.Table.return_value = table
+  return patch("database.repositories.get_dynamodb_resource", return_value=resource)
+
+
+class TestIterQuery:
+  def test_follows_last_evaluated_key(self, repo):
+    repo.table.query.side_effect = [
+      {"Items": [{"id": "1"}], "LastEvaluatedKey": {"id": "1"}},
+      {"Items": [{"id": "2"}]},
+    ]
+
+    items = list(repo.iter_query(Key("news").eq("news"), index_name="news_created_at_index", scan_forward=False))
+
+    assert [item["id"] for item in items] == ["1", "2"]
+    first, second = repo.table.query.call_args_list
+    assert first.kwargs["IndexName"] == "news_created_at_index"
+    assert first.kwargs["ScanIndexForward"] is False
+    assert "ExclusiveStartKey" not in first.kwargs
+    assert second.kwargs["ExclusiveStartKey"] == {"id": "1"}
+
+  def test_is_lazy(self, repo):
+    repo.table.query.return_value = {"Items": []}
+
+    items = repo.iter_query(Key("news").eq("news"))
+
+    repo.table.query.assert_not_called()
+    assert list(items) == []
+
+  def test_limit_stops_fetching_pages(self, repo):
+    repo.table.query.side_effect = [
+      {"Items": [{"id": "1"}, {"id": "2"}], "LastEvaluatedKey": {"id": "2"}},
+      {"Items": [{"id": "3"}]},
+    ]
+
+    items = list(repo.iter_query(Key("news").eq("news"), limit=2))
+
+    assert [item["id"] for item in items] == ["1", "2"]
+    assert repo.table.query.call_count == 1
+
+  def test_passes_filter_and_page_size(self, repo):
+    repo.table.query.return_value = {"Items": []}
+    condition = Attr("news_type").eq("regular")
+
+    list(repo.iter_query(Key("news").eq("news"), filter_expression=condition, page_size=25))
+
+    kwargs = repo.table.query.call_args.kwargs
+    assert kwargs["FilterExpression"] is condition
+    assert kwargs["Limit"] == 25
+
+
+class TestIterScan:
+  def test_projection_aliases_attribute_names(self, repo):
+    repo.table.scan.return_value = {"Items": [{"role": "admin"}]}
+
+    list(repo.iter_scan(projection=["role", "email"]))
+
+    kwargs = repo.table.scan.call_args.kwargs
+    assert kwargs["ProjectionExpression"] == "#p0, #p1"
+    assert kwargs["ExpressionAttributeNames"] == {"#p0": "role", "#p1": "email"}
+
+  def test_sequential_scan_paginates(self, repo):
+    repo.table = SegmentedTable(pages_per_segment=3, page_size=2)
+
+    items = list(repo.iter_scan())
+
+    assert len(items) == 6
+    assert all("Segment" not in call for call in repo.table.calls)
+
+  def test_parallel_scan_reads_every_segment(self, repo):
+    table = SegmentedTable(pages_per_segment=3, page_size=5)
+
+    with _patch_thread_tables(table):
+      items = list(repo.iter_scan(segments=4))
+
+    assert len(items) == 4 * 3 * 5
+    assert len({item["id"] for item in items}) == len(items)
+    assert {call["TotalSegments"] for call in table.calls} == {4}
+    assert {call["Segment"] for call in table.calls} == {0, 1, 2, 3}
+    assert all(name.startswith("scan-news_table") for name in table.threads)
+
+  def test_parallel_scan_respects_limit(self, repo):
+    table = SegmentedTable(pages_per_segment=50, page_size=10)
+
+    with _patch_thread_tables(table):
+      items = list(repo.iter_scan(segments=2, limit=15))
+
+    assert len(items) == 15
+    # Workers stop once the consumer is done instead of draining the table
+    assert len(table.calls) < 100
+
+  def test_parallel_scan_propagates_segment_errors(self, repo):
+    table = SegmentedTable(pages_per_segment=2, page_size=1, fail_segment=1)
+
+    with _patch_thread_tables(table), pytest.raises(RuntimeError, match="segment failed"):
+      list(repo.iter_scan(segments=3))
+
+  def test_segments_default_to_setting(self, repo, monkeypatch):
+    from database.db_config import get_dynamodb_settings
+
+    table = SegmentedTable(pages_per_segment=1, page_size=1)
+    monkeypatch.setenv("SCAN_SEGMENTS", "3")
+    get_dynamodb_settings.cache_clear()
+    try:
+      with _patch_thread_tables(table):
+        items = list(repo.iter_scan())
+    finally:
+      get_dynamodb_settings.cache_clear()
+
+    assert len(items) == 3
+    assert {call["Segment"] for call in table.calls} == {0, 1, 2}
+
+
+class TestBatchGet:
+  def _respond(self, repo, table_name="news_table"):
+    def batch_get_item(**kwargs):
+      keys = kwargs["RequestItems"][table_name]["Keys"]
+      return {"Responses": {table_name: [{"id": key["id"], "title": "t"} for key in keys]}}
+
+    repo.dynamodb.batch_get_item.side_effect = batch_get_item
+
+  def test_chunks_to_100_keys(self, repo):
+    self._respond(repo)
+    keys = [f"id-{i}" for i in range(250)]
+
+    items = repo.batch_get(keys)
+
+    assert set(items) == set(keys)
+    sizes = [len(c.kwargs["RequestItems"]["news_table"]["Keys"]) for c in repo.dynamodb.batch_get_item.call_args_list]
+    assert sizes == [100, 100, 50]
+
+  def test_deduplicates_and_skips_empty_keys(self, repo):
+    self._respond(repo)
+
+    repo.batch_get(["a", "b", "a", None, ""])
+
+    keys = repo.dynamodb.batch_get_item.call_args.kwargs["RequestItems"]["news_table"]["Keys"]
+    assert keys == [{"id": "a"}, {"id": "b"}]
+
+  def test_no_keys_makes_no_call(self, repo):
+    assert repo.batch_get([]) == {}
+    repo.dynamodb.batch_get_item.assert_not_called()
+
+  def test_projection_always_includes_key(self, repo):
+    self._respond(repo)
+
+    repo.batch_get(["a"], projection=["first_name", "last_name"])
+
+    request = repo.dynamodb.batch_get_item.call_args.kwargs["RequestItems"]["news_table"]
+    assert request["ProjectionExpression"] == "#p0, #p1, #p2"
+    assert request["ExpressionAttributeNames"] == {"#p0": "id", "#p1": "first_name", "#p2": "last_name"}
+
+  @patch("database.repositories.time.sleep")
+  def test_retries_unprocessed_keys(self, mock_sleep, repo):
+    unprocessed = {"news_table": {"Keys": [{"id": "b"}]}}
+    repo.dynamodb.batch_get_item.side_effect = [
+      {"Responses": {"news_table": [{"id": "a"}]}, "UnprocessedKeys": unprocessed},
+      {"Responses": {"news_table": [{"id": "b"}]}, "UnprocessedKeys": {}},
+    ]
+
+    items = repo.batch_get(["a", "b"])
+
+    assert set(items) == {"a", "b"}
+    assert repo.dynamodb.batch_get_item.call_args_list[1].kwargs["RequestItems"] == unprocessed
+    mock_sleep.assert_called_once()
+
+  @patch("database.repositories.time.sleep")
+  def test_gives_up_after_max_retries(self, mock_sleep, repo):
+    repo.dynamodb.batch_get_item.return_value = {
+      "Responses": {},
+      "UnprocessedKeys": {"news_table": {"Keys": [{"id": "a"}]}},
+    }
+
+    with pytest.raises(RuntimeError, match="unprocessed"):
+      repo.batch_get(["a"], max_retries=2)
+
+    assert repo.dynamodb.batch_get_item.call_count == 3
+
+  def test_member_repository_uses_member_code(self):
+    from database.repositories import MemberRepository
+
+    with patch("database.repositories.get_dynamodb_resource"):
+      repo = MemberRepository("members_table")
+    repo.dynamodb.batch_get_item.return_value = {"Responses": {"members_table": [{"member_code": "M1"}]}}
+
+    items = repo.batch_get(["M1"])
+
+    assert items == {"M1": {"member_code": "M1"}}
+    keys = repo.dynamodb.batch_get_item.call_args.kwargs["RequestItems"]["members_table"]["Keys"]
+    assert keys == [{"member_code": "M1"}]
+
+  def test_rejects_tables_with_a_sort_key(self):
+    from database.repositories import FileShareRepository
+
+    with patch("database.repositories.get_dynamodb_resource"):
+      repo = FileShareRepository("file_shares_table")
+
+    with pytest.raises(NotImplementedError, match="sort key"):
+      repo.batch_get(["user-1"])
+    repo.dynamodb.batch_get_item.assert_not_called()
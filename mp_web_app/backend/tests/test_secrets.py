@@ -0,0 +1,95 @@
+"""Tests for utils/secrets.py — lazy, cached secret loading."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.secrets import SecretProvider
+
+
+def _secrets_client(*secrets):
+  client = MagicMock()
+  client.get_secret_value.side_effect = [{"SecretString": json.dumps({"JWT_SECRET": s})} for s in secrets]
+  return client
+
+
+class TestSecretProvider:
+  @patch("utils.secrets.get_client")
+  def test_fetches_lazily_and_once(self, mock_get_client):
+    client = _secrets_client("first")
+    mock_get_client.return_value = client
+
+    provider = SecretProvider("arn:secret")
+    client.get_secret_value.assert_not_called()
+
+    assert provider.get("JWT_SECRET") == "first"
+    assert provider.get("JWT_SECRET") == "first"
+    client.get_secret_value.assert_called_once_with(SecretId="arn:secret")
+
+    stats = provider.stats()
+    assert stats["source"] == "secretsmanager"
+    assert stats["fetches"] == 1
+    assert stats["first_fetch_ms"] is not None
+
+  @patch("utils.secrets.get_client")
+  def test_refetches_after_refresh_interval(self, mock_get_client):
+    mock_get_client.return_value = _secrets_client("old", "rotated")
+    provider = SecretProvider("arn:secret", refresh_seconds=0)
+
+    assert provider.get("JWT_SECRET") == "old"
+    assert provider.get("JWT_SECRET") == "rotated"
+
+  @patch("utils.secrets.get_client")
+  def test_keeps_cached_value_when_refresh_fails(self, mock_get_client):
+    client = _secrets_client("old")
+    client.get_secret_value.side_effect = [*client.get_secret_value.side_effect, Exception("throttled")]
+    mock_get_client.return_value = client
+    provider = SecretProvider("arn:secret", refresh_seconds=0)
+
+    assert provider.get("JWT_SECRET") == "old"
+    assert provider.get("JWT_SECRET") == "old"
+    assert provider.stats()["fetch_errors"] == 1
+
+  @patch("utils.secrets.get_client")
+  def test_first_fetch_failure_raises(self, mock_get_client):
+    mock_get_client.return_value.get_secret_value.side_effect = Exception("no access")
+
+    with pytest.raises(Exception, match="no access"):
+      SecretProvider("arn:secret").get("JWT_SECRET")
+
+  @patch("utils.secrets.get_client")
+  def test_local_file_stand_in(self, mock_get_client, tmp_path):
+    secrets_file = tmp_path / "secrets.json"
+    secrets_file.write_text(json.dumps({"JWT_SECRET": "offline"}))
+
+    provider = SecretProvider(None, local_file=str(secrets_file))
+
+    assert provider.get("JWT_SECRET") == "offline"
+    assert provider.stats()["source"] == "file"
+    mock_get_client.assert_not_called()
+
+  @patch("utils.secrets.get_client")
+  def test_environment_variable_wins(self, mock_get_client, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "from-env")
+
+    assert SecretProvider("arn:secret").get("JWT_SECRET") == "from-env"
+    mock_get_client.assert_not_called()
+
+  def test_missing_key_raises(self, tmp_path):
+    secrets_file = tmp_path / "secrets.json"
+    secrets_file.write_text("{}")
+
+    with pytest.raises(ValueError, match="JWT_SECRET"):
+      SecretProvider(None, local_file=str(secrets_file)).get("JWT_SECRET")
+
+
+class TestJWTSettings:
+  def test_secret_key_resolves_through_provider(self):
+    from app_config import JWTSettings
+
+    with patch("app_config.get_secret_provider") as mock_provider:
+      mock_provider.return_value.get.return_value = "resolved"
+
+      assert JWTSettings().secret_key == "resolved"
+      mock_provider.return_value.get.assert_called_once_with("JWT_SECRET")
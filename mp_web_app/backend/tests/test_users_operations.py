@@ -5,9 +5,16 @@ import pytest
 from users.exceptions import UserNotFoundError, ValidationError
 from users.models import UserCreate, UserUpdate
 from users.operations import (
+  ROLE_INDEX,
+  SUBSCRIBED,
+  SUBSCRIPTION_INDEX,
   create_user,
   delete_user,
+  get_subscribed_users,
+  get_user_display_names,
   hash_password,
+  list_users,
+  list_users_by_role,
   update_user,
   validate_password,
   validate_phone,
@@ -126,6 +133,7 @@ class TestCreateUser:
     assert item["phone"] == "+359889123456"
     assert item["active"] is False
     assert item["subscribed"] is True
+    assert item["subscription"] == SUBSCRIBED
 
   @patch("users.operations.validate_password")
   def test_raises_error_on_invalid_password(self, mock_password):
@@ -175,6 +183,65 @@ class TestUpdateUser:
     with pytest.raises(UserNotFoundError):
       update_user("user123", "test@example.com", user_data, mock_repo)
 
+  @patch("users.operations.get_user_by_email")
+  def test_subscribing_sets_index_key(self, mock_get_user):
+    mock_get_user.return_value = Mock(id="user123")
+    mock_repo = Mock()
+    mock_repo.table.update_item = Mock(return_value={"Attributes": {"id": "user123"}})
+
+    update_user("user123", "test@example.com", UserUpdate(subscribed=True), mock_repo)
+
+    kwargs = mock_repo.table.update_item.call_args[1]
+    assert "#subscription = :subscription" in kwargs["UpdateExpression"]
+    assert "REMOVE" not in kwargs["UpdateExpression"]
+    assert kwargs["ExpressionAttributeValues"][":subscription"] == SUBSCRIBED
+
+  @patch("users.operations.get_user_by_email")
+  def test_unsubscribing_removes_index_key(self, mock_get_user):
+    mock_get_user.return_value = Mock(id="user123")
+    mock_repo = Mock()
+    mock_repo.table.update_item = Mock(return_value={"Attributes": {"id": "user123"}})
+
+    update_user("user123", "test@example.com", UserUpdate(subscribed=False), mock_repo)
+
+    kwargs = mock_repo.table.update_item.call_args[1]
+    assert kwargs["UpdateExpression"].endswith(" REMOVE #subscription")
+    assert ":subscription" not in kwargs["ExpressionAttributeValues"]
+
+
+class TestUserFanOutQueries:
+  def test_subscribed_users_query_sparse_index(self, mock_repo):
+    mock_repo.table.query.return_value = {"Items": [{"id": "u1"}, {"id": "u2"}]}
+
+    result = get_subscribed_users(mock_repo)
+
+    assert len(result) == 2
+    mock_repo.table.scan.assert_not_called()
+    assert mock_repo.table.query.call_args[1]["IndexName"] == SUBSCRIPTION_INDEX
+
+  def test_users_by_role_query_role_index(self, mock_repo):
+    mock_repo.table.query.side_effect = [
+      {"Items": [{"id": "u1"}], "LastEvaluatedKey": {"id": "u1"}},
+      {"Items": [{"id": "u2"}]},
+    ]
+
+    result = list_users_by_role("board", mock_repo)
+
+    assert len(result) == 2
+    assert mock_repo.table.query.call_count == 2
+    kwargs = mock_repo.table.query.call_args_list[0][1]
+    assert kwargs["IndexName"] == ROLE_INDEX
+    assert mock_repo.table.query.call_args_list[1][1]["ExclusiveStartKey"] == {"id": "u1"}
+
+  def test_list_users_reads_every_page(self, mock_repo):
+    mock_repo.table.scan.side_effect = [
+      {"Items": [{"id": "u1"}], "LastEvaluatedKey": {"id": "u1"}},
+      {"Items": [{"id": "u2"}]},
+    ]
+
+    assert len(list_users(mock_repo)) == 2
+    assert mock_repo.table.scan.call_count == 2
+
 
 class TestDeleteUser:
   @patch("users.operations.get_user_by_email")
@@ -202,6 +269,114 @@ class TestDeleteUser:
     mock_repo.table.delete_item.assert_not_called()
 
 
+class TestGetUserDisplayNames:
+  def test_resolves_names_with_one_batch_call(self):
+    mock_repo = Mock()
+    mock_repo.batch_get.return_value = {
+      "u1": {"id": "u1", "first_name": "Иван", "last_name": "Иванов"},
+      "u2": {"id": "u2", "first_name": "Мария", "last_name": "Петрова"},
+    }
+
+    result = get_user_display_names({"u1", "u2", "missing"}, mock_repo)
+
+    assert result == {"u1": "Иван Иванов", "u2": "Мария Петрова"}
+    mock_repo.batch_get.assert_called_once()
+
+  def test_returns_empty_map_on_failure(self):
+    mock_repo = Mock()
+    mock_repo.batch_get.side_effect = Exception("DynamoDB down")
+
+    assert get_user_display_names(["u1"], mock_repo) == {}
+
+
+class TestUserDirectory:
+  def _repo(self):
+    mock_repo = Mock()
+    mock_repo.batch_get.return_value = {
+      "u1": {"id": "u1", "first_name": "Иван", "last_name": "Иванов", "role": "board"}
+    }
+    return mock_repo
+
+  def test_warm_lookup_needs_no_reads(self):
+    from users.directory import get_user_directory_stats
+
+    mock_repo = self._repo()
+
+    get_user_display_names(["u1", "ghost"], mock_repo)
+    result = get_user_display_names(["u1", "ghost"], mock_repo)
+
+    assert result == {"u1": "Иван Иванов"}
+    # The unknown ID is cached too, so the second call is served entirely from memory
+    mock_repo.batch_get.assert_called_once()
+    stats = get_user_directory_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+  def test_lookup_returns_role(self):
+    from users.directory import lookup_users
+
+    entries = lookup_users(["u1"], self._repo())
+
+    assert entries["u1"].role == "board"
+    assert entries["u1"].subscribed is False
+
+  @patch("users.operations.get_user_by_email")
+  def test_update_user_invalidates_entry(self, mock_get_user):
+    mock_get_user.return_value = Mock(id="u1")
+    mock_repo = self._repo()
+    mock_repo.table.update_item = Mock(return_value={"Attributes": {"id": "u1"}})
+
+    get_user_display_names(["u1"], mock_repo)
+    update_user("u1", "test@example.com", UserUpdate(first_name="Петър"), mock_repo)
+    get_user_display_names(["u1"], mock_repo)
+
+    assert mock_repo.batch_get.call_count == 2
+
+  @patch("users.operations.get_user_by_email")
+  def test_delete_user_invalidates_entry(self, mock_get_user):
+    mock_get_user.return_value = Mock(id="u1")
+    mock_repo = self._repo()
+
+    get_user_display_names(["u1"], mock_repo)
+    delete_user("test@example.com", mock_repo)
+    mock_repo.batch_get.return_value = {}
+
+    assert get_user_display_names(["u1"], mock_repo) == {}
+
+
+class TestPrincipalInvalidation:
+  @patch("users.operations.invalidate_principal")
+  @patch("users.operations.get_user_by_email")
+  def test_role_change_invalidates_principal(self, mock_get_user, mock_invalidate):
+    mock_get_user.return_value = Mock(id="user123")
+    mock_repo = Mock()
+    mock_repo.table.update_item = Mock(return_value={"Attributes": {"id": "user123"}})
+
+    update_user("user123", "test@example.com", UserUpdate(role="board"), mock_repo)
+
+    mock_invalidate.assert_called_once_with("user123")
+
+  @patch("users.operations.invalidate_principal")
+  @patch("users.operations.get_user_by_email")
+  def test_profile_change_keeps_principal(self, mock_get_user, mock_invalidate):
+    mock_get_user.return_value = Mock(id="user123")
+    mock_repo = Mock()
+    mock_repo.table.update_item = Mock(return_value={"Attributes": {"id": "user123"}})
+
+    update_user("user123", "test@example.com", UserUpdate(phone=None, first_name="Иван"), mock_repo)
+
+    mock_invalidate.assert_not_called()
+
+  @patch("users.operations.invalidate_principal")
+  @patch("users.operations.get_user_by_email")
+  def test_delete_invalidates_principal(self, mock_get_user, mock_invalidate):
+    mock_get_user.return_value = Mock(id="user123")
+
+    delete_user("test@example.com", Mock())
+
+    mock_invalidate.assert_called_once_with("user123")
+
+
 class TestRedactUserNames:
   @patch("users.operations.get_user_by_email")
   def test_redacts_first_and_last_name(self, mock_get_user):
@@ -0,0 +1,65 @@
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Any
+
+from app_config import UserDirectorySettings
+from database.repositories import UserRepository
+from users.models import UserDirectoryEntry
+from utils.cache import TTLCache
+
+# Attributes fetched for a directory entry; everything else on the user item is skipped
+_DIRECTORY_PROJECTION = ["first_name", "last_name", "role", "email", "subscribed"]
+
+
+@lru_cache
+def get_user_directory_settings() -> UserDirectorySettings:
+  """Get user directory cache settings from environment variables."""
+  return UserDirectorySettings()
+
+
+@lru_cache
+def get_user_directory() -> TTLCache:
+  """Process-wide id -> UserDirectoryEntry cache. Unknown IDs are cached as None."""
+  settings = get_user_directory_settings()
+  return TTLCache(maxsize=settings.max_entries, ttl=settings.ttl_seconds)
+
+
+def _to_entry(user_id: str, item: dict[str, Any] | None) -> UserDirectoryEntry | None:
+  if item is None:
+    return None
+  return UserDirectoryEntry(
+    id=user_id,
+    display_name=f"{item.get('first_name', '')} {item.get('last_name', '')}",
+    role=item.get("role"),
+    email=item.get("email"),
+    subscribed=bool(item.get("subscribed", False)),
+  )
+
+
+def lookup_users(user_ids: Iterable[str], repo: UserRepository) -> dict[str, UserDirectoryEntry]:
+  """
+  Resolve user IDs through the directory cache, batch-fetching only the misses.
+
+  Returns entries for users that exist; IDs of missing users are left out.
+  """
+  cache = get_user_directory()
+  found, missing = cache.get_many(uid for uid in user_ids if uid)
+
+  if missing:
+    items = repo.batch_get(missing, projection=_DIRECTORY_PROJECTION)
+    for user_id in missing:
+      entry = _to_entry(user_id, items.get(user_id))
+      cache.set(user_id, entry)
+      found[user_id] = entry
+
+  return {user_id: entry for user_id, entry in found.items() if entry is not None}
+
+
+def invalidate_user(user_id: str) -> None:
+  """Drop a user from the directory cache after a write."""
+  get_user_directory().invalidate(user_id)
+
+
+def get_user_directory_stats() -> dict[str, Any]:
+  """Hit/miss counters and size of the directory cache for this process."""
+  return get_user_directory().stats()
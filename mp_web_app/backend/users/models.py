@@ -1,8 +1,17 @@
 from datetime import datetime
+from enum import StrEnum
 
 from pydantic import BaseModel, EmailStr
 
 
+class NotificationMode(StrEnum):
+  """How a user hears about new and shared documents."""
+
+  IMMEDIATE = "immediate"  # one email per upload batch or share
+  DAILY = "daily"  # collected into one digest per DIGEST_WINDOW_HOURS
+  OFF = "off"
+
+
 class UserBase(BaseModel):
   first_name: str
   last_name: str
@@ -23,6 +32,11 @@ class UserUpdate(BaseModel):
   role: str | None = None
   active: bool | None = None
   subscribed: bool | None = None
+  notification_mode: NotificationMode | None = None
+
+
+class NotificationPreference(BaseModel):
+  notification_mode: NotificationMode
 
 
 class UserUpdatePasswordEmail(BaseModel):
@@ -41,6 +55,7 @@ class User(UserBase):
   created_at: datetime
   updated_at: datetime
   subscribed: bool
+  notification_mode: NotificationMode = NotificationMode.IMMEDIATE
 
 
 class UserSecret(BaseModel):
@@ -51,3 +66,13 @@ class UserSecret(BaseModel):
   active: bool
   salt: str
   password_hash: str
+
+
+class UserDirectoryEntry(BaseModel):
+  """Cached subset of a user used for display-name enrichment and notifications."""
+
+  id: str
+  display_name: str
+  role: str | None = None
+  email: str | None = None
+  subscribed: bool = False
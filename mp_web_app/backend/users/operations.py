@@ -10,12 +10,19 @@ from fastapi import Request
 from pydantic import EmailStr
 
 from database.repositories import UserRepository
+from users.directory import invalidate_user, lookup_users
 from users.exceptions import DatabaseError, UserNotFoundError, ValidationError
 from users.models import User, UserCreate, UserSecret, UserUpdate, UserUpdatePassword
+from users.principals import invalidate_principal
 from users.roles import UserRole
 
 USERS_TABLE_NAME = os.environ.get("USERS_TABLE_NAME")
 
+ROLE_INDEX = "role_index"
+# Sparse GSI: only subscribed users carry the subscription attribute (GSI keys can't be booleans)
+SUBSCRIPTION_INDEX = "subscription_index"
+SUBSCRIBED = "subscribed"
+
 
 def hash_password(password: str, salt: str) -> str:
   from argon2 import PasswordHasher
@@ -119,6 +126,7 @@ def create_user(user_data: UserCreate, request: Request, repo: UserRepository) -
     "salt": salt,
     "password_hash": hashed_password,
     "subscribed": True,
+    "subscription": SUBSCRIBED,
   }
 
   try:
@@ -128,6 +136,8 @@ def create_user(user_data: UserCreate, request: Request, repo: UserRepository) -
   except Exception as e:
     raise DatabaseError(f"An unexpected error occurred while creating the user. {e}")
 
+  # The ID may be cached as unknown if something referenced it before the write
+  invalidate_user(user_item["id"])
   return repo.convert_item_to_object(user_item)
 
 
@@ -157,9 +167,16 @@ def get_user_by_email(email: EmailStr | str, repo: UserRepository, secret: bool
 
 def list_users(repo: UserRepository) -> list[User]:
   """List all users from DynamoDB."""
-  response = repo.table.scan()
+  return [repo.convert_item_to_object(item) for item in repo.iter_scan()]
+
 
-  return [repo.convert_item_to_object(item) for item in response["Items"]]
+def list_users_by_role(role: str, repo: UserRepository) -> list[User]:
+  """Get all users with the given role from the role GSI."""
+  try:
+    items = repo.iter_query(Key("role").eq(role), index_name=ROLE_INDEX)
+    return [repo.convert_item_to_object(item) for item in items]
+  except ClientError as e:
+    raise DatabaseError(f"Database error: {e.response['Error']['Message']}")
 
 
 def update_user(user_id: str, user_email: EmailStr | str, user_data: UserUpdate, repo: UserRepository) -> User:
@@ -219,13 +236,28 @@ def update_user(user_id: str, user_email: EmailStr | str, user_data: UserUpdate,
     expression_attribute_values[":active"] = user_data.active
     expression_attribute_names["#active"] = "active"
 
+  if user_data.notification_mode is not None:
+    update_expression_parts.append("#notification_mode = :notification_mode")
+    expression_attribute_values[":notification_mode"] = user_data.notification_mode.value
+    expression_attribute_names["#notification_mode"] = "notification_mode"
+
+  remove_parts = []
   if user_data.subscribed is not None:
     update_expression_parts.append("#subscribed = :subscribed")
     expression_attribute_values[":subscribed"] = user_data.subscribed
     expression_attribute_names["#subscribed"] = "subscribed"
+    # Keep the sparse subscription GSI in step with the flag
+    expression_attribute_names["#subscription"] = "subscription"
+    if user_data.subscribed:
+      update_expression_parts.append("#subscription = :subscription")
+      expression_attribute_values[":subscription"] = SUBSCRIBED
+    else:
+      remove_parts.append("#subscription")
 
   # Build the update expression
   update_expression = "SET " + ", ".join(update_expression_parts)
+  if remove_parts:
+    update_expression += " REMOVE " + ", ".join(remove_parts)
 
   # Update the item
   response = repo.table.update_item(
@@ -235,6 +267,11 @@ def update_user(user_id: str, user_email: EmailStr | str, user_data: UserUpdate,
     ExpressionAttributeNames=expression_attribute_names,
     ReturnValues="ALL_NEW",
   )
+  # Covers admin edits, activation and the redact endpoints, which all write through here
+  invalidate_user(user_id)
+  if user_data.role is not None or user_data.active is not None:
+    # Authorization depends on these; don't let a cached principal outlive the change
+    invalidate_principal(user_id)
 
   return repo.convert_item_to_object(response["Attributes"])
 
@@ -286,21 +323,30 @@ def delete_user(email: EmailStr, repo: UserRepository) -> None:
     raise UserNotFoundError(email)
 
   repo.table.delete_item(Key={"id": existing_user.id})
+  invalidate_user(existing_user.id)
+  invalidate_principal(existing_user.id)
 
 
-def get_subscribed_users(repo: UserRepository) -> list[User]:
-  """Get all users where subscribed=True."""
+def get_user_display_names(user_ids, repo: UserRepository) -> dict[str, str]:
+  """
+  Resolve user IDs to "First Last" through the user directory cache.
+
+  Cache misses are fetched with BatchGetItem (one call per 100 IDs). Unknown IDs are left
+  out of the result, so callers can fall back to the raw ID. A failed lookup returns an
+  empty map; names are cosmetic and must not break listings.
+  """
   try:
-    response = repo.table.scan(FilterExpression=Key("subscribed").eq(True))
-    users = [repo.convert_item_to_object(item) for item in response["Items"]]
+    entries = lookup_users(user_ids, repo)
+  except Exception as e:
+    print(f"Failed to resolve user names: {e}")
+    return {}
+  return {user_id: entry.display_name for user_id, entry in entries.items()}
 
-    # Handle pagination
-    while "LastEvaluatedKey" in response:
-      response = repo.table.scan(
-        FilterExpression=Key("subscribed").eq(True), ExclusiveStartKey=response["LastEvaluatedKey"]
-      )
-      users.extend([repo.convert_item_to_object(item) for item in response["Items"]])
 
-    return users
+def get_subscribed_users(repo: UserRepository) -> list[User]:
+  """Get all users where subscribed=True from the sparse subscription GSI."""
+  try:
+    items = repo.iter_query(Key("subscription").eq(SUBSCRIBED), index_name=SUBSCRIPTION_INDEX)
+    return [repo.convert_item_to_object(item) for item in items]
   except ClientError as e:
     raise DatabaseError(f"Database error: {e.response['Error']['Message']}")
@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Any
+
+from app_config import PrincipalCacheSettings
+from utils.cache import TTLCache
+
+
+@lru_cache
+def get_principal_cache_settings() -> PrincipalCacheSettings:
+  """Get principal cache settings from environment variables."""
+  return PrincipalCacheSettings()
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache:
+  """Process-wide (user id, token iat) -> User cache used by get_current_user."""
+  settings = get_principal_cache_settings()
+  return TTLCache(maxsize=settings.max_entries, ttl=settings.ttl_seconds)
+
+
+def invalidate_principal(user_id: str) -> int:
+  """Drop every cached principal of a user, whatever token it was resolved for."""
+  return get_principal_cache().invalidate_where(lambda key: key[0] == user_id)
+
+
+def get_principal_cache_stats() -> dict[str, Any]:
+  """Counters of the principal cache for this process; every hit is a user read saved."""
+  stats = get_principal_cache().stats()
+  stats["user_reads_saved"] = stats["hits"]
+  stats["trust_token_claims"] = get_principal_cache_settings().trust_token_claims
+  return stats
@@ -7,8 +7,9 @@ from auth.operations import decode_token, is_token_expired, role_required
 from database.repositories import MemberRepository, UserRepository
 from mail.operations import construct_verification_link, send_verification_email
 from members.operations import get_member_repository, is_member_code_valid, update_member_code
+from users.directory import get_user_directory_stats
 from users.exceptions import DatabaseError, UserNotFoundError, ValidationError
-from users.models import User, UserCreate, UserUpdate, UserUpdatePassword
+from users.models import NotificationPreference, User, UserCreate, UserUpdate, UserUpdatePassword
 from users.operations import (
   create_user,
   delete_user,
@@ -16,9 +17,11 @@ from users.operations import (
   get_user_by_id,
   get_user_repository,
   list_users,
+  list_users_by_role,
   update_user,
   update_user_password,
 )
+from users.principals import get_principal_cache_stats
 from users.roles import UserRole
 
 user_router = APIRouter(tags=["users"])
@@ -30,8 +33,25 @@ async def get_me(current_user: User = Depends(role_required([UserRole.REGULAR_US
   return current_user
 
 
+@user_router.put("/me/notification-mode", response_model=User, status_code=status.HTTP_200_OK)
+def update_my_notification_mode(
+  preference: NotificationPreference,
+  user_repo: UserRepository = Depends(get_user_repository),
+  current_user: User = Depends(role_required([UserRole.REGULAR_USER, UserRole.ACCOUNTANT])),
+):
+  """Choose immediate, daily digest or no emails about new and shared documents."""
+  try:
+    return update_user(
+      current_user.id, current_user.email, UserUpdate(notification_mode=preference.notification_mode), user_repo
+    )
+  except UserNotFoundError as e:
+    raise HTTPException(status_code=404, detail=str(e))
+  except DatabaseError as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+
 @user_router.get("/list", response_model=list[User], status_code=status.HTTP_200_OK)
-async def users_list(
+def users_list(
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.REGULAR_USER, UserRole.ACCOUNTANT])),
 ):
@@ -42,29 +62,27 @@ async def users_list(
 
 
 @user_router.get("/board", response_model=list[User], status_code=status.HTTP_200_OK)
-async def board_members_list(user_repo: UserRepository = Depends(get_user_repository)):
+def board_members_list(user_repo: UserRepository = Depends(get_user_repository)):
   """Public endpoint to get board members."""
   try:
-    all_users = list_users(user_repo)
-    members = [user for user in all_users if user.role == UserRole.BOARD]
+    members = list_users_by_role(UserRole.BOARD.value, user_repo)
     return sorted(members, key=lambda u: (u.first_name.lower(), u.last_name.lower()))
   except DatabaseError as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 
 @user_router.get("/control", response_model=list[User], status_code=status.HTTP_200_OK)
-async def control_members_list(user_repo: UserRepository = Depends(get_user_repository)):
+def control_members_list(user_repo: UserRepository = Depends(get_user_repository)):
   """Public endpoint to get control members."""
   try:
-    all_users = list_users(user_repo)
-    members = [user for user in all_users if user.role == UserRole.CONTROL]
+    members = list_users_by_role(UserRole.CONTROL.value, user_repo)
     return sorted(members, key=lambda u: (u.first_name.lower(), u.last_name.lower()))
   except DatabaseError as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 
 @user_router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def user_register(
+def user_register(
   request: Request,
   user_data: UserCreate,
   user_repo: UserRepository = Depends(get_user_repository),
@@ -108,7 +126,7 @@ async def user_register(
 
 
 @user_router.post("/reset-password")
-async def user_reset_password(user_data: UserUpdatePassword, user_repo: UserRepository = Depends(get_user_repository)):
+def user_reset_password(user_data: UserUpdatePassword, user_repo: UserRepository = Depends(get_user_repository)):
   token = user_data.token
   payload = decode_token(token)
   user_id = payload.get("user_id")
@@ -127,9 +145,7 @@ async def user_reset_password(user_data: UserUpdatePassword, user_repo: UserRepo
 
 
 @user_router.get("/activate-account")
-async def user_activate_account(
-  email: EmailStr | str, token: str, user_repo: UserRepository = Depends(get_user_repository)
-):
+def user_activate_account(email: EmailStr | str, token: str, user_repo: UserRepository = Depends(get_user_repository)):
   payload = decode_token(token)
   user_id = payload.get("user_id")
 
@@ -147,7 +163,7 @@ async def user_activate_account(
 
 
 @user_router.patch("/redact-names/{user_id}", response_model=User, status_code=status.HTTP_200_OK)
-async def user_redact_names(
+def user_redact_names(
   user_id: str,
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.ADMIN])),
@@ -165,7 +181,7 @@ async def user_redact_names(
 
 
 @user_router.patch("/redact-phone/{user_id}", response_model=User, status_code=status.HTTP_200_OK)
-async def user_redact_phone(
+def user_redact_phone(
   user_id: str,
   user_repo: UserRepository = Depends(get_user_repository),
   user=Depends(role_required([UserRole.ADMIN])),
@@ -181,7 +197,7 @@ async def user_redact_phone(
 
 
 @user_router.put("/update/{user_id}", response_model=User, status_code=status.HTTP_200_OK)
-async def user_update(
+def user_update(
   user_id: str,
   user_data: UserUpdate,
   user_repo: UserRepository = Depends(get_user_repository),
@@ -207,7 +223,7 @@ async def user_update(
 
 
 @user_router.delete("/delete/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def user_delete(
+def user_delete(
   user_id: str, user_repo: UserRepository = Depends(get_user_repository), user=Depends(role_required([UserRole.ADMIN]))
 ):
   """Delete a user (ADMIN only)."""
@@ -223,3 +239,15 @@ async def user_delete(
     raise HTTPException(status_code=404, detail=str(e))
   except DatabaseError as e:
     raise HTTPException(status_code=500, detail=str(e))
+
+
+@user_router.get("/directory-stats", status_code=status.HTTP_200_OK)
+def user_directory_stats(user=Depends(role_required([UserRole.ADMIN]))):
+  """Hit/miss counters of this instance's user directory cache (ADMIN only)."""
+  return get_user_directory_stats()
+
+
+@user_router.get("/principal-stats", status_code=status.HTTP_200_OK)
+def user_principal_stats(user=Depends(role_required([UserRole.ADMIN]))):
+  """User reads saved by this instance's authenticated-user cache (ADMIN only)."""
+  return get_principal_cache_stats()
@@ -0,0 +1,144 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+
+import boto3
+from botocore.config import Config
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Process-wide registry of boto3 clients, keyed by (service_name, region_name).
+# Clients are thread-safe and own the urllib3 connection pool, so one instance per
+# service is shared by every request served by this process (warm Lambda or uvicorn worker).
+_clients: dict[tuple[str, str | None], Any] = {}
+_client_stats: dict[tuple[str, str | None], dict[str, Any]] = {}
+_lock = threading.Lock()
+
+# boto3 resources are not thread-safe, so they are cached per thread instead.
+# Each one is still created only once per thread for the lifetime of the process.
+_thread_local = threading.local()
+
+
+class AwsClientSettings(BaseSettings):
+  """Tuning for the shared boto3 clients. Kept here rather than in app_config, which uses this registry at import."""
+
+  model_config = SettingsConfigDict(env_prefix="AWS_CLIENT_")
+
+  max_pool_connections: int = 50
+  connect_timeout: float = 2.0
+  read_timeout: float = 10.0
+  max_attempts: int = 5
+  retry_mode: str = "adaptive"
+  tcp_keepalive: bool = True
+
+
+@lru_cache
+def get_aws_client_settings() -> AwsClientSettings:
+  """Get AWS client tuning settings from environment variables."""
+  return AwsClientSettings()
+
+
+@lru_cache
+def get_botocore_config() -> Config:
+  """Build the shared botocore Config (pool size, keep-alive, retries, timeouts)."""
+  settings = get_aws_client_settings()
+  return Config(
+    max_pool_connections=settings.max_pool_connections,
+    connect_timeout=settings.connect_timeout,
+    read_timeout=settings.read_timeout,
+    tcp_keepalive=settings.tcp_keepalive,
+    retries={"max_attempts": settings.max_attempts, "mode": settings.retry_mode},
+  )
+
+
+def get_client(service_name: str, region_name: str | None = None):
+  """Return the shared boto3 client for a service, creating it on first use."""
+  key = (service_name, region_name)
+  client = _clients.get(key)
+  if client is not None:
+    _client_stats[key]["hits"] += 1
+    return client
+
+  with _lock:
+    # Another thread may have created it while we were waiting for the lock
+    client = _clients.get(key)
+    if client is not None:
+      _client_stats[key]["hits"] += 1
+      return client
+
+    started = time.perf_counter()
+    kwargs: dict[str, Any] = {"config": get_botocore_config()}
+    if region_name:
+      kwargs["region_name"] = region_name
+    client = boto3.client(service_name, **kwargs)
+    _clients[key] = client
+    _client_stats[key] = {
+      "service": service_name,
+      "region": region_name,
+      "created_at": time.time(),
+      "creation_ms": round((time.perf_counter() - started) * 1000, 3),
+      "hits": 0,
+    }
+    return client
+
+
+def get_resource(service_name: str, region_name: str | None = None):
+  """Return a boto3 resource for a service, cached per thread."""
+  resources: dict[tuple[str, str | None], Any] | None = getattr(_thread_local, "resources", None)
+  if resources is None:
+    resources = {}
+    _thread_local.resources = resources
+
+  key = (service_name, region_name)
+  resource = resources.get(key)
+  if resource is None:
+    kwargs: dict[str, Any] = {"config": get_botocore_config()}
+    if region_name:
+      kwargs["region_name"] = region_name
+    resource = boto3.resource(service_name, **kwargs)
+    resources[key] = resource
+  return resource
+
+
+def _connection_pool_stats(client: Any) -> dict[str, int] | None:
+  """Best-effort read of the urllib3 pools behind a client. Returns None if unavailable."""
+  try:
+    manager = client._endpoint.http_session._manager
+    # RecentlyUsedContainer does not support iteration, only keys()
+    pools = [manager.pools[key] for key in manager.pools.keys()]  # noqa: SIM118
+  except Exception:
+    return None
+
+  stats = {"pools": len(pools), "open_connections": 0, "requests": 0}
+  for pool in pools:
+    num_connections = getattr(pool, "num_connections", 0)
+    num_requests = getattr(pool, "num_requests", 0)
+    if isinstance(num_connections, int) and isinstance(num_requests, int):
+      stats["open_connections"] += num_connections
+      stats["requests"] += num_requests
+  return stats
+
+
+def get_pool_stats() -> dict[str, Any]:
+  """Return per-client registry and connection pool statistics."""
+  settings = get_aws_client_settings()
+  with _lock:
+    entries = [(dict(_client_stats[key]), _clients[key]) for key in _clients]
+
+  clients = []
+  for stats, client in entries:
+    stats["connection_pool"] = _connection_pool_stats(client)
+    clients.append(stats)
+
+  return {
+    "max_pool_connections": settings.max_pool_connections,
+    "clients": clients,
+  }
+
+
+def reset_clients() -> None:
+  """Drop all cached clients and this thread's resources (used by tests and benchmarks)."""
+  with _lock:
+    _clients.clear()
+    _client_stats.clear()
+  _thread_local.resources = {}
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+_MISSING = object()
+
+
+class TTLCache:
+  """
+  Thread-safe, size-bounded LRU cache whose entries expire after a fixed TTL.
+
+  Lives at module level so it survives between requests on a warm Lambda or uvicorn
+  worker. Stored values may be None (useful for caching "not found" lookups).
+  """
+
+  def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self._clock = clock
+    self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def _lookup(self, key: Hashable, now: float) -> Any:
+    # Caller holds the lock
+    entry = self._data.get(key)
+    if entry is None:
+      self.misses += 1
+      return _MISSING
+    expires_at, value = entry
+    if expires_at <= now:
+      del self._data[key]
+      self.expirations += 1
+      self.misses += 1
+      return _MISSING
+    self._data.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    with self._lock:
+      value = self._lookup(key, self._clock())
+    return default if value is _MISSING else value
+
+  def get_many(self, keys: Iterable[Hashable]) -> tuple[dict[Hashable, Any], list[Hashable]]:
+    """Return (cached values by key, keys that missed) in one locked pass."""
+    found: dict[Hashable, Any] = {}
+    missing: list[Hashable] = []
+    with self._lock:
+      now = self._clock()
+      for key in dict.fromkeys(keys):
+        value = self._lookup(key, now)
+        if value is _MISSING:
+          missing.append(key)
+        else:
+          found[key] = value
+    return found, missing
+
+  def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+    """Store a value; ttl overrides the cache-wide TTL for this entry."""
+    with self._lock:
+      self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+      self._data.move_to_end(key)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+        self.evictions += 1
+
+  def invalidate(self, key: Hashable) -> None:
+    with self._lock:
+      self._data.pop(key, None)
+
+  def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+    """Drop every entry whose key matches predicate. Returns the number of entries dropped."""
+    with self._lock:
+      keys = [key for key in self._data if predicate(key)]
+      for key in keys:
+        del self._data[key]
+    return len(keys)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._data.clear()
+
+  def __contains__(self, key: Hashable) -> bool:
+    with self._lock:
+      entry = self._data.get(key)
+      return entry is not None and entry[0] > self._clock()
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        "size": len(self._data),
+        "maxsize": self.maxsize,
+        "ttl_seconds": self.ttl,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        "evictions": self.evictions,
+        "expirations": self.expirations,
+      }
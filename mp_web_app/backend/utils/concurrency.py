@@ -0,0 +1,60 @@
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+import anyio.to_thread
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app_config import ConcurrencySettings
+
+T = TypeVar("T")
+
+# Execution model
+# ---------------
+# boto3, argon2 and xhtml2pdf are blocking. Route handlers that use them are declared
+# with plain `def`, so Starlette runs them on the AnyIO worker thread pool and the event
+# loop stays free. Async handlers that must await something (e.g. UploadFile.read())
+# hand their blocking part to run_blocking(). Both share one bounded limiter, sized by
+# BLOCKING_MAX_THREADS, so a burst of slow S3 uploads cannot spawn unbounded threads.
+# Mangum runs with lifespan="off", so ThreadLimiterMiddleware applies the size on the
+# first request an event loop serves rather than at startup.
+
+
+@lru_cache
+def get_concurrency_settings() -> ConcurrencySettings:
+  """Get thread pool settings from environment variables."""
+  return ConcurrencySettings()
+
+
+def configure_thread_limiter(max_threads: int | None = None) -> int:
+  """Resize the default AnyIO thread limiter. Must run inside the event loop."""
+  total = max_threads or get_concurrency_settings().max_threads
+  anyio.to_thread.current_default_thread_limiter().total_tokens = total
+  return total
+
+
+class ThreadLimiterMiddleware:
+  """Size the event loop's thread limiter before its first request is handled."""
+
+  def __init__(self, app: ASGIApp, max_threads: int | None = None):
+    self.app = app
+    self.max_threads = max_threads
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    # The limiter belongs to the running loop, so compare instead of configuring once
+    total = self.max_threads or get_concurrency_settings().max_threads
+    if anyio.to_thread.current_default_thread_limiter().total_tokens != total:
+      configure_thread_limiter(total)
+    await self.app(scope, receive, send)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+  """Run a blocking call on the shared worker pool from an async handler."""
+  return await run_in_threadpool(func, *args, **kwargs)
+
+
+def thread_limiter_stats() -> dict[str, float]:
+  """Borrowed vs total worker threads for the current event loop."""
+  limiter = anyio.to_thread.current_default_thread_limiter()
+  return {"total": limiter.total_tokens, "borrowed": limiter.borrowed_tokens}
@@ -0,0 +1,30 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+# Paginated listings return their items as the body and the cursor of the next page in this
+# header (absent on the last page); clients pass it back as ?cursor=
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+  def __init__(self):
+    super().__init__("Invalid pagination cursor")
+
+
+def encode_cursor(position: dict[str, Any]) -> str:
+  """Opaque, URL-safe cursor for a position in a listing."""
+  raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fields: tuple[str, ...]) -> dict[str, Any]:
+  """Position encoded by encode_cursor. Raises InvalidCursorError unless it holds every field."""
+  try:
+    position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+  except (binascii.Error, UnicodeDecodeError, ValueError):
+    raise InvalidCursorError()
+  if not isinstance(position, dict) or any(field not in position for field in fields):
+    raise InvalidCursorError()
+  return position
@@ -0,0 +1,61 @@
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+  """
+  Batching, memoising key loader scoped to a single request.
+
+  Keys announced with prime() are queued; the next load()/load_many() sends every queued
+  key plus the requested ones to batch_fn in a single call. Results (including "not found")
+  are memoised, so the same key is never fetched twice within the request.
+
+  batch_fn receives a list of unique keys and returns a dict of the values it found.
+  Not thread-safe: create one per request.
+  """
+
+  def __init__(self, batch_fn: Callable[[list[K]], dict[K, V]]) -> None:
+    self._batch_fn = batch_fn
+    self._memo: dict[K, V | None] = {}
+    self._queue: dict[K, None] = {}
+    self.batches = 0
+
+  def prime(self, keys: Iterable[K]) -> None:
+    """Queue keys for the next dispatch without fetching them yet."""
+    for key in keys:
+      if key and key not in self._memo:
+        self._queue[key] = None
+
+  def dispatch(self) -> None:
+    """Fetch every queued key in one batch."""
+    pending = [key for key in self._queue if key not in self._memo]
+    self._queue.clear()
+    if not pending:
+      return
+    found = self._batch_fn(pending)
+    self.batches += 1
+    for key in pending:
+      self._memo[key] = found.get(key)
+
+  def load_many(self, keys: Iterable[K]) -> dict[K, V]:
+    """Return the values found for keys, fetching anything not yet loaded in one batch."""
+    wanted = [key for key in dict.fromkeys(keys) if key]
+    self.prime(wanted)
+    self.dispatch()
+    return {key: self._memo[key] for key in wanted if self._memo.get(key) is not None}
+
+  def load(self, key: K) -> V | None:
+    return self.load_many([key]).get(key)
+
+  def clear(self, key: K | None = None) -> None:
+    """Forget one memoised key (e.g. after writing it) or everything."""
+    if key is None:
+      self._memo.clear()
+    else:
+      self._memo.pop(key, None)
+
+  def stats(self) -> dict[str, Any]:
+    return {"batches": self.batches, "loaded": len(self._memo), "queued": len(self._queue)}
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Literal
+from urllib.parse import quote
+
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from app_config import DownloadSettings
+from utils.aws_clients import get_client
+
+DownloadMode = Literal["redirect", "url", "proxy"]
+
+
+class PresignedDownload(BaseModel):
+  url: str
+  file_name: str
+  expires_in: int
+
+
+@lru_cache
+def get_download_settings() -> DownloadSettings:
+  """Get download delivery settings from environment variables."""
+  return DownloadSettings()
+
+
+def content_disposition(filename: str) -> str:
+  """attachment header with an ASCII fallback and the RFC 5987 UTF-8 name (Cyrillic file names)."""
+  safe_ascii = filename.encode("ascii", errors="replace").decode("ascii")
+  return f"attachment; filename=\"{safe_ascii}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def serve_s3_object(bucket: str, key: str, filename: str, mode: DownloadMode | None = None) -> Response:
+  """
+  Deliver an S3 object the caller has already been authorised to read.
+
+  "redirect" and "url" hand out a short-lived presigned GET URL, so the bytes go straight
+  from S3 to the browser; "proxy" streams them through the API. Raises botocore's
+  ClientError if S3 rejects the request (proxy mode only; presigning is offline).
+  """
+  import mimetypes
+
+  settings = get_download_settings()
+  mode = mode or settings.mode
+  content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+  s3 = get_client("s3")
+
+  if mode == "proxy":
+    s3_object = s3.get_object(Bucket=bucket, Key=key)
+    return StreamingResponse(
+      s3_object["Body"].iter_chunks(chunk_size=65536),
+      media_type=content_type,
+      headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+  url = s3.generate_presigned_url(
+    "get_object",
+    Params={
+      "Bucket": bucket,
+      "Key": key,
+      "ResponseContentDisposition": content_disposition(filename),
+      "ResponseContentType": content_type,
+    },
+    ExpiresIn=settings.url_expires_seconds,
+  )
+  if mode == "redirect":
+    return RedirectResponse(url=url, status_code=302)
+  return JSONResponse(
+    PresignedDownload(url=url, file_name=filename, expires_in=settings.url_expires_seconds).model_dump()
+  )
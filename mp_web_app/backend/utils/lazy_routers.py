@@ -0,0 +1,55 @@
+import threading
+from dataclasses import dataclass
+
+from fastapi import APIRouter, FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class LazyRouter:
+  """A router mounted at prefix, imported from module:attribute on first use."""
+
+  prefix: str
+  module: str
+  attribute: str
+
+  def matches(self, path: str) -> bool:
+    return path == self.prefix or path.startswith(self.prefix + "/")
+
+  def load(self) -> APIRouter:
+    # __import__ rather than importlib.import_module so the import shows up in -X importtime
+    return getattr(__import__(self.module, fromlist=[self.attribute]), self.attribute)
+
+
+class LazyRouterMiddleware:
+  """
+  Import and mount routers the first time a request reaches their prefix.
+
+  A cold Lambda then imports only the package serving the request (plus whatever it
+  depends on) instead of every router. Routing happens after middleware, so the route
+  exists by the time the app looks for it. Requests for the API docs mount everything
+  first so the OpenAPI schema is complete.
+  """
+
+  def __init__(self, app: ASGIApp, fastapi_app: FastAPI, routers: list[LazyRouter], mount_all_paths: set[str]):
+    self.app = app
+    self.fastapi_app = fastapi_app
+    self.pending = list(routers)
+    self.mount_all_paths = mount_all_paths
+    self._lock = threading.Lock()
+
+  def mount(self, routers: list[LazyRouter]) -> None:
+    with self._lock:
+      for router in routers:
+        if router in self.pending:
+          self.fastapi_app.include_router(router.load(), prefix=router.prefix)
+          self.pending.remove(router)
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if self.pending and scope["type"] in ("http", "websocket"):
+      path = scope["path"]
+      if path in self.mount_all_paths:
+        self.mount(list(self.pending))
+      else:
+        self.mount([router for router in self.pending if router.matches(path)])
+    await self.app(scope, receive, send)
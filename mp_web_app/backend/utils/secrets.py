@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from utils.aws_clients import get_client
+
+
+class SecretSettings(BaseSettings):
+  """Where and how often secrets are loaded. Kept out of app_config, which reads secrets through this module."""
+
+  model_config = SettingsConfigDict(env_prefix="SECRETS_")
+
+  # Re-fetch from Secrets Manager after this long so a rotated secret is picked up
+  refresh_seconds: float = 3600.0
+  # JSON file with secret values ({"JWT_SECRET": "..."}) used instead of Secrets Manager, for offline runs
+  local_file: str | None = None
+
+
+@lru_cache
+def get_secret_settings() -> SecretSettings:
+  """Get secret loading settings from environment variables."""
+  return SecretSettings()
+
+
+class SecretProvider:
+  """
+  Lazily loaded, cached secret values.
+
+  Nothing is fetched until the first get(), so importing the app (and serving public
+  endpoints) never waits on Secrets Manager. Values are looked up in this order:
+  an environment variable of the same name, SECRETS_LOCAL_FILE, then the JSON secret
+  at secret_arn. The Secrets Manager payload is cached for SECRETS_REFRESH_SECONDS; if a
+  refresh fails the previous value is kept.
+  """
+
+  def __init__(self, secret_arn: str | None, refresh_seconds: float = 3600.0, local_file: str | None = None) -> None:
+    self.secret_arn = secret_arn
+    self.refresh_seconds = refresh_seconds
+    self.local_file = local_file
+    self._values: dict[str, Any] | None = None
+    self._source: str | None = None
+    self._loaded_at = 0.0
+    self._lock = threading.Lock()
+    self.fetches = 0
+    self.fetch_errors = 0
+    self.first_fetch_ms: float | None = None
+    self.total_fetch_ms = 0.0
+
+  def get(self, key: str) -> str:
+    override = os.environ.get(key)
+    if override:
+      return override
+    values = self._load()
+    if key not in values:
+      raise ValueError(f"{key} not found in secret")
+    return values[key]
+
+  def _load(self) -> dict[str, Any]:
+    values = self._values
+    if values is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+      return values
+
+    with self._lock:
+      # Another thread may have loaded it while we waited
+      if self._values is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+        return self._values
+      started = time.perf_counter()
+      try:
+        self._values, self._source = self._fetch()
+      except Exception as e:
+        self.fetch_errors += 1
+        if self._values is None:
+          raise
+        print(f"Secret refresh failed, keeping the cached value: {e}")
+      else:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.fetches += 1
+        self.total_fetch_ms += elapsed_ms
+        if self.first_fetch_ms is None:
+          self.first_fetch_ms = elapsed_ms
+          print(f"Resolved secrets from {self._source} in {elapsed_ms:.1f} ms")
+      self._loaded_at = time.monotonic()
+      return self._values
+
+  def _fetch(self) -> tuple[dict[str, Any], str]:
+    if self.local_file:
+      return json.loads(Path(self.local_file).read_text(encoding="utf-8")), "file"
+
+    if not self.secret_arn:
+      raise ValueError("No secret source configured: set JWT_SECRET_ARN or SECRETS_LOCAL_FILE")
+    response = get_client("secretsmanager").get_secret_value(SecretId=self.secret_arn)
+    secret = response.get("SecretString")
+    if not secret:
+      raise ValueError("SecretString is empty")
+    return json.loads(secret), "secretsmanager"
+
+  def invalidate(self) -> None:
+    """Force the next get() to fetch again."""
+    with self._lock:
+      self._loaded_at = 0.0
+      self._values = None
+
+  def stats(self) -> dict[str, Any]:
+    return {
+      "source": self._source,
+      "loaded": self._values is not None,
+      "fetches": self.fetches,
+      "fetch_errors": self.fetch_errors,
+      "first_fetch_ms": round(self.first_fetch_ms, 1) if self.first_fetch_ms is not None else None,
+      "total_fetch_ms": round(self.total_fetch_ms, 1),
+      "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._values is not None else None,
+    }
+
+
+@lru_cache
+def get_secret_provider() -> SecretProvider:
+  """Process-wide provider for the application secret (JWT_SECRET_ARN)."""
+  settings = get_secret_settings()
+  return SecretProvider(
+    os.environ.get("JWT_SECRET_ARN"), refresh_seconds=settings.refresh_seconds, local_file=settings.local_file
+  )
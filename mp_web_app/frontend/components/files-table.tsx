@@ -14,6 +14,7 @@ import {
 } from "@/components/ui/pagination";
 import {Search} from "lucide-react";
 import apiClient from "@/context/apiClient";
+import {openPresignedDownload, type PresignedDownload} from "@/lib/downloads";
 import {useFiles, type FileType, type FileMetadata} from "@/hooks/useFiles";
 import {usePagination} from "@/hooks/usePagination";
 import {TABLE_STYLES, COLUMN_WIDTHS, EMPTY_MESSAGES, LOADING_MESSAGES} from "@/lib/tableUtils";
@@ -59,7 +60,7 @@ export function FilesTable({
   const handleDownload = async (file: FileMetadata) => {
     if (!file.id || !file.file_name) return;
     try {
-      const res = await apiClient.post(
+      const res = await apiClient.post<PresignedDownload>(
         `files/download`,
         {
           id: file.id,
@@ -68,30 +69,9 @@ export function FilesTable({
           uploaded_by: file.uploaded_by ?? null,
           created_at: file.created_at ?? null,
         } as FileMetadata,
-        {
-          responseType: "blob",
-          withCredentials: true,
-        }
+        {params: {mode: "url"}}
       );
-
-      const blob = new Blob([res.data], {type: res.headers["content-type"] || "application/octet-stream"});
-      const contentDisposition = res.headers["content-disposition"] as string | undefined;
-      const suggestedName = (() => {
-        if (contentDisposition) {
-          const match = /filename\*?=(?:UTF-8'')?"?([^"]+)"?/i.exec(contentDisposition);
-          if (match && match[1]) return decodeURIComponent(match[1]);
-        }
-        return file.file_name || "download";
-      })();
-
-      const url = window.URL.createObjectURL(blob);
-      const a = document.createElement("a");
-      a.href = url;
-      a.download = suggestedName;
-      document.body.appendChild(a);
-      a.click();
-      a.remove();
-      window.URL.revokeObjectURL(url);
+      openPresignedDownload(res.data);
     } catch (e: unknown) {
       const apiErr = e as {response?: {data?: {detail?: string}}};
       alert(apiErr?.response?.data?.detail ?? "Неуспешно изтегляне.");
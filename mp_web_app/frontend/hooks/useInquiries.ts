@@ -60,33 +60,36 @@ export const inquiryKeys = {
 // Queries
 // ---------------------------------------------------------------------------
 
+// Listings are paginated: the next page's cursor comes back in the X-Next-Cursor header
+async function fetchAllPages(url: string): Promise<Inquiry[]> {
+  const inquiries: Inquiry[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await apiClient.get<Inquiry[]>(url, {params: cursor ? {cursor} : undefined});
+    inquiries.push(...(res.data ?? []));
+    cursor = res.headers["x-next-cursor"] || undefined;
+  } while (cursor);
+  return inquiries;
+}
+
 export function useMyInquiries() {
   return useQuery({
     queryKey: inquiryKeys.mine(),
-    queryFn: async () => {
-      const res = await apiClient.get<Inquiry[]>("inquiries/mine");
-      return res.data ?? [];
-    },
+    queryFn: () => fetchAllPages("inquiries/mine"),
   });
 }
 
 export function useAddressedToMe() {
   return useQuery({
     queryKey: inquiryKeys.addressedToMe(),
-    queryFn: async () => {
-      const res = await apiClient.get<Inquiry[]>("inquiries/addressed-to-me");
-      return res.data ?? [];
-    },
+    queryFn: () => fetchAllPages("inquiries/addressed-to-me"),
   });
 }
 
 export function useAllInquiries() {
   return useQuery({
     queryKey: inquiryKeys.adminAll(),
-    queryFn: async () => {
-      const res = await apiClient.get<Inquiry[]>("inquiries/all");
-      return res.data ?? [];
-    },
+    queryFn: () => fetchAllPages("inquiries/all"),
   });
 }
 
@@ -0,0 +1,31 @@
+import apiClient from "@/context/apiClient";
+
+/** Body of a download endpoint called with ?mode=url */
+export interface PresignedDownload {
+  url: string;
+  file_name: string;
+  expires_in: number;
+}
+
+/**
+ * Starts a browser download from a short-lived presigned S3 URL.
+ *
+ * The URL is navigated to rather than fetched: S3 serves it with its own
+ * Content-Disposition (the original, possibly Cyrillic, file name), and a
+ * credentialed XHR to S3 would be rejected by the bucket's CORS rule.
+ */
+export function openPresignedDownload(download: PresignedDownload): void {
+  const a = document.createElement("a");
+  a.href = download.url;
+  a.download = download.file_name;
+  a.rel = "noopener";
+  document.body.appendChild(a);
+  a.click();
+  a.remove();
+}
+
+/** GETs a download endpoint in url mode and starts the download. */
+export async function downloadFromApi(endpoint: string): Promise<void> {
+  const res = await apiClient.get<PresignedDownload>(endpoint, {params: {mode: "url"}});
+  openPresignedDownload(res.data);
+}
@@ -24,7 +24,7 @@ import {Badge} from "@/components/ui/badge";
 import {Checkbox} from "@/components/ui/checkbox";
 import {Select, SelectContent, SelectItem, SelectTrigger, SelectValue} from "@/components/ui/select";
 import {Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter} from "@/components/ui/dialog";
-import apiClient from "@/context/apiClient";
+import {downloadFromApi} from "@/lib/downloads";
 import {Trash2, Pencil} from "lucide-react";
 
 const SCOPE_BG: Record<string, string> = {
@@ -227,13 +227,7 @@ export default function InquiryDetail() {
 
   const handlePdfExport = async () => {
     try {
-      const res = await apiClient.get(`inquiries/${inquiry.id}/pdf`, {responseType: "blob"});
-      const url = URL.createObjectURL(new Blob([res.data], {type: "application/pdf"}));
-      const a = document.createElement("a");
-      a.href = url;
-      a.download = `inquiry-${inquiry.entry_number ?? inquiry.id}.pdf`;
-      a.click();
-      URL.revokeObjectURL(url);
+      await downloadFromApi(`inquiries/${inquiry.id}/pdf`);
     } catch {
       toast({title: "Грешка", description: "Неуспешно изтегляне на PDF.", variant: "destructive"});
     }
@@ -310,15 +304,7 @@ export default function InquiryDetail() {
                           className="text-primary underline underline-offset-2 hover:text-primary/80 text-left"
                           onClick={async () => {
                             try {
-                              const res = await apiClient.get(`inquiries/${inquiry.id}/files/${fileKey}`, {
-                                responseType: "blob",
-                              });
-                              const url = URL.createObjectURL(new Blob([res.data]));
-                              const a = document.createElement("a");
-                              a.href = url;
-                              a.download = displayName;
-                              a.click();
-                              URL.revokeObjectURL(url);
+                              await downloadFromApi(`inquiries/${inquiry.id}/files/${fileKey}`);
                             } catch (err: any) {
                               const detail =
                                 err?.response?.data?.detail ?? err?.message ?? "Неуспешно изтегляне на файла.";
@@ -373,15 +359,7 @@ export default function InquiryDetail() {
                               className="text-primary underline underline-offset-2 hover:text-primary/80 text-left text-sm"
                               onClick={async () => {
                                 try {
-                                  const res = await apiClient.get(`inquiries/${inquiry.id}/files/${fileKey}`, {
-                                    responseType: "blob",
-                                  });
-                                  const url = URL.createObjectURL(new Blob([res.data]));
-                                  const a = document.createElement("a");
-                                  a.href = url;
-                                  a.download = displayName;
-                                  a.click();
-                                  URL.revokeObjectURL(url);
+                                  await downloadFromApi(`inquiries/${inquiry.id}/files/${fileKey}`);
                                 } catch (err: any) {
                                   const detail =
                                     err?.response?.data?.detail ?? err?.message ?? "Неуспешно изтегляне на файла.";
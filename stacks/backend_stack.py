@@ -9,6 +9,8 @@ from aws_cdk import (
   aws_route53 as route53,
   aws_route53_targets as route53_targets,
   aws_logs as logs,
+  aws_events as events,
+  aws_events_targets as events_targets,
   RemovalPolicy,
   Duration,
   CfnOutput,
@@ -16,6 +18,11 @@ from aws_cdk import (
 from constructs import Construct
 import os
 
+# DynamoDB creates or deletes at most one GSI per table in a stack update. Indexes added
+# to tables that already exist carry the rollout stage that creates them, and an existing
+# stack is brought up to date with one deploy per stage (see stacks/README.md).
+INDEX_STAGES = 3
+
 
 class BackendStack(Stack):
   def __init__(
@@ -35,6 +42,10 @@ class BackendStack(Stack):
   ):
     super().__init__(scope, id, **kwargs)
 
+    # `cdk deploy -c index_stage=N` stops the GSI rollout at stage N. Without it every
+    # index is declared, which only a fresh stack or the last rollout deploy can apply
+    index_stage = int(self.node.try_get_context("index_stage") or INDEX_STAGES)
+
     # Create a randomly generated JWT secret
     self.jwt_secret = secretsmanager.Secret(
       self, "JwtSecret",
@@ -59,6 +70,19 @@ class BackendStack(Stack):
       index_name="email_index",
       partition_key=dynamodb.Attribute(name="email", type=dynamodb.AttributeType.STRING)
     )
+    # Rollout stage 1
+    self.table1.add_global_secondary_index(
+      index_name="role_index",
+      partition_key=dynamodb.Attribute(name="role", type=dynamodb.AttributeType.STRING),
+      projection_type=dynamodb.ProjectionType.ALL,
+    )
+    # Rollout stage 2. Sparse: only subscribed users carry the "subscription" attribute
+    if index_stage >= 2:
+      self.table1.add_global_secondary_index(
+        index_name="subscription_index",
+        partition_key=dynamodb.Attribute(name="subscription", type=dynamodb.AttributeType.STRING),
+        projection_type=dynamodb.ProjectionType.ALL,
+      )
 
     self.table2 = dynamodb.TableV2(
       self, "members_table",
@@ -134,6 +158,106 @@ class BackendStack(Stack):
       billing=dynamodb.Billing.on_demand(),
       removal_policy=RemovalPolicy.RETAIN,
     )
+    # Rollout stage 1
+    self.table8.add_global_secondary_index(
+      index_name="author_created_at_index",
+      partition_key=dynamodb.Attribute(name="author_id", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="created_at", type=dynamodb.AttributeType.STRING),
+      projection_type=dynamodb.ProjectionType.ALL,
+    )
+    # Rollout stage 2. Registry order: entry_sort is the numeric entry number. Every
+    # inquiry carries inquiry = "inquiry", so the admin registry reads one partition
+    if index_stage >= 2:
+      self.table8.add_global_secondary_index(
+        index_name="registry_entry_index",
+        partition_key=dynamodb.Attribute(name="inquiry", type=dynamodb.AttributeType.STRING),
+        sort_key=dynamodb.Attribute(name="entry_sort", type=dynamodb.AttributeType.NUMBER),
+        projection_type=dynamodb.ProjectionType.ALL,
+      )
+    # Rollout stage 3
+    if index_stage >= 3:
+      self.table8.add_global_secondary_index(
+        index_name="status_entry_index",
+        partition_key=dynamodb.Attribute(name="status", type=dynamodb.AttributeType.STRING),
+        sort_key=dynamodb.Attribute(name="entry_sort", type=dynamodb.AttributeType.NUMBER),
+        projection_type=dynamodb.ProjectionType.ALL,
+      )
+
+    # Share index: one row per (recipient, file) mirroring uploads_table.allowed_to
+    self.table9 = dynamodb.TableV2(
+      self, "file_shares_table",
+      table_name="file_shares_table",
+      partition_key=dynamodb.Attribute(name="user_id", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="share_key", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+    )
+    self.table9.add_global_secondary_index(
+      index_name="share_created_at_index",
+      partition_key=dynamodb.Attribute(name="share", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="share_key", type=dynamodb.AttributeType.STRING),
+      projection_type=dynamodb.ProjectionType.ALL,
+    )
+
+    # Label registry: one item per label with an ADD-maintained usage_count
+    self.table10 = dynamodb.TableV2(
+      self, "file_labels_table",
+      table_name="file_labels_table",
+      partition_key=dynamodb.Attribute(name="registry", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="label", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+    )
+
+    # Participant index: one row per (co-author or scope role, inquiry) mirroring inquiries_table
+    self.table11 = dynamodb.TableV2(
+      self, "inquiry_participants_table",
+      table_name="inquiry_participants_table",
+      partition_key=dynamodb.Attribute(name="participant", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="inquiry_key", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+    )
+
+    # Inquiry statistics: one aggregates item with ADD-maintained counters
+    self.table12 = dynamodb.TableV2(
+      self, "inquiry_stats_table",
+      table_name="inquiry_stats_table",
+      partition_key=dynamodb.Attribute(name="stats", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+    )
+
+    # Email outbox: notification jobs queued by the API and sent by the outbox worker.
+    # Jobs still to send carry queue = "pending" (sparse index ordered by available_at);
+    # sent and failed jobs expire through TTL. The stream wakes the worker on new jobs.
+    self.table13 = dynamodb.TableV2(
+      self, "email_outbox_table",
+      table_name="email_outbox_table",
+      partition_key=dynamodb.Attribute(name="job_id", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+      time_to_live_attribute="expires_at",
+      dynamo_stream=dynamodb.StreamViewType.KEYS_ONLY,
+    )
+    self.table13.add_global_secondary_index(
+      index_name="outbox_queue_index",
+      partition_key=dynamodb.Attribute(name="queue", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="available_at", type=dynamodb.AttributeType.NUMBER),
+      projection_type=dynamodb.ProjectionType.ALL,
+    )
+
+    # Notification digests: documents held for users with notification_mode = daily, one
+    # row per document, until the outbox worker's hourly digest run emails and deletes them.
+    self.table14 = dynamodb.TableV2(
+      self, "notification_digest_table",
+      table_name="notification_digest_table",
+      partition_key=dynamodb.Attribute(name="user_id", type=dynamodb.AttributeType.STRING),
+      sort_key=dynamodb.Attribute(name="event_key", type=dynamodb.AttributeType.STRING),
+      billing=dynamodb.Billing.on_demand(),
+      removal_policy=RemovalPolicy.RETAIN,
+      time_to_live_attribute="expires_at",
+    )
 
     # Minimal log group with 1-day retention to cut CloudWatch costs
     lambda_log_group = logs.LogGroup(
@@ -143,47 +267,57 @@ class BackendStack(Stack):
       removal_policy=RemovalPolicy.DESTROY,
     )
 
-    # Lambda function with dependencies bundled directly
+    # Backend code with dependencies bundled directly, shared by the API and the outbox worker
+    backend_code = _lambda.Code.from_asset(
+      os.path.join("mp_web_app", "backend"),
+      bundling={
+        "image": _lambda.Runtime.PYTHON_3_12.bundling_image,
+        "command": [
+          "bash", "-c",
+          # Use pip with platform/implementation flags for native deps
+          "pip install --platform manylinux2014_x86_64 --target=/asset-output --implementation cp --only-binary=:all: --upgrade -r requirements.txt && "
+          "cp -r . /asset-output/"
+        ],
+        "user": "root",
+      },
+    )
+
+    backend_environment = {
+      "FRONTEND_BASE_URL": frontend_base_url,
+      "COOKIE_DOMAIN": cookie_domain,
+      "USERS_TABLE_NAME": self.table1.table_name,
+      "MEMBERS_TABLE_NAME": self.table2.table_name,
+      "REFRESH_TABLE_NAME": self.table3.table_name,
+      "UPLOADS_TABLE_NAME": self.table4.table_name,
+      "NEWS_TABLE_NAME": self.table5.table_name,
+      "MAIL_SENDER": "notifications@murdjovpojar.com",
+      "JWT_SECRET_ARN": self.jwt_secret.secret_arn,
+      "JWT_ALGORITHM": "HS256",
+      "UPLOADS_BUCKET": uploads_bucket_name or "",
+      "GALLERY_TABLE_NAME": self.table6.table_name,
+      "PRODUCTS_TABLE_NAME": self.table7.table_name,
+      "INQUIRIES_TABLE_NAME": self.table8.table_name,
+      "FILE_SHARES_TABLE_NAME": self.table9.table_name,
+      "FILE_LABELS_TABLE_NAME": self.table10.table_name,
+      "INQUIRY_PARTICIPANTS_TABLE_NAME": self.table11.table_name,
+      "INQUIRY_STATS_TABLE_NAME": self.table12.table_name,
+      "EMAIL_OUTBOX_TABLE_NAME": self.table13.table_name,
+      "NOTIFICATION_DIGEST_TABLE_NAME": self.table14.table_name,
+      # CloudFront configuration
+      "USE_CLOUDFRONT": "true" if uploads_cloudfront_domain else "false",
+      "CLOUDFRONT_DOMAIN": uploads_cloudfront_domain or "",
+      "CLOUDFRONT_DISTRIBUTION_ID": uploads_distribution_id or "",
+    }
+
     self.backend_lambda = _lambda.Function(
       self, "BackendLambda",
       runtime=_lambda.Runtime.PYTHON_3_12,
       handler="api.handler",
       log_group=lambda_log_group,
-      code=_lambda.Code.from_asset(
-        os.path.join("mp_web_app", "backend"),
-        bundling={
-          "image": _lambda.Runtime.PYTHON_3_12.bundling_image,
-          "command": [
-            "bash", "-c",
-            # Use pip with platform/implementation flags for native deps
-            "pip install --platform manylinux2014_x86_64 --target=/asset-output --implementation cp --only-binary=:all: --upgrade -r requirements.txt && "
-            "cp -r . /asset-output/"
-          ],
-          "user": "root",
-        },
-      ),
+      code=backend_code,
       timeout=Duration.seconds(30),
       memory_size=1024,
-      environment={
-        "FRONTEND_BASE_URL": frontend_base_url,
-        "COOKIE_DOMAIN": cookie_domain,
-        "USERS_TABLE_NAME": self.table1.table_name,
-        "MEMBERS_TABLE_NAME": self.table2.table_name,
-        "REFRESH_TABLE_NAME": self.table3.table_name,
-        "UPLOADS_TABLE_NAME": self.table4.table_name,
-        "NEWS_TABLE_NAME": self.table5.table_name,
-        "MAIL_SENDER": "notifications@murdjovpojar.com",
-        "JWT_SECRET_ARN": self.jwt_secret.secret_arn,
-        "JWT_ALGORITHM": "HS256",
-        "UPLOADS_BUCKET": uploads_bucket_name or "",
-        "GALLERY_TABLE_NAME": self.table6.table_name,
-        "PRODUCTS_TABLE_NAME": self.table7.table_name,
-        "INQUIRIES_TABLE_NAME": self.table8.table_name,
-        # CloudFront configuration
-        "USE_CLOUDFRONT": "true" if uploads_cloudfront_domain else "false",
-        "CLOUDFRONT_DOMAIN": uploads_cloudfront_domain or "",
-        "CLOUDFRONT_DISTRIBUTION_ID": uploads_distribution_id or "",
-      }
+      environment=backend_environment,
     )
 
     # Give lambda permissions to read the secret
@@ -232,6 +366,12 @@ class BackendStack(Stack):
     self.table6.grant_read_write_data(self.backend_lambda)
     self.table7.grant_read_write_data(self.backend_lambda)
     self.table8.grant_read_write_data(self.backend_lambda)
+    self.table9.grant_read_write_data(self.backend_lambda)
+    self.table10.grant_read_write_data(self.backend_lambda)
+    self.table11.grant_read_write_data(self.backend_lambda)
+    self.table12.grant_read_write_data(self.backend_lambda)
+    self.table13.grant_read_write_data(self.backend_lambda)
+    self.table14.grant_read_write_data(self.backend_lambda)
 
     # Explicitly grant permission to query the Global Secondary Index on the news table
     self.backend_lambda.add_to_role_policy(
@@ -249,10 +389,42 @@ class BackendStack(Stack):
       )
     )
 
+    # Explicitly grant permission to query the role and subscription indexes on the users table
+    self.backend_lambda.add_to_role_policy(
+      iam.PolicyStatement(
+        actions=["dynamodb:Query"],
+        resources=[f"{self.table1.table_arn}/index/*"]
+      )
+    )
+
+    # Explicitly grant permission to query the share audit index
+    self.backend_lambda.add_to_role_policy(
+      iam.PolicyStatement(
+        actions=["dynamodb:Query"],
+        resources=[f"{self.table9.table_arn}/index/*"]
+      )
+    )
+
+    # Explicitly grant permission to query the author and listing indexes on the inquiries table
+    self.backend_lambda.add_to_role_policy(
+      iam.PolicyStatement(
+        actions=["dynamodb:Query"],
+        resources=[f"{self.table8.table_arn}/index/*"]
+      )
+    )
+
+    # Explicitly grant permission to query the queue index on the email outbox table
+    self.backend_lambda.add_to_role_policy(
+      iam.PolicyStatement(
+        actions=["dynamodb:Query"],
+        resources=[f"{self.table13.table_arn}/index/*"]
+      )
+    )
+
     # Grant Lambda access to SES
     self.backend_lambda.add_to_role_policy(
       iam.PolicyStatement(
-        actions=["ses:SendEmail", "ses:SendRawEmail"],
+        actions=["ses:SendEmail", "ses:SendRawEmail", "ses:GetSendQuota"],
         resources=["*"]  # Or restrict to your SES identity ARN
       )
     )
@@ -286,6 +458,64 @@ class BackendStack(Stack):
         )
       )
 
+    # Outbox worker: same code, environment and role as the API, different entry point.
+    # Woken by new outbox jobs on the table stream; the schedule picks up retries whose
+    # backoff has run out and jobs left behind by a worker that timed out.
+    outbox_log_group = logs.LogGroup(
+      self, "OutboxWorkerLogGroup",
+      log_group_name="/aws/lambda/OutboxWorkerLambda",
+      retention=logs.RetentionDays.ONE_DAY,
+      removal_policy=RemovalPolicy.DESTROY,
+    )
+
+    self.outbox_worker_lambda = _lambda.Function(
+      self, "OutboxWorkerLambda",
+      runtime=_lambda.Runtime.PYTHON_3_12,
+      handler="outbox_worker.handler",
+      log_group=outbox_log_group,
+      code=backend_code,
+      role=self.backend_lambda.role,
+      timeout=Duration.minutes(15),
+      # Same as the API: the worker also renders the registry PDF archive
+      memory_size=1024,
+      environment=backend_environment,
+      # One instance at a time: its SES token bucket is per process and refills at the
+      # account's full MaxSendRate. Stream and schedule invocations that arrive while it
+      # runs are throttled and retried, and the running worker drains their jobs anyway.
+      reserved_concurrent_executions=1,
+    )
+
+    self.table13.grant_stream_read(self.outbox_worker_lambda)
+    _lambda.EventSourceMapping(
+      self, "OutboxStreamMapping",
+      target=self.outbox_worker_lambda,
+      event_source_arn=self.table13.table_stream_arn,
+      starting_position=_lambda.StartingPosition.LATEST,
+      batch_size=100,
+      max_batching_window=Duration.seconds(5),
+      retry_attempts=2,
+      # Only new jobs: the worker's own lease and status writes must not wake it again
+      filters=[_lambda.FilterCriteria.filter({"eventName": _lambda.FilterRule.is_equal("INSERT")})],
+    )
+
+    events.Rule(
+      self, "OutboxWorkerSchedule",
+      schedule=events.Schedule.rate(Duration.minutes(5)),
+      targets=[events_targets.LambdaFunction(self.outbox_worker_lambda)],
+    )
+
+    # Hourly digest run: emails each daily-digest user whose oldest buffered document is due
+    events.Rule(
+      self, "NotificationDigestSchedule",
+      schedule=events.Schedule.rate(Duration.hours(1)),
+      targets=[
+        events_targets.LambdaFunction(
+          self.outbox_worker_lambda,
+          event=events.RuleTargetInput.from_object({"task": "digests"}),
+        )
+      ],
+    )
+
     # Outputs
     CfnOutput(self, "ApiUrl", value=self.api.url)
     CfnOutput(self, "Table1Name", value=self.table1.table_name)
@@ -11,7 +11,7 @@ from constructs import Construct
 
 
 class UploadsStack(Stack):
-  def __init__(self, scope: Construct, id: str, **kwargs):
+  def __init__(self, scope: Construct, id: str, allowed_origins: list[str] | None = None, **kwargs):
     super().__init__(scope, id, **kwargs)
 
     # S3 bucket for uploads (gallery images, documents, etc.)
@@ -20,6 +20,16 @@ class UploadsStack(Stack):
       block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
       removal_policy=RemovalPolicy.RETAIN,
       auto_delete_objects=False,
+      # Browsers post documents straight to S3 with presigned POST policies
+      cors=[
+        s3.CorsRule(
+          allowed_methods=[s3.HttpMethods.POST, s3.HttpMethods.GET, s3.HttpMethods.HEAD],
+          allowed_origins=allowed_origins or ["*"],
+          allowed_headers=["*"],
+          exposed_headers=["ETag"],
+          max_age=3000,
+        )
+      ],
     )
 
     # Create CloudFront Origin Access Identity for uploads bucket